@@ -26,16 +26,17 @@ def _(mo):
         Demonstrates:
         - **Perpetual execution** — `Receive Parcel` has no inputs, so it generates tokens
           from nothing.
-        - **Time-based activation** — guards use wall-clock time (`1s` arrivals, `5s`
-          dispatch), so timing is controlled by activation functions, not by sleeping
-          inside transitions.
+        - **Virtual time** — the graph runs on a `VirtualClock`. Guards read the graph's
+          clock (`1s` arrivals, `5s` dispatch) and register the time they become ready with
+          `graph.clock.wake_at`, so when nothing can fire `execute_graph` jumps straight to
+          that time instead of waiting for it. A run is deterministic and takes no longer
+          than its transitions take to fire.
         - **Guard-based selection** — a custom selector that respects activation guards.
         - **Probabilistic behaviour** — each parcel has a 1-in-10 chance of being left
-          behind.
+          behind, drawn from a seeded random generator so every run is the same.
 
-        > Because this is live and time-driven (rather than finite and deterministic), it
-        > uses a **Run** button with a step cap instead of the precompute + scrub slider
-        > used by the other examples.
+        > Because the process never stops on its own, it uses a **Run** button with a step
+        > cap instead of the precompute + scrub slider used by the other examples.
         """
     )
     return
@@ -50,6 +51,7 @@ def _():
     from pydantic import BaseModel
     from rustworkx.visualization import graphviz_draw
 
+    from petritype.core.clock import VirtualClock
     from petritype.core.executable_graph_components import (
         ArgumentEdgeToTransition,
         ExecutableGraphOperations,
@@ -58,10 +60,12 @@ def _():
         ReturnedEdgeFromTransition,
     )
     from petritype.core.rustworkx_graph import RustworkxGraph
+    from petritype.core.transition_selectors import ActivationFunctionCall
     from petritype.plotting.rustworkx_to_graphviz import RustworkxToGraphviz
     from petritype.plotting.simple_graphviz import SimpleGraphvizVisualization
 
     return (
+        ActivationFunctionCall,
         ArgumentEdgeToTransition,
         BaseModel,
         ExecutableGraphOperations,
@@ -71,6 +75,7 @@ def _():
         RustworkxGraph,
         RustworkxToGraphviz,
         SimpleGraphvizVisualization,
+        VirtualClock,
         graphviz_draw,
         io,
         random,
@@ -100,25 +105,30 @@ def _(BaseModel):
 
 
 @app.cell
-def _(Parcel, random, time):
+def _(ActivationFunctionCall, Parcel, random):
     # Mutable timing/counter state shared by the transition and activation functions below.
-    # `receive_parcel()` / `can_receive_parcel()` are called by the engine with no arguments,
-    # so they can't take state as a parameter — they read this module-level dict instead.
+    # `receive_parcel()` / `dispatch_truck()` are called by the engine with their input tokens
+    # only, so they can't take state as a parameter — they read this module-level dict instead,
+    # including the graph's clock. The guards take the graph and read its clock directly.
     # `make_simulation` resets it at the start of each run. Defining the functions at module
     # scope (rather than nested in `make_simulation`) keeps their names clean in the rendered
     # transition labels (e.g. `receive_parcel`, not `make_simulation.<locals>.receive_parcel`).
-    sim_state = {"counter": 0, "last_arrival": 0.0, "last_dispatch": 0.0}
+    sim_state = {"counter": 0, "last_arrival": 0.0, "last_dispatch": 0.0, "clock": None, "rng": random.Random(0)}
 
     def receive_parcel() -> Parcel:
         """Receive a parcel from a delivery truck (timing handled by the guard)."""
         sim_state["counter"] += 1
-        sim_state["last_arrival"] = time.time()
+        sim_state["last_arrival"] = sim_state["clock"].now()
         print(f"📦 Receiving parcel #{sim_state['counter']}...")
         return Parcel(id=sim_state["counter"])
 
-    def can_receive_parcel() -> bool:
+    def can_receive_parcel(graph) -> bool:
         """Guard: only allow receiving a parcel every 1 second."""
-        return time.time() - sim_state["last_arrival"] >= 1.0
+        ready_at = sim_state["last_arrival"] + 1.0
+        if graph.now() < ready_at:
+            graph.clock.wake_at(ready_at)
+            return False
+        return True
 
     def sort_parcel(parcel: Parcel) -> Parcel:
         print(f"  Parcel #{parcel.id} → Sorting...")
@@ -130,10 +140,10 @@ def _(Parcel, random, time):
 
     def dispatch_truck(parcels: list[Parcel]) -> list[Parcel]:
         """Dispatch a truck; each parcel has a 1-in-10 chance of being left behind."""
-        sim_state["last_dispatch"] = time.time()
+        sim_state["last_dispatch"] = sim_state["clock"].now()
         left_behind, dispatched_ids = [], []
         for parcel in parcels:
-            if random.randint(1, 10) == 1:
+            if sim_state["rng"].randint(1, 10) == 1:
                 left_behind.append(parcel)
             else:
                 dispatched_ids.append(parcel.id)
@@ -143,16 +153,20 @@ def _(Parcel, random, time):
             print(f"⏳ Left behind for next truck: {[p.id for p in left_behind]}")
         return left_behind
 
-    def can_dispatch_truck() -> bool:
+    def can_dispatch_truck(graph) -> bool:
         """Guard: only allow truck dispatch every 5 seconds."""
-        return time.time() - sim_state["last_dispatch"] >= 5.0
+        ready_at = sim_state["last_dispatch"] + 5.0
+        if graph.now() < ready_at:
+            graph.clock.wake_at(ready_at)
+            return False
+        return True
 
     def guard_based_selector(graph, enabled):
         """Select the first enabled transition whose guard (if any) is satisfied."""
         for transition in enabled:
             if transition.activation_function is None:
                 return transition
-            if transition.activation_function():
+            if ActivationFunctionCall.result(transition, graph):
                 return transition
         return None
 
@@ -177,10 +191,12 @@ def _(
     Parcel,
     ReturnedEdgeFromTransition,
     RustworkxGraph,
+    VirtualClock,
     can_dispatch_truck,
     can_receive_parcel,
     dispatch_truck,
     guard_based_selector,
+    random,
     receive_parcel,
     sim_state,
     sort_parcel,
@@ -189,11 +205,15 @@ def _(
     def make_simulation():
         """Build a fresh simulation: graph and rustworkx view.
 
-        Resets the shared `sim_state` so each run starts from a clean counter/timers. The
+        Resets the shared `sim_state` so each run starts from a clean counter/timers, a
+        virtual clock at time 0 and a freshly seeded random generator. The
         transition and activation functions are defined at module scope (above) so they show
         up with clean names in the rendered graph.
         """
-        sim_state.update({"counter": 0, "last_arrival": 0.0, "last_dispatch": 0.0})
+        clock = VirtualClock(start=0.0)
+        sim_state.update(
+            {"counter": 0, "last_arrival": 0.0, "last_dispatch": 0.0, "clock": clock, "rng": random.Random(0)}
+        )
 
         nodes_and_edges = [
             FunctionTransitionNode(
@@ -221,6 +241,7 @@ def _(
         ]
         graph = ExecutableGraphOperations.construct_graph(nodes_and_edges)
         graph.transition_selector = guard_based_selector
+        graph.clock = clock
         pydigraph = RustworkxGraph.from_executable_graph(graph)
         return graph, pydigraph
 
@@ -261,8 +282,10 @@ async def _(
             )
         )
     else:
-        # Live loop: unlike the finite examples we do NOT stop on an idle step — an idle
-        # step just means a timing guard isn't ready yet, and the process is perpetual.
+        # Live loop: the process is perpetual, so it is cut off after a fixed number of steps.
+        # When no guard is ready yet, `execute_graph` moves the virtual clock on to the next
+        # time a guard registered with `wake_at`, so every step fires a transition. The
+        # real-time pause below only paces the animation.
         for _i in range(n_steps.value):
             _, _fired = await ExecutableGraphOperations.execute_graph(
                 executable_graph=_graph,
@@ -277,7 +300,13 @@ async def _(
                 method="dot",
             )
             mo.output.replace(
-                mo.vstack([_controls, mo.md(f"**Step {_i}** — fired {_fired}"), half_image(_diagram)])
+                mo.vstack(
+                    [
+                        _controls,
+                        mo.md(f"**Step {_i}** at t = {_graph.now():.0f}s — fired {_fired}"),
+                        half_image(_diagram),
+                    ]
+                )
             )
             time.sleep(0.5)
         mo.output.append(
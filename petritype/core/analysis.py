@@ -0,0 +1,434 @@
+"""Structural analysis of the place/transition structure of a net.
+
+The analyses work on the count abstraction of a net, which forgets the values of tokens and keeps how many tokens
+each place holds:
+
+    abstraction = CountAbstraction(graph)
+    StructuralAnalysis.p_invariants(abstraction)   # [{'Idle': 1, 'Busy': 1}, ...]
+    StructuralAnalysis.potential_deadlocks(abstraction)
+    report = StructuralAnalysis.analyse(graph)      # All of the above plus a coverability tree.
+
+A transition consumes one token per argument edge and, when it takes all the tokens of a place as a list (see
+``ExecutableGraphCheck.argument_takes_all_tokens``), empties the place. Its result goes to exactly one of its output
+places, chosen by type or by its output distribution function, so a transition with several output places becomes
+one abstract transition per output place, named ``<transition>-><place>``. With token copying and no distribution
+function the result may be copied to every output place, which is how it is modelled then. A transition that
+returns a list of tokens is counted as producing one token.
+
+Activation functions are ignored and source transitions are always enabled, so the abstraction can fire everything
+the net can fire, and more. Place capacities are respected. A place that is bounded in the abstraction is bounded in
+the net, and a marking that is dead in the net is covered by a marking reachable in the abstraction; a dead marking
+of the abstraction is a potential deadlock of the net, which guards may or may not rule out.
+"""
+
+import math
+from collections import deque
+from typing import Optional, Sequence, Union
+
+import numpy as np
+from pydantic import BaseModel
+
+from petritype.core.data_structures import PlaceNodeName, TransitionNodeName
+from petritype.core.executable_graph_components import (
+    ArgumentEdgeToTransition, ExecutableGraph, ExecutableGraphCheck, FunctionTransitionNode, ListPlaceNode,
+)
+from petritype.core.rustworkx_graph import RustworkxArgumentEdgeData, RustworkxGraph, RustworkxReturnedEdgeData
+
+
+OMEGA = math.inf  # The token count of a place that can hold arbitrarily many tokens in a coverability tree.
+
+type Marking = dict[PlaceNodeName, Union[int, float]]
+
+
+class CountAbstraction:
+    """The token-count view of a net as pre and post matrices over its places.
+
+    Attributes:
+        place_names: The places, in the order of the columns of the matrices
+        transition_names: The abstract transitions, in the order of the rows of the matrices
+        transition_of: The name of the net transition each abstract transition stands for
+        pre: Tokens consumed from each place, shape (transitions, places)
+        post: Tokens produced into each place, shape (transitions, places)
+        resets: Places emptied by a transition that takes all their tokens, shape (transitions, places)
+        capacity_limits: The largest count of each place at which the transition may still fire, or inf, shape
+            (transitions, places)
+        initial_marking: The token counts of the graph the abstraction was built from
+    """
+
+    def __init__(self, executable_graph: ExecutableGraph):
+        graph = RustworkxGraph.from_executable_graph(executable_graph)
+        places = [graph[index] for index in graph.node_indices() if isinstance(graph[index], ListPlaceNode)]
+        self.place_names: tuple[PlaceNodeName, ...] = tuple(place.name for place in places)
+        place_indices = {name: i for i, name in enumerate(self.place_names)}
+        rows: list[tuple[TransitionNodeName, TransitionNodeName, dict[int, int], set[int], tuple[int, ...]]] = []
+        for node_index in graph.node_indices():
+            transition = graph[node_index]
+            if not isinstance(transition, FunctionTransitionNode):
+                continue
+            consumed: dict[int, int] = {}
+            emptied: set[int] = set()
+            for source, _, data in graph.in_edges(node_index):
+                assert isinstance(data, RustworkxArgumentEdgeData)
+                place = graph[source]
+                edge = ArgumentEdgeToTransition(place.name, transition.name, data.argument)
+                if ExecutableGraphCheck.argument_takes_all_tokens(transition, edge, place):
+                    emptied.add(place_indices[place.name])
+                else:
+                    consumed[place_indices[place.name]] = consumed.get(place_indices[place.name], 0) + 1
+            outputs = tuple(sorted({
+                place_indices[data.target_place_node_name]
+                for _, _, data in graph.out_edges(node_index)
+                if isinstance(data, RustworkxReturnedEdgeData)
+            }))
+            copies = executable_graph.allow_token_copying and transition.output_distribution_function is None
+            if len(outputs) <= 1 or copies:
+                rows.append((transition.name, transition.name, consumed, emptied, outputs))
+            else:
+                for output in outputs:
+                    name = f"{transition.name}->{self.place_names[output]}"
+                    rows.append((name, transition.name, consumed, emptied, (output,)))
+        self.transition_names: tuple[TransitionNodeName, ...] = tuple(row[0] for row in rows)
+        self.transition_of: dict[TransitionNodeName, TransitionNodeName] = {row[0]: row[1] for row in rows}
+        shape = (len(rows), len(places))
+        self.pre = np.zeros(shape, dtype=np.int64)
+        self.post = np.zeros(shape, dtype=np.int64)
+        self.resets = np.zeros(shape, dtype=bool)
+        self.capacity_limits = np.full(shape, np.inf)
+        for row_index, (_, _, consumed, emptied, outputs) in enumerate(rows):
+            for place_index, count in consumed.items():
+                self.pre[row_index, place_index] = count
+            for place_index in emptied:
+                self.resets[row_index, place_index] = True
+            for place_index in outputs:
+                self.post[row_index, place_index] += 1
+                capacity = places[place_index].capacity
+                if capacity is not None and place_index not in emptied:
+                    limit = capacity - self.post[row_index, place_index] + self.pre[row_index, place_index]
+                    self.capacity_limits[row_index, place_index] = limit
+        self.capacities = np.array([np.inf if place.capacity is None else place.capacity for place in places])
+        self.initial_marking = np.array([len(place.tokens) for place in places], dtype=np.int64)
+        # A transition that empties a place still needs a token in it to be enabled.
+        self._required = np.maximum(self.pre, self.resets.astype(np.int64))
+
+    @property
+    def incidence(self) -> np.ndarray:
+        """The change in token counts caused by firing each transition, shape (transitions, places).
+
+        Transitions that empty a place count as consuming one token from it.
+        """
+        return self.post - np.maximum(self.pre, self.resets.astype(np.int64))
+
+    def enabled(self, marking: np.ndarray) -> np.ndarray:
+        """A boolean array, one entry per transition, that is True where the transition can fire in ``marking``."""
+        return np.all(marking >= self._required, axis=1) & np.all(marking <= self.capacity_limits, axis=1)
+
+    def fire(self, marking: np.ndarray, transition_index: int) -> np.ndarray:
+        """The marking after firing a transition that is enabled in ``marking``."""
+        remaining = np.where(self.resets[transition_index], 0, marking - self.pre[transition_index])
+        return remaining + self.post[transition_index]
+
+    def marking_dict(self, marking: Sequence[Union[int, float]]) -> Marking:
+        return {
+            name: count if count == OMEGA else int(count)
+            for name, count in zip(self.place_names, marking)
+        }
+
+
+class DeadMarking(BaseModel):
+    """A marking of the coverability tree in which no transition is enabled.
+
+    Attributes:
+        marking: Token count per place, ``OMEGA`` for places that can hold arbitrarily many tokens
+        trace: The net transitions fired to reach the marking from the initial marking
+    """
+    marking: dict[PlaceNodeName, Union[int, float]]
+    trace: tuple[TransitionNodeName, ...]
+
+
+class CoverabilityResult(BaseModel):
+    """The outcome of a Karp-Miller coverability tree exploration.
+
+    Attributes:
+        complete: Whether the tree was explored in full within ``max_nodes``. If not, the other attributes describe
+            the explored part only: ``place_bounds`` are lower bounds and there may be more dead markings.
+        node_count: Number of distinct markings explored
+        place_bounds: The largest token count of each place, ``OMEGA`` if it is unbounded
+        unbounded_places: The places that can hold arbitrarily many tokens
+        dead_markings: Markings in which no transition is enabled
+    """
+    complete: bool
+    node_count: int
+    place_bounds: dict[PlaceNodeName, Union[int, float]]
+    unbounded_places: tuple[PlaceNodeName, ...]
+    dead_markings: tuple[DeadMarking, ...]
+
+
+class AnalysisReport(BaseModel):
+    """A summary of the structural analyses of a net, see ``StructuralAnalysis.analyse``.
+
+    Attributes:
+        p_invariants: Minimal place weightings whose weighted token count no firing changes
+        t_invariants: Minimal transition firing counts that reproduce the marking they start from
+        uncovered_places: Places that are not part of any P-invariant, so no invariant bounds them
+        potential_deadlocks: Minimal siphons without an initially marked trap, which may run empty
+        coverability: The coverability tree exploration
+    """
+    p_invariants: tuple[dict[PlaceNodeName, int], ...]
+    t_invariants: tuple[dict[TransitionNodeName, int], ...]
+    uncovered_places: tuple[PlaceNodeName, ...]
+    potential_deadlocks: tuple[frozenset[PlaceNodeName], ...]
+    coverability: CoverabilityResult
+
+
+class StructuralAnalysis:
+    """Invariants, siphons, traps and coverability of the count abstraction of a net."""
+
+    def p_invariants(abstraction: CountAbstraction, max_rows: int = 10_000) -> list[dict[PlaceNodeName, int]]:
+        """The minimal-support non-negative integer place weightings ``y`` with ``y . incidence[t] = 0`` for every
+        transition ``t``: the weighted token count of the places is the same in every reachable marking.
+
+        Computed exactly with the Farkas algorithm. Raises a RuntimeError if an intermediate step has more than
+        ``max_rows`` candidate invariants.
+        """
+        incidence = abstraction.incidence.T.tolist()  # One row per place.
+        return [
+            {abstraction.place_names[i]: weight for i, weight in enumerate(invariant) if weight}
+            for invariant in _farkas(incidence, max_rows)
+        ]
+
+    def t_invariants(abstraction: CountAbstraction, max_rows: int = 10_000) -> list[dict[TransitionNodeName, int]]:
+        """The minimal-support non-negative integer firing counts ``x`` with ``incidence.T . x = 0``: firing every
+        transition ``t`` ``x[t]`` times, in an order in which they are enabled, returns to the starting marking.
+
+        Computed exactly with the Farkas algorithm. Raises a RuntimeError if an intermediate step has more than
+        ``max_rows`` candidate invariants.
+        """
+        incidence = abstraction.incidence.tolist()  # One row per transition.
+        return [
+            {abstraction.transition_names[i]: count for i, count in enumerate(invariant) if count}
+            for invariant in _farkas(incidence, max_rows)
+        ]
+
+    def minimal_siphons(abstraction: CountAbstraction, limit: int = 100_000) -> list[frozenset[PlaceNodeName]]:
+        """The minimal sets of places such that every transition producing into the set consumes from it.
+
+        Once a siphon is empty it stays empty, and the transitions consuming from it are dead. Raises a
+        RuntimeError if the search visits more than ``limit`` candidate sets.
+        """
+        inputs, outputs = _place_sets(abstraction)
+        producers = [set() for _ in abstraction.place_names]
+        for transition_index, places in enumerate(outputs):
+            for place_index in places:
+                producers[place_index].add(transition_index)
+        return _named(abstraction, _minimal_closed_sets(producers, inputs, limit))
+
+    def minimal_traps(abstraction: CountAbstraction, limit: int = 100_000) -> list[frozenset[PlaceNodeName]]:
+        """The minimal sets of places such that every transition consuming from the set produces into it.
+
+        Once a trap holds a token it always does. Raises a RuntimeError if the search visits more than ``limit``
+        candidate sets.
+        """
+        inputs, outputs = _place_sets(abstraction)
+        consumers = [set() for _ in abstraction.place_names]
+        for transition_index, places in enumerate(inputs):
+            for place_index in places:
+                consumers[place_index].add(transition_index)
+        return _named(abstraction, _minimal_closed_sets(consumers, outputs, limit))
+
+    def maximal_trap(abstraction: CountAbstraction, places: frozenset[PlaceNodeName]) -> frozenset[PlaceNodeName]:
+        """The largest trap contained in ``places``, which is empty if there is none."""
+        inputs, outputs = _place_sets(abstraction)
+        place_indices = {name: i for i, name in enumerate(abstraction.place_names)}
+        trap = {place_indices[name] for name in places}
+        changed = True
+        while changed:
+            changed = False
+            for transition_index, consumed in enumerate(inputs):
+                if consumed & trap and not outputs[transition_index] & trap:
+                    trap -= consumed
+                    changed = True
+        return frozenset(abstraction.place_names[i] for i in trap)
+
+    def potential_deadlocks(abstraction: CountAbstraction, limit: int = 100_000) -> list[frozenset[PlaceNodeName]]:
+        """The minimal siphons that do not contain a trap holding a token in the initial marking.
+
+        Such a siphon may be emptied, after which the transitions consuming from it can never fire again. A net in
+        which every siphon contains an initially marked trap never deadlocks (for free-choice nets this is also
+        necessary, by Commoner's theorem).
+        """
+        marked = {
+            name for name, count in zip(abstraction.place_names, abstraction.initial_marking.tolist()) if count > 0
+        }
+        return [
+            siphon for siphon in StructuralAnalysis.minimal_siphons(abstraction, limit)
+            if not StructuralAnalysis.maximal_trap(abstraction, siphon) & marked
+        ]
+
+    def coverability(abstraction: CountAbstraction, max_nodes: int = 10_000) -> CoverabilityResult:
+        """Explore the Karp-Miller coverability tree from the initial marking, breadth first.
+
+        When a marking strictly covers one of its ancestors, the firing sequence from the ancestor can be repeated
+        forever, so the places that grew are set to ``OMEGA``. Markings that were already explored are not expanded
+        again. The exploration stops after ``max_nodes`` distinct markings. Places with a capacity are never
+        accelerated, and with list-mode arguments (which empty places) an ``OMEGA`` may be an over-estimate.
+        """
+        accelerable = np.isinf(abstraction.capacities)
+        initial = tuple(float(count) for count in abstraction.initial_marking.tolist())
+        parents: dict[tuple[float, ...], Optional[tuple[tuple[float, ...], int]]] = {initial: None}
+        queue = deque([initial])
+        bounds = np.array(initial, dtype=float)
+        dead: list[DeadMarking] = []
+        complete = True
+        while queue:
+            marking = queue.popleft()
+            current = np.array(marking, dtype=float)
+            enabled = np.flatnonzero(abstraction.enabled(current))
+            if len(enabled) == 0:
+                dead.append(DeadMarking(
+                    marking=abstraction.marking_dict(marking), trace=_trace(abstraction, parents, marking),
+                ))
+            for transition_index in enabled.tolist():
+                successor = abstraction.fire(current, transition_index).astype(float)
+                ancestor = marking
+                while ancestor is not None:
+                    previous = np.array(ancestor, dtype=float)
+                    if np.all(previous <= successor):
+                        successor[(previous < successor) & accelerable] = OMEGA
+                    parent = parents[ancestor]
+                    ancestor = None if parent is None else parent[0]
+                key = tuple(successor.tolist())
+                if key in parents:
+                    continue
+                if len(parents) >= max_nodes:
+                    complete = False
+                    queue.clear()
+                    break
+                parents[key] = (marking, transition_index)
+                np.maximum(bounds, successor, out=bounds)
+                queue.append(key)
+        place_bounds = abstraction.marking_dict(bounds.tolist())
+        return CoverabilityResult(
+            complete=complete,
+            node_count=len(parents),
+            place_bounds=place_bounds,
+            unbounded_places=tuple(name for name, bound in place_bounds.items() if bound == OMEGA),
+            dead_markings=tuple(dead),
+        )
+
+    def analyse(executable_graph: ExecutableGraph, max_nodes: int = 10_000) -> AnalysisReport:
+        """Run every analysis on the count abstraction of the net."""
+        abstraction = CountAbstraction(executable_graph)
+        p_invariants = StructuralAnalysis.p_invariants(abstraction)
+        covered = {name for invariant in p_invariants for name in invariant}
+        return AnalysisReport(
+            p_invariants=tuple(p_invariants),
+            t_invariants=tuple(StructuralAnalysis.t_invariants(abstraction)),
+            uncovered_places=tuple(name for name in abstraction.place_names if name not in covered),
+            potential_deadlocks=tuple(StructuralAnalysis.potential_deadlocks(abstraction)),
+            coverability=StructuralAnalysis.coverability(abstraction, max_nodes),
+        )
+
+
+def _farkas(matrix: list[list[int]], max_rows: int) -> list[tuple[int, ...]]:
+    """The minimal-support non-negative integer vectors ``y`` with ``y . matrix = 0``."""
+    row_count = len(matrix)
+    column_count = len(matrix[0]) if row_count else 0
+    rows = [
+        (tuple(matrix[i]), tuple(1 if j == i else 0 for j in range(row_count)))
+        for i in range(row_count)
+    ]
+    for column in range(column_count):
+        combined = [row for row in rows if row[0][column] == 0]
+        positive = [row for row in rows if row[0][column] > 0]
+        negative = [row for row in rows if row[0][column] < 0]
+        for values_p, weights_p in positive:
+            for values_n, weights_n in negative:
+                factor_p, factor_n = -values_n[column], values_p[column]
+                values = tuple(factor_p * a + factor_n * b for a, b in zip(values_p, values_n))
+                weights = tuple(factor_p * a + factor_n * b for a, b in zip(weights_p, weights_n))
+                divisor = math.gcd(*values, *weights)
+                combined.append((
+                    tuple(value // divisor for value in values), tuple(weight // divisor for weight in weights),
+                ))
+        rows = _minimal_support_rows(combined)
+        if len(rows) > max_rows:
+            raise RuntimeError(f"The Farkas algorithm produced more than {max_rows} candidate invariants.")
+    return sorted(weights for _, weights in rows)
+
+
+def _minimal_support_rows(
+    rows: list[tuple[tuple[int, ...], tuple[int, ...]]],
+) -> list[tuple[tuple[int, ...], tuple[int, ...]]]:
+    supports = [frozenset(i for i, weight in enumerate(weights) if weight) for _, weights in rows]
+    kept, kept_supports = [], set()
+    for row, support in sorted(zip(rows, supports), key=lambda pair: len(pair[1])):
+        if support in kept_supports or any(other < support for other in kept_supports):
+            continue
+        kept.append(row)
+        kept_supports.add(support)
+    return kept
+
+
+def _place_sets(abstraction: CountAbstraction) -> tuple[list[set[int]], list[set[int]]]:
+    """The input and output place indices of each transition."""
+    consumes = (abstraction.pre > 0) | abstraction.resets
+    produces = abstraction.post > 0
+    return (
+        [set(np.flatnonzero(row).tolist()) for row in consumes],
+        [set(np.flatnonzero(row).tolist()) for row in produces],
+    )
+
+
+def _minimal_closed_sets(
+    transitions_of_place: list[set[int]], places_of_transition: list[set[int]], limit: int,
+) -> list[frozenset[int]]:
+    """The minimal non-empty place sets ``S`` in which every transition of every place has a place in ``S``.
+
+    With the producers of each place and the inputs of each transition these are the minimal siphons, with the
+    consumers and the outputs the minimal traps. Each set is grown from a single place by adding, for a transition
+    that violates the condition, each of its places in turn, which reaches every minimal set containing the place.
+    """
+    found: list[frozenset[int]] = []
+    visited: set[frozenset[int]] = set()
+    stack = [frozenset({place_index}) for place_index in range(len(transitions_of_place))]
+    while stack:
+        candidate = stack.pop()
+        if candidate in visited or any(other <= candidate for other in found):
+            continue
+        visited.add(candidate)
+        if len(visited) > limit:
+            raise RuntimeError(f"The search for minimal place sets visited more than {limit} candidates.")
+        violating = next(
+            (
+                transition_index
+                for place_index in candidate
+                for transition_index in transitions_of_place[place_index]
+                if not places_of_transition[transition_index] & candidate
+            ),
+            None,
+        )
+        if violating is None:
+            found = [other for other in found if not candidate < other]
+            found.append(candidate)
+        else:
+            stack.extend(candidate | {place_index} for place_index in places_of_transition[violating])
+    return found
+
+
+def _named(abstraction: CountAbstraction, place_sets: list[frozenset[int]]) -> list[frozenset[PlaceNodeName]]:
+    named = [frozenset(abstraction.place_names[i] for i in place_set) for place_set in place_sets]
+    return sorted(named, key=lambda place_set: (len(place_set), sorted(place_set)))
+
+
+def _trace(
+    abstraction: CountAbstraction,
+    parents: dict[tuple[float, ...], Optional[tuple[tuple[float, ...], int]]],
+    marking: tuple[float, ...],
+) -> tuple[TransitionNodeName, ...]:
+    trace = []
+    parent = parents[marking]
+    while parent is not None:
+        marking, transition_index = parent
+        trace.append(abstraction.transition_of[abstraction.transition_names[transition_index]])
+        parent = parents[marking]
+    return tuple(reversed(trace))
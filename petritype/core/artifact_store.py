@@ -0,0 +1,135 @@
+"""A content-addressed store of transition results on disk.
+
+An ``ArtifactStore`` is a ``TransitionCache`` without a memory layer, keyed by the source code of the function and
+its input tokens. Attached to the expensive transitions of a net, it lets a net that is re-run after a crash or a
+restart skip every step whose code and inputs have not changed:
+
+    store = ArtifactStore('artifacts/')
+    FunctionTransitionNode('FineTune', fine_tune, cache=store)
+
+The key is a blake2b digest of the function's source (its compiled code where the source is unavailable) and the
+pickled argument tokens and ``kwargs``, with set members in a canonical order so that a re-run in a process with
+another hash seed finds the same keys. Unlike ``TransitionCache`` the key does not depend on where the function is
+defined, so moving a function to another module keeps its artifacts, while any edit to its source, even to a
+comment, invalidates them. The arguments of a ``functools.partial`` and the state of a callable object or of the
+instance of a bound method are part of the key, as in ``TransitionCache``.
+
+numpy arrays are stored as ``.npy`` files and read back memory-mapped and read-only, so a hit on a large array costs
+no copy until it is used, and the stored artifact cannot be modified through it. Other results are pickled. An
+artifact is written to a temporary file first and then moved into place with ``IOHelper.safe_move_file``, which
+never replaces an existing file: two processes storing the same artifact at once both succeed, and a crash leaves at
+most a stray temporary file, never a partial artifact.
+"""
+
+import inspect
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from types import FunctionType
+from typing import Any, Callable, Optional, Union
+
+import numpy as np
+
+from petritype.core.transition_cache import CacheStats, TransitionCache, callable_fingerprint, code_description
+from petritype.helpers.io.io_helper import IOHelper
+
+
+_PICKLE_PROTOCOL = 5
+
+
+class ArtifactStore(TransitionCache):
+    """Transition results stored on disk under the hash of the function's source and its inputs.
+
+    Args:
+        directory: Root directory of the store; created if it does not exist.
+        memory_map_arrays: Read numpy array artifacts memory-mapped rather than into memory.
+    """
+
+    def __init__(self, directory: Union[str, Path], memory_map_arrays: bool = True):
+        super().__init__(max_entries=None, directory=directory)
+        self.memory_map_arrays = memory_map_arrays
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _function_fingerprint(self, function: Callable) -> Optional[bytes]:
+        return source_fingerprint(function)
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        path = self.path_of(key)
+        if path is None:
+            return False, None
+        try:
+            if path.suffix == ".npy":
+                result = np.load(path, mmap_mode="r" if self.memory_map_arrays else None, allow_pickle=False)
+            else:
+                with open(path, "rb") as file:
+                    result = pickle.load(file)
+        except (OSError, ValueError, pickle.UnpicklingError, EOFError):
+            return False, None
+        self._hits += 1
+        self._disk_hits += 1
+        return True, result
+
+    def put(self, key: str, result: Any) -> None:
+        is_array = isinstance(result, np.ndarray) and not result.dtype.hasobject
+        destination = self._artifact_path(key, ".npy" if is_array else ".pkl")
+        if destination.exists():
+            return
+        temporary_directory = self.directory / "tmp"
+        temporary_directory.mkdir(exist_ok=True)
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=temporary_directory, suffix=".tmp")
+        try:
+            with os.fdopen(file_descriptor, "wb") as file:
+                if is_array:
+                    np.save(file, result, allow_pickle=False)
+                else:
+                    pickle.dump(result, file, protocol=_PICKLE_PROTOCOL)
+        except Exception:
+            Path(temporary_path).unlink(missing_ok=True)
+            self._uncacheable += 1
+            return
+        try:
+            IOHelper.safe_move_file(temporary_path, str(destination))
+        except FileExistsError:
+            Path(temporary_path).unlink(missing_ok=True)  # Stored concurrently with the same content.
+
+    def path_of(self, key: str) -> Optional[Path]:
+        """The file holding the artifact with the given key, or None if it has not been stored."""
+        for suffix in (".npy", ".pkl"):
+            path = self._artifact_path(key, suffix)
+            if path.exists():
+                return path
+        return None
+
+    def clear(self, disk: bool = True) -> None:
+        """Delete every artifact. An artifact store has no memory layer, so ``disk=False`` does nothing."""
+        if disk:
+            for path in self._artifact_paths():
+                path.unlink(missing_ok=True)
+
+    def stats(self) -> CacheStats:
+        """Counters of this process; ``entries`` and ``bytes`` describe the artifacts on disk."""
+        paths = self._artifact_paths()
+        return CacheStats(
+            hits=self._hits, disk_hits=self._disk_hits, misses=self._misses, uncacheable=self._uncacheable,
+            evictions=0, expirations=0, entries=len(paths), bytes=sum(path.stat().st_size for path in paths),
+        )
+
+    def _artifact_path(self, key: str, suffix: str) -> Path:
+        return self.directory / key[:2] / f"{key}{suffix}"
+
+    def _artifact_paths(self) -> list[Path]:
+        return [*self.directory.glob("*/*.npy"), *self.directory.glob("*/*.pkl")]
+
+
+def source_fingerprint(function: Callable) -> Optional[bytes]:
+    """The source code of ``function``, or its compiled code if the source is not available, with its bound state,
+    as bytes. See ``callable_fingerprint``."""
+    return callable_fingerprint(function, _source_of)
+
+
+def _source_of(function: FunctionType) -> bytes:
+    try:
+        return inspect.getsource(function).encode()
+    except (OSError, TypeError):
+        return code_description(function)
@@ -0,0 +1,87 @@
+"""Clocks that the executor and time-based guards read the current time from.
+
+A graph without a ``clock`` uses ``time.time()`` and ``execute_graph`` stops as soon as nothing can fire, as it
+always has. Giving the graph a clock makes execution time-aware. When nothing can fire, ``execute_graph`` sleeps on
+the clock until the next deadline: the next ``TimeWindow`` start of a guard, or a time registered with
+``clock.wake_at``. It then tries again. A ``SystemClock`` sleeps in real time. A ``VirtualClock`` jumps straight to
+the deadline, so a simulated day of traffic runs as fast as its transitions can fire:
+
+    graph.clock = VirtualClock(start=0.0)
+    await ExecutableGraphOperations.execute_graph(graph, max_transitions=None, until=24 * 3600)
+
+Activation functions that compute with the time should take the graph as their argument and read ``graph.now()``.
+If they are waiting for a time to come, they should tell the clock with ``graph.clock.wake_at(deadline)``:
+
+    def can_receive_parcel(graph: ExecutableGraph) -> bool:
+        ready_at = state['last_arrival'] + 1.0
+        if graph.now() < ready_at:
+            graph.clock.wake_at(ready_at)
+            return False
+        return True
+"""
+
+import asyncio
+import heapq
+import time
+from abc import ABC, abstractmethod
+from typing import Optional
+
+
+class Clock(ABC):
+    """The time source of a graph, with the deadlines at which execution should be resumed."""
+
+    def __init__(self):
+        self._wakeups: list[float] = []
+
+    @abstractmethod
+    def now(self) -> float:
+        """The current time in seconds."""
+
+    @abstractmethod
+    async def sleep_until(self, deadline: float) -> None:
+        """Return once the clock has reached ``deadline``."""
+
+    def wake_at(self, deadline: float) -> None:
+        """Ask ``execute_graph`` to try again at ``deadline`` if nothing can fire before then."""
+        if deadline > self.now() and deadline not in self._wakeups:
+            heapq.heappush(self._wakeups, deadline)
+
+    def next_wakeup(self) -> Optional[float]:
+        """The earliest deadline registered with ``wake_at`` that lies in the future, or None."""
+        now = self.now()
+        while self._wakeups and self._wakeups[0] <= now:
+            heapq.heappop(self._wakeups)
+        return self._wakeups[0] if self._wakeups else None
+
+
+class SystemClock(Clock):
+    """Wall-clock time in seconds since the epoch; sleeping waits in real time."""
+
+    def now(self) -> float:
+        return time.time()
+
+    async def sleep_until(self, deadline: float) -> None:
+        await asyncio.sleep(max(0.0, deadline - time.time()))
+
+
+class VirtualClock(Clock):
+    """Simulated time that only moves when it is advanced or slept on; sleeping jumps to the deadline at once."""
+
+    def __init__(self, start: float = 0.0):
+        super().__init__()
+        self._now = float(start)
+
+    def now(self) -> float:
+        return self._now
+
+    def advance_to(self, moment: float) -> None:
+        if moment < self._now:
+            raise ValueError(f"Cannot move a virtual clock back from {self._now} to {moment}.")
+        self._now = float(moment)
+
+    def advance(self, seconds: float) -> None:
+        self.advance_to(self._now + seconds)
+
+    async def sleep_until(self, deadline: float) -> None:
+        self.advance_to(max(deadline, self._now))
+        await asyncio.sleep(0)  # Let other tasks see the new time.
@@ -1,12 +1,22 @@
+import asyncio
+from collections import OrderedDict, deque
 from copy import deepcopy
 from typing import _GenericAlias, _UnionGenericAlias, TypeAliasType
 from types import GenericAlias
-from typing import Callable, Iterable, Optional, Sequence, Type, Union, Any, get_type_hints, get_origin, get_args
-from pydantic import BaseModel, model_validator
+from typing import Callable, Iterable, Literal, Optional, Sequence, Type, Union, Any, get_origin, get_args
+from pydantic import BaseModel, InstanceOf, PrivateAttr, model_validator
 import inspect
-
-from petritype.core.data_structures import ArgumentName, FunctionName, KwArgs, PlaceNodeName, ReturnIndex
-from petritype.core.type_comparisons import CompareTypes
+import math
+import threading
+import time
+import warnings
+
+from petritype.core.data_structures import (
+    ArgumentName, FunctionName, KwArgs, PlaceNodeName, ReturnIndex, TransitionNodeName,
+)
+from petritype.core.clock import Clock
+from petritype.core.transition_cache import TransitionCache
+from petritype.core.type_comparisons import CompareTypes, TypeHints
 from petritype.helpers.structures import SafeMerge
 
 
@@ -32,11 +42,100 @@ class PositionalArgsBaseModel(BaseModel):
     }
 
 
+class TokenStream:
+    """Async iterator over the tokens added to a streaming place, in the order they are produced.
+
+    Obtained with ``ExecutableGraph.stream``. Iteration ends once the stream has been closed (``close`` or
+    ``ExecutableGraph.close_streams``) and every token delivered before that has been consumed. A consumer that stops
+    iterating early should call ``close`` so tokens stop being buffered for it.
+
+    With a ``maxsize`` the stream buffers at most that many tokens; the rest stay in the place until the consumer
+    catches up, where the place's ``capacity`` (if any) holds back the transitions producing into it.
+    """
+
+    def __init__(
+        self, place: "ListPlaceNode", maxsize: Optional[int] = None, on_room: Optional[Callable[[], None]] = None,
+    ):
+        if maxsize is not None and maxsize < 1:
+            raise ValueError(f"maxsize of a stream must be at least 1, got {maxsize}.")
+        self._place = place
+        self._buffer: deque = deque()
+        self._waiter: Optional[asyncio.Future] = None
+        self._on_room = on_room
+        self.maxsize = maxsize
+        self.closed = False
+
+    def room(self) -> Union[int, float]:
+        """How many more tokens the stream can buffer (``inf`` without a ``maxsize``)."""
+        return math.inf if self.maxsize is None else self.maxsize - len(self._buffer)
+
+    def push(self, tokens: Iterable[Any]) -> None:
+        self._buffer.extend(tokens)
+        self._wake()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        # Tokens held back in the place were produced before the close, so the consumer still receives them.
+        self._buffer.extend(self._place.tokens)
+        self._place.remove_stream(self)
+        if not self._place.has_open_streams():
+            self._place.tokens = []
+        self._wake()
+        self._place.hand_off_tokens()
+        self._place.notify_room_available()  # Wakes an ``execute_graph`` waiting on this consumer.
+        if self._on_room is not None:
+            self._on_room()
+
+    def _wake(self) -> None:
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    def __aiter__(self) -> "TokenStream":
+        return self
+
+    async def __anext__(self) -> Any:
+        while not self._buffer:
+            if self.closed:
+                raise StopAsyncIteration
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        token = self._buffer.popleft()
+        if self._place.tokens and self._place.hand_off_tokens() and self._on_room is not None:
+            self._on_room()
+        return token
+
+
 class ListPlaceNode(PositionalArgsBaseModel):
+    """A place that holds its tokens in a list.
+
+    Attributes:
+        name: Unique identifier for the place
+        type: The type every token in the place must match
+        tokens: The tokens currently held by the place
+        capacity: Optional maximum number of tokens. A transition that would add a token to a full place is not
+            enabled, so upstream transitions wait for downstream ones to drain the place. The check assumes one
+            token per output place, so a transition returning a list can overshoot; producers then stay disabled
+            until the place has drained below capacity. Async producers outside the net can wait for room with
+            ``ExecutableGraphOperations.add_token_when_room_available``.
+        streaming: If True the place is a sink whose tokens are handed to the consumers iterating over
+            ``ExecutableGraph.stream`` as soon as they are produced, instead of accumulating in ``tokens``. Tokens
+            produced while nobody is subscribed are kept in ``tokens`` and delivered to the first subscriber, and so
+            are tokens that a stream with a full ``maxsize`` cannot take yet. ``capacity`` counts only those tokens,
+            so together with a ``maxsize`` it bounds how far the net runs ahead of a slow consumer.
+    """
     name: PlaceNodeName
     type: Any  # Temporarily accept any value  
     tokens: list[Any] = []
+    capacity: Optional[int] = None
+    streaming: bool = False
     # TODO: Add validation to check that type matches tokens
+    _room_waiters: list[asyncio.Future] = PrivateAttr(default_factory=list)
+    _streams: list[TokenStream] = PrivateAttr(default_factory=list)
 
     @model_validator(mode="after")
     def validate_type_field(self):
@@ -63,7 +162,11 @@ class ListPlaceNode(PositionalArgsBaseModel):
 
     @model_validator(mode="after")
     def check_type_matches_tokens(self):
-        for token in self.tokens:
+        tokens = self.tokens
+        if len(tokens) > 1 and CompareTypes.value_type_decides_match(self.type):
+            # One representative token per distinct type is enough.
+            tokens = {type(token): token for token in tokens}.values()
+        for token in tokens:
             if not CompareTypes.between_value_and_type(token, self.type):
                 raise TypeError(
                     f"Expected token to be of type {self.type} in {self.name}, got {type(token)}."
@@ -71,8 +174,89 @@ class ListPlaceNode(PositionalArgsBaseModel):
                 )
         return self
 
+    @model_validator(mode="after")
+    def check_capacity(self):
+        if self.capacity is not None:
+            if self.capacity < 1:
+                raise ValueError(f"Capacity of {self.name} must be at least 1, got {self.capacity}.")
+            if len(self.tokens) > self.capacity:
+                raise ValueError(
+                    f"{self.name} was given {len(self.tokens)} tokens which exceeds its capacity of {self.capacity}."
+                )
+        return self
+
     def copy_sans_tokens(self) -> "ListPlaceNode":
-        return ListPlaceNode(self.name, self.type)
+        return ListPlaceNode(self.name, self.type, capacity=self.capacity, streaming=self.streaming)
+
+    def open_stream(self, maxsize: Optional[int] = None, on_room: Optional[Callable[[], None]] = None) -> TokenStream:
+        if not self.streaming:
+            raise ValueError(f"Place {self.name} is not a streaming place; construct it with streaming=True.")
+        stream = TokenStream(self, maxsize, on_room)
+        self._streams.append(stream)
+        self.hand_off_tokens()
+        return stream
+
+    def remove_stream(self, stream: TokenStream) -> None:
+        if stream in self._streams:
+            self._streams.remove(stream)
+
+    def has_open_streams(self) -> bool:
+        return len(self._streams) > 0
+
+    def hand_off_tokens(self) -> bool:
+        """Move the place's tokens to every open stream, as many as the fullest stream has room for.
+
+        Return True if any tokens were handed off.
+        """
+        if not self._streams or not self.tokens:
+            return False
+        count = min(stream.room() for stream in self._streams)
+        if count <= 0:
+            return False
+        if count >= len(self.tokens):
+            tokens, self.tokens = self.tokens, []
+        else:
+            tokens, self.tokens = self.tokens[:count], self.tokens[count:]
+        for stream in self._streams:
+            stream.push(tokens)
+        self.notify_room_available()
+        return True
+
+    def is_held_back_by_streams(self) -> bool:
+        """Whether the place is full and waiting for a stream consumer to make room."""
+        return bool(self._streams) and not self.has_room_for()
+
+    async def wait_for_stream_consumers(self) -> None:
+        """Wait until a stream consumer takes tokens from the place or closes its stream."""
+        waiter = asyncio.get_running_loop().create_future()
+        self._room_waiters.append(waiter)
+        try:
+            await waiter
+        finally:
+            if waiter in self._room_waiters:
+                self._room_waiters.remove(waiter)
+
+    def has_room_for(self, token_count: int = 1) -> bool:
+        return self.capacity is None or len(self.tokens) + token_count <= self.capacity
+
+    async def wait_for_room(self, token_count: int = 1) -> None:
+        """Wait until the place has room for ``token_count`` more tokens."""
+        while not self.has_room_for(token_count):
+            waiter = asyncio.get_running_loop().create_future()
+            self._room_waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._room_waiters:
+                    self._room_waiters.remove(waiter)
+
+    def notify_room_available(self) -> bool:
+        """Wake anything waiting in ``wait_for_room``. Return True if there was a waiter."""
+        waiters, self._room_waiters = self._room_waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+        return len(waiters) > 0
 
 
 # An alias to ListPlaceNode just called PlaceNode.
@@ -93,12 +277,161 @@ class FunctionTransitionNode(PositionalArgsBaseModel):
             - () -> bool: guard function (True = can fire)
             - () -> float: priority score or countdown timer
             - (ExecutableGraph) -> Any: context-aware activation
+        distribution_places: Optional names of the places the ``output_distribution_function`` may deliver to.
+            Each must be the target of one of the transition's return edges, which is checked when the graph is
+            built. Tokens delivered to declared places skip the per-firing place type check (see the
+            ``check_declared_distributions`` parameter of ``execute_graph``); delivering to any other place raises.
+        cache: Optional ``TransitionCache``. When set, the function is only called for argument tokens and kwargs
+            whose fingerprint is not in the cache; otherwise the cached result is used. Only use it for functions
+            whose result depends on their arguments alone.
     """
     name: str
     function: Callable
     output_distribution_function: Optional[Callable[[Any], dict[PlaceNodeName, Any]]] = None
     kwargs: Optional[KwArgs] = None
     activation_function: Optional[Callable] = None
+    distribution_places: Optional[frozenset[PlaceNodeName]] = None
+    cache: Optional[InstanceOf[TransitionCache]] = None
+
+    @model_validator(mode="after")
+    def check_distribution_places(self):
+        if self.distribution_places is not None and self.output_distribution_function is None:
+            raise ValueError(
+                f"Transition {self.name} declares distribution places but has no output distribution function."
+            )
+        return self
+
+
+class SourceTransitionNode(FunctionTransitionNode):
+    """A transition with no input places that emits the items of an iterator, one item per fire.
+
+    The source may be a sync iterable (e.g. the lines of a file) or an async iterable (e.g. an async generator over a
+    paginated API or a queue). Items are pulled lazily into a buffer holding at most ``prefetch`` items: sync sources
+    are read when the buffer runs empty, async sources are read by a background task on the running event loop. The
+    transition is only enabled while the buffer holds an item, and is permanently disabled once the iterator is
+    exhausted. When nothing else can fire, ``execute_graph`` waits for pending async sources instead of stopping.
+
+    Async generators are tied to the event loop they were first iterated on, so run a net with async sources within
+    a single event loop.
+
+    Usage:
+        SourceTransitionNode('ReadLines', open('data.txt'), prefetch=64)
+    """
+    function: Optional[Callable] = None
+    source: Any = None
+    prefetch: int = 1
+    _iterator: Any = PrivateAttr(default=None)
+    _is_async: bool = PrivateAttr(default=False)
+    _buffer: deque = PrivateAttr(default_factory=deque)
+    _exhausted: bool = PrivateAttr(default=False)
+    _error: Optional[BaseException] = PrivateAttr(default=None)
+    _prefetch_task: Optional[asyncio.Task] = PrivateAttr(default=None)
+    _item_arrived: Optional[asyncio.Future] = PrivateAttr(default=None)
+    _item_taken: Optional[asyncio.Future] = PrivateAttr(default=None)
+    _on_arrival: Optional[Callable[[TransitionNodeName], None]] = PrivateAttr(default=None)
+
+    def __init__(self, *args, **kwargs):
+        # Positional arguments are (name, source, prefetch) rather than the inherited field order.
+        for field_name, arg in zip(("name", "source", "prefetch"), args):
+            kwargs.setdefault(field_name, arg)
+        super().__init__(**kwargs)
+
+    @model_validator(mode="after")
+    def validate_source(self):
+        if self.source is None:
+            raise ValueError(f"Source transition {self.name} requires a source iterable.")
+        if self.prefetch < 1:
+            raise ValueError(f"Prefetch depth of {self.name} must be at least 1, got {self.prefetch}.")
+        if self.function is None:
+            self.function = self.take
+        self._is_async = hasattr(self.source, "__aiter__")
+        return self
+
+    def take(self) -> Any:
+        """Remove and return the next prefetched item. Used as the transition function."""
+        token = self._buffer.popleft()
+        self._resolve(self._item_taken)
+        return token
+
+    def has_token(self) -> bool:
+        """Whether an item is ready to be emitted, pulling from the source if the buffer is empty."""
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+        if self._buffer:
+            return True
+        if self._exhausted:
+            return False
+        if self._is_async:
+            self._ensure_prefetching()
+        else:
+            self._pull_sync()
+        return len(self._buffer) > 0
+
+    def watch(self, on_arrival: Optional[Callable[[TransitionNodeName], None]]) -> None:
+        """Call ``on_arrival(name)`` whenever the async source delivers an item, ends, or fails (None to stop)."""
+        self._on_arrival = on_arrival
+
+    def is_pending(self) -> bool:
+        """Whether the source may still produce items that have not arrived yet."""
+        return not self._buffer and not self._exhausted and self._is_async
+
+    async def wait_for_item(self) -> None:
+        """Wait until an item is buffered, the source is exhausted, or the source has failed."""
+        self._ensure_prefetching()
+        while self.is_pending() and self._error is None:
+            self._item_arrived = asyncio.get_running_loop().create_future()
+            await self._item_arrived
+
+    def _pull_sync(self) -> None:
+        if self._iterator is None:
+            self._iterator = iter(self.source)
+        while len(self._buffer) < self.prefetch:
+            try:
+                self._buffer.append(next(self._iterator))
+            except StopIteration:
+                self._exhausted = True
+                return
+
+    def _ensure_prefetching(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # Outside an event loop there is nothing to schedule the prefetch on.
+        task = self._prefetch_task
+        if task is None or (task.done() and not self._exhausted) or task.get_loop() is not loop:
+            if self._iterator is None:
+                self._iterator = aiter(self.source)
+            self._prefetch_task = loop.create_task(self._prefetch())
+
+    async def _prefetch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            while len(self._buffer) >= self.prefetch:
+                self._item_taken = loop.create_future()
+                await self._item_taken
+            try:
+                item = await anext(self._iterator)
+            except StopAsyncIteration:
+                self._exhausted = True
+                self._arrived()
+                return
+            except Exception as error:
+                self._exhausted = True
+                self._error = error
+                self._arrived()
+                return
+            self._buffer.append(item)
+            self._arrived()
+
+    def _arrived(self) -> None:
+        self._resolve(self._item_arrived)
+        if self._on_arrival is not None:
+            self._on_arrival(self.name)
+
+    def _resolve(self, future: Optional[asyncio.Future]) -> None:
+        if future is not None and not future.done():
+            future.set_result(None)
 
 
 class ArgumentEdgeToTransition(PositionalArgsBaseModel):
@@ -113,6 +446,15 @@ class ReturnedEdgeFromTransition(PositionalArgsBaseModel):
     return_index: Optional[ReturnIndex] = None
 
 
+def _annotation_pair_key(annotation1: Any, annotation2: Any) -> Optional[tuple[Any, Any]]:
+    """The pair as a set key, or None if an annotation is unhashable (e.g. ``Annotated`` with a list)."""
+    try:
+        hash((annotation1, annotation2))
+    except TypeError:
+        return None
+    return annotation1, annotation2
+
+
 class ExecutableGraph(BaseModel):
     """A Petri net graph that can be executed.
 
@@ -126,11 +468,14 @@ class ExecutableGraph(BaseModel):
             successfully fires a transition. Use this as a stable sequence
             number when you need to identify "which step are we on" — e.g.
             for idempotency / compare-and-swap semantics over an unreliable
-            transport, or for replay / fork-from-step features. Independent
+            transport, or for replay / fork-from-step features (see
+            ``ExecutableGraphOperations.fork``, which keeps it). Independent
             of ``transition_history``, which is capped for memory and is
             therefore unsuitable as an authoritative counter.
         last_fired: Name of the most recent transition fired by the last
             ``execute_graph`` call (None if it fired nothing). Reset per call.
+        last_changed_places: Names of the places whose tokens were consumed or
+            produced by the ``last_fired`` transition. Reset per call.
         fired_counts: Cumulative {transition_name: times_fired} since the graph
             was created. Monotonic and never trimmed (like ``step_count``), so
             it is the reliable way to ask "has transition X ever fired" — the
@@ -144,6 +489,9 @@ class ExecutableGraph(BaseModel):
             If None, defaults to firing the last enabled transition (current behavior).
             The selector receives the full graph context and list of enabled transitions,
             allowing for sophisticated selection strategies (priority-based, random, etc.).
+        clock: Optional ``Clock`` that guards and ``now()`` read the time from. With a clock, ``execute_graph`` waits
+            on it for the next deadline when nothing can fire, instead of stopping (see ``petritype.core.clock``).
+            Without one the time is ``time.time()``.
     """
     places: Sequence[ListPlaceNode]
     transitions: Sequence[FunctionTransitionNode]
@@ -159,6 +507,12 @@ class ExecutableGraph(BaseModel):
     # ambiguous for self-loops). Transition names are unique (enforced by
     # ``check_unique_names``), so a name unambiguously identifies the node.
     last_fired: Optional[str] = None
+    # Names of the places touched by the ``last_fired`` transition: its input
+    # places followed by the places that received output tokens. Reset with
+    # ``last_fired``. Stateful selectors (see ``transition_selectors``) use it
+    # to update only the transitions adjacent to these places instead of
+    # re-examining every transition on every step.
+    last_changed_places: tuple[PlaceNodeName, ...] = ()
     # Cumulative count of how many times each transition has fired since this
     # graph was created (keyed by transition name). Like ``step_count`` it is
     # monotonic and never trimmed — independent of ``transition_history``'s
@@ -173,6 +527,68 @@ class ExecutableGraph(BaseModel):
     token_history: Sequence[Any] = []
     transition_selector: Optional[Callable] = None
     allow_token_copying: bool = False
+    clock: Optional[InstanceOf[Clock]] = None
+    # Places whose tokens changed outside of a fire (e.g. ``add_token_when_room_available``), and transitions that
+    # may have become enabled outside of a fire (async sources that received an item), since the selector last took
+    # them. Incremental selectors take them together with ``last_changed_places``.
+    _places_changed_outside_fires: dict[PlaceNodeName, None] = PrivateAttr(default_factory=dict)
+    _transitions_changed_outside_fires: dict[TransitionNodeName, None] = PrivateAttr(default_factory=dict)
+    # The node and edge sequences the cached ``lookups`` were built from, their lengths, and the lookups.
+    _lookups: Optional[tuple[tuple[Sequence, ...], tuple[int, ...], "GraphLookups"]] = PrivateAttr(default=None)
+
+    def now(self) -> float:
+        """The current time of the graph's clock, or ``time.time()`` if it has none."""
+        return time.time() if self.clock is None else self.clock.now()
+
+    def stream(self, place_name: PlaceNodeName, maxsize: Optional[int] = None) -> TokenStream:
+        """Subscribe to a streaming place: ``async for token in graph.stream('Output'): ...``.
+
+        With a ``maxsize`` the stream buffers at most that many tokens, see ``TokenStream``.
+        """
+        place = self.place_named(place_name)
+        if place is None:
+            raise ValueError(f"Unknown place: {place_name}")
+        return place.open_stream(maxsize, on_room=lambda: self.mark_place_changed(place_name))
+
+    def close_streams(self) -> None:
+        """Close every open stream so that consumers finish once they have drained the delivered tokens."""
+        for place in self.places:
+            for stream in tuple(place._streams):
+                stream.close()
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = super().__getstate__()
+        # The lookups are rebuilt on demand, and may memoise result types that cannot be pickled.
+        state["__pydantic_private__"] = {**state["__pydantic_private__"], "_lookups": None}
+        return state
+
+    def lookups(self) -> "GraphLookups":
+        """The name-to-node and edge maps of the graph, rebuilt only when a node or edge sequence changes.
+
+        A sequence counts as changed when it is replaced or its length changes, so change the topology of a graph by
+        assigning new sequences (or build a new graph) rather than by replacing items in place.
+        """
+        topology = (self.places, self.transitions, self.argument_edges, self.return_edges)
+        sizes = tuple(len(sequence) for sequence in topology)
+        cached = self._lookups
+        if cached is None or cached[1] != sizes or any(old is not new for old, new in zip(cached[0], topology)):
+            cached = self._lookups = (topology, sizes, GraphLookups(self))
+        return cached[2]
+
+    def mark_place_changed(self, place_name: PlaceNodeName) -> None:
+        """Record that the tokens of a place were changed outside of a fire, so that incremental selectors see it."""
+        self._places_changed_outside_fires[place_name] = None
+
+    def mark_transition_changed(self, transition_name: TransitionNodeName) -> None:
+        """Record that a transition may have become enabled outside of a fire, e.g. a source that received an item."""
+        self._transitions_changed_outside_fires[transition_name] = None
+
+    def take_changes_outside_fires(self) -> tuple[tuple[PlaceNodeName, ...], tuple[TransitionNodeName, ...]]:
+        """The places and transitions recorded since the last call, clearing the record."""
+        changes = tuple(self._places_changed_outside_fires), tuple(self._transitions_changed_outside_fires)
+        self._places_changed_outside_fires.clear()
+        self._transitions_changed_outside_fires.clear()
+        return changes
 
     def place_named(self, name: str) -> Optional[ListPlaceNode]:
         place_names_to_nodes = {place.name: place for place in self.places}  # TODO: do we need to check every time?
@@ -222,6 +638,9 @@ class ExecutableGraph(BaseModel):
         return_edges = values.get('return_edges', [])
         place_names_to_nodes = {place.name: place for place in places}
         transition_names_to_nodes = {transition.name: transition for transition in transitions}
+        # Generated nets repeat the same (place type, annotation) pairs many times, so each pair is compared once.
+        matching_argument_types: set[tuple[Any, Any]] = set()
+        matching_return_types: set[tuple[Any, Any]] = set()
 
         for edge in argument_edges:
             if not isinstance(edge, ArgumentEdgeToTransition):
@@ -233,8 +652,9 @@ class ExecutableGraph(BaseModel):
             if not isinstance(transition, FunctionTransitionNode):
                 raise NotImplementedError("Currently only FunctionTransitionNode is supported.")
             place_type = place.type  # This needs to be the value of the 'type' field of the place.
-            argument_type = get_type_hints(transition.function).get(edge.argument)
-            if place_type is not None and argument_type is not None:
+            argument_type = TypeHints.of(transition.function).get(edge.argument)
+            match_key = _annotation_pair_key(place_type, argument_type)
+            if place_type is not None and argument_type is not None and match_key not in matching_argument_types:
                 if not CompareTypes.between_annotations_where_both_maybe_in_list(
                     annotation1=place_type,  # The place.type contains the inner type event if the place
                     # is a ListPlaceNode that holds a list of tokens.
@@ -246,6 +666,8 @@ class ExecutableGraph(BaseModel):
                         f"'{transition.name}': place type '{place_type}' does not match argument type "
                         f"'{argument_type}'."
                     )
+                if match_key is not None:
+                    matching_argument_types.add(match_key)
 
         for edge in return_edges:
             if not isinstance(edge, ReturnedEdgeFromTransition):
@@ -256,9 +678,10 @@ class ExecutableGraph(BaseModel):
             transition = transition_names_to_nodes[edge.transition_node_name]
             if not isinstance(transition, FunctionTransitionNode):
                 raise NotImplementedError("Currently only FunctionTransitionNode is supported.")
-            place_type = get_type_hints(place).get('type')
-            return_type = get_type_hints(transition.function).get('return')
-            if place_type is not None and return_type is not None:
+            place_type = TypeHints.of(type(place)).get('type')
+            return_type = TypeHints.of(transition.function).get('return')
+            match_key = _annotation_pair_key(place_type, return_type)
+            if place_type is not None and return_type is not None and match_key not in matching_return_types:
                 if not CompareTypes.between_annotations_where_one_maybe_in_list(
                     annotation_not_in_list=place_type,  # The place type contains the inner type even if the place
                     # is a ListPlaceNode that holds a list of tokens.
@@ -269,9 +692,286 @@ class ExecutableGraph(BaseModel):
                         f"'{place.name}': place type '{place_type}' does not match return type "
                         f"'{return_type}'."
                     )
+                if match_key is not None:
+                    matching_return_types.add(match_key)
         
         return values
 
+    @model_validator(mode="before")
+    def check_distribution_places(cls, values):
+        transitions = values.get('transitions', [])
+        return_edges = values.get('return_edges', [])
+        transition_names_to_return_edges = {}
+        for edge in return_edges:
+            transition_names_to_return_edges.setdefault(edge.transition_node_name, []).append(edge)
+        for transition in transitions:
+            if transition.distribution_places is None:
+                continue
+            edges = transition_names_to_return_edges.get(transition.name, [])
+            places_without_edge = transition.distribution_places - {edge.place_node_name for edge in edges}
+            if places_without_edge:
+                raise ValueError(
+                    f"Transition '{transition.name}' declares distribution places without a return edge: "
+                    f"{sorted(places_without_edge)}."
+                )
+            if not ExecutableGraphCheck.all_return_indices_are_none(edges):
+                raise ValueError(
+                    f"Expected all return indices to be None for transition '{transition.name}', which uses an "
+                    "output distribution function."
+                )
+        return values
+
+
+class RenamedDistribution:
+    """An output distribution function whose destination place names are translated through ``place_names``."""
+
+    def __init__(
+        self, function: Callable[[Any], dict[PlaceNodeName, Any]], place_names: dict[PlaceNodeName, PlaceNodeName]
+    ):
+        self.function = function
+        self.place_names = place_names
+
+    def __call__(self, result: Any) -> dict[PlaceNodeName, Any]:
+        return {self.place_names.get(name, name): token for name, token in self.function(result).items()}
+
+    def __eq__(self, other):
+        if not isinstance(other, RenamedDistribution):
+            return NotImplemented
+        return self.function == other.function and self.place_names == other.place_names
+
+    def __hash__(self):
+        return hash((self.function, tuple(sorted(self.place_names.items()))))
+
+
+class SubnetTransitionNode(PositionalArgsBaseModel):
+    """A net embedded in another net, connected to it through mapped boundary places.
+
+    ``construct_graph`` replaces the node by the subnet's places, transitions and edges, so the subnet runs as part
+    of the parent net: there is no nested ``execute_graph`` call. The inner places named in ``place_mapping`` are
+    replaced by the parent places they map to, which must be given to ``construct_graph`` too. All other inner
+    places and transitions are renamed to ``<name>.<inner name>``. Boundary places have to be empty, since their
+    tokens would belong to the parent place.
+
+    Output distribution functions and ``Guard`` activation functions are translated to the new place names; other
+    activation functions that look places up by name must use the flattened names. The subnet's nodes are copied,
+    so the same subnet graph can be embedded several times under different names. Source transitions are rebuilt
+    around the same source, so each embedding reads a re-iterable source (e.g. a list) from the start, while
+    one-shot iterators are shared between the embeddings.
+
+    Usage:
+        SubnetTransitionNode('Clean', cleaning_net, {'Raw': 'Downloads', 'Clean': 'Parsed'})
+    """
+    name: str
+    graph: InstanceOf["ExecutableGraph"]
+    place_mapping: dict[PlaceNodeName, PlaceNodeName] = {}
+
+    @model_validator(mode="after")
+    def check_place_mapping(self):
+        inner_place_names = {place.name for place in self.graph.places}
+        unknown = set(self.place_mapping) - inner_place_names
+        if unknown:
+            raise ValueError(f"Subnet {self.name} maps places it does not have: {sorted(unknown)}.")
+        for place in self.graph.places:
+            if place.name in self.place_mapping and place.tokens:
+                raise ValueError(f"Boundary place {place.name} of subnet {self.name} must be empty.")
+        return self
+
+    def flattened_name(self, inner_name: str) -> str:
+        return f"{self.name}.{inner_name}"
+
+    def flattened_nodes(
+        self,
+    ) -> list[Union[ListPlaceNode, FunctionTransitionNode, ArgumentEdgeToTransition, ReturnedEdgeFromTransition]]:
+        """The subnet's places (except the boundary places), transitions and edges, renamed for the parent net."""
+        place_names = {
+            place.name: self.place_mapping.get(place.name, self.flattened_name(place.name))
+            for place in self.graph.places
+        }
+        nodes = [
+            place.model_copy(update={"name": place_names[place.name], "tokens": list(place.tokens)})
+            for place in self.graph.places
+            if place.name not in self.place_mapping
+        ]
+        for transition in self.graph.transitions:
+            update = {"name": self.flattened_name(transition.name)}
+            if transition.output_distribution_function is not None:
+                update["output_distribution_function"] = RenamedDistribution(
+                    transition.output_distribution_function, place_names
+                )
+            if transition.distribution_places is not None:
+                update["distribution_places"] = frozenset(place_names[name] for name in transition.distribution_places)
+            if hasattr(transition.activation_function, "with_place_names"):
+                update["activation_function"] = transition.activation_function.with_place_names(place_names)
+            if isinstance(transition, SourceTransitionNode):
+                # A copy would share the original's buffer and iterator, and call the original's bound ``take``.
+                fields = {field: getattr(transition, field) for field in SourceTransitionNode.model_fields}
+                nodes.append(SourceTransitionNode(**{**fields, **update, "function": None}))
+            else:
+                nodes.append(transition.model_copy(update=update))
+        nodes.extend(
+            ArgumentEdgeToTransition(
+                place_names[edge.place_node_name], self.flattened_name(edge.transition_node_name), edge.argument
+            )
+            for edge in self.graph.argument_edges
+        )
+        nodes.extend(
+            ReturnedEdgeFromTransition(
+                self.flattened_name(edge.transition_node_name), place_names[edge.place_node_name], edge.return_index
+            )
+            for edge in self.graph.return_edges
+        )
+        return nodes
+
+
+type PlaceSpec = tuple[PlaceNodeName, Any, Optional[int], bool]
+type TransitionSpec = tuple[
+    TransitionNodeName, Callable, Optional[Callable], Optional[frozenset[tuple[str, Any]]], Optional[Callable],
+    Optional[frozenset[PlaceNodeName]], Optional[InstanceOf[TransitionCache]],
+]
+
+
+class GraphSpec(BaseModel):
+    """The topology of an executable graph, i.e. everything except the tokens, as a hashable value.
+
+    Attributes:
+        places: (name, type, capacity, streaming) of every place
+        transitions: (name, function, output_distribution_function, kwargs items, activation_function,
+            distribution_places, cache) of every transition
+        argument_edges: (place name, transition name, argument) of every argument edge
+        return_edges: (transition name, place name, return index) of every return edge
+        allow_token_copying: As on ``ExecutableGraph``
+
+    Functions are compared by identity, so two specs are only equal if their transitions call the same function
+    objects. Build nets that are constructed repeatedly from module-level functions rather than from lambdas created
+    per job, otherwise every construction produces a new spec.
+
+    Validating a graph depends only on its topology, so each distinct spec is validated once per process (see
+    ``GraphSpecCache``). ``construct_graph`` uses this automatically, and ``ExecutableGraphOperations.
+    instantiate_graph`` builds new graphs from a spec without re-validating anything but their tokens.
+    """
+    places: tuple[PlaceSpec, ...]
+    transitions: tuple[TransitionSpec, ...]
+    argument_edges: tuple[tuple[PlaceNodeName, TransitionNodeName, ArgumentName], ...]
+    return_edges: tuple[tuple[TransitionNodeName, PlaceNodeName, Optional[ReturnIndex]], ...]
+    allow_token_copying: bool = False
+
+    model_config = {"frozen": True}
+
+
+def graph_spec_of(
+    places: Sequence[ListPlaceNode],
+    transitions: Sequence[FunctionTransitionNode],
+    argument_edges: Sequence[ArgumentEdgeToTransition],
+    return_edges: Sequence[ReturnedEdgeFromTransition],
+    allow_token_copying: bool = False,
+) -> Optional[GraphSpec]:
+    """The spec of the given nodes and edges, or None if they cannot be described by a hashable spec.
+
+    That is the case for subclasses of the node types (e.g. ``SourceTransitionNode``, which holds iterator state) and
+    for unhashable kwargs or activation functions.
+    """
+    if any(type(place) is not ListPlaceNode for place in places):
+        return None
+    if any(type(transition) is not FunctionTransitionNode for transition in transitions):
+        return None
+    spec = GraphSpec.model_construct(
+        places=tuple((place.name, place.type, place.capacity, place.streaming) for place in places),
+        transitions=tuple(
+            (
+                transition.name,
+                transition.function,
+                transition.output_distribution_function,
+                None if transition.kwargs is None else frozenset(transition.kwargs.items()),
+                transition.activation_function,
+                transition.distribution_places,
+                transition.cache,
+            )
+            for transition in transitions
+        ),
+        argument_edges=tuple(
+            (edge.place_node_name, edge.transition_node_name, edge.argument) for edge in argument_edges
+        ),
+        return_edges=tuple(
+            (edge.transition_node_name, edge.place_node_name, edge.return_index) for edge in return_edges
+        ),
+        allow_token_copying=allow_token_copying,
+    )
+    try:
+        hash(spec)
+    except TypeError:
+        return None
+    return spec
+
+
+class GraphSpecCache:
+    """Process-wide LRU set of the graph specs that have passed ``ExecutableGraph`` validation.
+
+    Graphs may be constructed from several threads, so every access to the ordered dict holds ``_lock``.
+    """
+    max_size: int = 256
+    _validated: OrderedDict[GraphSpec, None] = OrderedDict()
+    _lock: threading.Lock = threading.Lock()
+
+    def contains(spec: GraphSpec) -> bool:
+        with GraphSpecCache._lock:
+            if spec in GraphSpecCache._validated:
+                GraphSpecCache._validated.move_to_end(spec)
+                return True
+            return False
+
+    def add(spec: GraphSpec) -> None:
+        with GraphSpecCache._lock:
+            GraphSpecCache._validated[spec] = None
+            GraphSpecCache._validated.move_to_end(spec)
+            while len(GraphSpecCache._validated) > GraphSpecCache.max_size:
+                GraphSpecCache._validated.popitem(last=False)
+
+    def clear() -> None:
+        with GraphSpecCache._lock:
+            GraphSpecCache._validated.clear()
+
+
+def _graph_components_of(
+    spec: GraphSpec, place_names_to_tokens: dict[PlaceNodeName, Iterable[Any]], check_tokens: bool
+) -> dict[str, list]:
+    """Fresh nodes and edges for ``spec``, built without validation except for the tokens if ``check_tokens``."""
+    places = []
+    for name, type_, capacity, streaming in spec.places:
+        place = ListPlaceNode.model_construct(
+            name=name, type=type_, tokens=list(place_names_to_tokens.get(name, ())), capacity=capacity,
+            streaming=streaming,
+        )
+        if check_tokens:
+            place.check_type_matches_tokens()
+            place.check_capacity()
+        places.append(place)
+    transitions = [
+        FunctionTransitionNode.model_construct(
+            name=name,
+            function=function,
+            output_distribution_function=output_distribution_function,
+            kwargs=None if kwargs is None else dict(kwargs),
+            activation_function=activation_function,
+            distribution_places=distribution_places,
+            cache=cache,
+        )
+        for name, function, output_distribution_function, kwargs, activation_function, distribution_places, cache
+        in spec.transitions
+    ]
+    argument_edges = [
+        ArgumentEdgeToTransition.model_construct(
+            place_node_name=place, transition_node_name=transition, argument=argument
+        )
+        for place, transition, argument in spec.argument_edges
+    ]
+    return_edges = [
+        ReturnedEdgeFromTransition.model_construct(
+            transition_node_name=transition, place_node_name=place, return_index=return_index
+        )
+        for transition, place, return_index in spec.return_edges
+    ]
+    return dict(places=places, transitions=transitions, argument_edges=argument_edges, return_edges=return_edges)
+
 
 # This is intended as shorthand for the common case when adding a transition with output(s) to a graph.
 def function_transition_node_and_output_edges(
@@ -376,12 +1076,60 @@ class MapTransitionNames:
 class ExecutableGraphCheck:
     """Functions that do not alter the executable graph."""
 
+    def unreachable_nodes(
+        executable_graph: ExecutableGraph,
+    ) -> tuple[frozenset[TransitionNodeName], frozenset[PlaceNodeName]]:
+        """The transitions that can never fire and the places that can never hold a token, ignoring guards.
+
+        A place can hold a token if it has tokens or a transition that can fire produces into it, and a transition
+        can fire if all its input places can hold a token. Both are found with one pass over the edges from the
+        places that have tokens and the transitions without input places. Places counted by the ``Guard`` of a
+        transition that can fire are never reported, so pruning them cannot break the guard.
+        """
+        consumers: dict[PlaceNodeName, list[TransitionNodeName]] = {
+            place.name: [] for place in executable_graph.places
+        }
+        outputs: dict[TransitionNodeName, list[PlaceNodeName]] = {
+            transition.name: [] for transition in executable_graph.transitions
+        }
+        missing_inputs: dict[TransitionNodeName, set[PlaceNodeName]] = {name: set() for name in outputs}
+        for edge in executable_graph.argument_edges:
+            consumers[edge.place_node_name].append(edge.transition_node_name)
+            missing_inputs[edge.transition_node_name].add(edge.place_node_name)
+        for edge in executable_graph.return_edges:
+            outputs[edge.transition_node_name].append(edge.place_node_name)
+        reachable = {place.name for place in executable_graph.places if place.tokens}
+        live = {name for name, inputs in missing_inputs.items() if not inputs}
+        pending = list(reachable) + [place_name for name in live for place_name in outputs[name]]
+        while pending:
+            place_name = pending.pop()
+            reachable.add(place_name)
+            for transition_name in consumers[place_name]:
+                inputs = missing_inputs[transition_name]
+                if place_name not in inputs:
+                    continue
+                inputs.discard(place_name)
+                if not inputs:
+                    live.add(transition_name)
+                    pending.extend(name for name in outputs[transition_name] if name not in reachable)
+        for transition in executable_graph.transitions:
+            guard = transition.activation_function
+            if transition.name in live and hasattr(guard, "with_place_names"):
+                reachable.update(clause.place_name for clause in guard.clauses if hasattr(clause, "place_name"))
+        return (
+            frozenset(outputs) - live,
+            frozenset(place.name for place in executable_graph.places) - reachable,
+        )
+
     def sufficient_tokens_are_available(
         transition: FunctionTransitionNode,
         transition_names_to_incoming_edges: dict[str, tuple[ArgumentEdgeToTransition, ...]],
         place_names_to_nodes: dict[str, ListPlaceNode],
     ) -> bool:
-        # Transitions with no incoming edges (generators) are always ready to fire
+        # Transitions with no incoming edges (generators) are always ready to fire, unless they emit the items of a
+        # source iterator and have none ready.
+        if isinstance(transition, SourceTransitionNode):
+            return transition.has_token()
         incoming_edges: tuple[ArgumentEdgeToTransition, ...] = transition_names_to_incoming_edges.get(
             transition.name, tuple()
         )
@@ -391,6 +1139,72 @@ class ExecutableGraphCheck:
                 return False
         return True
 
+    def argument_takes_all_tokens(
+        transition: FunctionTransitionNode, edge: ArgumentEdgeToTransition, place: ListPlaceNode
+    ) -> bool:
+        """Whether the argument receives every token in the place as a list, rather than a single token."""
+        argument_type = TypeHints.of(transition.function).get(edge.argument)
+        return get_origin(argument_type) is list and CompareTypes.between_annotations_where_one_maybe_in_list(
+            annotation_not_in_list=place.type,
+            annotation_maybe_in_list=argument_type,
+        )
+
+    def output_capacity_is_available(
+        transition: FunctionTransitionNode,
+        transition_names_to_incoming_edges: dict[str, tuple[ArgumentEdgeToTransition, ...]],
+        transition_names_to_outgoing_edges: dict[str, tuple[ReturnedEdgeFromTransition, ...]],
+        place_names_to_nodes: dict[str, ListPlaceNode],
+    ) -> bool:
+        """Whether every capacity-limited output place has room for a token once the inputs have been consumed."""
+        for outgoing_edge in transition_names_to_outgoing_edges.get(transition.name, tuple()):
+            place = place_names_to_nodes[outgoing_edge.place_node_name]
+            if place.capacity is None:
+                continue
+            tokens_after_consumption = len(place.tokens)
+            for incoming_edge in transition_names_to_incoming_edges.get(transition.name, tuple()):
+                if incoming_edge.place_node_name != place.name:
+                    continue
+                if ExecutableGraphCheck.argument_takes_all_tokens(transition, incoming_edge, place):
+                    tokens_after_consumption = 0
+                else:
+                    tokens_after_consumption -= 1
+            if tokens_after_consumption + 1 > place.capacity:
+                return False
+        return True
+
+    def next_deadline(executable_graph: ExecutableGraph) -> Optional[float]:
+        """The earliest future time at which a transition may become enabled without a change in the marking.
+
+        That is the earliest of the deadlines registered with the graph clock's ``wake_at`` and those reported by
+        activation functions with a ``next_deadline(now)`` method, such as the time windows of a ``Guard``.
+        """
+        clock = executable_graph.clock
+        now = executable_graph.now()
+        deadlines = [] if clock is None else [clock.next_wakeup()]
+        for transition in executable_graph.transitions:
+            next_deadline = getattr(transition.activation_function, "next_deadline", None)
+            if next_deadline is not None:
+                deadlines.append(next_deadline(now))
+        return min((deadline for deadline in deadlines if deadline is not None), default=None)
+
+    def transition_is_enabled(
+        transition: FunctionTransitionNode,
+        transition_names_to_incoming_edges: dict[str, tuple[ArgumentEdgeToTransition, ...]],
+        transition_names_to_outgoing_edges: dict[str, tuple[ReturnedEdgeFromTransition, ...]],
+        place_names_to_nodes: dict[str, ListPlaceNode],
+    ) -> bool:
+        """A transition is enabled when its input places hold tokens and its output places have room."""
+        return ExecutableGraphCheck.sufficient_tokens_are_available(
+            transition=transition,
+            transition_names_to_incoming_edges=transition_names_to_incoming_edges,
+            place_names_to_nodes=place_names_to_nodes,
+        ) and ExecutableGraphCheck.output_capacity_is_available(
+            transition=transition,
+            transition_names_to_incoming_edges=transition_names_to_incoming_edges,
+            transition_names_to_outgoing_edges=transition_names_to_outgoing_edges,
+            place_names_to_nodes=place_names_to_nodes,
+        )
+
     def next_transition(
         executable_graph: ExecutableGraph,  # Needed so that we know the transition order.
         place_names_to_nodes: dict[str, ListPlaceNode],
@@ -423,6 +1237,13 @@ class ExecutableGraphCheck:
                 return False
         return True
 
+    def ensure_place_is_declared_distribution_place(transition: FunctionTransitionNode, place_name: PlaceNodeName):
+        if place_name not in transition.distribution_places:
+            raise ValueError(
+                f"Output distribution function of transition \"{transition.name}\" delivered a token to undeclared "
+                f"place \"{place_name}\". Declared places: {sorted(transition.distribution_places)}."
+            )
+
     def ensure_token_type_matches_place_type(token: any, place: ListPlaceNode):
         # Handle the case where we have ListPlaceNode being given a list of tokens of the matching inner type.
         if isinstance(place, ListPlaceNode) and isinstance(token, list):
@@ -441,8 +1262,7 @@ class ExecutableGraphCheck:
             )
 
     def ensure_all_token_types_match_place_types(executable_graph: ExecutableGraph):
-        places = (x for x in executable_graph if isinstance(x, ListPlaceNode))
-        for place in places:
+        for place in executable_graph.places:
             for token in place.tokens:
                 ExecutableGraphCheck.ensure_token_type_matches_place_type(token, place)
 
@@ -487,6 +1307,78 @@ class ExecutableGraphCheck:
         return tuple(matching_by_direct_type + matching_by_list_contents)
 
 
+class OutputRouting:
+    """Memoised matching of transition results to output places, keyed on the type of the result.
+
+    The candidate output places of each transition are resolved once. If every candidate place type can be decided
+    from the type of a value alone (see ``CompareTypes.value_type_decides_match``), the places matched by
+    ``ExecutableGraphCheck.value_and_places_types_match`` are remembered per ``type(result)``, and per element type for
+    non-empty lists whose elements all have the same type, so routing a repeated result type is a dict lookup. Other
+    results are matched in full every time.
+    """
+
+    def __init__(
+        self,
+        transition_names_to_outgoing_edges: dict[str, tuple[ReturnedEdgeFromTransition, ...]],
+        place_names_to_nodes: dict[str, ListPlaceNode],
+    ):
+        self.transition_names_to_outgoing_edges = transition_names_to_outgoing_edges
+        self.place_names_to_nodes = place_names_to_nodes
+        self._candidates: dict[TransitionNodeName, tuple[tuple[ListPlaceNode, ...], bool]] = {}
+        self._routes: dict[tuple[TransitionNodeName, type, Optional[type]], tuple[ListPlaceNode, ...]] = {}
+
+    def candidate_places(self, transition: FunctionTransitionNode) -> tuple[tuple[ListPlaceNode, ...], bool]:
+        """The output places of the transition and whether routing to them can be memoised by result type."""
+        candidates = self._candidates.get(transition.name)
+        if candidates is None:
+            places = tuple(
+                self.place_names_to_nodes[edge.place_node_name]
+                for edge in self.transition_names_to_outgoing_edges[transition.name]
+            )
+            memoisable = all(CompareTypes.value_type_decides_match(place.type) for place in places)
+            candidates = self._candidates[transition.name] = (places, memoisable)
+        return candidates
+
+    def matching_places(self, transition: FunctionTransitionNode, result: Any) -> tuple[ListPlaceNode, ...]:
+        places, memoisable = self.candidate_places(transition)
+        if not memoisable:
+            return ExecutableGraphCheck.value_and_places_types_match(result, places)
+        element_type = None
+        if isinstance(result, list):
+            if len(result) == 0:
+                return places  # An empty list matches every place, see ``value_and_places_types_match``.
+            element_type = type(result[0])
+            if any(type(item) is not element_type for item in result):
+                return ExecutableGraphCheck.value_and_places_types_match(result, places)
+        key = (transition.name, type(result), element_type)
+        matching = self._routes.get(key)
+        if matching is None:
+            matching = self._routes[key] = ExecutableGraphCheck.value_and_places_types_match(result, places)
+        return matching
+
+
+class GraphLookups:
+    """The maps ``execute_graph`` derives from the nodes and edges of a graph.
+
+    Get them with ``graph.lookups()``, which keeps them, and the result types memoised by ``output_routing``, from one
+    ``execute_graph`` call to the next.
+    """
+
+    def __init__(self, executable_graph: ExecutableGraph):
+        self.place_names_to_nodes: dict[str, ListPlaceNode] = MapPlaceNames.to_list_place_nodes(executable_graph)
+        self.transition_names_to_incoming_edges: dict[str, tuple[ArgumentEdgeToTransition, ...]] = \
+            MapTransitionNames.to_incoming_edges(executable_graph)
+        self.transition_names_to_outgoing_edges: dict[str, tuple[ReturnedEdgeFromTransition, ...]] = \
+            MapTransitionNames.to_outgoing_edges(executable_graph)
+        self.source_transitions: tuple[SourceTransitionNode, ...] = tuple(
+            transition for transition in executable_graph.transitions if isinstance(transition, SourceTransitionNode)
+        )
+        self.output_routing = OutputRouting(self.transition_names_to_outgoing_edges, self.place_names_to_nodes)
+        self.streaming_places: tuple[ListPlaceNode, ...] = tuple(
+            place for place in executable_graph.places if place.streaming
+        )
+
+
 class ExecutableGraphOperations:
     """Functions that alter the executable graph.
 
@@ -504,14 +1396,40 @@ class ExecutableGraphOperations:
     - Add output tokens (append?).
     """
 
+    def _flatten_subnets(mixed_nodes_and_edges: Iterable[Any]) -> Iterable[Any]:
+        for node in mixed_nodes_and_edges:
+            if isinstance(node, SubnetTransitionNode):
+                yield from node.flattened_nodes()
+            else:
+                yield node
+
     def construct_graph(
         mixed_nodes_and_edges: Iterable[
-            Union[ListPlaceNode, FunctionTransitionNode, ArgumentEdgeToTransition, ReturnedEdgeFromTransition]
+            Union[
+                ListPlaceNode, FunctionTransitionNode, SubnetTransitionNode,
+                ArgumentEdgeToTransition, ReturnedEdgeFromTransition,
+            ]
         ],
         allow_token_copying: bool = False,
+        trusted: bool = False,
+        structural_check: Optional[Literal["warn", "prune"]] = None,
     ) -> ExecutableGraph:
+        """Sort the given nodes and edges into an ``ExecutableGraph``.
+
+        Graph-level validation (unique names, edge references, edge and distribution place types) depends only on the
+        topology, so it runs once per distinct ``GraphSpec`` in the process; constructing the same topology again only
+        allocates the graph. With ``trusted=True`` graph-level validation is skipped altogether. Only use it for
+        nodes and edges that are known to form a valid graph.
+
+        A ``SubnetTransitionNode`` is replaced by the subnet's nodes and edges, so subnets run inline in the graph.
+
+        With ``structural_check`` set, the graph is checked for transitions that can never fire and places that can
+        never hold a token (see ``ExecutableGraphCheck.unreachable_nodes``). ``"warn"`` issues a warning naming them,
+        ``"prune"`` leaves them and their edges out of the graph. Only prune nets whose tokens are all given at
+        construction: a pruned place cannot receive tokens added from outside the net later.
+        """
         places, transitions, edges_to, edges_from = [], [], [], []
-        for node in mixed_nodes_and_edges:
+        for node in ExecutableGraphOperations._flatten_subnets(mixed_nodes_and_edges):
             if isinstance(node, ListPlaceNode):
                 places.append(node)
             elif isinstance(node, FunctionTransitionNode):
@@ -522,7 +1440,128 @@ class ExecutableGraphOperations:
                 edges_from.append(node)
             else:
                 raise ValueError(f"Unexpected node type: {type(node)}")
-        return ExecutableGraph(places=places, transitions=transitions, argument_edges=edges_to, return_edges=edges_from, allow_token_copying=allow_token_copying)
+        spec = None if trusted else graph_spec_of(places, transitions, edges_to, edges_from, allow_token_copying)
+        if trusted or (spec is not None and GraphSpecCache.contains(spec)):
+            graph = ExecutableGraph.model_construct(
+                places=places, transitions=transitions, argument_edges=edges_to, return_edges=edges_from,
+                allow_token_copying=allow_token_copying,
+            )
+        else:
+            graph = ExecutableGraph(
+                places=places, transitions=transitions, argument_edges=edges_to, return_edges=edges_from,
+                allow_token_copying=allow_token_copying,
+            )
+            if spec is not None:
+                GraphSpecCache.add(spec)
+        if structural_check is not None:
+            graph = ExecutableGraphOperations.apply_structural_check(graph, structural_check)
+        return graph
+
+    def apply_structural_check(executable_graph: ExecutableGraph, mode: Literal["warn", "prune"]) -> ExecutableGraph:
+        """Warn about or prune the transitions that can never fire and the places that can never hold a token."""
+        if mode not in ("warn", "prune"):
+            raise ValueError(f"Unexpected structural check: {mode!r}. Expected 'warn' or 'prune'.")
+        dead_transitions, unreachable_places = ExecutableGraphCheck.unreachable_nodes(executable_graph)
+        if not dead_transitions and not unreachable_places:
+            return executable_graph
+        if mode == "warn":
+            warnings.warn(
+                f"Transitions that can never fire: {sorted(dead_transitions)}. "
+                f"Places that can never hold a token: {sorted(unreachable_places)}.",
+                stacklevel=3,
+            )
+            return executable_graph
+        # Removing nodes with their edges from a valid graph leaves a valid graph. Dead transitions never fired and
+        # unreachable places never held a token, so the counters and histories carry over unchanged.
+        pruned_graph = executable_graph.model_copy(update={
+            "places": [place for place in executable_graph.places if place.name not in unreachable_places],
+            "transitions": [
+                transition for transition in executable_graph.transitions
+                if transition.name not in dead_transitions
+            ],
+            "argument_edges": [
+                edge for edge in executable_graph.argument_edges if edge.transition_node_name not in dead_transitions
+            ],
+            "return_edges": [
+                edge for edge in executable_graph.return_edges if edge.transition_node_name not in dead_transitions
+            ],
+            "fired_counts": dict(executable_graph.fired_counts),
+            "transition_history": list(executable_graph.transition_history),
+            "input_place_history": list(executable_graph.input_place_history),
+            "output_place_history": list(executable_graph.output_place_history),
+            "token_history": list(executable_graph.token_history),
+        })
+        pruned_graph._places_changed_outside_fires = dict(executable_graph._places_changed_outside_fires)
+        pruned_graph._transitions_changed_outside_fires = dict(executable_graph._transitions_changed_outside_fires)
+        pruned_graph._lookups = None
+        return pruned_graph
+
+    def graph_spec(executable_graph: ExecutableGraph) -> GraphSpec:
+        """The hashable topology of the graph. Raises a ValueError if it has nodes a spec cannot describe."""
+        spec = graph_spec_of(
+            executable_graph.places, executable_graph.transitions, executable_graph.argument_edges,
+            executable_graph.return_edges, executable_graph.allow_token_copying,
+        )
+        if spec is None:
+            raise ValueError(
+                "The graph cannot be described by a GraphSpec: it has node subclasses (e.g. source transitions) or "
+                "unhashable kwargs or activation functions."
+            )
+        return spec
+
+    def instantiate_graph(
+        spec: GraphSpec,
+        place_names_to_tokens: Optional[dict[PlaceNodeName, Iterable[Any]]] = None,
+        check_tokens: bool = True,
+    ) -> ExecutableGraph:
+        """Build a new graph with the topology of ``spec`` and the given initial tokens.
+
+        The topology is validated once per process; only the tokens are checked against their place types, and not
+        even that when ``check_tokens`` is False. Each graph gets its own nodes, so instances are independent.
+        """
+        place_names_to_tokens = place_names_to_tokens or {}
+        unknown_places = set(place_names_to_tokens) - {place[0] for place in spec.places}
+        if unknown_places:
+            raise ValueError(f"Tokens given for unknown places: {sorted(unknown_places)}")
+        components = _graph_components_of(spec, place_names_to_tokens, check_tokens)
+        if GraphSpecCache.contains(spec):
+            return ExecutableGraph.model_construct(**components, allow_token_copying=spec.allow_token_copying)
+        graph = ExecutableGraph(**components, allow_token_copying=spec.allow_token_copying)
+        GraphSpecCache.add(spec)
+        return graph
+
+    def fork(executable_graph: ExecutableGraph) -> ExecutableGraph:
+        """A copy of the graph's marking and counters that shares its topology, to run a what-if continuation.
+
+        Forking costs one shallow copy of each place's token list, so it is linear in the number of tokens. The
+        transitions, edges and transition selector are shared with the original. The token objects are shared too,
+        so branches stay independent only if transitions do not modify their input tokens in place. The fork keeps
+        ``step_count`` and ``fired_counts`` and starts with empty histories and no open streams. A clock is copied,
+        so simulated time moves on separately in each branch. Stateful selectors rebuild their state when they are
+        called with a different graph; pass each branch its own selector when the selectors hold a random state.
+        Source transitions keep the state of their iterator on the node, so graphs with them cannot be forked.
+        """
+        if any(isinstance(transition, SourceTransitionNode) for transition in executable_graph.transitions):
+            raise ValueError("Source transitions hold per-net iterator state, so the graph cannot be forked.")
+        places = []
+        for place in executable_graph.places:
+            forked_place = place.model_copy(update={"tokens": list(place.tokens)})
+            forked_place._room_waiters = []
+            forked_place._streams = []
+            places.append(forked_place)
+        forked_graph = executable_graph.model_copy(update={
+            "places": places,
+            "fired_counts": dict(executable_graph.fired_counts),
+            "transition_history": [],
+            "input_place_history": [],
+            "output_place_history": [],
+            "token_history": [],
+            "clock": deepcopy(executable_graph.clock),
+        })
+        forked_graph._places_changed_outside_fires = {}
+        forked_graph._transitions_changed_outside_fires = {}
+        forked_graph._lookups = None
+        return forked_graph
 
     def update_output_place_with_result_tokens(result: Any, place: ListPlaceNode) -> None:
         """Update the given place by appending the result token to its tokens list."""
@@ -551,22 +1590,11 @@ class ExecutableGraphOperations:
             place = place_names_to_nodes[edge.place_node_name]
             place_copy = place.copy_sans_tokens()
             input_places.append(place_copy)
-            argument_type = get_type_hints(transition.function).get(edge.argument)
-            place_type = place.type
             # Two cases - passing a single token or passing all tokens as a list.
-            print("argument_type:", argument_type   
-                  , "place_type:", place_type
-                  , "place.tokens:", place.tokens
-                  )
-            argument_origin = get_origin(argument_type)
-            print("argument_origin is list:", argument_origin is list)
-            if argument_origin is list and CompareTypes.between_annotations_where_one_maybe_in_list(
-                annotation_not_in_list=place_type,
-                annotation_maybe_in_list=argument_type,
-            ):  # If the argument type is a list and the type inside the list matches the place type,
+            if ExecutableGraphCheck.argument_takes_all_tokens(transition, edge, place):
+                # If the argument type is a list and the type inside the list matches the place type,
                 # pass all tokens as a list.
                 tokens = place.tokens
-                print("tokens to pass as list:", tokens)
                 place.tokens = []
                 if allow_token_copying and token_history_length >= 1:
                     tokens_copy = deepcopy(tokens)
@@ -574,7 +1602,6 @@ class ExecutableGraphOperations:
                 input_edge_names_to_tokens[edge.argument] = tokens
             else:  # Pass in a single token.
                 token = place.tokens.pop()
-                print("token to pass as single:", token)
                 # if place_history_length >= 1:
                 if allow_token_copying and token_history_length >= 1:
                     token_copy = deepcopy(token)
@@ -588,16 +1615,24 @@ class ExecutableGraphOperations:
         transition_names_to_outgoing_edges: dict[str, tuple[ReturnedEdgeFromTransition, ...]],
         place_names_to_nodes: dict[str, ListPlaceNode],
         allow_token_copying: bool = False,
+        output_routing: Optional["OutputRouting"] = None,
+        check_declared_distributions: bool = False,
     ) -> dict[ListPlaceNode, Any]:
-        """Call the transition function and match output tokens to destination places.
+        """Call the transition function, or look its result up in the transition's cache, and match output tokens
+        to destination places.
 
         Return a mapping of output places to the tokens to be added to them.
+        If an ``OutputRouting`` is given, the matching places are looked up in its memo instead of being recomputed.
+        Tokens from an output distribution function with declared ``distribution_places`` are only checked against
+        the declaration, unless ``check_declared_distributions`` is set.
         """
         if transition.kwargs is not None:
             merged_kwargs = SafeMerge.dictionaries(tokens_kwargs, transition.kwargs)
         else:
             merged_kwargs = tokens_kwargs
-        if inspect.iscoroutinefunction(transition.function):
+        if transition.cache is not None:
+            result = await transition.cache.call(transition.function, merged_kwargs)
+        elif inspect.iscoroutinefunction(transition.function):
             result = await transition.function(**merged_kwargs)
         else:
             result = transition.function(**merged_kwargs)
@@ -605,12 +1640,15 @@ class ExecutableGraphOperations:
         outgoing_edges: tuple[ReturnedEdgeFromTransition, ...] = transition_names_to_outgoing_edges[transition.name]
         if transition.output_distribution_function is None:
             # Use place types to determine where tokens should go.
-            potential_output_places: Iterable[ListPlaceNode] = tuple(
-                place_names_to_nodes[edge.place_node_name] for edge in outgoing_edges
-            )
-            matching_places: Iterable[ListPlaceNode] = ExecutableGraphCheck.value_and_places_types_match(
-                result, potential_output_places,
-            )
+            if output_routing is not None:
+                matching_places = output_routing.matching_places(transition, result)
+            else:
+                potential_output_places: Iterable[ListPlaceNode] = tuple(
+                    place_names_to_nodes[edge.place_node_name] for edge in outgoing_edges
+                )
+                matching_places: Iterable[ListPlaceNode] = ExecutableGraphCheck.value_and_places_types_match(
+                    result, potential_output_places,
+                )
             if len(matching_places) > 1 and not allow_token_copying:
                 # Multiple matching places but token copying is not allowed.
                 raise ValueError(
@@ -636,6 +1674,17 @@ class ExecutableGraphOperations:
                     )
                 else:
                     raise ValueError("Unexpected branch...")
+        elif transition.distribution_places is not None and not check_declared_distributions:
+            # The destinations and return edges were validated when the graph was built.
+            destination_place_names_to_tokens = transition.output_distribution_function(result)
+            if not destination_place_names_to_tokens:
+                raise ValueError(
+                    "Unexpected branch: no output places found for the result of the transition."
+                )
+            for place_name, token in destination_place_names_to_tokens.items():
+                ExecutableGraphCheck.ensure_place_is_declared_distribution_place(transition, place_name)
+                if token is not None:
+                    output_place_names_to_tokens[place_name] = token
         else:  # TODO: create and test separate functions for these two branches.
             # Use the given output distribution function to determine where the tokens should go.
             if not ExecutableGraphCheck.all_return_indices_are_none(outgoing_edges):
@@ -653,6 +1702,8 @@ class ExecutableGraphOperations:
             # destinations and the allow_token_copying flag don't change what we
             # do here: place each (place_name -> token) the distributor produced.
             for place_name, token in destination_place_names_to_tokens.items():
+                if transition.distribution_places is not None:
+                    ExecutableGraphCheck.ensure_place_is_declared_distribution_place(transition, place_name)
                 destination_place = place_names_to_nodes[place_name]
                 ExecutableGraphCheck.ensure_token_type_matches_place_type(token, destination_place)
                 if token is not None:
@@ -736,8 +1787,26 @@ class ExecutableGraphOperations:
                     CompareTypes.between_value_and_type(token_or_list_to_add, place.type)
                 place.tokens.append(token_or_list_to_add)
             updated_places[place_name] = place
+        for place in updated_places.values():
+            if place.streaming:
+                place.hand_off_tokens()
         return updated_places
 
+    async def add_token_when_room_available(
+        executable_graph: ExecutableGraph, place_name: PlaceNodeName, token: Any
+    ) -> None:
+        """Add a token to a place from outside the net, waiting while the place is at capacity.
+
+        Intended for async producers running alongside ``execute_graph`` on the same event loop: the producer is
+        suspended until a transition consumes from the place, which bounds how far it can run ahead of the net.
+        """
+        place = executable_graph.place_named(place_name)
+        if place is None:
+            raise ValueError(f"Unknown place: {place_name}")
+        ExecutableGraphCheck.ensure_token_type_matches_place_type(token, place)
+        await place.wait_for_room()
+        place.tokens.append(token)
+        executable_graph.mark_place_changed(place_name)
 
     async def execute_graph(
         executable_graph: ExecutableGraph,
@@ -748,6 +1817,8 @@ class ExecutableGraphOperations:
         place_history_length=1,
         token_history_length=0,
         transition_selector: Optional[Callable[[ExecutableGraph, list[FunctionTransitionNode]], Optional[FunctionTransitionNode]]] = None,
+        check_declared_distributions: bool = False,
+        until: Optional[float] = None,
     ) -> tuple[ExecutableGraph, int]:
         """Execute the Petri net graph.
 
@@ -766,6 +1837,15 @@ class ExecutableGraphOperations:
             transition_selector: Optional function to select which transition to fire.
                 Signature: (graph, enabled_transitions) -> transition_to_fire
                 If None, uses graph.transition_selector or default behavior.
+                Selectors with a truthy ``tracks_enabled_transitions`` attribute receive an empty list and are
+                expected to determine the enabled transitions themselves.
+            check_declared_distributions: Debug mode that type checks every token delivered by an output
+                distribution function, including those of transitions with declared ``distribution_places``.
+            until: For graphs with a ``clock``, stop instead of waiting for a deadline later than this time.
+
+        When nothing can fire and the graph has a ``clock``, execution sleeps on the clock until the next deadline
+        (see ``ExecutableGraphCheck.next_deadline``) and tries again; a ``VirtualClock`` jumps to it at once. It stops
+        when there is no deadline left. Without a clock it stops straight away.
 
         Returns:
             Tuple of (updated_graph, transitions_fired_count)
@@ -792,34 +1872,61 @@ class ExecutableGraphOperations:
         transitions_fired = 0
         # Reset per call so it reflects only this invocation (None if nothing fires).
         executable_graph.last_fired = None
+        executable_graph.last_changed_places = ()
         ExecutableGraphCheck.ensure_all_token_types_match_place_types(executable_graph)
-        place_names_to_nodes: dict[str, ListPlaceNode] = MapPlaceNames.to_list_place_nodes(executable_graph)
-        transition_names_to_incoming_edges: dict[str, tuple[ArgumentEdgeToTransition, ...]] = \
-            MapTransitionNames.to_incoming_edges(executable_graph)
-        transition_names_to_outgoing_edges: dict[str, tuple[ReturnedEdgeFromTransition, ...]] = \
-            MapTransitionNames.to_outgoing_edges(executable_graph)
+        lookups = executable_graph.lookups()
+        place_names_to_nodes = lookups.place_names_to_nodes
+        transition_names_to_incoming_edges = lookups.transition_names_to_incoming_edges
+        transition_names_to_outgoing_edges = lookups.transition_names_to_outgoing_edges
+        source_transitions = lookups.source_transitions
+        for source in source_transitions:
+            source.watch(executable_graph.mark_transition_changed)
+        output_routing = lookups.output_routing
 
         while True:
-            if transitions_fired >= max_transitions:
+            if max_transitions is not None and transitions_fired >= max_transitions:
                 if verbose:
                     print(f"Performed {transitions_fired} transitions, maximum transitions count reached.")
                 return executable_graph, transitions_fired
 
-            # Get all enabled transitions (those with sufficient tokens)
+            # Get all enabled transitions (those with sufficient tokens). Selectors that keep their own
+            # incremental view of the enabled transitions opt out of this O(T) scan.
             enabled_transitions = []
-            for transition in reversed(executable_graph.transitions):  # Preserve ordering for default behavior
-                if ExecutableGraphCheck.sufficient_tokens_are_available(
-                    transition=transition,
-                    transition_names_to_incoming_edges=transition_names_to_incoming_edges,
-                    place_names_to_nodes=place_names_to_nodes,
-                ):
-                    enabled_transitions.append(transition)
+            if not getattr(selector, "tracks_enabled_transitions", False):
+                for transition in reversed(executable_graph.transitions):  # Preserve ordering for default behavior
+                    if ExecutableGraphCheck.transition_is_enabled(
+                        transition=transition,
+                        transition_names_to_incoming_edges=transition_names_to_incoming_edges,
+                        transition_names_to_outgoing_edges=transition_names_to_outgoing_edges,
+                        place_names_to_nodes=place_names_to_nodes,
+                    ):
+                        enabled_transitions.append(transition)
 
             # Let selector choose which transition to fire
             transition = selector(executable_graph, enabled_transitions)
 
             if transition is None:
-                print(f"Performed {transitions_fired} transitions, no more valid transitions remaining.")
+                waits = [
+                    asyncio.ensure_future(source.wait_for_item())
+                    for source in source_transitions if source.is_pending()
+                ] + [
+                    asyncio.ensure_future(place.wait_for_stream_consumers())
+                    for place in lookups.streaming_places if place.is_held_back_by_streams()
+                ]
+                if waits:
+                    # Nothing can fire yet but async sources are still producing, or stream consumers have yet to
+                    # make room in a full streaming place; wait for one of them.
+                    _, still_waiting = await asyncio.wait(waits, return_when=asyncio.FIRST_COMPLETED)
+                    for wait in still_waiting:
+                        wait.cancel()
+                    continue
+                if executable_graph.clock is not None:
+                    deadline = ExecutableGraphCheck.next_deadline(executable_graph)
+                    if deadline is not None and (until is None or deadline <= until):
+                        await executable_graph.clock.sleep_until(deadline)
+                        continue
+                if verbose:
+                    print(f"Performed {transitions_fired} transitions, no more valid transitions remaining.")
                 return executable_graph, transitions_fired
             # input_history, output_history = await ExecutableGraphOperations.old_fire_transition(
             #     transition=transition,
@@ -839,12 +1946,20 @@ class ExecutableGraphOperations:
                 # place_history_length=place_history_length,
                 token_history_length=token_history_length,
             )
+            # Consuming tokens may have made room in a capacity-limited place; let waiting producers run.
+            room_was_awaited = False
+            for input_place in input_places:
+                room_was_awaited |= place_names_to_nodes[input_place.name].notify_room_available()
+            if room_was_awaited:
+                await asyncio.sleep(0)
             output_place_names_to_tokens = await ExecutableGraphOperations.stage_2_call_transition_function(
                 transition=transition,
                 tokens_kwargs=input_args_to_tokens,
                 transition_names_to_outgoing_edges=transition_names_to_outgoing_edges,
                 place_names_to_nodes=place_names_to_nodes,
                 allow_token_copying=allow_token_copying,
+                output_routing=output_routing,
+                check_declared_distributions=check_declared_distributions,
             )
             updated_places_dict = ExecutableGraphOperations.add_tokens_to_places(
                 output_place_names_to_tokens=output_place_names_to_tokens,
@@ -859,6 +1974,9 @@ class ExecutableGraphOperations:
             executable_graph.step_count += 1
             # Authoritative "what just fired" — independent of history config.
             executable_graph.last_fired = transition.name
+            executable_graph.last_changed_places = (
+                tuple(place.name for place in input_places) + tuple(updated_places_dict.keys())
+            )
             # Cumulative per-transition tally — monotonic, never trimmed.
             executable_graph.fired_counts[transition.name] = (
                 executable_graph.fired_counts.get(transition.name, 0) + 1
@@ -880,3 +1998,6 @@ class ExecutableGraphOperations:
                 if len(executable_graph.input_place_history) > place_history_length:
                     executable_graph.input_place_history.pop(0)
                     executable_graph.output_place_history.pop(0)
+            if any(place.has_open_streams() for place in output_places):
+                # Let stream consumers take the tokens before the next fire.
+                await asyncio.sleep(0)
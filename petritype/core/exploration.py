@@ -0,0 +1,334 @@
+"""Explicit-state exploration of the reachable token counts of a net.
+
+``StateSpaceExplorer`` visits every marking of the count abstraction of a net (see ``petritype.core.analysis``)
+that is reachable from its initial marking, breadth first. It checks each one against named invariants, and reports
+the dead markings, in which nothing can fire. Places are typed, so a per-place token count is also a per-type count.
+Every failure comes with the shortest firing sequence that reaches it, and that sequence can be replayed through
+``execute_graph``:
+
+    explorer = StateSpaceExplorer(graph, invariants={
+        'one holder': lambda counts: counts['Busy1'] + counts['Busy2'] <= 1,
+    }, terminal=lambda counts: counts['Done'] == 3)
+    result = explorer.explore(max_states=10_000_000, workers=8)
+    assert result.complete and not result.counterexamples, result.counterexamples
+    graph = await result.counterexamples[0].replay(graph)     # Fires the trace in a fresh graph
+
+Invariants and ``terminal`` receive a dict from place name to an array of the token counts of a batch of markings,
+and return one boolean per marking. ``terminal`` holds in the dead markings that are expected, e.g. all work done.
+
+The markings that have been seen are kept in an open-addressing hash set of 64-bit fingerprints. Equal fingerprints
+are confirmed by comparing the markings, so no state is ever lost to a collision. Each marking is stored once, in
+the narrowest unsigned integer type that holds its counts, with its parent and the transition that reached it.
+Lookups and insertions are vectorised over a whole frontier. With ``workers`` above one, each frontier is split into
+chunks that worker processes expand, while the main process deduplicates the successors and checks the invariants.
+
+Activation functions are ignored, as in every count-abstraction analysis. A net whose guards rule out a reported
+counterexample fails to replay it, with a RuntimeError at the step the guard blocks. A transition with several
+output places has its output place chosen by its function at replay, so such a trace may also be replayed along a
+different branch.
+"""
+
+import multiprocessing
+from typing import Callable, Mapping, Optional
+
+import numpy as np
+from numpy.random import SFC64, Generator
+from pydantic import BaseModel
+
+from petritype.core.count_net import CountNet
+from petritype.core.data_structures import PlaceNodeName, TransitionNodeName
+from petritype.core.executable_graph_components import ExecutableGraph, ExecutableGraphOperations
+from petritype.core.transition_selectors import TraceSelector
+
+
+type Counts = dict[PlaceNodeName, np.ndarray]
+type Invariant = Callable[[Counts], np.ndarray]
+
+DEADLOCK = "deadlock"  # The property of a counterexample that is a dead marking not accepted by ``terminal``.
+
+
+class Counterexample(BaseModel):
+    """A reachable marking that breaks a property, with the shortest firing sequence that reaches it.
+
+    Attributes:
+        property: The name of the violated invariant, or ``DEADLOCK``
+        marking: Token count per place
+        trace: The net transitions fired to reach the marking from the initial marking
+    """
+    property: str
+    marking: dict[PlaceNodeName, int]
+    trace: tuple[TransitionNodeName, ...]
+
+    async def replay(self, executable_graph: ExecutableGraph) -> ExecutableGraph:
+        """Fire the trace in ``executable_graph``, which should hold the initial marking, and return it."""
+        await ExecutableGraphOperations.execute_graph(
+            executable_graph, max_transitions=len(self.trace), transition_selector=TraceSelector(self.trace),
+        )
+        return executable_graph
+
+
+class ExplorationResult(BaseModel):
+    """The outcome of a ``StateSpaceExplorer.explore`` call.
+
+    Attributes:
+        complete: Whether every reachable marking was visited within ``max_states``. If not, the other attributes
+            describe the visited markings only.
+        state_count: Number of distinct markings visited
+        edge_count: Number of firings explored, between visited markings or into the unvisited rest
+        depth: The length of the longest of the shortest firing sequences to the visited markings
+        place_bounds: The largest token count of each place
+        counterexamples: Up to ``max_counterexamples`` failures, in the order they were found
+    """
+    complete: bool
+    state_count: int
+    edge_count: int
+    depth: int
+    place_bounds: dict[PlaceNodeName, int]
+    counterexamples: tuple[Counterexample, ...]
+
+
+class StateSpaceExplorer:
+    """Breadth-first exploration of the reachable markings of a net. See the module docstring.
+
+    Args:
+        executable_graph: The net, in its initial marking.
+        invariants: Named predicates that must hold in every reachable marking.
+        terminal: A predicate that holds in the dead markings that are not deadlocks. Without it, every dead
+            marking is a deadlock; with ``check_deadlocks=False`` none are.
+        check_deadlocks: Whether to report dead markings at all.
+    """
+
+    def __init__(
+        self,
+        executable_graph: ExecutableGraph,
+        invariants: Optional[Mapping[str, Invariant]] = None,
+        terminal: Optional[Invariant] = None,
+        check_deadlocks: bool = True,
+    ):
+        self.net = CountNet(executable_graph)
+        self.invariants = dict(invariants or {})
+        self.terminal = terminal
+        self.check_deadlocks = check_deadlocks
+
+    def explore(
+        self,
+        max_states: int = 1_000_000,
+        max_counterexamples: int = 10,
+        workers: int = 1,
+        chunk_size: int = 65_536,
+        start_method: Optional[str] = None,
+    ) -> ExplorationResult:
+        """Visit the reachable markings, at most ``max_states`` of them.
+
+        Args:
+            max_states: The number of distinct markings after which exploration stops, incomplete.
+            max_counterexamples: Failures to report; exploration goes on after the last one for the statistics.
+            workers: Processes that expand frontiers; 1 expands them in this process.
+            chunk_size: Markings per chunk that a worker expands at a time.
+            start_method: ``multiprocessing`` start method; defaults to the platform default.
+        """
+        net = self.net
+        states = _MarkingSet(len(net.place_names))
+        parents = _GrowingArray(np.int64)
+        via = _GrowingArray(np.int32)
+        counterexamples: list[Counterexample] = []
+
+        def record(name: str, indices: np.ndarray) -> None:
+            for index in indices[:max(0, max_counterexamples - len(counterexamples))].tolist():
+                marking = states.rows(index)
+                counterexamples.append(Counterexample(
+                    property=name,
+                    marking={place: int(count) for place, count in zip(net.place_names, marking)},
+                    trace=self._trace(index, parents.values(), via.values()),
+                ))
+
+        def visit(indices: np.ndarray, origins: np.ndarray, transitions: np.ndarray) -> None:
+            parents.extend(origins)
+            via.extend(transitions)
+            markings = states.rows(indices)
+            for name, invariant in self.invariants.items():
+                record(name, indices[~self._holds(invariant, markings)])
+
+        states.add(net.initial_marking[None, :])
+        frontier = np.arange(1)
+        visit(frontier, np.array([-1]), np.array([-1]))
+        complete = True
+        edge_count = 0
+        depth = 0
+        pool = multiprocessing.get_context(start_method).Pool(
+            workers, initializer=_initialise_worker, initargs=(net,),
+        ) if workers > 1 else None
+        try:
+            while len(frontier):
+                chunks = [frontier[start:start + chunk_size] for start in range(0, len(frontier), chunk_size)]
+                markings = [states.rows(chunk) for chunk in chunks]
+                if pool is not None:
+                    expanded = pool.map(_expand, markings)
+                else:
+                    expanded = [_expand(part, net) for part in markings]
+                origins = np.concatenate([chunk[origin] for chunk, (origin, _, _) in zip(chunks, expanded)])
+                transitions = np.concatenate([transition for _, transition, _ in expanded])
+                successors = np.concatenate([successor for _, _, successor in expanded])
+                edge_count += len(successors)
+                if self.check_deadlocks:
+                    dead = np.setdiff1d(frontier, origins)
+                    if len(dead) and self.terminal is not None:
+                        dead = dead[~self._holds(self.terminal, states.rows(dead))]
+                    record(DEADLOCK, dead)
+                indices, new = states.add(successors)
+                # New markings are numbered consecutively, in an order of their own.
+                discovered = np.flatnonzero(new)
+                discovered = discovered[np.argsort(indices[discovered])]
+                frontier = indices[discovered]
+                visit(frontier, origins[discovered], transitions[discovered])
+                depth += bool(len(frontier))
+                if len(states) > max_states:
+                    complete = False
+                    break
+        finally:
+            if pool is not None:
+                pool.terminate()
+        return ExplorationResult(
+            complete=complete,
+            state_count=len(states),
+            edge_count=edge_count,
+            depth=depth,
+            place_bounds={name: int(bound) for name, bound in zip(net.place_names, states.maximum())},
+            counterexamples=tuple(counterexamples),
+        )
+
+    def _holds(self, predicate: Invariant, markings: np.ndarray) -> np.ndarray:
+        counts = {name: markings[:, column].astype(np.int64) for column, name in enumerate(self.net.place_names)}
+        return np.broadcast_to(np.asarray(predicate(counts), dtype=bool), (len(markings),))
+
+    def _trace(self, index: int, parents: np.ndarray, via: np.ndarray) -> tuple[TransitionNodeName, ...]:
+        trace = []
+        while parents[index] >= 0:
+            trace.append(self.net.transition_of[self.net.transition_names[via[index]]])
+            index = parents[index]
+        return tuple(reversed(trace))
+
+
+class _GrowingArray:
+    """A one-dimensional array that doubles its storage as it grows."""
+
+    def __init__(self, dtype: type):
+        self._data = np.zeros(1024, dtype=dtype)
+        self._count = 0
+
+    def extend(self, values: np.ndarray) -> None:
+        needed = self._count + len(values)
+        if needed > len(self._data):
+            self._data = np.resize(self._data, max(needed, 2 * len(self._data)))
+        self._data[self._count:needed] = values
+        self._count = needed
+
+    def values(self) -> np.ndarray:
+        return self._data[:self._count]
+
+
+class _MarkingSet:
+    """Distinct markings, numbered in the order they were added. See the module docstring."""
+
+    _DTYPES = (np.uint8, np.uint16, np.uint32, np.uint64)
+
+    def __init__(self, place_count: int):
+        self._multipliers = Generator(SFC64(0)).integers(0, 2**63, size=place_count, dtype=np.uint64) * 2 + 1
+        self._rows = np.zeros((1024, place_count), dtype=np.uint8)
+        self._fingerprints = np.zeros(1024, dtype=np.uint64)
+        self._count = 0
+        self._slots = np.full(2048, -1, dtype=np.int64)  # Index of the marking in each slot, -1 if empty.
+
+    def __len__(self) -> int:
+        return self._count
+
+    def rows(self, indices: np.ndarray) -> np.ndarray:
+        return self._rows[indices]
+
+    def maximum(self) -> np.ndarray:
+        return self._rows[:self._count].max(axis=0)
+
+    def add(self, markings: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """The index of each marking in the set, and whether it was new. Markings added twice get one index."""
+        self._reserve(len(markings), int(markings.max(initial=0)))
+        fingerprints = self._fingerprint(markings)
+        indices = np.full(len(markings), -1, dtype=np.int64)
+        new = np.zeros(len(markings), dtype=bool)
+        positions = fingerprints & np.uint64(len(self._slots) - 1)
+        pending = np.arange(len(markings))
+        while len(pending):
+            slots = positions[pending].astype(np.intp)
+            occupants = self._slots[slots]
+            occupied = occupants >= 0
+            matches = np.zeros(len(pending), dtype=bool)
+            matches[occupied] = (self._fingerprints[occupants[occupied]] == fingerprints[pending[occupied]]) & np.all(
+                self._rows[occupants[occupied]] == markings[pending[occupied]], axis=1,
+            )
+            indices[pending[matches]] = occupants[matches]
+            # The first of the markings probing an empty slot takes it; the others probe it again, now occupied.
+            empty = np.flatnonzero(~occupied)
+            _, first = np.unique(slots[empty], return_index=True)
+            winners = pending[empty[first]]
+            added = np.arange(self._count, self._count + len(winners))
+            self._rows[added] = markings[winners]
+            self._fingerprints[added] = fingerprints[winners]
+            self._slots[slots[empty[first]]] = added
+            self._count += len(winners)
+            indices[winners] = added
+            new[winners] = True
+            moving = occupied & ~matches
+            positions[pending[moving]] = (positions[pending[moving]] + np.uint64(1)) & np.uint64(len(self._slots) - 1)
+            pending = pending[indices[pending] < 0]
+        return indices, new
+
+    def _fingerprint(self, markings: np.ndarray) -> np.ndarray:
+        # Integer arithmetic wraps modulo 2**64; the shifts and multiplication mix the high bits into the low ones.
+        fingerprints = markings.astype(np.uint64) @ self._multipliers
+        fingerprints ^= fingerprints >> np.uint64(31)
+        fingerprints *= np.uint64(0x9E3779B97F4A7C15)
+        fingerprints ^= fingerprints >> np.uint64(29)
+        return fingerprints
+
+    def _reserve(self, count: int, largest: int) -> None:
+        """Make room for ``count`` more markings with counts up to ``largest``, keeping the table at most half full."""
+        dtype = next(dtype for dtype in self._DTYPES if largest <= np.iinfo(dtype).max)
+        if np.iinfo(dtype).max > np.iinfo(self._rows.dtype).max:
+            self._rows = self._rows.astype(dtype)
+        needed = self._count + count
+        if needed > len(self._rows):
+            size = max(needed, 2 * len(self._rows))
+            self._rows = np.resize(self._rows, (size, self._rows.shape[1]))
+            self._fingerprints = np.resize(self._fingerprints, size)
+        if 2 * needed > len(self._slots):
+            size = len(self._slots)
+            while 2 * needed > size:
+                size *= 2
+            self._rehash(size)
+
+    def _rehash(self, size: int) -> None:
+        self._slots = np.full(size, -1, dtype=np.int64)
+        positions = self._fingerprints[:self._count] & np.uint64(size - 1)
+        pending = np.arange(self._count)
+        while len(pending):
+            slots = positions[pending].astype(np.intp)
+            empty = np.flatnonzero(self._slots[slots] < 0)
+            _, first = np.unique(slots[empty], return_index=True)
+            self._slots[slots[empty[first]]] = pending[empty[first]]
+            placed = np.zeros(len(pending), dtype=bool)
+            placed[empty[first]] = True
+            # Every slot probed is taken now, so the markings that were not placed move on.
+            pending = pending[~placed]
+            positions[pending] = (positions[pending] + np.uint64(1)) & np.uint64(size - 1)
+
+
+_worker_net: Optional[CountNet] = None
+
+
+def _initialise_worker(net: CountNet) -> None:
+    global _worker_net
+    _worker_net = net
+
+
+def _expand(markings: np.ndarray, net: Optional[CountNet] = None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """The successors of a chunk of markings, as ``CountNet.successors`` returns them."""
+    return (net or _worker_net).successors(markings.astype(np.int64))
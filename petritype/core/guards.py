@@ -0,0 +1,248 @@
+"""Declarative activation guards that can be evaluated for many transitions at once.
+
+A guard is built from place-count comparisons and time windows and combined with ``&``:
+
+    FunctionTransitionNode(
+        'Batch', batch_process,
+        activation_function=(PlaceCount('Pool') >= 10) & TimeWindow(end=closing_time),
+    )
+
+Note the parentheses: ``&`` binds more tightly than the comparison operators.
+
+A ``Guard`` is callable as ``guard(graph) -> bool``, so it works as an ``activation_function`` with any selector. The
+``GuardSelector`` in ``transition_selectors`` goes further and uses ``CompiledGuards`` to evaluate the guards of every
+transition, together with the "has an input token" check, as one vectorised pass over an array of place token counts.
+
+Time windows are compared with ``graph.now()``, the time of the graph's clock (see ``petritype.core.clock``). When
+nothing can fire, ``execute_graph`` on a graph with a clock waits for the next window to open.
+"""
+
+import operator
+import time
+from typing import Literal, Optional, Sequence, Union
+
+import numpy as np
+from pydantic import BaseModel
+
+from petritype.core.data_structures import PlaceNodeName
+from petritype.core.executable_graph_components import (
+    ArgumentEdgeToTransition, ExecutableGraph, ExecutableGraphCheck, FunctionTransitionNode, ListPlaceNode,
+    ReturnedEdgeFromTransition, SourceTransitionNode,
+)
+
+
+type Comparison = Literal[">=", ">", "<=", "<", "==", "!="]
+
+_PYTHON_COMPARISONS = {
+    ">=": operator.ge, ">": operator.gt, "<=": operator.le, "<": operator.lt, "==": operator.eq, "!=": operator.ne,
+}
+_NUMPY_COMPARISONS = {
+    ">=": np.greater_equal, ">": np.greater, "<=": np.less_equal, "<": np.less, "==": np.equal, "!=": np.not_equal,
+}
+
+
+class PlaceCountClause(BaseModel):
+    """Holds when ``len(place.tokens) <comparison> threshold``."""
+    place_name: PlaceNodeName
+    comparison: Comparison
+    threshold: float
+
+    model_config = {"frozen": True}
+
+    def holds(self, graph: ExecutableGraph, now: float) -> bool:
+        place = graph.place_named(self.place_name)
+        if place is None:
+            raise ValueError(f"Guard references unknown place: {self.place_name}")
+        return _PYTHON_COMPARISONS[self.comparison](len(place.tokens), self.threshold)
+
+
+class TimeWindowClause(BaseModel):
+    """Holds when ``start <= now < end``; a missing bound is unbounded."""
+    start: Optional[float] = None
+    end: Optional[float] = None
+
+    model_config = {"frozen": True}
+
+    def holds(self, graph: ExecutableGraph, now: float) -> bool:
+        return (self.start is None or now >= self.start) and (self.end is None or now < self.end)
+
+
+type GuardClause = Union[PlaceCountClause, TimeWindowClause]
+
+
+class Guard(BaseModel):
+    """A conjunction of clauses. Callable as ``guard(graph) -> bool`` so it can be used as an activation function."""
+    clauses: tuple[GuardClause, ...]
+
+    model_config = {"frozen": True}
+
+    def __and__(self, other: "Guard") -> "Guard":
+        if not isinstance(other, Guard):
+            return NotImplemented
+        return Guard(clauses=self.clauses + other.clauses)
+
+    def __call__(self, graph: Optional[ExecutableGraph]) -> bool:
+        """Evaluate the guard on ``graph``. Without a graph only time windows can be checked, against the wall clock."""
+        if graph is None:
+            if any(isinstance(clause, PlaceCountClause) for clause in self.clauses):
+                raise ValueError("A guard with place count clauses needs a graph to be evaluated against.")
+            now = time.time()
+        else:
+            now = graph.now()
+        return all(clause.holds(graph, now) for clause in self.clauses)
+
+    def next_deadline(self, now: float) -> Optional[float]:
+        """The earliest time window start after ``now``, or None if no window opens later."""
+        starts = [
+            clause.start for clause in self.clauses
+            if isinstance(clause, TimeWindowClause) and clause.start is not None and clause.start > now
+        ]
+        return min(starts, default=None)
+
+    def with_place_names(self, place_names: dict[PlaceNodeName, PlaceNodeName]) -> "Guard":
+        """The same guard with its place names translated through ``place_names``, used to flatten subnets."""
+        clauses = tuple(
+            clause.model_copy(update={"place_name": place_names.get(clause.place_name, clause.place_name)})
+            if isinstance(clause, PlaceCountClause) else clause
+            for clause in self.clauses
+        )
+        return Guard(clauses=clauses)
+
+
+class TimeWindow(Guard):
+    """A guard that holds while the time of the graph's clock (seconds since the epoch by default) lies in
+    ``[start, end)``."""
+
+    def __init__(self, start: Optional[float] = None, end: Optional[float] = None):
+        super().__init__(clauses=(TimeWindowClause(start=start, end=end),))
+
+
+class PlaceCount:
+    """Builds place-count guards: ``PlaceCount('Pool') >= 10``."""
+
+    def __init__(self, place_name: PlaceNodeName):
+        self.place_name = place_name
+
+    def _guard(self, comparison: Comparison, threshold: float) -> Guard:
+        clause = PlaceCountClause(place_name=self.place_name, comparison=comparison, threshold=threshold)
+        return Guard(clauses=(clause,))
+
+    def __ge__(self, threshold: float) -> Guard:
+        return self._guard(">=", threshold)
+
+    def __gt__(self, threshold: float) -> Guard:
+        return self._guard(">", threshold)
+
+    def __le__(self, threshold: float) -> Guard:
+        return self._guard("<=", threshold)
+
+    def __lt__(self, threshold: float) -> Guard:
+        return self._guard("<", threshold)
+
+    def __eq__(self, threshold: float) -> Guard:
+        return self._guard("==", threshold)
+
+    def __ne__(self, threshold: float) -> Guard:
+        return self._guard("!=", threshold)
+
+    __hash__ = None
+
+
+class CompiledGuards:
+    """The token-availability checks and declarative guards of a graph's transitions, as flat numpy arrays.
+
+    Each transition contributes one ``count >= 1`` clause per distinct input place, one ``count <= room`` clause per
+    capacity-limited output place (see ``ExecutableGraphCheck.output_capacity_is_available``) and the place-count
+    clauses of its ``Guard``. ``evaluate`` compares all clauses in one pass and reduces them per transition.
+    Transitions whose activation function is not a ``Guard`` are flagged in ``has_fallback`` so the caller can
+    evaluate them in Python, and source transitions are flagged in ``is_source`` so the caller can check whether their
+    iterator has an item ready.
+    """
+
+    def __init__(
+        self,
+        places: Sequence[ListPlaceNode],
+        transitions: Sequence[FunctionTransitionNode],
+        transition_names_to_incoming_edges: dict[str, tuple[ArgumentEdgeToTransition, ...]],
+        transition_names_to_outgoing_edges: dict[str, tuple[ReturnedEdgeFromTransition, ...]],
+    ):
+        places_by_name = {place.name: place for place in places}
+        self.place_indices = {place.name: i for i, place in enumerate(places)}
+        self.transition_count = len(transitions)
+        self.has_fallback = np.zeros(self.transition_count, dtype=bool)
+        self.is_source = np.fromiter(
+            (isinstance(transition, SourceTransitionNode) for transition in transitions),
+            dtype=bool, count=self.transition_count,
+        )
+        count_transitions, count_places, count_comparisons, count_thresholds = [], [], [], []
+        time_transitions, time_starts, time_ends = [], [], []
+        for transition_index, transition in enumerate(transitions):
+            incoming_edges = transition_names_to_incoming_edges.get(transition.name, ())
+            for place_name in dict.fromkeys(edge.place_node_name for edge in incoming_edges):
+                count_transitions.append(transition_index)
+                count_places.append(self.place_indices[place_name])
+                count_comparisons.append(">=")
+                count_thresholds.append(1.0)
+            outgoing_edges = transition_names_to_outgoing_edges.get(transition.name, ())
+            for place_name in dict.fromkeys(edge.place_node_name for edge in outgoing_edges):
+                place = places_by_name[place_name]
+                if place.capacity is None:
+                    continue
+                consumed = 0
+                for edge in incoming_edges:
+                    if edge.place_node_name != place_name:
+                        continue
+                    if ExecutableGraphCheck.argument_takes_all_tokens(transition, edge, place):
+                        consumed = None
+                        break
+                    consumed += 1
+                if consumed is None:
+                    continue  # The place is emptied before the output is added.
+                count_transitions.append(transition_index)
+                count_places.append(self.place_indices[place_name])
+                count_comparisons.append("<=")
+                count_thresholds.append(place.capacity - 1 + consumed)
+            guard = transition.activation_function
+            if isinstance(guard, Guard):
+                for clause in guard.clauses:
+                    if isinstance(clause, PlaceCountClause):
+                        if clause.place_name not in self.place_indices:
+                            raise ValueError(
+                                f"Guard of transition '{transition.name}' references unknown place: {clause.place_name}"
+                            )
+                        count_transitions.append(transition_index)
+                        count_places.append(self.place_indices[clause.place_name])
+                        count_comparisons.append(clause.comparison)
+                        count_thresholds.append(clause.threshold)
+                    else:
+                        time_transitions.append(transition_index)
+                        time_starts.append(-np.inf if clause.start is None else clause.start)
+                        time_ends.append(np.inf if clause.end is None else clause.end)
+            elif guard is not None:
+                self.has_fallback[transition_index] = True
+        self.count_transitions = np.asarray(count_transitions, dtype=np.intp)
+        self.count_places = np.asarray(count_places, dtype=np.intp)
+        self.count_thresholds = np.asarray(count_thresholds, dtype=float)
+        comparisons = np.asarray(count_comparisons, dtype=object)
+        self.clauses_by_comparison = {
+            comparison: np.flatnonzero(comparisons == comparison)
+            for comparison in _NUMPY_COMPARISONS
+            if np.any(comparisons == comparison)
+        }
+        self.time_transitions = np.asarray(time_transitions, dtype=np.intp)
+        self.time_starts = np.asarray(time_starts, dtype=float)
+        self.time_ends = np.asarray(time_ends, dtype=float)
+
+    def evaluate(self, place_counts: np.ndarray, now: float) -> np.ndarray:
+        """Return a boolean array, one entry per transition, that is True where every clause holds."""
+        values = place_counts[self.count_places]
+        satisfied = np.empty(len(values), dtype=bool)
+        for comparison, clause_indices in self.clauses_by_comparison.items():
+            satisfied[clause_indices] = _NUMPY_COMPARISONS[comparison](
+                values[clause_indices], self.count_thresholds[clause_indices]
+            )
+        failures = np.bincount(self.count_transitions[~satisfied], minlength=self.transition_count)
+        if len(self.time_transitions):
+            outside_window = (now < self.time_starts) | (now >= self.time_ends)
+            failures += np.bincount(self.time_transitions[outside_window], minlength=self.transition_count)
+        return failures == 0
@@ -0,0 +1,180 @@
+"""Many independent markings over one shared net topology.
+
+An ``ExecutableGraph`` per workflow duplicates the places, transitions, edges and history lists of the net. A
+``NetTemplate`` holds the topology once, in a single working graph, and each ``NetInstance`` holds only its marking
+(one token list per place) and its counters:
+
+    template = NetTemplate(ExecutableGraphOperations.construct_graph(nodes))
+    instances = [template.new_instance({'Orders': [order]}) for order in orders]
+    await template.run(instances, max_transitions=100)
+
+To fire transitions of an instance the template binds the instance's token lists to the working graph's places and
+runs ``execute_graph`` on it. The lookups ``execute_graph`` builds from the topology are cached on the working graph,
+so they are built once per template rather than once per step. Binding assigns list references, so the instance's
+lists are modified in place; the only lists the engine replaces rather than modifies are those of places drained by
+list-mode arguments and of streaming places, and only those are copied back when the instance is unbound.
+"""
+
+from copy import deepcopy
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+from petritype.core.data_structures import PlaceNodeName, TransitionNodeName
+from petritype.core.executable_graph_components import (
+    ExecutableGraph, ExecutableGraphCheck, ExecutableGraphOperations, SourceTransitionNode,
+)
+
+
+class NetInstance:
+    """The marking and counters of one workflow running over a ``NetTemplate``.
+
+    Attributes:
+        marking: One token list per place, in the order of the template's places
+        step_count: Transitions fired by this instance, as ``ExecutableGraph.step_count``
+        fired_counts: Cumulative {transition_name: times_fired}, as ``ExecutableGraph.fired_counts``
+        last_fired: The last transition fired by the instance, or None if it has not fired. Unlike
+            ``ExecutableGraph.last_fired`` it is not reset by steps that fire nothing.
+        transition_selector: The instance's own selector, so a stateful selector's cursor or random state is not
+            carried over from one instance to the next
+    """
+    __slots__ = ("template", "marking", "step_count", "fired_counts", "last_fired", "transition_selector")
+
+    def __init__(
+        self, template: "NetTemplate", marking: list[list[Any]], transition_selector: Optional[Callable] = None
+    ):
+        self.template = template
+        self.marking = marking
+        self.step_count = 0
+        self.fired_counts: dict[TransitionNodeName, int] = {}
+        self.last_fired: Optional[TransitionNodeName] = None
+        self.transition_selector = transition_selector
+
+    def tokens(self, place_name: PlaceNodeName) -> list[Any]:
+        """The tokens the instance holds in the named place."""
+        return self.marking[self.template.place_indices[place_name]]
+
+    def to_dict(self) -> dict[PlaceNodeName, list[Any]]:
+        return {place.name: tokens for place, tokens in zip(self.template.graph.places, self.marking)}
+
+
+class NetTemplate:
+    """The shared topology of many ``NetInstance``s and the executor that fires their transitions.
+
+    The topology is taken from ``graph``; its tokens are ignored. Its ``transition_selector``, if any, is the prototype
+    that every new instance gets a copy of. Source transitions keep the state of their iterator
+    on the transition node, so they cannot be shared between instances and are rejected.
+    """
+
+    def __init__(self, graph: ExecutableGraph):
+        if any(isinstance(transition, SourceTransitionNode) for transition in graph.transitions):
+            raise ValueError("Source transitions hold per-net iterator state and cannot be shared by a NetTemplate.")
+        self.graph: ExecutableGraph = ExecutableGraphOperations.instantiate_graph(
+            ExecutableGraphOperations.graph_spec(graph)
+        )
+        self.transition_selector: Optional[Callable] = graph.transition_selector
+        self.place_indices: dict[PlaceNodeName, int] = {
+            place.name: index for index, place in enumerate(self.graph.places)
+        }
+        self._replaced_place_indices: tuple[int, ...] = self._places_whose_lists_are_replaced()
+
+    def new_instance(
+        self,
+        place_names_to_tokens: Optional[dict[PlaceNodeName, Iterable[Any]]] = None,
+        check_tokens: bool = True,
+        transition_selector: Optional[Callable] = None,
+    ) -> NetInstance:
+        """A new instance with the given initial tokens; places not mentioned start empty.
+
+        The instance uses ``transition_selector`` if given, otherwise a copy of the template's selector.
+        """
+        place_names_to_tokens = place_names_to_tokens or {}
+        unknown_places = set(place_names_to_tokens) - set(self.place_indices)
+        if unknown_places:
+            raise ValueError(f"Tokens given for unknown places: {sorted(unknown_places)}")
+        marking = []
+        for place in self.graph.places:
+            tokens = list(place_names_to_tokens.get(place.name, ()))
+            if check_tokens:
+                for token in tokens:
+                    ExecutableGraphCheck.ensure_token_type_matches_place_type(token, place)
+            marking.append(tokens)
+        if transition_selector is None:
+            transition_selector = deepcopy(self.transition_selector)
+        return NetInstance(self, marking, transition_selector)
+
+    async def step(self, instance: NetInstance, max_transitions: int = 1, **execute_graph_kwargs) -> int:
+        """Fire up to ``max_transitions`` transitions of ``instance``. Return the number fired.
+
+        Keyword arguments are passed on to ``execute_graph``. History is not recorded unless requested, since it
+        would be shared by all instances, and a ``transition_selector`` passed here is likewise shared; set one per
+        instance instead.
+        """
+        if instance.template is not self:
+            raise ValueError("The instance belongs to a different template.")
+        self._bind(instance)
+        execute_graph_kwargs.setdefault("transition_history_length", 0)
+        execute_graph_kwargs.setdefault("place_history_length", 0)
+        try:
+            _, fired = await ExecutableGraphOperations.execute_graph(
+                self.graph, max_transitions=max_transitions, **execute_graph_kwargs
+            )
+        finally:
+            self._sync(instance)
+        return fired
+
+    async def run(
+        self,
+        instances: Sequence[NetInstance],
+        max_transitions: Optional[int] = None,
+        quantum: int = 1,
+        **execute_graph_kwargs,
+    ) -> int:
+        """Interleave the instances until none can fire, ``quantum`` transitions per instance per turn.
+
+        ``max_transitions`` caps the transitions fired per instance in this call. Return the total number fired.
+        """
+        if quantum < 1:
+            raise ValueError(f"Quantum must be at least 1, got {quantum}.")
+        remaining = {id(instance): max_transitions for instance in instances}
+        active = list(instances)
+        total_fired = 0
+        while active:
+            still_active = []
+            for instance in active:
+                budget = quantum if remaining[id(instance)] is None else min(quantum, remaining[id(instance)])
+                fired = await self.step(instance, budget, **execute_graph_kwargs)
+                total_fired += fired
+                if remaining[id(instance)] is not None:
+                    remaining[id(instance)] -= fired
+                if fired == budget and remaining[id(instance)] != 0:
+                    still_active.append(instance)
+            active = still_active
+        return total_fired
+
+    def _bind(self, instance: NetInstance) -> None:
+        graph = self.graph
+        for place, tokens in zip(graph.places, instance.marking):
+            place.tokens = tokens
+        graph.fired_counts = instance.fired_counts
+        graph.step_count = instance.step_count
+        graph.transition_selector = instance.transition_selector
+
+    def _sync(self, instance: NetInstance) -> None:
+        places = self.graph.places
+        for index in self._replaced_place_indices:
+            instance.marking[index] = places[index].tokens
+        instance.step_count = self.graph.step_count
+        if self.graph.last_fired is not None:
+            instance.last_fired = self.graph.last_fired
+
+    def _places_whose_lists_are_replaced(self) -> tuple[int, ...]:
+        """Places whose token list the engine swaps for a new one: list-mode inputs and streaming places."""
+        lookups = self.graph.lookups()
+        place_names_to_nodes = lookups.place_names_to_nodes
+        transition_names_to_incoming_edges = lookups.transition_names_to_incoming_edges
+        replaced = {place.name for place in self.graph.places if place.streaming}
+        for transition in self.graph.transitions:
+            for edge in transition_names_to_incoming_edges.get(transition.name, ()):
+                place = place_names_to_nodes[edge.place_node_name]
+                if ExecutableGraphCheck.argument_takes_all_tokens(transition, edge, place):
+                    replaced.add(place.name)
+        return tuple(sorted(self.place_indices[name] for name in replaced))
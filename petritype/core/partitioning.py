@@ -0,0 +1,406 @@
+"""Run one large net as several subnets in worker processes.
+
+``NetPartitioner.partition`` cuts the place/transition graph into subnets, using the ``RustworkxGraph`` view of the
+net, so that few arcs cross between them:
+
+    partition = NetPartitioner.partition(graph, partition_count=4)
+    graph, fired = PartitionedExecution.execute(graph, partition)
+
+Transitions that share an input place compete for its tokens, so they are always kept in the same subnet, which also
+owns the place. Only arcs from a transition to a place owned by another subnet are cut. The transition's subnet gets
+an empty stand-in place with the same name, and the tokens produced into it are forwarded to the owner over an
+inter-process queue. A token in transit has been produced but cannot be consumed yet, which is the same as a
+transition that is slow to be chosen, so firing sequences of the partitioned net are firing sequences of the
+original net. Places at the cut may not have a capacity, since a producer cannot see how full a remote place is.
+
+Activation functions only see their own subnet: a ``Guard`` that counts tokens in a place owned by another subnet
+is rejected, and other activation functions must only inspect places owned by the subnet of their transition.
+"""
+
+import asyncio
+import math
+import multiprocessing
+import queue
+from typing import Any, Optional
+
+import rustworkx
+from pydantic import BaseModel
+
+from petritype.core.data_structures import PlaceNodeName, TransitionNodeName
+from petritype.core.executable_graph_components import (
+    ExecutableGraph, ExecutableGraphOperations, FunctionTransitionNode, ListPlaceNode,
+)
+from petritype.core.guards import Guard, PlaceCountClause
+from petritype.core.rustworkx_graph import RustworkxGraph
+
+
+class NetPartition(BaseModel):
+    """An assignment of the transitions and places of a net to subnets.
+
+    Attributes:
+        transitions: The transition names of each subnet
+        place_owners: {place_name: index of the subnet that holds its tokens}
+        cut_arcs: Number of return edges from a transition to a place owned by another subnet
+    """
+    transitions: tuple[tuple[TransitionNodeName, ...], ...]
+    place_owners: dict[PlaceNodeName, int]
+    cut_arcs: int
+
+    model_config = {"frozen": True}
+
+
+class NetPartitioner:
+
+    def partition(
+        executable_graph: ExecutableGraph,
+        partition_count: int,
+        imbalance: float = 0.1,
+        refinement_passes: int = 8,
+    ) -> NetPartition:
+        """Split the net into at most ``partition_count`` subnets with few cut arcs.
+
+        Transitions that share input places form indivisible groups. Groups are laid out in topological order
+        (breadth-first order where the net has cycles) and cut into runs of roughly equal numbers of transitions,
+        which is optimal for pipelines. Single groups are then moved to the neighbouring subnet they have the most
+        arcs to, as long as that reduces the cut and keeps every subnet within ``1 + imbalance`` of the average size.
+        """
+        if partition_count < 1:
+            raise ValueError(f"Partition count must be at least 1, got {partition_count}.")
+        graph = RustworkxGraph.from_executable_graph(executable_graph)
+        group_of_node = NetPartitioner._group_nodes(graph)
+        group_count = max(group_of_node.values(), default=-1) + 1
+        group_sizes = [0] * group_count
+        for node_index, group in group_of_node.items():
+            if isinstance(graph[node_index], FunctionTransitionNode):
+                group_sizes[group] += 1
+        group_graph = rustworkx.PyDiGraph()
+        group_graph.add_nodes_from(range(group_count))
+        arcs: dict[tuple[int, int], int] = {}
+        for source, target in graph.edge_list():
+            group_pair = (group_of_node[source], group_of_node[target])
+            if group_pair[0] != group_pair[1]:
+                arcs[group_pair] = arcs.get(group_pair, 0) + 1
+        group_graph.add_edges_from([(source, target, count) for (source, target), count in arcs.items()])
+
+        order = NetPartitioner._group_order(group_graph)
+        partition_count = min(partition_count, max(1, sum(1 for size in group_sizes if size)))
+        target_size = math.ceil(sum(group_sizes) / partition_count)
+        part_of_group = [0] * group_count
+        part, part_size = 0, 0
+        for group in order:
+            if part_size >= target_size and part < partition_count - 1 and group_sizes[group]:
+                part, part_size = part + 1, 0
+            part_of_group[group] = part
+            part_size += group_sizes[group]
+        NetPartitioner._refine(
+            group_graph, group_sizes, part_of_group, partition_count,
+            max_size=max(target_size, math.floor(target_size * (1 + imbalance))), passes=refinement_passes,
+        )
+
+        transitions: list[list[TransitionNodeName]] = [[] for _ in range(partition_count)]
+        place_owners = {}
+        for node_index, group in group_of_node.items():
+            node = graph[node_index]
+            if isinstance(node, FunctionTransitionNode):
+                transitions[part_of_group[group]].append(node.name)
+            else:
+                place_owners[node.name] = part_of_group[group]
+        cut_arcs = sum(
+            count for (source, target), count in arcs.items() if part_of_group[source] != part_of_group[target]
+        )
+        return NetPartition(
+            transitions=tuple(tuple(names) for names in transitions), place_owners=place_owners, cut_arcs=cut_arcs,
+        )
+
+    def subgraphs(executable_graph: ExecutableGraph, partition: NetPartition) -> tuple[ExecutableGraph, ...]:
+        """The subnet of every partition: its transitions, the places it owns and stand-ins for remote outputs.
+
+        The subnets share place nodes (and their token lists) with ``executable_graph``; stand-ins are new, empty
+        places without a capacity.
+        """
+        places = {place.name: place for place in executable_graph.places}
+        transitions = {transition.name: transition for transition in executable_graph.transitions}
+        if set(partition.place_owners) != set(places) or (
+            sorted(name for names in partition.transitions for name in names) != sorted(transitions)
+        ):
+            raise ValueError("The partition does not cover exactly the places and transitions of the graph.")
+        subgraphs = []
+        for part, transition_names in enumerate(partition.transitions):
+            names = set(transition_names)
+            argument_edges = [edge for edge in executable_graph.argument_edges if edge.transition_node_name in names]
+            return_edges = [edge for edge in executable_graph.return_edges if edge.transition_node_name in names]
+            for edge in argument_edges:
+                if partition.place_owners[edge.place_node_name] != part:
+                    raise ValueError(
+                        f"Transition {edge.transition_node_name} consumes from place {edge.place_node_name}, "
+                        f"which is owned by another partition."
+                    )
+            owned = [place for place in executable_graph.places if partition.place_owners[place.name] == part]
+            stand_ins = {}
+            for edge in return_edges:
+                place = places[edge.place_node_name]
+                if partition.place_owners[place.name] == part or place.name in stand_ins:
+                    continue
+                if place.capacity is not None:
+                    raise ValueError(
+                        f"Place {place.name} has a capacity and is fed across the cut by {edge.transition_node_name}."
+                    )
+                stand_ins[place.name] = ListPlaceNode(place.name, place.type, [])
+            for name in transition_names:
+                guard = transitions[name].activation_function
+                if not isinstance(guard, Guard):
+                    continue
+                for clause in guard.clauses:
+                    if isinstance(clause, PlaceCountClause) and partition.place_owners.get(clause.place_name) != part:
+                        raise ValueError(
+                            f"Guard of transition {name} counts tokens in place {clause.place_name}, "
+                            f"which is owned by another partition."
+                        )
+            subgraphs.append(ExecutableGraph(
+                places=owned + list(stand_ins.values()),
+                transitions=[transitions[name] for name in transition_names],
+                argument_edges=argument_edges,
+                return_edges=return_edges,
+                allow_token_copying=executable_graph.allow_token_copying,
+            ))
+        return tuple(subgraphs)
+
+    def _group_nodes(graph: rustworkx.PyDiGraph) -> dict[int, int]:
+        """{node_index: group}: transitions sharing an input place, with the places they consume from."""
+        parents = {index: index for index in graph.node_indices()}
+
+        def find(index: int) -> int:
+            while parents[index] != index:
+                parents[index] = parents[parents[index]]
+                index = parents[index]
+            return index
+
+        for index in graph.node_indices():
+            if isinstance(graph[index], ListPlaceNode):
+                for consumer in graph.successor_indices(index):
+                    parents[find(consumer)] = find(index)
+        for index in graph.node_indices():
+            # A place nobody consumes from stays with a transition that produces it.
+            if isinstance(graph[index], ListPlaceNode) and not graph.successor_indices(index):
+                producers = graph.predecessor_indices(index)
+                if producers:
+                    parents[find(index)] = find(producers[0])
+        roots: dict[int, int] = {}
+        return {index: roots.setdefault(find(index), len(roots)) for index in graph.node_indices()}
+
+    def _group_order(group_graph: rustworkx.PyDiGraph) -> list[int]:
+        """Groups component by component, in topological order or, for cyclic components, breadth-first order."""
+        order = []
+        for component in sorted(rustworkx.weakly_connected_components(group_graph), key=min):
+            subgraph = group_graph.subgraph(sorted(component))  # Node payloads are the group indices.
+            if rustworkx.is_directed_acyclic_graph(subgraph):
+                order.extend(subgraph[index] for index in rustworkx.topological_sort(subgraph))
+                continue
+            start = min(component)
+            seen, frontier = {start}, [start]
+            while frontier:
+                order.extend(frontier)
+                next_frontier = []
+                for group in frontier:
+                    for neighbour in sorted(group_graph.neighbors_undirected(group)):
+                        if neighbour not in seen:
+                            seen.add(neighbour)
+                            next_frontier.append(neighbour)
+                frontier = next_frontier
+        return order
+
+    def _refine(
+        group_graph: rustworkx.PyDiGraph,
+        group_sizes: list[int],
+        part_of_group: list[int],
+        partition_count: int,
+        max_size: int,
+        passes: int,
+    ) -> None:
+        part_sizes = [0] * partition_count
+        for group, size in enumerate(group_sizes):
+            part_sizes[part_of_group[group]] += size
+        for _ in range(passes):
+            moved = False
+            for group in range(len(group_sizes)):
+                arcs_to_part: dict[int, int] = {}
+                for source, target, count in list(group_graph.in_edges(group)) + list(group_graph.out_edges(group)):
+                    neighbour = source if target == group else target
+                    arcs_to_part[part_of_group[neighbour]] = arcs_to_part.get(part_of_group[neighbour], 0) + count
+                current = part_of_group[group]
+                best, best_gain = current, 0
+                for part, count in arcs_to_part.items():
+                    gain = count - arcs_to_part.get(current, 0)
+                    fits = part_sizes[part] + group_sizes[group] <= max_size
+                    if part != current and fits and gain > best_gain:
+                        best, best_gain = part, gain
+                if best != current and part_sizes[current] > group_sizes[group]:
+                    part_sizes[current] -= group_sizes[group]
+                    part_sizes[best] += group_sizes[group]
+                    part_of_group[group] = best
+                    moved = True
+            if not moved:
+                break
+
+
+class PartitionedExecution:
+
+    def execute(
+        executable_graph: ExecutableGraph,
+        partition: NetPartition,
+        slice_transitions: int = 256,
+        start_method: Optional[str] = None,
+        timeout: Optional[float] = None,
+        **execute_graph_kwargs: Any,
+    ) -> tuple[ExecutableGraph, int]:
+        """Run every subnet in its own process until no transition of any subnet is enabled.
+
+        Like ``execute_graph`` the final marking is written back to ``executable_graph``, which is returned with the
+        number of transitions fired; ``step_count`` and ``fired_counts`` are updated too. Nodes and tokens are
+        pickled to the workers. Raises a RuntimeError if a worker fails and a TimeoutError if the subnets have not
+        finished within ``timeout`` seconds.
+
+        Termination is detected by counting token batches: a worker reports when it runs out of enabled transitions,
+        with the number of batches it has sent and received. Once all workers have reported and the totals agree,
+        every worker is asked for its counters again, and the run is over if none of them changed in between.
+        """
+        subgraphs = NetPartitioner.subgraphs(executable_graph, partition)
+        context = multiprocessing.get_context(start_method)
+        inboxes = [context.Queue() for _ in subgraphs]
+        reports = context.Queue()
+        processes = [
+            context.Process(
+                target=_partition_worker,
+                args=(
+                    part, subgraph, inboxes, reports, partition.place_owners, slice_transitions, execute_graph_kwargs,
+                ),
+                daemon=True,
+            )
+            for part, subgraph in enumerate(subgraphs)
+        ]
+        for process in processes:
+            process.start()
+        try:
+            PartitionedExecution._wait_for_termination(inboxes, reports, timeout)
+            for inbox in inboxes:
+                inbox.put(("stop",))
+            results = {}
+            while len(results) < len(subgraphs):
+                report = reports.get(timeout=timeout)
+                if report[0] == "error":
+                    raise RuntimeError(f"Partition {report[1]} failed: {report[2]}")
+                if report[0] == "result":
+                    results[report[1]] = report[2:]
+        except queue.Empty:
+            raise TimeoutError(f"The partitioned net did not finish within {timeout} seconds.") from None
+        finally:
+            for process in processes:
+                process.join(1.0)
+                if process.is_alive():
+                    process.terminate()
+
+        places = {place.name: place for place in executable_graph.places}
+        fired = 0
+        for part, (marking, step_count, fired_counts) in results.items():
+            for place_name, tokens in marking.items():
+                places[place_name].tokens = tokens
+            fired += step_count
+            for name, count in fired_counts.items():
+                executable_graph.fired_counts[name] = executable_graph.fired_counts.get(name, 0) + count
+        executable_graph.step_count += fired
+        return executable_graph, fired
+
+    def _wait_for_termination(
+        inboxes: list[multiprocessing.Queue], reports: multiprocessing.Queue, timeout: Optional[float]
+    ) -> None:
+        idle_counters: dict[int, tuple[int, int]] = {}  # part: (batches sent, batches received)
+        probe, snapshot, replies = 0, None, {}
+        while True:
+            report = reports.get(timeout=timeout)
+            kind, part = report[0], report[1]
+            if kind == "error":
+                raise RuntimeError(f"Partition {part} failed: {report[2]}")
+            if kind == "idle":
+                idle_counters[part] = report[2:]
+            elif kind == "probe" and report[2] == probe and snapshot is not None:
+                is_idle, counters = report[3], report[4:]
+                if is_idle and counters == snapshot[part]:
+                    replies[part] = counters
+                    if len(replies) == len(inboxes):
+                        return
+                else:
+                    snapshot = None
+            if snapshot is None and len(idle_counters) == len(inboxes):
+                if sum(sent for sent, _ in idle_counters.values()) == sum(
+                    received for _, received in idle_counters.values()
+                ):
+                    probe, snapshot, replies = probe + 1, dict(idle_counters), {}
+                    for inbox in inboxes:
+                        inbox.put(("probe", probe))
+
+
+def _partition_worker(
+    part: int,
+    subgraph: ExecutableGraph,
+    inboxes: list[multiprocessing.Queue],
+    reports: multiprocessing.Queue,
+    place_owners: dict[PlaceNodeName, int],
+    slice_transitions: int,
+    execute_graph_kwargs: dict[str, Any],
+) -> None:
+    try:
+        asyncio.run(_run_partition(
+            part, subgraph, inboxes, reports, place_owners, slice_transitions, execute_graph_kwargs
+        ))
+    except Exception as error:
+        reports.put(("error", part, f"{type(error).__name__}: {error}"))
+
+
+async def _run_partition(
+    part: int,
+    subgraph: ExecutableGraph,
+    inboxes: list[multiprocessing.Queue],
+    reports: multiprocessing.Queue,
+    place_owners: dict[PlaceNodeName, int],
+    slice_transitions: int,
+    execute_graph_kwargs: dict[str, Any],
+) -> None:
+    inbox = inboxes[part]
+    owned = {place.name: place for place in subgraph.places if place_owners[place.name] == part}
+    stand_ins = [place for place in subgraph.places if place_owners[place.name] != part]
+    sent = received = 0
+    idle = False
+    while True:
+        message = inbox.get() if idle else _poll(inbox)
+        while message is not None:
+            if message[0] == "tokens":
+                owned[message[1]].tokens.extend(message[2])
+                received += 1
+                idle = False
+            elif message[0] == "probe":
+                reports.put(("probe", part, message[1], idle, sent, received))
+            elif message[0] == "stop":
+                marking = {name: list(place.tokens) for name, place in owned.items()}
+                reports.put(("result", part, marking, subgraph.step_count, dict(subgraph.fired_counts)))
+                return
+            message = _poll(inbox)
+        if idle:
+            continue
+        _, fired = await ExecutableGraphOperations.execute_graph(
+            subgraph, max_transitions=slice_transitions, **execute_graph_kwargs
+        )
+        for place in stand_ins:
+            if place.tokens:
+                inboxes[place_owners[place.name]].put(("tokens", place.name, list(place.tokens)))
+                place.tokens.clear()
+                sent += 1
+        if fired < slice_transitions:
+            idle = True
+            reports.put(("idle", part, sent, received))
+
+
+def _poll(inbox: multiprocessing.Queue) -> Optional[tuple]:
+    try:
+        return inbox.get_nowait()
+    except queue.Empty:
+        return None
@@ -0,0 +1,314 @@
+"""Run independent nets in several worker processes.
+
+A ``ShardedNetPool`` starts one worker process per shard. Each worker runs a ``NetScheduler`` over the nets assigned
+to it, so CPU-bound nets use as many cores as there are shards without any change to the net definitions:
+
+    with ShardedNetPool(processes=4) as pool:
+        for factory in (orders_net, billing_net, reports_net):
+            pool.add_factory(factory)                  # @petri_net factories
+        pool.inject('orders', 'Incoming', [order])
+        pool.wait_until_idle()
+        shipped = pool.tokens('orders', 'Shipped', take=True)
+        pool.health()                                  # per shard: alive, pid, step counts, throughput
+
+Nets, factories and tokens are sent to the workers over pipes and must be picklable, so use module-level functions
+rather than lambdas in nets that are added to a pool. A factory is called in the worker, which avoids sending the
+graph at all. New nets go to the shard with the fewest running nets. A "batch" net that runs out of work, or a net
+that fails, stays on its shard so its tokens can still be read; adding a net of the same name replaces it.
+
+A worker checks its pipe between slices of ``slice_transitions`` transitions, so requests are answered within one
+slice. Requests are answered in the order they are sent; the pool is not thread-safe.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import time
+from multiprocessing.connection import Connection
+from typing import Any, Callable, Iterable, Optional
+
+from pydantic import BaseModel
+
+from petritype.core.data_structures import PlaceNodeName
+from petritype.core.executable_graph_components import ExecutableGraph
+from petritype.core.scheduler import NetScheduler, ScheduledNet
+
+
+class ShardHealth(BaseModel):
+    """The state of one worker process of a ``ShardedNetPool``.
+
+    Attributes:
+        shard: Index of the shard
+        pid: Process id of the worker
+        alive: Whether the worker process is running
+        step_counts: {net_name: step_count} of the nets on the shard, including completed and failed ones; empty if
+            the worker is not alive
+        parked_nets: Nets on the shard waiting for tokens
+        completed_nets: Batch nets on the shard that ran out of enabled transitions
+        failed_nets: {net_name: error message} of nets on the shard that were stopped because a quantum raised
+        transitions_fired: Transitions fired by the shard
+        transitions_per_second: Throughput of the shard while it was running nets
+    """
+    shard: int
+    pid: Optional[int]
+    alive: bool
+    step_counts: dict[str, int] = {}
+    parked_nets: list[str] = []
+    completed_nets: list[str] = []
+    failed_nets: dict[str, str] = {}
+    transitions_fired: int = 0
+    transitions_per_second: float = 0.0
+
+
+class ShardedNetPool:
+    """Shard independent nets across worker processes, each running a ``NetScheduler``.
+
+    Args:
+        processes: Number of worker processes; defaults to the number of CPUs.
+        quantum: Passed to each worker's ``NetScheduler``.
+        slice_transitions: Transitions a worker fires before checking for requests again.
+        start_method: ``multiprocessing`` start method; defaults to the platform default.
+        **execute_graph_kwargs: Passed to every ``execute_graph`` call in the workers.
+    """
+
+    def __init__(
+        self,
+        processes: Optional[int] = None,
+        quantum: int = 8,
+        slice_transitions: int = 256,
+        start_method: Optional[str] = None,
+        **execute_graph_kwargs: Any,
+    ):
+        self.process_count = processes or os.cpu_count() or 1
+        self.quantum = quantum
+        self.slice_transitions = slice_transitions
+        self.execute_graph_kwargs = execute_graph_kwargs
+        self._context = multiprocessing.get_context(start_method)
+        self._processes: list[multiprocessing.Process] = []
+        self._connections: list[Connection] = []
+        self._net_shards: dict[str, int] = {}
+        self._finished_nets: set[str] = set()  # Completed or failed, as last reported by the workers.
+
+    def start(self) -> "ShardedNetPool":
+        if self._processes:
+            raise RuntimeError("The pool has already been started.")
+        for _ in range(self.process_count):
+            parent_connection, child_connection = self._context.Pipe()
+            process = self._context.Process(
+                target=_worker_main,
+                args=(child_connection, self.quantum, self.slice_transitions, self.execute_graph_kwargs),
+                daemon=True,
+            )
+            process.start()
+            child_connection.close()
+            self._processes.append(process)
+            self._connections.append(parent_connection)
+        return self
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stop the workers. Nets and their tokens are discarded."""
+        for shard, process in enumerate(self._processes):
+            if process.is_alive():
+                try:
+                    self._request(shard, ("close",))
+                except (EOFError, OSError):
+                    pass
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        for connection in self._connections:
+            connection.close()
+        self._processes, self._connections, self._net_shards, self._finished_nets = [], [], {}, set()
+
+    def __enter__(self) -> "ShardedNetPool":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def add_factory(self, factory: Callable[[], ExecutableGraph], weight: float = 1.0) -> str:
+        """Build a net with a ``@petri_net`` factory in a worker and schedule it there. Return its name."""
+        config = getattr(factory, "_petri_net_config", None)
+        if config is None:
+            raise ValueError(f"{factory!r} is not decorated with @petri_net.")
+        return self._add(config["name"], ("add_factory", factory, weight))
+
+    def add(self, graph: ExecutableGraph, name: str, weight: float = 1.0) -> str:
+        """Send ``graph`` to a worker and schedule it there under ``name``."""
+        return self._add(name, ("add", graph, name, weight))
+
+    def inject(self, name: str, place_name: PlaceNodeName, tokens: Iterable[Any]) -> None:
+        """Add tokens to a place of the named net and wake it."""
+        self._request(self._shard_of(name), ("inject", name, place_name, list(tokens)))
+
+    def tokens(self, name: str, place_name: PlaceNodeName, take: bool = False) -> list[Any]:
+        """A copy of the tokens in a place of the named net. With ``take=True`` they are also removed from it."""
+        return self._request(self._shard_of(name), ("tokens", name, place_name, take))
+
+    def step_counts(self) -> dict[str, int]:
+        """{net_name: step_count} of every net in the pool."""
+        counts = {}
+        for shard_health in self.health():
+            counts.update(shard_health.step_counts)
+        return counts
+
+    def health(self) -> list[ShardHealth]:
+        """The state of every shard. A dead worker is reported as not alive rather than raising."""
+        shards = []
+        for shard, process in enumerate(self._processes):
+            if not process.is_alive():
+                shards.append(ShardHealth(shard=shard, pid=process.pid, alive=False))
+                continue
+            try:
+                report = self._request(shard, ("health",))
+            except (EOFError, OSError):
+                shards.append(ShardHealth(shard=shard, pid=process.pid, alive=False))
+                continue
+            shards.append(ShardHealth(shard=shard, pid=process.pid, alive=True, **report))
+        return shards
+
+    def wait_until_idle(self, timeout: Optional[float] = None) -> None:
+        """Block until every net in the pool is parked, i.e. has no enabled transitions.
+
+        Raises ``TimeoutError`` if a shard is still busy after ``timeout`` seconds. The nets keep running and the
+        pool stays usable, so the caller can inspect ``health()`` or wait again.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for connection in self._connections:
+            connection.send(("wait_until_idle",))
+        busy_shards = []
+        for shard, connection in enumerate(self._connections):
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if connection.poll(remaining):
+                self._receive(shard)
+            else:
+                busy_shards.append(shard)
+        for shard in busy_shards:
+            # The worker answers the pending wait before it answers this request, busy or not.
+            self._connections[shard].send(("stop_waiting",))
+            self._receive(shard)
+            self._receive(shard)
+        if busy_shards:
+            raise TimeoutError(f"Shards {busy_shards} were still busy after {timeout} seconds.")
+
+    def _add(self, name: str, message: tuple) -> str:
+        if not self._processes:
+            raise RuntimeError("Start the pool before adding nets.")
+        if name in self._net_shards:
+            shard = self._net_shards[name]
+            self._request(shard, ("health",))  # Learn whether the net has finished since the last reply.
+            if name not in self._finished_nets:
+                raise ValueError(f"A net named {name} is already in the pool.")
+        else:
+            nets_per_shard = [0] * len(self._processes)
+            for running_name, running_shard in self._net_shards.items():
+                if running_name not in self._finished_nets:
+                    nets_per_shard[running_shard] += 1
+            shard = nets_per_shard.index(min(nets_per_shard))
+        self._request(shard, message)
+        self._net_shards[name] = shard
+        self._finished_nets.discard(name)
+        return name
+
+    def _shard_of(self, name: str) -> int:
+        if name not in self._net_shards:
+            raise ValueError(f"No net named {name} in the pool.")
+        return self._net_shards[name]
+
+    def _request(self, shard: int, message: tuple) -> Any:
+        self._connections[shard].send(message)
+        return self._receive(shard)
+
+    def _receive(self, shard: int) -> Any:
+        status, result, finished_nets = self._connections[shard].recv()
+        self._finished_nets.update(finished_nets)
+        if status == "error":
+            raise result
+        return result
+
+
+def _worker_main(
+    connection: Connection, quantum: int, slice_transitions: int, execute_graph_kwargs: dict[str, Any]
+) -> None:
+    asyncio.run(_serve(connection, NetScheduler(quantum, **execute_graph_kwargs), slice_transitions))
+
+
+async def _serve(connection: Connection, scheduler: NetScheduler, slice_transitions: int) -> None:
+    idle_waiters: list[tuple] = []
+    reported: dict[str, ScheduledNet] = {}
+
+    def send(status: str, result: Any) -> None:
+        # Every reply also names the nets that finished since the previous one, so the pool knows which names are
+        # free to be added again.
+        finished = [name for name, net in scheduler.finished.items() if reported.get(name) is not net]
+        connection.send((status, result, finished))
+        reported.update((name, scheduler.finished[name]) for name in finished)
+
+    while True:
+        busy = any(not net.parked for net in scheduler.nets.values())
+        if not busy:
+            for _ in idle_waiters:
+                send("ok", None)
+            idle_waiters.clear()
+        if busy and not connection.poll():
+            await scheduler.run(max_transitions=slice_transitions)
+            continue
+        message = connection.recv()  # Blocks only when every net is parked.
+        if message[0] == "close":
+            send("ok", None)
+            return
+        if message[0] == "wait_until_idle":
+            idle_waiters.append(message)
+            continue
+        if message[0] == "stop_waiting":
+            for _ in idle_waiters:
+                send("ok", None)
+            idle_waiters.clear()
+            send("ok", None)
+            continue
+        try:
+            reply = ("ok", _handle(scheduler, message))
+        except Exception as error:
+            reply = ("error", error)
+        try:
+            send(*reply)
+        except Exception as error:  # The result or the error could not be pickled.
+            send("error", RuntimeError(f"Could not send the reply to {message[0]!r}: {error!r}"))
+
+
+def _handle(scheduler: NetScheduler, message: tuple) -> Any:
+    command, *args = message
+    if command == "add_factory":
+        factory, weight = args
+        return scheduler.add_factory(factory, weight)
+    if command == "add":
+        graph, name, weight = args
+        return scheduler.add(graph, name, weight)
+    if command == "inject":
+        name, place_name, tokens = args
+        return scheduler.inject(name, place_name, tokens)
+    if command == "tokens":
+        name, place_name, take = args
+        place = scheduler.net(name).graph.place_named(place_name)
+        if place is None:
+            raise ValueError(f"Net {name} has no place named {place_name}.")
+        tokens = list(place.tokens)
+        if take:
+            place.tokens.clear()
+            place.notify_room_available()
+            if name in scheduler.nets:
+                scheduler.wake(name)
+        return tokens
+    if command == "health":
+        stats = scheduler.stats()
+        return dict(
+            step_counts={
+                name: net.graph.step_count for name, net in {**scheduler.finished, **scheduler.nets}.items()
+            },
+            parked_nets=stats.parked_nets,
+            completed_nets=stats.completed_nets,
+            failed_nets=stats.failed_nets,
+            transitions_fired=stats.transitions_fired,
+            transitions_per_second=stats.transitions_per_second,
+        )
+    raise ValueError(f"Unknown command: {command}")
@@ -0,0 +1,258 @@
+"""Run many executable graphs on one event loop.
+
+A ``NetScheduler`` owns a set of graphs and interleaves them, firing at most ``quantum`` transitions of one graph per
+turn. Turns are shared in proportion to each net's weight using stride scheduling: the net that has used the least
+weighted share of the scheduler so far goes next, so equal weights give fair round-robin sharing.
+
+A net with no enabled transitions is parked and costs nothing until it is woken, either by ``inject``, which adds
+tokens to one of its places, or by ``wake`` after its tokens were changed directly.
+
+    scheduler = NetScheduler(quantum=8)
+    scheduler.add_factory(order_pipeline)          # a @petri_net factory
+    scheduler.add(build_report_net(), weight=0.5)
+    stats = await scheduler.run()
+
+Nets built by ``@petri_net`` factories follow their declared mode: "batch" nets are removed once they run out of
+enabled transitions, "24/7" nets are rebuilt by their factory if a quantum raises, and "manual" nets are parked until
+woken like any other net. "cron" nets need a clock-driven trigger and are not accepted. Completed and failed nets are
+kept in ``finished``, so their final marking can still be read, until a net of the same name is added.
+
+Each quantum is an ``execute_graph`` call, which runs to completion before the next net gets a turn; a net waiting on
+an async source transition therefore holds the loop until an item arrives.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Any, Callable, Iterable, Optional
+
+from pydantic import BaseModel
+
+from petritype.core.data_structures import PlaceNodeName
+from petritype.core.executable_graph_components import (
+    ExecutableGraph, ExecutableGraphCheck, ExecutableGraphOperations,
+)
+
+
+class ScheduledNet:
+    """A graph owned by a ``NetScheduler`` and its scheduling state."""
+
+    def __init__(
+        self, name: str, graph: ExecutableGraph, weight: float, mode: str = "manual",
+        factory: Optional[Callable[[], ExecutableGraph]] = None,
+    ):
+        if weight <= 0:
+            raise ValueError(f"Weight of net {name} must be positive, got {weight}.")
+        self.name = name
+        self.graph = graph
+        self.weight = weight
+        self.mode = mode
+        self.factory = factory
+        self.pass_value = 0.0  # Stride scheduling: weighted share of the scheduler used so far.
+        self.parked = False
+        self.transitions_fired = 0
+        self.quanta = 0
+        self.restarts = 0
+
+
+class SchedulerStats(BaseModel):
+    """Aggregate counters of a ``NetScheduler``.
+
+    Attributes:
+        transitions_fired: Transitions fired by all nets since the scheduler was created
+        quanta: ``execute_graph`` calls made
+        running_seconds: Wall-clock time spent inside ``run``
+        transitions_per_second: ``transitions_fired / running_seconds``
+        fired_by_net: {net_name: transitions fired}, including completed and failed nets
+        active_nets: Nets that currently have work to do
+        parked_nets: Nets waiting to be woken
+        completed_nets: Batch nets that ran out of enabled transitions and were removed
+        failed_nets: {net_name: error message} of nets removed because a quantum raised
+    """
+    transitions_fired: int
+    quanta: int
+    running_seconds: float
+    transitions_per_second: float
+    fired_by_net: dict[str, int]
+    active_nets: list[str]
+    parked_nets: list[str]
+    completed_nets: list[str]
+    failed_nets: dict[str, str]
+
+
+class NetScheduler:
+    """Interleave the execution of many graphs, sharing turns in proportion to their weights.
+
+    Args:
+        quantum: Maximum transitions fired per turn.
+        **execute_graph_kwargs: Passed on to every ``execute_graph`` call, e.g. ``transition_history_length=0``.
+    """
+
+    def __init__(self, quantum: int = 1, **execute_graph_kwargs: Any):
+        if quantum < 1:
+            raise ValueError(f"Quantum must be at least 1, got {quantum}.")
+        self.quantum = quantum
+        self.execute_graph_kwargs = execute_graph_kwargs
+        self.nets: dict[str, ScheduledNet] = {}
+        self._ready: list[tuple[float, int, str]] = []  # (pass value, tie breaker, net name)
+        self._order = itertools.count()
+        self._virtual_time = 0.0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._transitions_fired = 0
+        self._quanta = 0
+        self._running_seconds = 0.0
+        self._fired_by_net: dict[str, int] = {}
+        self._completed: list[str] = []
+        self._failed: dict[str, str] = {}
+        # Completed and failed nets, kept until a net of the same name is added so their marking can be read.
+        self.finished: dict[str, ScheduledNet] = {}
+
+    def add(self, graph: ExecutableGraph, name: Optional[str] = None, weight: float = 1.0) -> str:
+        """Schedule ``graph`` and return its name, which defaults to ``net-<n>``."""
+        return self._add(ScheduledNet(name or f"net-{len(self._fired_by_net)}", graph, weight))
+
+    def add_factory(self, factory: Callable[[], ExecutableGraph], weight: float = 1.0) -> str:
+        """Build a net with a ``@petri_net`` factory and schedule it under the factory's declared name and mode."""
+        config = getattr(factory, "_petri_net_config", None)
+        if config is None:
+            raise ValueError(f"{factory!r} is not decorated with @petri_net.")
+        if config["mode"] == "cron":
+            raise ValueError(f"Net {config['name']} has mode 'cron'; trigger it from a clock instead of scheduling it.")
+        return self._add(ScheduledNet(config["name"], factory(), weight, mode=config["mode"], factory=factory))
+
+    def net(self, name: str) -> ScheduledNet:
+        """The named net, whether it is still scheduled or has completed or failed."""
+        if name in self.nets:
+            return self.nets[name]
+        if name in self.finished:
+            return self.finished[name]
+        raise ValueError(f"No net named {name}.")
+
+    def remove(self, name: str) -> ScheduledNet:
+        """Stop scheduling the named net and return it."""
+        net = self.nets.pop(name)
+        self._ready = [entry for entry in self._ready if entry[2] != name]
+        heapq.heapify(self._ready)
+        return net
+
+    def inject(self, name: str, place_name: PlaceNodeName, tokens: Iterable[Any]) -> None:
+        """Add tokens to a place of the named net and wake it."""
+        graph = self.nets[name].graph
+        place = graph.place_named(place_name)
+        if place is None:
+            raise ValueError(f"Net {name} has no place named {place_name}.")
+        tokens = list(tokens)
+        for token in tokens:
+            ExecutableGraphCheck.ensure_token_type_matches_place_type(token, place)
+        place.tokens.extend(tokens)
+        self.wake(name)
+
+    def wake(self, name: str) -> None:
+        """Give a parked net a turn again, e.g. after its tokens were changed directly."""
+        net = self.nets[name]
+        if net.parked:
+            net.parked = False
+            # A woken net starts from the current virtual time, so it cannot claim the turns it missed while parked.
+            net.pass_value = max(net.pass_value, self._virtual_time)
+            heapq.heappush(self._ready, (net.pass_value, next(self._order), name))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def stop(self) -> None:
+        """Make ``run(until_idle=False)`` return after the current quantum."""
+        self._stopping = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def run(self, max_transitions: Optional[int] = None, until_idle: bool = True) -> SchedulerStats:
+        """Run turns until every net is parked (or, with ``until_idle=False``, until ``stop`` is called).
+
+        ``max_transitions`` caps the transitions fired by all nets in this call.
+        """
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        started = time.perf_counter()
+        fired_in_call = 0
+        try:
+            while not self._stopping and (max_transitions is None or fired_in_call < max_transitions):
+                if not self._ready:
+                    if until_idle:
+                        break
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+                budget = self.quantum if max_transitions is None else min(
+                    self.quantum, max_transitions - fired_in_call
+                )
+                fired_in_call += await self._turn(budget)
+                await asyncio.sleep(0)  # Let injectors and stream consumers run between turns.
+        finally:
+            self._running_seconds += time.perf_counter() - started
+            self._wakeup = None
+        return self.stats()
+
+    def stats(self) -> SchedulerStats:
+        return SchedulerStats(
+            transitions_fired=self._transitions_fired,
+            quanta=self._quanta,
+            running_seconds=self._running_seconds,
+            transitions_per_second=self._transitions_fired / self._running_seconds if self._running_seconds else 0.0,
+            fired_by_net=dict(self._fired_by_net),
+            active_nets=[name for name, net in self.nets.items() if not net.parked],
+            parked_nets=[name for name, net in self.nets.items() if net.parked],
+            completed_nets=list(self._completed),
+            failed_nets=dict(self._failed),
+        )
+
+    def _add(self, net: ScheduledNet) -> str:
+        if net.name in self.nets:
+            raise ValueError(f"A net named {net.name} is already scheduled.")
+        self.nets[net.name] = net
+        self.finished.pop(net.name, None)
+        self._fired_by_net.setdefault(net.name, 0)
+        net.pass_value = self._virtual_time
+        heapq.heappush(self._ready, (net.pass_value, next(self._order), net.name))
+        return net.name
+
+    async def _turn(self, budget: int) -> int:
+        _, _, name = heapq.heappop(self._ready)
+        net = self.nets[name]
+        self._virtual_time = net.pass_value
+        restarted = False
+        try:
+            _, fired = await ExecutableGraphOperations.execute_graph(
+                net.graph, max_transitions=budget, **self.execute_graph_kwargs
+            )
+        except Exception as error:
+            fired = 0
+            failure = f"{type(error).__name__}: {error}"
+            if net.mode == "24/7" and net.factory is not None:
+                try:
+                    net.graph = net.factory()
+                except Exception as restart_error:
+                    failure += f" (restart failed with {type(restart_error).__name__}: {restart_error})"
+                else:
+                    net.restarts += 1
+                    restarted = True
+            if not restarted:
+                self.finished[name] = self.remove(name)
+                self._failed[name] = failure
+                return 0
+        self._quanta += 1
+        self._transitions_fired += fired
+        self._fired_by_net[name] += fired
+        net.quanta += 1
+        net.transitions_fired += fired
+        net.pass_value += max(fired, 1) / net.weight
+        if fired < budget and not restarted:
+            # execute_graph stopped early, so nothing is enabled any more.
+            if net.mode == "batch":
+                self.finished[name] = self.remove(name)
+                self._completed.append(name)
+            else:
+                net.parked = True
+        else:
+            heapq.heappush(self._ready, (net.pass_value, next(self._order), name))
+        return fired
@@ -0,0 +1,228 @@
+"""Numpy array tokens that cross process boundaries without being copied.
+
+A ``SharedArray`` keeps its data in a ``multiprocessing.shared_memory`` segment. Pickling it, as ``ShardedNetPool``
+and ``PartitionedExecution`` do for every token they move between processes, sends only the segment name, shape and
+dtype; ``.array`` in the receiving process is a view of the same memory:
+
+    token = SharedArrays.from_array(np.random.default_rng().normal(size=(1000, 1000)))
+    pool.inject('stats', 'Series', [token])        # sends ~100 bytes instead of 8 MB
+
+The first 64 bytes of a segment hold a reference count. A new ``SharedArray`` holds one reference, which moves with
+the token, so pickling does not change the count. Call ``acquire`` before putting the same array into a second
+place and ``release`` when a token is consumed for good; the segment is unlinked when the count reaches zero. On
+POSIX systems the count is updated under an ``flock`` on the segment; on Windows the operating system frees a
+segment once no process has it open, and the count is informational.
+
+Segments are not registered with the ``multiprocessing`` resource tracker, since a segment routinely outlives the
+process that created it; one that is never released lives until the machine restarts.
+
+``SharedArrays.transition`` adapts a function on ndarrays so that it takes and returns ``SharedArray`` tokens,
+releasing its inputs after the call:
+
+    FunctionTransitionNode('Smooth', SharedArrays.transition(smooth))   # smooth(series: np.ndarray) -> np.ndarray
+"""
+
+import inspect
+import secrets
+from multiprocessing import shared_memory
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+_HEADER_BYTES = 64  # Reference count, padded so the data stays 64-byte aligned.
+
+# Segments attached in this process, by name. A segment whose last reference was released in another process stays
+# mapped here until the next sweep, which runs when the number of attached segments has doubled since the last one.
+_attached: dict[str, shared_memory.SharedMemory] = {}
+_sweep_threshold = 64
+
+
+class SharedArray:
+    """A handle to a numpy array in a shared memory segment; see the module docstring for ownership rules."""
+    __slots__ = ("name", "shape", "dtype")
+
+    def __init__(self, name: str, shape: tuple[int, ...], dtype: str):
+        self.name = name
+        self.shape = tuple(shape)
+        self.dtype = dtype
+
+    def __reduce__(self):
+        return (SharedArray, (self.name, self.shape, self.dtype))
+
+    def __repr__(self) -> str:
+        return f"SharedArray({self.name!r}, shape={self.shape}, dtype={self.dtype!r})"
+
+    @property
+    def nbytes(self) -> int:
+        return int(np.prod(self.shape, dtype=np.int64)) * np.dtype(self.dtype).itemsize
+
+    @property
+    def array(self) -> np.ndarray:
+        """A writable view of the shared data."""
+        segment = _segment(self.name)
+        return np.ndarray(self.shape, dtype=self.dtype, buffer=segment.buf, offset=_HEADER_BYTES)
+
+    @property
+    def refcount(self) -> int:
+        return int(_counter(_segment(self.name))[0])
+
+    def acquire(self) -> "SharedArray":
+        """Add a reference, e.g. before putting the array into a second place. Return the handle."""
+        _add_to_refcount(self.name, 1)
+        return self
+
+    def release(self) -> None:
+        """Drop a reference. The segment is unlinked once no references are left."""
+        if _add_to_refcount(self.name, -1) > 0:
+            return
+        segment = _attached.pop(self.name)
+        segment.unlink()
+        _close(segment)
+
+
+class SharedArrays:
+
+    def empty(shape: tuple[int, ...], dtype: Any = float) -> SharedArray:
+        """A new shared array with one reference and uninitialised contents."""
+        if len(_attached) >= _sweep_threshold:
+            SharedArrays.collect()
+        dtype = np.dtype(dtype)
+        if dtype.hasobject:
+            raise TypeError(f"Arrays of Python objects cannot be shared, got dtype {dtype}.")
+        nbytes = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+        name = f"pt_{secrets.token_hex(8)}"
+        segment = shared_memory.SharedMemory(name, create=True, size=_HEADER_BYTES + max(nbytes, 1), track=False)
+        _counter(segment)[0] = 1
+        _attached[name] = segment
+        return SharedArray(name, tuple(shape), dtype.str)
+
+    def from_array(array: np.ndarray) -> SharedArray:
+        """Copy ``array`` into a new shared array with one reference."""
+        array = np.asarray(array)
+        shared = SharedArrays.empty(array.shape, array.dtype)
+        shared.array[...] = array
+        return shared
+
+    def collect() -> int:
+        """Unmap the segments attached in this process whose last reference has been released elsewhere.
+
+        Runs automatically as arrays are created; call it in processes that only receive arrays. Return the number of
+        segments unmapped.
+        """
+        global _sweep_threshold
+        released = [name for name, segment in _attached.items() if _counter(segment)[0] == 0]
+        for name in released:
+            _close(_attached.pop(name))
+        _sweep_threshold = max(64, 2 * len(_attached))
+        return len(released)
+
+    def transition(function: Callable) -> "SharedArrayTransition":
+        """Adapt a function on ndarrays to ``SharedArray`` tokens; see ``SharedArrayTransition``."""
+        return SharedArrayTransition(function)
+
+
+class SharedArrayTransition:
+    """A function on ndarrays, adapted to take and return ``SharedArray`` tokens.
+
+    Arguments annotated ``np.ndarray`` receive ``token.array`` and the tokens are released once the call returns or
+    raises; an ``np.ndarray`` return value is copied into a new ``SharedArray``. The annotations and signature of the
+    adapter say ``SharedArray`` instead of ``np.ndarray``, so places connected to it must have that type. Unlike a
+    closure the adapter pickles by reference to ``function``, so nets using it can be sent to worker processes.
+    """
+
+    def __init__(self, function: Callable):
+        self.function = function
+        annotations = inspect.get_annotations(function, eval_str=True)
+        self.array_arguments = frozenset(
+            name for name, annotation in annotations.items() if name != "return" and annotation is np.ndarray
+        )
+        self.returns_array = annotations.get("return") is np.ndarray
+        self.__name__ = getattr(function, "__name__", type(self).__name__)
+        self.__qualname__ = getattr(function, "__qualname__", self.__name__)
+        self.__doc__ = function.__doc__
+        self.__annotations__ = {
+            name: SharedArray if annotation is np.ndarray else annotation for name, annotation in annotations.items()
+        }
+        signature = inspect.signature(function, eval_str=True)
+        self.__signature__ = signature.replace(
+            parameters=[
+                parameter.replace(annotation=self.__annotations__.get(parameter.name, parameter.annotation))
+                for parameter in signature.parameters.values()
+            ],
+            return_annotation=self.__annotations__.get("return", signature.return_annotation),
+        )
+        self.is_async = inspect.iscoroutinefunction(function)
+        if self.is_async:
+            inspect.markcoroutinefunction(self)
+
+    def __reduce__(self):
+        return (SharedArrayTransition, (self.function,))
+
+    def __call__(self, **kwargs):
+        consumed = [kwargs[name] for name in self.array_arguments if isinstance(kwargs.get(name), SharedArray)]
+        for name in self.array_arguments:
+            if isinstance(kwargs.get(name), SharedArray):
+                kwargs[name] = kwargs[name].array
+        if self.is_async:
+            return self._call_async(kwargs, consumed)
+        try:
+            return self._wrap(self.function(**kwargs))
+        finally:
+            self._release(consumed)
+
+    async def _call_async(self, kwargs: dict[str, Any], consumed: list[SharedArray]) -> Any:
+        try:
+            return self._wrap(await self.function(**kwargs))
+        finally:
+            self._release(consumed)
+
+    def _wrap(self, result: Any) -> Any:
+        if self.returns_array:
+            result = SharedArrays.from_array(result)  # Copy before the inputs, which it may view, go away.
+        return result
+
+    def _release(self, consumed: list[SharedArray]) -> None:
+        """Release the consumed tokens, also when the function raised: the engine has already taken them."""
+        for token in consumed:
+            token.release()
+
+
+def _segment(name: str) -> shared_memory.SharedMemory:
+    segment = _attached.get(name)
+    if segment is None:
+        segment = _attached[name] = shared_memory.SharedMemory(name, track=False)
+    return segment
+
+
+def _counter(segment: shared_memory.SharedMemory) -> np.ndarray:
+    return np.ndarray((1,), dtype=np.int64, buffer=segment.buf)
+
+
+def _add_to_refcount(name: str, delta: int) -> int:
+    segment = _segment(name)
+    file_descriptor: Optional[int] = getattr(segment, "_fd", None)
+    locked = fcntl is not None and file_descriptor is not None and file_descriptor >= 0
+    if locked:
+        fcntl.flock(file_descriptor, fcntl.LOCK_EX)
+    try:
+        counter = _counter(segment)
+        if counter[0] + delta < 0:
+            raise RuntimeError(f"Shared array {name} was released more often than it was acquired.")
+        counter[0] += delta
+        return int(counter[0])
+    finally:
+        if locked:
+            fcntl.flock(file_descriptor, fcntl.LOCK_UN)
+
+
+def _close(segment: shared_memory.SharedMemory) -> None:
+    try:
+        segment.close()
+    except BufferError:
+        pass  # Views of the array are still alive; the mapping goes away with them.
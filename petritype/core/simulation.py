@@ -0,0 +1,396 @@
+"""Stochastic timed simulation of a net for capacity planning.
+
+A ``StochasticSimulation`` runs the count abstraction of a net (see ``petritype.core.analysis``) in simulated time.
+Transitions take a random service time and arrivals come from random processes:
+
+    simulation = StochasticSimulation(
+        graph,
+        service_times={'Sort': Distributions.exponential(mean=0.8), 'Load': Distributions.uniform(2.0, 4.0)},
+        arrivals={'Receive': Distributions.exponential(mean=1.0)},
+        servers={'Sort': 2},
+    )
+    report = simulation.run(horizon=8 * 3600, replications=200, seed=1, warm_up=600)
+    report.places['Sorted'].mean_tokens, report.transitions['Sort'].utilisation, report.cycle_time
+
+A timed transition works like a station with ``servers`` servers, 1 by default. Whenever it is enabled and a server
+is free, it takes its input tokens and keeps the server busy for a service time drawn from its distribution. When
+the service ends, it delivers its output token, and the room it needs in capacity-limited places is held for it
+from the start of the service. Transitions without a service time fire immediately. Transitions
+without input places are sources, and need an arrival process that gives the times between their firings. An arrival
+into a full place is lost. A transition with several output places picks one per firing, with the probabilities
+given in ``routing`` or uniformly. When transitions compete for tokens, they start in a random order.
+
+All replications run side by side: the marking, the busy servers and the pending events of every replication are
+numpy arrays, and each step processes the next event of every replication at once. Random numbers for all
+replications are drawn in one call from an SFC64 generator. Statistics are time averages from ``warm_up`` to
+``horizon``, reported as the mean over the replications with its standard error.
+"""
+
+from typing import Callable, Optional
+
+import numpy as np
+from numpy.random import SFC64, Generator
+from pydantic import BaseModel
+
+from petritype.core.analysis import CountAbstraction
+from petritype.core.data_structures import PlaceNodeName, TransitionNodeName
+from petritype.core.executable_graph_components import ExecutableGraph
+
+
+type Sampler = Callable[[Generator, int], np.ndarray]  # (generator, size) -> array of non-negative durations
+
+_MAX_STEPS_PER_INSTANT = 100_000
+
+
+class Distributions:
+    """Vectorised samplers of durations, for service times and times between arrivals."""
+
+    def deterministic(value: float) -> Sampler:
+        def sample(generator: Generator, size: int) -> np.ndarray:
+            return np.full(size, float(value))
+        return sample
+
+    def exponential(mean: float) -> Sampler:
+        def sample(generator: Generator, size: int) -> np.ndarray:
+            return generator.exponential(mean, size)
+        return sample
+
+    def uniform(low: float, high: float) -> Sampler:
+        def sample(generator: Generator, size: int) -> np.ndarray:
+            return generator.uniform(low, high, size)
+        return sample
+
+    def gamma(shape: float, scale: float) -> Sampler:
+        def sample(generator: Generator, size: int) -> np.ndarray:
+            return generator.gamma(shape, scale, size)
+        return sample
+
+    def lognormal(mean: float, sigma: float) -> Sampler:
+        """Log-normal durations with the given ``mean`` and ``sigma`` of the underlying normal distribution."""
+        def sample(generator: Generator, size: int) -> np.ndarray:
+            return generator.lognormal(mean, sigma, size)
+        return sample
+
+    def empirical(observations: list[float]) -> Sampler:
+        """Durations resampled from observed ones."""
+        values = np.asarray(observations, dtype=float)
+
+        def sample(generator: Generator, size: int) -> np.ndarray:
+            return generator.choice(values, size)
+        return sample
+
+
+class Estimate(BaseModel):
+    """The mean of a statistic over the replications and its standard error."""
+    mean: float
+    std_error: float
+
+
+class PlaceStatistics(BaseModel):
+    """Attributes:
+        mean_tokens: Time-averaged number of tokens in the place (the queue length)
+        max_tokens: Largest number of tokens held at once
+        mean_sojourn: Mean time a token spends in the place, by Little's law (``nan`` if no token arrived)
+    """
+    mean_tokens: Estimate
+    max_tokens: Estimate
+    mean_sojourn: Estimate
+
+
+class TransitionStatistics(BaseModel):
+    """Attributes:
+        throughput: Completed firings per unit of time
+        utilisation: Time-averaged fraction of the servers that are busy (0 for immediate transitions)
+        lost: Arrivals dropped because an output place was full, per unit of time (sources only)
+    """
+    throughput: Estimate
+    utilisation: Estimate
+    lost: Estimate
+
+
+class SimulationReport(BaseModel):
+    """Attributes:
+        replications: Number of independent replications
+        duration: Length of the measured period, ``horizon - warm_up``
+        places: Statistics per place
+        transitions: Statistics per transition
+        cycle_time: Mean time a token spends between entering the net and reaching a place that nothing consumes,
+            by Little's law over all other places and the transitions in service
+    """
+    replications: int
+    duration: float
+    places: dict[PlaceNodeName, PlaceStatistics]
+    transitions: dict[TransitionNodeName, TransitionStatistics]
+    cycle_time: Estimate
+
+
+class StochasticSimulation:
+    """A timed, stochastic model of a net. See the module docstring.
+
+    Args:
+        executable_graph: The net; its current marking is the initial marking of every replication.
+        service_times: Sampler of the service time of each timed transition.
+        arrivals: Sampler of the time between firings of each source transition.
+        servers: Number of servers of each timed transition, 1 if not given.
+        routing: {transition: {output place: probability}} for transitions with several output places.
+    """
+
+    def __init__(
+        self,
+        executable_graph: ExecutableGraph,
+        service_times: Optional[dict[TransitionNodeName, Sampler]] = None,
+        arrivals: Optional[dict[TransitionNodeName, Sampler]] = None,
+        servers: Optional[dict[TransitionNodeName, int]] = None,
+        routing: Optional[dict[TransitionNodeName, dict[PlaceNodeName, float]]] = None,
+    ):
+        abstraction = CountAbstraction(executable_graph)
+        service_times, arrivals, servers, routing = service_times or {}, arrivals or {}, servers or {}, routing or {}
+        self.place_names = abstraction.place_names
+        self.transition_names: tuple[TransitionNodeName, ...] = tuple(
+            dict.fromkeys(abstraction.transition_of.values())
+        )
+        unknown = (set(service_times) | set(arrivals) | set(servers) | set(routing)) - set(self.transition_names)
+        if unknown:
+            raise ValueError(f"Unknown transitions: {sorted(unknown)}.")
+        alternatives: dict[TransitionNodeName, list[int]] = {name: [] for name in self.transition_names}
+        for row, name in enumerate(abstraction.transition_names):
+            alternatives[abstraction.transition_of[name]].append(row)
+        first_rows = [rows[0] for rows in alternatives.values()]
+        self.pre = abstraction.pre[first_rows]
+        self.resets = abstraction.resets[first_rows]
+        self.required = np.maximum(self.pre, self.resets.astype(np.int64))
+        # A transition with several output places needs room in each of them to start.
+        self.capacity_limits = np.stack([
+            abstraction.capacity_limits[rows].min(axis=0) for rows in alternatives.values()
+        ]) if alternatives else abstraction.capacity_limits
+        self.capacities = abstraction.capacities
+        self.initial_marking = abstraction.initial_marking
+        self.outputs = [abstraction.post[rows] for rows in alternatives.values()]  # (alternatives, places) each
+        self.output_probabilities = []
+        for name, rows in alternatives.items():
+            if name not in routing:
+                self.output_probabilities.append(np.full(len(rows), 1.0 / len(rows)))
+                continue
+            destinations = [self.place_names[int(np.flatnonzero(abstraction.post[row])[0])] for row in rows]
+            if set(routing[name]) - set(destinations):
+                raise ValueError(f"Routing of {name} names places it does not output to.")
+            weights = np.array([routing[name].get(place, 0.0) for place in destinations], dtype=float)
+            if weights.sum() <= 0:
+                raise ValueError(f"Routing probabilities of {name} must have a positive sum.")
+            self.output_probabilities.append(weights / weights.sum())
+        is_source = ~self.required.any(axis=1)
+        self.sources = tuple(int(i) for i in np.flatnonzero(is_source))
+        for index in self.sources:
+            if self.transition_names[index] not in arrivals:
+                raise ValueError(f"Source transition {self.transition_names[index]} needs an arrival process.")
+        for name in arrivals:
+            if not is_source[self.transition_names.index(name)]:
+                raise ValueError(f"Transition {name} has input places, so it cannot have an arrival process.")
+        self.arrivals = [arrivals[self.transition_names[index]] for index in self.sources]
+        self.timed = tuple(
+            index for index, name in enumerate(self.transition_names) if name in service_times and not is_source[index]
+        )
+        self.immediate = tuple(
+            index for index, name in enumerate(self.transition_names)
+            if name not in service_times and not is_source[index]
+        )
+        self.service_times = {index: service_times[self.transition_names[index]] for index in self.timed}
+        self.servers = np.ones(len(self.transition_names), dtype=np.int64)
+        for name, count in servers.items():
+            if count < 1:
+                raise ValueError(f"Transition {name} needs at least one server, got {count}.")
+            self.servers[self.transition_names.index(name)] = count
+        is_sink = ~((abstraction.pre > 0) | abstraction.resets).any(axis=0)
+        self.sinks = np.flatnonzero(is_sink)
+        self.non_sinks = np.flatnonzero(~is_sink)
+
+    def run(
+        self, horizon: float, replications: int = 100, seed: Optional[int] = None, warm_up: float = 0.0,
+    ) -> SimulationReport:
+        """Simulate ``replications`` independent runs from time 0 to ``horizon``."""
+        if not 0 <= warm_up < horizon:
+            raise ValueError(f"Expected 0 <= warm_up < horizon, got warm_up={warm_up} and horizon={horizon}.")
+        generator = Generator(SFC64(seed))
+        run = _Replications(self, replications, generator, horizon, warm_up)
+        run.simulate()
+        return run.report()
+
+
+class _Replications:
+    """The state of all replications of one ``StochasticSimulation.run``."""
+
+    def __init__(
+        self, model: StochasticSimulation, count: int, generator: Generator, horizon: float, warm_up: float,
+    ):
+        self.model = model
+        self.count = count
+        self.generator = generator
+        self.horizon = horizon
+        self.warm_up = warm_up
+        transition_count = len(model.transition_names)
+        self.marking = np.tile(model.initial_marking, (count, 1))
+        self.completions = np.full((count, transition_count, int(model.servers.max())), np.inf)
+        self.routes = np.zeros(self.completions.shape, dtype=np.intp)  # The output alternative of each service.
+        self.reserved = np.zeros(self.marking.shape, dtype=np.int64)  # Tokens that services in progress will deliver.
+        self.next_arrivals = np.stack(
+            [sample(generator, count) for sample in model.arrivals], axis=1,
+        ) if model.sources else np.full((count, 0), np.inf)
+        self.now = np.zeros(count)
+        self.active = np.ones(count, dtype=bool)
+        self.token_time = np.zeros(self.marking.shape)
+        self.busy_time = np.zeros((count, transition_count))
+        self.max_tokens = self.marking.astype(float) if warm_up == 0 else np.zeros(self.marking.shape)
+        self.produced = np.zeros(self.marking.shape)
+        self.fired = np.zeros((count, transition_count))
+        self.lost = np.zeros((count, transition_count))
+
+    def simulate(self) -> None:
+        while self.active.any():
+            self._start_enabled_transitions()
+            self._advance_to_next_event()
+
+    def _enabled(self, transition_index: int, replications: np.ndarray) -> np.ndarray:
+        marking = self.marking[replications]
+        return np.all(marking >= self.model.required[transition_index], axis=1) & np.all(
+            marking + self.reserved[replications] <= self.model.capacity_limits[transition_index], axis=1,
+        )
+
+    def _consume(self, transition_index: int, replications: np.ndarray) -> None:
+        remaining = self.marking[replications] - self.model.pre[transition_index]
+        self.marking[replications] = np.where(self.model.resets[transition_index], 0, remaining)
+
+    def _route(self, transition_index: int, count: int) -> np.ndarray:
+        """The output alternative taken by each of ``count`` firings of a transition."""
+        outputs = self.model.outputs[transition_index]
+        if len(outputs) == 1:
+            return np.zeros(count, dtype=np.intp)
+        probabilities = self.model.output_probabilities[transition_index]
+        return self.generator.choice(len(outputs), count, p=probabilities)
+
+    def _produce(self, transition_index: int, replications: np.ndarray, routes: np.ndarray) -> None:
+        produced = self.model.outputs[transition_index][routes]
+        np.add.at(self.marking, replications, produced)
+        is_measured = self.now[replications] >= self.warm_up
+        np.add.at(self.produced, replications[is_measured], produced[is_measured])
+        np.add.at(self.fired, (replications[is_measured], transition_index), 1)
+        measured = replications[is_measured]
+        np.maximum.at(self.max_tokens, measured, self.marking[measured])
+
+    def _start_enabled_transitions(self) -> None:
+        """Start every timed transition that has a free server and fire every immediate one, until none can."""
+        for _ in range(_MAX_STEPS_PER_INSTANT):
+            started = False
+            order = self.generator.permutation(len(self.model.timed) + len(self.model.immediate))
+            candidates = self.model.timed + self.model.immediate
+            for position in order:
+                transition_index = candidates[position]
+                replications = np.flatnonzero(self.active)
+                if transition_index in self.model.service_times:
+                    servers = self.model.servers[transition_index]
+                    free = np.isinf(self.completions[replications, transition_index, :servers])
+                    replications = replications[free.any(axis=1)]
+                replications = replications[self._enabled(transition_index, replications)]
+                if len(replications) == 0:
+                    continue
+                started = True
+                self._consume(transition_index, replications)
+                if transition_index in self.model.service_times:
+                    servers = self.model.servers[transition_index]
+                    server = np.argmax(np.isinf(self.completions[replications, transition_index, :servers]), axis=1)
+                    durations = self.model.service_times[transition_index](self.generator, len(replications))
+                    self.completions[replications, transition_index, server] = self.now[replications] + durations
+                    routes = self._route(transition_index, len(replications))
+                    self.routes[replications, transition_index, server] = routes
+                    np.add.at(self.reserved, replications, self.model.outputs[transition_index][routes])
+                else:
+                    self._produce(transition_index, replications, self._route(transition_index, len(replications)))
+            if not started:
+                return
+        raise RuntimeError(
+            f"More than {_MAX_STEPS_PER_INSTANT} firings at one instant: immediate transitions form a loop."
+        )
+
+    def _advance_to_next_event(self) -> None:
+        count, transition_count, server_count = self.completions.shape
+        flat_completions = self.completions.reshape(count, transition_count * server_count)
+        completion_slot = np.argmin(flat_completions, axis=1)
+        next_completion = flat_completions[np.arange(count), completion_slot]
+        if self.next_arrivals.shape[1]:
+            arrival_slot = np.argmin(self.next_arrivals, axis=1)
+            next_arrival = self.next_arrivals[np.arange(count), arrival_slot]
+        else:
+            arrival_slot = np.zeros(count, dtype=np.intp)
+            next_arrival = np.full(count, np.inf)
+        next_event = np.minimum(next_completion, next_arrival)
+        until = np.where(self.active, np.minimum(next_event, self.horizon), self.now)
+        elapsed = np.maximum(until, self.warm_up) - np.maximum(self.now, self.warm_up)
+        warming_up = np.flatnonzero((self.now < self.warm_up) & (until >= self.warm_up))
+        self.max_tokens[warming_up] = np.maximum(self.max_tokens[warming_up], self.marking[warming_up])
+        self.token_time += self.marking * elapsed[:, None]
+        self.busy_time += np.isfinite(self.completions).sum(axis=2) * elapsed[:, None]
+        self.now = until
+        self.active &= next_event < self.horizon
+        completing = np.flatnonzero(self.active & (next_completion <= next_arrival))
+        arriving = np.flatnonzero(self.active & (next_arrival < next_completion))
+        if len(completing):
+            transitions, servers = np.divmod(completion_slot[completing], server_count)
+            self.completions[completing, transitions, servers] = np.inf
+            routes = self.routes[completing, transitions, servers]
+            for transition_index in np.unique(transitions).tolist():
+                is_transition = transitions == transition_index
+                replications, transition_routes = completing[is_transition], routes[is_transition]
+                np.subtract.at(self.reserved, replications, self.model.outputs[transition_index][transition_routes])
+                self._produce(transition_index, replications, transition_routes)
+        if len(arriving):
+            slots = arrival_slot[arriving]
+            for slot in np.unique(slots).tolist():
+                replications = arriving[slots == slot]
+                transition_index = self.model.sources[slot]
+                self.next_arrivals[replications, slot] += self.model.arrivals[slot](self.generator, len(replications))
+                has_room = self._enabled(transition_index, replications)
+                arrived = replications[has_room]
+                self._produce(transition_index, arrived, self._route(transition_index, len(arrived)))
+                lost = replications[~has_room]
+                np.add.at(self.lost, (lost[self.now[lost] >= self.warm_up], transition_index), 1)
+
+    def report(self) -> SimulationReport:
+        model = self.model
+        duration = self.horizon - self.warm_up
+        mean_tokens = self.token_time / duration
+        inflow = self.produced / duration
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sojourn = np.where(inflow > 0, mean_tokens / inflow, np.nan)
+            utilisation = self.busy_time / (duration * model.servers)
+            in_service = self.busy_time.sum(axis=1) / duration
+            work_in_progress = mean_tokens[:, model.non_sinks].sum(axis=1) + in_service
+            completed = inflow[:, model.sinks].sum(axis=1)
+            cycle_time = np.where(completed > 0, work_in_progress / completed, np.nan)
+        return SimulationReport(
+            replications=self.count,
+            duration=duration,
+            places={
+                name: PlaceStatistics(
+                    mean_tokens=_estimate(mean_tokens[:, index]),
+                    max_tokens=_estimate(self.max_tokens[:, index]),
+                    mean_sojourn=_estimate(sojourn[:, index]),
+                )
+                for index, name in enumerate(model.place_names)
+            },
+            transitions={
+                name: TransitionStatistics(
+                    throughput=_estimate(self.fired[:, index] / duration),
+                    utilisation=_estimate(utilisation[:, index]),
+                    lost=_estimate(self.lost[:, index] / duration),
+                )
+                for index, name in enumerate(model.transition_names)
+            },
+            cycle_time=_estimate(cycle_time),
+        )
+
+
+def _estimate(values: np.ndarray) -> Estimate:
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return Estimate(mean=float("nan"), std_error=float("nan"))
+    std_error = float(values.std(ddof=1) / np.sqrt(len(values))) if len(values) > 1 else float("nan")
+    return Estimate(mean=float(values.mean()), std_error=std_error)
@@ -0,0 +1,291 @@
+"""Memoise pure transitions on a fingerprint of their input tokens.
+
+A transition with a ``cache`` looks its inputs up before calling its function, and on a hit returns the stored
+result without calling it:
+
+    cache = TransitionCache(max_entries=10_000, ttl=3600, directory='.petritype_cache')
+    FunctionTransitionNode('Fit', fit_model, cache=cache)
+
+The fingerprint is a blake2b digest of the pickled argument tokens and ``kwargs``, together with the function's
+module, qualified name and compiled code, so editing a function invalidates its entries. Sets are pickled with their
+members in a canonical order (see ``canonical_dumps``), so the fingerprint does not depend on the hash seed of the
+process and entries written to disk by one process are found by the next. The state bound to the
+function is part of the fingerprint too: its defaults, the arguments of a ``functools.partial``, the instance of a
+bound method or a callable object, all pickled on every call. Closure variables and globals the function reads are
+not, so only cache functions whose result depends on their arguments and bound state alone. Inputs or state that
+cannot be pickled are never cached.
+
+Results are stored pickled: every hit returns a fresh copy, so downstream transitions that modify their tokens do
+not modify the cache, and the pickled size is what ``max_bytes`` limits. Entries are evicted least recently used
+first once there are more than ``max_entries`` or they take more than ``max_bytes``, and expire ``ttl`` seconds after
+they were stored. With a ``directory`` every entry is also written to disk, so later processes start warm; disk
+entries are not evicted, only expired.
+"""
+
+import functools
+import hashlib
+import inspect
+import io
+import marshal
+import os
+import pickle
+import tempfile
+import time
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+from types import FunctionType
+from typing import Any, Callable, Optional, Union
+
+from pydantic import BaseModel
+
+
+_PICKLE_PROTOCOL = 5
+
+
+class CacheStats(BaseModel):
+    """Counters of a ``TransitionCache``.
+
+    Attributes:
+        hits: Calls answered from memory or disk
+        disk_hits: The subset of ``hits`` read from disk
+        misses: Calls that ran the function
+        uncacheable: Calls whose inputs or result could not be pickled
+        evictions: Entries dropped from memory to respect ``max_entries`` or ``max_bytes``
+        expirations: Entries dropped because they were older than ``ttl``
+        entries: Entries held in memory
+        bytes: Total pickled size of the entries held in memory
+    """
+    hits: int
+    disk_hits: int
+    misses: int
+    uncacheable: int
+    evictions: int
+    expirations: int
+    entries: int
+    bytes: int
+
+
+class TransitionCache:
+    """Results of transition functions, keyed by a fingerprint of the function and its arguments.
+
+    Args:
+        max_entries: Maximum number of entries held in memory, or None for no limit.
+        max_bytes: Maximum total pickled size of the entries held in memory, or None for no limit.
+        ttl: Seconds after which an entry expires, or None to keep entries until they are evicted.
+        directory: Directory in which to persist entries, or None to keep them in memory only.
+
+    One cache can be shared by several transitions; entries of different functions never collide.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = 1024,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+        directory: Optional[Union[str, Path]] = None,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.directory = None if directory is None else Path(directory)
+        self._entries: OrderedDict[str, tuple[bytes, Optional[float]]] = OrderedDict()  # key: (payload, expires at)
+        self._bytes = 0
+        self._hits = self._disk_hits = self._misses = self._uncacheable = 0
+        self._evictions = self._expirations = 0
+
+    async def call(self, function: Callable, kwargs: dict[str, Any]) -> Any:
+        """Return the cached result of ``function(**kwargs)``, calling and caching it on a miss."""
+        key = self.fingerprint(function, kwargs)
+        if key is not None:
+            found, result = self.get(key)
+            if found:
+                return result
+        if inspect.iscoroutinefunction(function):
+            result = await function(**kwargs)
+        else:
+            result = function(**kwargs)
+        if key is None:
+            self._uncacheable += 1
+        else:
+            self._misses += 1
+            self.put(key, result)
+        return result
+
+    def fingerprint(self, function: Callable, kwargs: dict[str, Any]) -> Optional[str]:
+        """The cache key of ``function(**kwargs)``, or None if the arguments or the function's state cannot be
+        pickled."""
+        try:
+            arguments = canonical_dumps(sorted(kwargs.items()))
+        except Exception:
+            return None
+        function_fingerprint = self._function_fingerprint(function)
+        if function_fingerprint is None:
+            return None
+        digest = hashlib.blake2b(function_fingerprint, digest_size=20)
+        digest.update(arguments)
+        return digest.hexdigest()
+
+    def _function_fingerprint(self, function: Callable) -> Optional[bytes]:
+        return code_fingerprint(function)
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        """(True, result) for a live entry, (False, None) otherwise."""
+        entry = self._entries.get(key)
+        from_disk = False
+        if entry is None and self.directory is not None:
+            entry = self._read(key)
+            from_disk = entry is not None
+        if entry is None:
+            return False, None
+        payload, expires_at = entry
+        if expires_at is not None and expires_at <= time.time():
+            self._expirations += 1
+            self._discard(key)
+            return False, None
+        if from_disk:
+            self._disk_hits += 1
+            self._remember(key, payload, expires_at)
+        else:
+            self._entries.move_to_end(key)
+        self._hits += 1
+        return True, pickle.loads(payload)
+
+    def put(self, key: str, result: Any) -> None:
+        try:
+            payload = pickle.dumps(result, protocol=_PICKLE_PROTOCOL)
+        except Exception:
+            self._uncacheable += 1
+            return
+        expires_at = None if self.ttl is None else time.time() + self.ttl
+        self._remember(key, payload, expires_at)
+        if self.directory is not None:
+            self._write(key, payload, expires_at)
+
+    def clear(self, disk: bool = False) -> None:
+        """Drop the entries held in memory and, with ``disk=True``, those persisted in ``directory``."""
+        self._entries.clear()
+        self._bytes = 0
+        if disk and self.directory is not None and self.directory.exists():
+            for path in self.directory.glob("*/*.pkl"):
+                path.unlink(missing_ok=True)
+
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            hits=self._hits, disk_hits=self._disk_hits, misses=self._misses, uncacheable=self._uncacheable,
+            evictions=self._evictions, expirations=self._expirations, entries=len(self._entries), bytes=self._bytes,
+        )
+
+    def _remember(self, key: str, payload: bytes, expires_at: Optional[float]) -> None:
+        if key in self._entries:
+            self._bytes -= len(self._entries.pop(key)[0])
+        if self.max_bytes is not None and len(payload) > self.max_bytes:
+            return  # Would evict everything else and still not fit.
+        self._entries[key] = (payload, expires_at)
+        self._bytes += len(payload)
+        while (self.max_entries is not None and len(self._entries) > self.max_entries) or (
+            self.max_bytes is not None and self._bytes > self.max_bytes
+        ):
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self._evictions += 1
+
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[0])
+        if self.directory is not None:
+            self._path(key).unlink(missing_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.pkl"
+
+    def _read(self, key: str) -> Optional[tuple[bytes, Optional[float]]]:
+        try:
+            with open(self._path(key), "rb") as file:
+                return pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def _write(self, key: str, payload: bytes, expires_at: Optional[float]) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file and rename it, so readers never see a partial entry.
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(file_descriptor, "wb") as file:
+                pickle.dump((payload, expires_at), file, protocol=_PICKLE_PROTOCOL)
+            os.replace(temporary_path, path)
+        except BaseException:
+            Path(temporary_path).unlink(missing_ok=True)
+            raise
+
+
+def code_fingerprint(function: Callable) -> Optional[bytes]:
+    """Module, qualified name and compiled code of ``function`` with its bound state, as bytes. See
+    ``callable_fingerprint``."""
+    return callable_fingerprint(function, code_description)
+
+
+def callable_fingerprint(function: Callable, describe: Callable[[FunctionType], bytes]) -> Optional[bytes]:
+    """``describe`` applied to the plain function behind ``function``, together with the state bound to it.
+
+    The bound state is the defaults of a plain function, the arguments of a ``functools.partial``, the instance of a
+    bound method, and a callable object itself; it is pickled, and None is returned if it cannot be. Descriptions of
+    plain functions are remembered per function in a weak-keyed table, so functions and closures can still be freed.
+    """
+    if isinstance(function, functools.partial):
+        inner = callable_fingerprint(function.func, describe)
+        state: Any = (function.args, sorted(function.keywords.items()))
+    elif inspect.ismethod(function):
+        inner = callable_fingerprint(function.__func__, describe)
+        state = function.__self__
+    elif isinstance(function, FunctionType):
+        descriptions = _descriptions.setdefault(describe, weakref.WeakKeyDictionary())
+        inner = descriptions.get(function)
+        if inner is None:
+            inner = descriptions[function] = describe(function)
+        state = (function.__defaults__, function.__kwdefaults__)
+    else:  # A callable object, or a builtin.
+        call = type(function).__call__
+        inner = callable_fingerprint(call, describe) if isinstance(call, FunctionType) else b""
+        wrapped = getattr(function, "function", None)  # Adapters such as ``SharedArrayTransition``.
+        if inner is not None and callable(wrapped):
+            wrapped_fingerprint = callable_fingerprint(wrapped, describe)
+            inner = None if wrapped_fingerprint is None else inner + b"\x00" + wrapped_fingerprint
+        state = function
+    if inner is None:
+        return None
+    try:
+        pickled_state = canonical_dumps(state)
+    except Exception:
+        return None
+    return b"\x00".join((type(function).__qualname__.encode(), inner, pickled_state))
+
+
+class _CanonicalPickler(pickle.Pickler):
+
+    def persistent_id(self, obj: Any) -> Any:
+        # Called for every object before it is pickled, unlike ``reducer_override``, which skips exact sets. The
+        # members are ordered by their own canonical pickles rather than by their hashes, which vary per process.
+        if isinstance(obj, (set, frozenset)):
+            return type(obj).__qualname__, tuple(sorted(obj, key=canonical_dumps))
+        return None
+
+
+def canonical_dumps(value: Any) -> bytes:
+    """``pickle.dumps(value)`` with the members of every set and frozenset in a fixed order, so that equal values give
+    equal bytes in every process whatever its ``PYTHONHASHSEED``. The result is for hashing only; it cannot be
+    unpickled."""
+    buffer = io.BytesIO()
+    _CanonicalPickler(buffer, protocol=_PICKLE_PROTOCOL).dump(value)
+    return buffer.getvalue()
+
+
+def code_description(function: FunctionType) -> bytes:
+    return b"\x00".join((
+        str(function.__module__).encode(), function.__qualname__.encode(), marshal.dumps(function.__code__),
+    ))
+
+
+_descriptions: dict[Callable, weakref.WeakKeyDictionary] = {}
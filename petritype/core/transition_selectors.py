@@ -0,0 +1,570 @@
+"""Built-in, stateful transition selectors.
+
+Every selector here satisfies the ``transition_selector`` contract of ``ExecutableGraph`` - it is called as
+``selector(graph, enabled_transitions)`` and returns the transition to fire (or None to stop) - but keeps its own
+state across steps so that the work done per step does not grow with the size of the net.
+
+Selectors that set ``tracks_enabled_transitions = True`` maintain their own incremental view of which transitions are
+enabled. ``execute_graph`` skips its O(T) enabled-transition scan for them and passes an empty list instead. They
+rebuild their state only when they are used on a different graph or the topology of the graph changes (when
+``ExecutableGraph.lookups`` returns a new object), and otherwise update it from the places touched by the transition
+they last selected. At the start of each ``execute_graph`` call they also compare the token lists of all places with
+those they last saw, which picks up tokens appended to or removed from places between calls. Changes that keep the
+length of a token list, and tokens added while a call is running, must be recorded with
+``ExecutableGraph.mark_place_changed``, as ``add_token_when_room_available`` does.
+"""
+
+import bisect
+import heapq
+import inspect
+import math
+import random
+import weakref
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Optional, Sequence
+
+import numpy as np
+
+from petritype.core.data_structures import PlaceNodeName, TransitionNodeName
+from petritype.core.executable_graph_components import (
+    ArgumentEdgeToTransition, ExecutableGraph, ExecutableGraphCheck, FunctionTransitionNode, GraphLookups,
+    ListPlaceNode, MapTransitionNames, ReturnedEdgeFromTransition,
+)
+from petritype.core.guards import CompiledGuards
+
+
+# Weakly keyed so that remembering how to call a lambda or closure does not keep it alive. Bound methods are created
+# afresh on every attribute access, so they are remembered by their function instead.
+_takes_graph_cache: "weakref.WeakKeyDictionary[Callable, bool]" = weakref.WeakKeyDictionary()
+_method_takes_graph_cache: "weakref.WeakKeyDictionary[Callable, bool]" = weakref.WeakKeyDictionary()
+
+
+class ActivationFunctionCall:
+
+    def takes_graph(activation_function: Callable) -> bool:
+        """Whether the activation function accepts the graph as a positional argument.
+
+        Resolved once per function rather than by trying ``f(graph)`` and falling back to ``f()`` on ``TypeError``,
+        which would also swallow type errors raised inside the function. Callables that are unhashable or cannot be
+        weakly referenced, such as pydantic models with a ``__call__``, are inspected on every call.
+        """
+        if inspect.ismethod(activation_function):
+            cache, key = _method_takes_graph_cache, activation_function.__func__
+        else:
+            cache, key = _takes_graph_cache, activation_function
+        try:
+            return cache[key]
+        except KeyError:
+            pass
+        except TypeError:
+            return ActivationFunctionCall._signature_takes_graph(activation_function)
+        takes_graph = cache[key] = ActivationFunctionCall._signature_takes_graph(activation_function)
+        return takes_graph
+
+    def _signature_takes_graph(activation_function: Callable) -> bool:
+        try:
+            parameters = inspect.signature(activation_function).parameters.values()
+        except (TypeError, ValueError):
+            return False
+        return any(
+            parameter.kind in (
+                inspect.Parameter.POSITIONAL_ONLY,
+                inspect.Parameter.POSITIONAL_OR_KEYWORD,
+                inspect.Parameter.VAR_POSITIONAL,
+            )
+            for parameter in parameters
+        )
+
+    def result(transition: FunctionTransitionNode, graph: ExecutableGraph):
+        """Call the transition's activation function, passing the graph if the function accepts it."""
+        if ActivationFunctionCall.takes_graph(transition.activation_function):
+            return transition.activation_function(graph)
+        return transition.activation_function()
+
+
+class IncrementalSelector(ABC):
+    """Base class for selectors that follow the marking incrementally rather than rescanning the graph.
+
+    On a rebuild (first use, a different graph, or a change of topology) every transition is passed to ``_update``.
+    Otherwise only the transitions affected by the places that may have changed are: the input and output places of
+    the transition selected last, the places marked with ``ExecutableGraph.mark_place_changed``, and at the start of
+    an ``execute_graph`` call (or after fires this selector did not choose) the places whose token list was replaced
+    or changed length. The transitions consuming from those places, those producing into the ones that have a
+    capacity, the transitions marked as changed outside of a fire (async sources that received an item) and the
+    transition selected last are passed to ``_update``. Subclasses implement ``_reset``, ``_update`` and ``_select``;
+    state that should survive the marking changes of a rebuild (e.g. a round-robin cursor) is kept outside ``_reset``.
+    """
+
+    tracks_enabled_transitions = True
+
+    def __init__(self):
+        # The lookups object of the graph, kept rather than its id, identifies both the graph and its topology.
+        self._lookups: Optional[GraphLookups] = None
+        self._expected_step_count: Optional[int] = None
+        self._token_lists: dict[PlaceNodeName, tuple[list, int]] = {}  # The token list of each place and its length.
+        self._selected_places: tuple[PlaceNodeName, ...] = ()
+        self._selected_transition: tuple[TransitionNodeName, ...] = ()
+        self._places_of: dict[TransitionNodeName, tuple[PlaceNodeName, ...]] = {}  # Input and output places.
+        self._positions: dict[TransitionNodeName, int] = {}
+        self._transitions: dict[TransitionNodeName, FunctionTransitionNode] = {}
+        self._consumers: dict[PlaceNodeName, tuple[TransitionNodeName, ...]] = {}
+        self._capacity_limited_producers: dict[PlaceNodeName, tuple[TransitionNodeName, ...]] = {}
+        self._incoming_edges: dict[TransitionNodeName, tuple[ArgumentEdgeToTransition, ...]] = {}
+        self._outgoing_edges: dict[TransitionNodeName, tuple[ReturnedEdgeFromTransition, ...]] = {}
+        self._place_names_to_nodes: dict[PlaceNodeName, ListPlaceNode] = {}
+
+    def __call__(
+        self, graph: ExecutableGraph, enabled_transitions: list[FunctionTransitionNode]
+    ) -> Optional[FunctionTransitionNode]:
+        place_names, transition_names = graph.take_changes_outside_fires()
+        if graph.lookups() is not self._lookups:
+            self._rebuild(graph)
+        else:
+            place_names = self._selected_places + place_names
+            # ``execute_graph`` resets ``last_fired`` at the start of every call, and each fire increments
+            # ``step_count`` by one, so anything else means tokens may have been moved behind our back.
+            if graph.last_fired is None or graph.step_count != self._expected_step_count:
+                place_names += self._replaced_or_resized_token_lists()
+            self._marking_changed(graph, place_names, self._selected_transition + transition_names)
+            self._remember_token_lists(place_names)
+        transition = self._select(graph)
+        if transition is None:
+            self._selected_places, self._selected_transition = (), ()
+        else:
+            self._selected_places = self._places_of[transition.name]
+            self._selected_transition = (transition.name,)
+        self._expected_step_count = graph.step_count + (transition is not None)
+        return transition
+
+    @abstractmethod
+    def _reset(self, graph: ExecutableGraph) -> None:
+        """Clear the per-graph state before every transition is passed to ``_update`` on a rebuild."""
+
+    @abstractmethod
+    def _update(self, graph: ExecutableGraph, transition: FunctionTransitionNode) -> None:
+        """Bring the state of a transition whose input or output places may have changed up to date."""
+
+    @abstractmethod
+    def _select(self, graph: ExecutableGraph) -> Optional[FunctionTransitionNode]:
+        """The transition to fire next, or None if none is enabled."""
+
+    def _marking_changed(
+        self,
+        graph: ExecutableGraph,
+        place_names: tuple[PlaceNodeName, ...],
+        transition_names: tuple[TransitionNodeName, ...],
+    ) -> None:
+        for transition_name in self._affected_transitions(graph, place_names, transition_names):
+            self._update(graph, self._transitions[transition_name])
+
+    def _rebuild(self, graph: ExecutableGraph) -> None:
+        lookups = self._lookups = graph.lookups()
+        self._transitions = MapTransitionNames.to_function_transition_nodes(graph)
+        self._positions = {transition.name: i for i, transition in enumerate(graph.transitions)}
+        self._incoming_edges = lookups.transition_names_to_incoming_edges
+        self._outgoing_edges = lookups.transition_names_to_outgoing_edges
+        self._place_names_to_nodes = lookups.place_names_to_nodes
+        consumers: dict[PlaceNodeName, dict[TransitionNodeName, None]] = {}
+        for edge in graph.argument_edges:
+            consumers.setdefault(edge.place_node_name, {})[edge.transition_node_name] = None
+        self._consumers = {place_name: tuple(names) for place_name, names in consumers.items()}
+        producers: dict[PlaceNodeName, dict[TransitionNodeName, None]] = {}
+        for edge in graph.return_edges:
+            if self._place_names_to_nodes[edge.place_node_name].capacity is not None:
+                producers.setdefault(edge.place_node_name, {})[edge.transition_node_name] = None
+        self._capacity_limited_producers = {place_name: tuple(names) for place_name, names in producers.items()}
+        self._places_of = {
+            name: tuple(dict.fromkeys(
+                [edge.place_node_name for edge in self._incoming_edges.get(name, ())]
+                + [edge.place_node_name for edge in self._outgoing_edges.get(name, ())]
+            ))
+            for name in self._transitions
+        }
+        self._token_lists = {}
+        self._remember_token_lists(tuple(self._place_names_to_nodes))
+        self._reset(graph)
+        for transition in graph.transitions:
+            self._update(graph, transition)
+
+    def _replaced_or_resized_token_lists(self) -> tuple[PlaceNodeName, ...]:
+        changed = []
+        for place_name, place in self._place_names_to_nodes.items():
+            tokens, length = self._token_lists[place_name]
+            if place.tokens is not tokens or len(tokens) != length:
+                changed.append(place_name)
+        return tuple(changed)
+
+    def _remember_token_lists(self, place_names: tuple[PlaceNodeName, ...]) -> None:
+        for place_name in place_names:
+            tokens = self._place_names_to_nodes[place_name].tokens
+            self._token_lists[place_name] = (tokens, len(tokens))
+
+    def _affected_transitions(
+        self,
+        graph: ExecutableGraph,
+        place_names: tuple[PlaceNodeName, ...],
+        transition_names: tuple[TransitionNodeName, ...],
+    ) -> tuple[TransitionNodeName, ...]:
+        affected = {}
+        for transition_name in transition_names:
+            if transition_name in self._transitions:
+                affected[transition_name] = None
+        for place_name in place_names:
+            for transition_name in self._consumers.get(place_name, ()):
+                affected[transition_name] = None
+            for transition_name in self._capacity_limited_producers.get(place_name, ()):
+                affected[transition_name] = None
+        return tuple(affected)
+
+    def _is_enabled(self, transition: FunctionTransitionNode) -> bool:
+        return ExecutableGraphCheck.transition_is_enabled(
+            transition=transition,
+            transition_names_to_incoming_edges=self._incoming_edges,
+            transition_names_to_outgoing_edges=self._outgoing_edges,
+            place_names_to_nodes=self._place_names_to_nodes,
+        )
+
+    def _input_places(self, transition: FunctionTransitionNode) -> tuple[ListPlaceNode, ...]:
+        return tuple(
+            self._place_names_to_nodes[edge.place_node_name]
+            for edge in self._incoming_edges.get(transition.name, ())
+        )
+
+
+class HeapSelector(IncrementalSelector):
+    """Fire the enabled transition with the smallest ``_key``, kept in a heap across steps.
+
+    Keys are only recomputed for the transitions passed to ``_update``. Stale heap entries are discarded lazily when
+    they reach the top, and the heap is compacted when it grows past twice the number of transitions, so a step costs
+    amortised O(k log T) for k affected transitions instead of O(T). Ties are broken in
+    favour of the transition declared first, which is also what the default selector fires.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._heap: list[tuple[Any, int, int, TransitionNodeName]] = []
+        self._versions: dict[TransitionNodeName, int] = {}
+
+    @abstractmethod
+    def _key(self, graph: ExecutableGraph, transition: FunctionTransitionNode) -> Any:
+        """The heap key of an enabled transition; the smallest key fires first."""
+
+    def _selected(self, graph: ExecutableGraph, transition: FunctionTransitionNode) -> None:
+        """Hook called with the transition about to fire."""
+
+    def _reset(self, graph: ExecutableGraph) -> None:
+        self._heap = []
+        self._versions = {name: self._versions.get(name, 0) + 1 for name in self._transitions}
+
+    def _update(self, graph: ExecutableGraph, transition: FunctionTransitionNode) -> None:
+        self._versions[transition.name] += 1
+        if self._is_enabled(transition):
+            heapq.heappush(self._heap, (
+                self._key(graph, transition),
+                self._positions[transition.name],
+                self._versions[transition.name],
+                transition.name,
+            ))
+        if len(self._heap) > 2 * len(self._transitions):
+            self._compact()
+
+    def _compact(self) -> None:
+        """Drop the superseded entries, which otherwise pile up behind transitions that stay enabled."""
+        self._heap = [entry for entry in self._heap if entry[2] == self._versions[entry[3]]]
+        heapq.heapify(self._heap)
+
+    def _select(self, graph: ExecutableGraph) -> Optional[FunctionTransitionNode]:
+        while self._heap:
+            _, _, version, transition_name = self._heap[0]
+            if version != self._versions[transition_name]:
+                heapq.heappop(self._heap)  # Superseded by a more recent entry for the same transition.
+                continue
+            transition = self._transitions[transition_name]
+            if not self._is_enabled(transition):
+                # Tokens were removed outside of a fire of an adjacent transition.
+                heapq.heappop(self._heap)
+                self._versions[transition_name] += 1
+                continue
+            self._selected(graph, transition)
+            return transition
+        return None
+
+
+class PriorityQueueSelector(HeapSelector):
+    """Fire the enabled transition with the highest priority.
+
+    A transition's priority is taken from ``priorities`` if it is listed there (static priority), otherwise from its
+    ``activation_function`` (dynamic priority, higher = more important), otherwise ``default_priority``.
+
+    Dynamic priorities are assumed to depend on the state of the transition's input places: after each fire only the
+    transitions consuming from the places it touched are re-checked and have their priority recomputed. Source
+    transitions (no input places) are evaluated when the selector is rebuilt, after they fire, and when an async
+    source receives an item.
+
+    Usage:
+        graph.transition_selector = PriorityQueueSelector(priorities={"Drain": 10.0})
+    """
+
+    def __init__(
+        self,
+        priorities: Optional[dict[TransitionNodeName, float]] = None,
+        default_priority: float = 0.0,
+    ):
+        super().__init__()
+        self.priorities = dict(priorities or {})
+        self.default_priority = default_priority
+
+    def priority_of(self, transition: FunctionTransitionNode, graph: ExecutableGraph) -> float:
+        if transition.name in self.priorities:
+            return self.priorities[transition.name]
+        if transition.activation_function is not None:
+            return ActivationFunctionCall.result(transition, graph)
+        return self.default_priority
+
+    def _key(self, graph: ExecutableGraph, transition: FunctionTransitionNode) -> float:
+        return -self.priority_of(transition, graph)
+
+
+class EarliestDeadlineSelector(HeapSelector):
+    """Fire the enabled transition whose deadline is earliest.
+
+    A transition's deadline is taken from ``deadlines`` if it is listed there, otherwise from its
+    ``activation_function`` (which should return an absolute deadline, e.g. a ``graph.now()`` timestamp). Transitions
+    without a deadline fire only when nothing with a deadline is enabled. As with ``PriorityQueueSelector``,
+    deadlines are recomputed only for transitions whose input places changed.
+    """
+
+    def __init__(self, deadlines: Optional[dict[TransitionNodeName, float]] = None):
+        super().__init__()
+        self.deadlines = dict(deadlines or {})
+
+    def deadline_of(self, transition: FunctionTransitionNode, graph: ExecutableGraph) -> float:
+        if transition.name in self.deadlines:
+            return self.deadlines[transition.name]
+        if transition.activation_function is not None:
+            return ActivationFunctionCall.result(transition, graph)
+        return math.inf
+
+    def _key(self, graph: ExecutableGraph, transition: FunctionTransitionNode) -> float:
+        return self.deadline_of(transition, graph)
+
+
+class WeightedFairSelector(HeapSelector):
+    """Share fires between enabled transitions in proportion to their weights (stride scheduling).
+
+    Each transition carries a virtual "pass" that advances by ``1 / weight`` every time it fires, and the enabled
+    transition with the lowest pass fires next. A transition that becomes enabled after sitting idle starts from the
+    current virtual time rather than its old pass, so it cannot monopolise the net to catch up. Pass values persist
+    across ``execute_graph`` calls. Transitions missing from ``weights`` get ``default_weight``.
+    """
+
+    def __init__(self, weights: Optional[dict[TransitionNodeName, float]] = None, default_weight: float = 1.0):
+        super().__init__()
+        self.weights = dict(weights or {})
+        self.default_weight = default_weight
+        for name, weight in self.weights.items():
+            if weight <= 0:
+                raise ValueError(f"Weight for transition '{name}' must be positive, got {weight}.")
+        if default_weight <= 0:
+            raise ValueError(f"default_weight must be positive, got {default_weight}.")
+        self._passes: dict[TransitionNodeName, float] = {}
+        self._virtual_time = 0.0
+
+    def _rebuild(self, graph: ExecutableGraph) -> None:
+        self._passes = {}
+        self._virtual_time = 0.0
+        super()._rebuild(graph)
+
+    def _key(self, graph: ExecutableGraph, transition: FunctionTransitionNode) -> float:
+        pass_value = max(self._passes.get(transition.name, 0.0), self._virtual_time)
+        self._passes[transition.name] = pass_value
+        return pass_value
+
+    def _selected(self, graph: ExecutableGraph, transition: FunctionTransitionNode) -> None:
+        pass_value = self._passes[transition.name]
+        self._virtual_time = pass_value
+        self._passes[transition.name] = pass_value + 1.0 / self.weights.get(transition.name, self.default_weight)
+
+
+class BottleneckAwareSelector(HeapSelector):
+    """Prefer transitions that drain the fullest places.
+
+    A place's fill level is its token count, or the fraction of its capacity in use if it has one. A transition's key
+    is the largest fill level among its input places, tracked incrementally: fill levels are only re-read for places
+    that changed. Transitions with no input places have a fill level of zero. When no enabled
+    transition consumes from a non-empty place the first enabled transition fires, as with the default selector.
+    """
+
+    def fill_level(self, place: ListPlaceNode) -> float:
+        if place.capacity is not None:
+            return len(place.tokens) / place.capacity
+        return len(place.tokens)
+
+    def _key(self, graph: ExecutableGraph, transition: FunctionTransitionNode) -> float:
+        return -max((self.fill_level(place) for place in self._input_places(transition)), default=0)
+
+
+class RoundRobinSelector(IncrementalSelector):
+    """Fire enabled transitions in turn, in declaration order.
+
+    The enabled transitions are kept as a sorted list of declaration positions, so finding the next one after the
+    previously fired transition is a binary search. The cursor persists across ``execute_graph`` calls.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._enabled_positions: list[int] = []
+        self._names_by_position: dict[int, TransitionNodeName] = {}
+        self._cursor: int = -1
+
+    def _rebuild(self, graph: ExecutableGraph) -> None:
+        self._cursor = -1
+        super()._rebuild(graph)
+        self._names_by_position = {position: name for name, position in self._positions.items()}
+
+    def _reset(self, graph: ExecutableGraph) -> None:
+        self._enabled_positions = []
+
+    def _update(self, graph: ExecutableGraph, transition: FunctionTransitionNode) -> None:
+        position = self._positions[transition.name]
+        index = bisect.bisect_left(self._enabled_positions, position)
+        is_listed = index < len(self._enabled_positions) and self._enabled_positions[index] == position
+        if self._is_enabled(transition):
+            if not is_listed:
+                self._enabled_positions.insert(index, position)
+        elif is_listed:
+            del self._enabled_positions[index]
+
+    def _select(self, graph: ExecutableGraph) -> Optional[FunctionTransitionNode]:
+        while self._enabled_positions:
+            index = bisect.bisect_right(self._enabled_positions, self._cursor) % len(self._enabled_positions)
+            position = self._enabled_positions[index]
+            transition = self._transitions[self._names_by_position[position]]
+            if not self._is_enabled(transition):
+                del self._enabled_positions[index]
+                continue
+            self._cursor = position
+            return transition
+        return None
+
+
+class RandomSelector(IncrementalSelector):
+    """Fire a uniformly random enabled transition using a seeded RNG.
+
+    The enabled transitions are kept in a list with a name-to-index map, so additions, removals (swap with the last
+    element) and the random choice are all O(1). Given the same seed and the same net, the sequence of fires is
+    reproducible.
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        super().__init__()
+        self.rng = random.Random(seed)
+        self._enabled: list[TransitionNodeName] = []
+        self._enabled_indices: dict[TransitionNodeName, int] = {}
+
+    def _reset(self, graph: ExecutableGraph) -> None:
+        self._enabled = []
+        self._enabled_indices = {}
+
+    def _update(self, graph: ExecutableGraph, transition: FunctionTransitionNode) -> None:
+        is_listed = transition.name in self._enabled_indices
+        if self._is_enabled(transition):
+            if not is_listed:
+                self._enabled_indices[transition.name] = len(self._enabled)
+                self._enabled.append(transition.name)
+        elif is_listed:
+            self._remove(transition.name)
+
+    def _remove(self, transition_name: TransitionNodeName) -> None:
+        index = self._enabled_indices.pop(transition_name)
+        last = self._enabled.pop()
+        if last != transition_name:
+            self._enabled[index] = last
+            self._enabled_indices[last] = index
+
+    def _select(self, graph: ExecutableGraph) -> Optional[FunctionTransitionNode]:
+        while self._enabled:
+            transition = self._transitions[self._enabled[self.rng.randrange(len(self._enabled))]]
+            if not self._is_enabled(transition):
+                self._remove(transition.name)
+                continue
+            return transition
+        return None
+
+
+class GuardSelector(IncrementalSelector):
+    """Fire the first enabled transition whose guard passes, evaluating all guards in one vectorised pass.
+
+    Declarative ``Guard`` activation functions (see ``petritype.core.guards``), the "has an input token" check and
+    the output place capacity check are compiled into ``CompiledGuards`` once per graph and evaluated against an array
+    of place token counts, which is updated only for the places that changed. Any other activation function is
+    treated as a Python guard and called only for transitions that pass the vectorised checks.
+
+    Transitions are considered in the order ``execute_graph`` lists them (last declared first), so this is a drop-in
+    replacement for the guard-based selector pattern in TRANSITION_SELECTION.md.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._compiled: Optional[CompiledGuards] = None
+        self._place_counts: np.ndarray = np.zeros(0, dtype=np.int64)
+        self._transition_list: tuple[FunctionTransitionNode, ...] = ()
+
+    def _reset(self, graph: ExecutableGraph) -> None:
+        self._compiled = CompiledGuards(graph.places, graph.transitions, self._incoming_edges, self._outgoing_edges)
+        self._transition_list = tuple(graph.transitions)
+        self._place_counts = np.fromiter(
+            (len(place.tokens) for place in graph.places), dtype=np.int64, count=len(graph.places)
+        )
+
+    def _update(self, graph: ExecutableGraph, transition: FunctionTransitionNode) -> None:
+        pass  # Enabledness is recomputed for every transition in ``_select``.
+
+    def _marking_changed(
+        self,
+        graph: ExecutableGraph,
+        place_names: tuple[PlaceNodeName, ...],
+        transition_names: tuple[TransitionNodeName, ...],
+    ) -> None:
+        # Sources are asked for a token in ``_select`` on every step, so only the place counts need updating.
+        for place_name in place_names:
+            place_index = self._compiled.place_indices[place_name]
+            self._place_counts[place_index] = len(self._place_names_to_nodes[place_name].tokens)
+
+    def _select(self, graph: ExecutableGraph) -> Optional[FunctionTransitionNode]:
+        passing = self._compiled.evaluate(self._place_counts, graph.now())
+        for transition_index in np.flatnonzero(passing)[::-1]:
+            transition = self._transition_list[transition_index]
+            if self._compiled.is_source[transition_index] and not transition.has_token():
+                continue
+            if self._compiled.has_fallback[transition_index] and not ActivationFunctionCall.result(transition, graph):
+                continue
+            return transition
+        return None
+
+
+class TraceSelector:
+    """Fire the transitions of a recorded firing sequence in order, and stop at its end.
+
+    Used to replay a counterexample trace of ``StateSpaceExplorer`` through ``execute_graph``. Raises a RuntimeError
+    if the next transition of the trace is not enabled or its activation function fails, which shows where the net
+    departs from the trace.
+    """
+
+    def __init__(self, trace: Sequence[TransitionNodeName]):
+        self.trace = tuple(trace)
+        self.position = 0
+
+    def __call__(
+        self, graph: ExecutableGraph, enabled_transitions: list[FunctionTransitionNode]
+    ) -> Optional[FunctionTransitionNode]:
+        if self.position == len(self.trace):
+            return None
+        name = self.trace[self.position]
+        for transition in enabled_transitions:
+            if transition.name == name:
+                if transition.activation_function is not None and not ActivationFunctionCall.result(transition, graph):
+                    break
+                self.position += 1
+                return transition
+        raise RuntimeError(f"Step {self.position} of the trace, {name}, is not enabled.")
@@ -1,8 +1,27 @@
-from typing import Any, Type, Union, get_origin, get_args, TypeAliasType
+import weakref
+from typing import Any, Type, Union, get_origin, get_args, get_type_hints, TypeAliasType
 from types import UnionType
 from typeguard import check_type, TypeCheckError
 
 
+# Weakly keyed so that caching the hints of a lambda or closure does not keep it alive.
+_type_hints_cache: "weakref.WeakKeyDictionary[Any, dict[str, Any]]" = weakref.WeakKeyDictionary()
+
+
+class TypeHints:
+
+    def of(obj: Any) -> dict[str, Any]:
+        """``get_type_hints(obj)``, resolved once per function or class. Do not mutate the returned dict."""
+        try:
+            return _type_hints_cache[obj]
+        except KeyError:
+            pass
+        except TypeError:  # Unhashable or not weakly referenceable callables are resolved every time.
+            return get_type_hints(obj)
+        hints = _type_hints_cache[obj] = get_type_hints(obj)
+        return hints
+
+
 class CompareTypes:
 
     def between_value_and_type(value: Any, type_: Type) -> bool:
@@ -85,6 +104,23 @@ class CompareTypes:
         # Use type() instead of isinstance() for strict checking because isinstance(True, int) is True.
         return type(value) is type_ or isinstance(value, type_)
 
+    def value_type_decides_match(type_: Type) -> bool:
+        """Whether ``between_value_and_type(value, type_)`` depends only on ``type(value)``.
+
+        True for ``Any``, ``None``, plain classes and unions or aliases of these. False for parameterised generics,
+        whose match depends on the contents of the value, and for protocols, which are checked by attribute.
+        """
+        if type_ is Any or type_ is None or type_ is type(None):
+            return True
+        if isinstance(type_, TypeAliasType):
+            return CompareTypes.value_type_decides_match(type_.__value__)
+        origin = get_origin(type_)
+        if origin in (Union, UnionType):
+            return all(CompareTypes.value_type_decides_match(arg) for arg in get_args(type_))
+        if origin is not None:
+            return False
+        return isinstance(type_, type) and not getattr(type_, "_is_protocol", False)
+
     def between_annotations(annotation1: Type, annotation2: Type) -> bool:
         if annotation1 == annotation2:
             return True
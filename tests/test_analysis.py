@@ -0,0 +1,208 @@
+"""Tests for ``CountAbstraction`` and ``StructuralAnalysis``: invariants, siphons, traps and coverability."""
+
+import pytest
+
+pytest.importorskip("rustworkx")
+
+from petritype.core.analysis import OMEGA, CountAbstraction, StructuralAnalysis  # noqa: E402
+from petritype.core.executable_graph_components import (  # noqa: E402
+    ArgumentEdgeToTransition,
+    ExecutableGraphOperations,
+    FunctionTransitionNode,
+    ListPlaceNode,
+    ReturnedEdgeFromTransition,
+)
+
+
+def _start(worker: str, job: int) -> int:
+    return job
+
+
+def _finish(job: int) -> str:
+    return "worker"
+
+
+def _new_job() -> int:
+    return 0
+
+
+def _batch(jobs: list[int]) -> str:
+    return "batch"
+
+
+def _classify(job: int) -> int:
+    return job
+
+
+def _classify_worker(job: str) -> int:
+    return 0
+
+
+def _route(job: int) -> dict[str, int]:
+    return {"Even": job} if job % 2 == 0 else {"Odd": job}
+
+
+def _workers(workers: int, jobs: int):
+    """Idle workers take jobs and return to ``Idle`` once they are done; the jobs run out."""
+    return ExecutableGraphOperations.construct_graph([
+        ListPlaceNode("Idle", str, ["worker"] * workers),
+        ListPlaceNode("Jobs", int, list(range(jobs))),
+        ArgumentEdgeToTransition("Idle", "Start", "worker"),
+        ArgumentEdgeToTransition("Jobs", "Start", "job"),
+        FunctionTransitionNode("Start", _start),
+        ReturnedEdgeFromTransition("Start", "Busy"),
+        ListPlaceNode("Busy", int),
+        ArgumentEdgeToTransition("Busy", "Finish", "job"),
+        FunctionTransitionNode("Finish", _finish),
+        ReturnedEdgeFromTransition("Finish", "Idle"),
+    ])
+
+
+def _generator(capacity=None):
+    """``NewJob`` has no inputs, so it can fill ``Queue`` forever; ``Batch`` drains the whole queue at once."""
+    return ExecutableGraphOperations.construct_graph([
+        FunctionTransitionNode("NewJob", _new_job),
+        ReturnedEdgeFromTransition("NewJob", "Queue"),
+        ListPlaceNode("Queue", int, capacity=capacity),
+        ArgumentEdgeToTransition("Queue", "Batch", "jobs"),
+        FunctionTransitionNode("Batch", _batch),
+        ReturnedEdgeFromTransition("Batch", "Batches"),
+        ListPlaceNode("Batches", str),
+    ])
+
+
+class TestCountAbstraction:
+
+    def test_matrices(self):
+        abstraction = CountAbstraction(_workers(2, 3))
+        assert abstraction.place_names == ("Idle", "Jobs", "Busy")
+        assert abstraction.transition_names == ("Start", "Finish")
+        assert abstraction.incidence.tolist() == [[-1, -1, 1], [1, 0, -1]]
+        assert abstraction.initial_marking.tolist() == [2, 3, 0]
+        assert abstraction.enabled(abstraction.initial_marking).tolist() == [True, False]
+        assert abstraction.fire(abstraction.initial_marking, 0).tolist() == [1, 2, 1]
+
+    def test_list_arguments_empty_the_place(self):
+        abstraction = CountAbstraction(_generator())
+        batch = abstraction.transition_names.index("Batch")
+        assert abstraction.resets[batch].tolist() == [True, False]
+        assert abstraction.fire([5, 0], batch).tolist() == [0, 1]
+        assert not abstraction.enabled([0, 0])[batch]
+
+    def test_each_output_place_of_a_choice_is_a_transition(self):
+        graph = ExecutableGraphOperations.construct_graph([
+            ListPlaceNode("Jobs", int, [1, 2]),
+            ArgumentEdgeToTransition("Jobs", "Classify", "job"),
+            FunctionTransitionNode("Classify", _classify, output_distribution_function=_route),
+            ReturnedEdgeFromTransition("Classify", "Even"),
+            ReturnedEdgeFromTransition("Classify", "Odd"),
+            ListPlaceNode("Even", int),
+            ListPlaceNode("Odd", int),
+        ])
+        abstraction = CountAbstraction(graph)
+        assert abstraction.transition_names == ("Classify->Even", "Classify->Odd")
+        assert set(abstraction.transition_of.values()) == {"Classify"}
+        assert abstraction.post.sum(axis=1).tolist() == [1, 1]
+
+    def test_capacity_disables_producers(self):
+        abstraction = CountAbstraction(_generator(capacity=2))
+        new_job = abstraction.transition_names.index("NewJob")
+        assert abstraction.enabled([1, 0])[new_job]
+        assert not abstraction.enabled([2, 0])[new_job]
+
+
+class TestInvariants:
+
+    def test_p_invariant_conserves_workers(self):
+        abstraction = CountAbstraction(_workers(2, 3))
+        assert StructuralAnalysis.p_invariants(abstraction) == [{"Idle": 1, "Busy": 1}]
+
+    def test_t_invariant_of_a_cycle(self):
+        assert StructuralAnalysis.t_invariants(CountAbstraction(_workers(1, 1))) == []  # Every start uses a job.
+        cycle = ExecutableGraphOperations.construct_graph([
+            ListPlaceNode("Idle", str, ["worker"]),
+            ArgumentEdgeToTransition("Idle", "Start", "job"),
+            FunctionTransitionNode("Start", _classify_worker),
+            ReturnedEdgeFromTransition("Start", "Busy"),
+            ListPlaceNode("Busy", int),
+            ArgumentEdgeToTransition("Busy", "Finish", "job"),
+            FunctionTransitionNode("Finish", _finish),
+            ReturnedEdgeFromTransition("Finish", "Idle"),
+        ])
+        assert StructuralAnalysis.t_invariants(CountAbstraction(cycle)) == [{"Start": 1, "Finish": 1}]
+
+    def test_invariants_are_minimal_and_integral(self):
+        # Two independent worker pools sharing no places have one invariant each, never their sum.
+        nodes = []
+        for pool in ("A", "B"):
+            nodes += [
+                ListPlaceNode(f"{pool}Idle", str, ["worker"]),
+                ArgumentEdgeToTransition(f"{pool}Idle", f"{pool}Start", "job"),
+                FunctionTransitionNode(f"{pool}Start", _classify_worker),
+                ReturnedEdgeFromTransition(f"{pool}Start", f"{pool}Busy"),
+                ListPlaceNode(f"{pool}Busy", int),
+                ArgumentEdgeToTransition(f"{pool}Busy", f"{pool}Finish", "job"),
+                FunctionTransitionNode(f"{pool}Finish", _finish),
+                ReturnedEdgeFromTransition(f"{pool}Finish", f"{pool}Idle"),
+            ]
+        abstraction = CountAbstraction(ExecutableGraphOperations.construct_graph(nodes))
+        assert sorted(map(sorted, StructuralAnalysis.p_invariants(abstraction))) == [
+            ["ABusy", "AIdle"], ["BBusy", "BIdle"],
+        ]
+
+    def test_farkas_row_limit(self):
+        with pytest.raises(RuntimeError, match="candidate invariants"):
+            StructuralAnalysis.p_invariants(CountAbstraction(_workers(1, 1)), max_rows=0)
+
+
+class TestSiphonsAndTraps:
+
+    def test_worker_cycle_is_a_siphon_and_a_trap(self):
+        abstraction = CountAbstraction(_workers(1, 2))
+        assert frozenset({"Idle", "Busy"}) in StructuralAnalysis.minimal_siphons(abstraction)
+        assert frozenset({"Idle", "Busy"}) in StructuralAnalysis.minimal_traps(abstraction)
+        assert StructuralAnalysis.maximal_trap(abstraction, frozenset({"Jobs", "Busy"})) == frozenset()
+
+    def test_places_fed_by_a_source_are_in_no_siphon(self):
+        assert StructuralAnalysis.minimal_siphons(CountAbstraction(_generator())) == []
+
+    def test_potential_deadlocks(self):
+        abstraction = CountAbstraction(_workers(1, 2))
+        assert StructuralAnalysis.potential_deadlocks(abstraction) == [frozenset({"Jobs"})]
+        abstraction = CountAbstraction(_workers(0, 2))  # No worker ever starts.
+        assert frozenset({"Idle", "Busy"}) in StructuralAnalysis.potential_deadlocks(abstraction)
+
+
+class TestCoverability:
+
+    def test_bounded_net_and_its_deadlock(self):
+        result = StructuralAnalysis.coverability(CountAbstraction(_workers(2, 3)))
+        assert result.complete
+        assert result.unbounded_places == ()
+        assert result.place_bounds == {"Idle": 2, "Jobs": 3, "Busy": 2}
+        assert [dead.marking for dead in result.dead_markings] == [{"Idle": 2, "Jobs": 0, "Busy": 0}]
+        trace = result.dead_markings[0].trace
+        assert trace.count("Start") == 3 and trace.count("Finish") == 3
+
+    def test_unbounded_place(self):
+        result = StructuralAnalysis.coverability(CountAbstraction(_generator()))
+        assert result.complete
+        assert result.unbounded_places == ("Queue", "Batches")
+        assert result.place_bounds["Queue"] == OMEGA
+        assert result.dead_markings == ()
+
+    def test_capacity_bounds_the_place(self):
+        result = StructuralAnalysis.coverability(CountAbstraction(_generator(capacity=3)))
+        assert result.place_bounds["Queue"] == 3
+        assert result.unbounded_places == ("Batches",)
+
+    def test_exploration_is_bounded(self):
+        result = StructuralAnalysis.coverability(CountAbstraction(_workers(5, 50)), max_nodes=10)
+        assert not result.complete
+        assert result.node_count == 10
+
+    def test_analyse(self):
+        report = StructuralAnalysis.analyse(_workers(1, 1))
+        assert report.uncovered_places == ("Jobs",)
+        assert report.potential_deadlocks == (frozenset({"Jobs"}),)
+        assert report.coverability.complete
@@ -0,0 +1,160 @@
+"""Tests for ``ArtifactStore``, a content-addressed store of transition results on disk.
+
+Covers memory-mapped arrays and pickled results, reuse of a directory by a new store, and the source-based keys
+that decide when a result can be reused.
+"""
+
+import asyncio
+import functools
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from petritype.core.artifact_store import ArtifactStore
+from petritype.core.executable_graph_components import (
+    ArgumentEdgeToTransition,
+    ExecutableGraphOperations,
+    FunctionTransitionNode,
+    ListPlaceNode,
+    ReturnedEdgeFromTransition,
+)
+
+
+_calls: list[int] = []
+
+
+def _ramp(n: int) -> np.ndarray:
+    _calls.append(n)
+    return np.arange(n, dtype=np.float64)
+
+
+def _label(n: int) -> str:
+    _calls.append(n)
+    return f"item-{n}"
+
+
+def _repeat(n: int, text: str) -> str:
+    _calls.append(n)
+    return text * n
+
+
+def _ramp_net(tokens: list[int], store: ArtifactStore):
+    return ExecutableGraphOperations.construct_graph([
+        ListPlaceNode("Sizes", int, list(tokens)),
+        ArgumentEdgeToTransition("Sizes", "Ramp", "n"),
+        FunctionTransitionNode("Ramp", _ramp, cache=store),
+        ReturnedEdgeFromTransition("Ramp", "Ramps"),
+        ListPlaceNode("Ramps", np.ndarray),
+    ])
+
+
+def _call(store: ArtifactStore, function, **kwargs):
+    return asyncio.run(store.call(function, kwargs))
+
+
+_HASH_SEED_SCRIPT = textwrap.dedent("""
+    import asyncio, sys
+    from petritype.core.artifact_store import ArtifactStore
+
+    calls = []
+
+    def count_tags(tags):
+        calls.append(tags)
+        return len(tags)
+
+    store = ArtifactStore(sys.argv[1])
+    kwargs = {"tags": frozenset(f"tag-{i}" for i in range(20))}
+    asyncio.run(store.call(count_tags, kwargs))
+    print(store.fingerprint(count_tags, kwargs), len(calls))
+""")
+
+
+class TestArtifactStore:
+
+    def setup_method(self):
+        _calls.clear()
+
+    def test_arrays_are_memory_mapped_and_read_only(self, tmp_path):
+        store = ArtifactStore(tmp_path)
+        assert _call(store, _ramp, n=5).tolist() == [0, 1, 2, 3, 4]
+        cached = _call(store, _ramp, n=5)
+        assert isinstance(cached, np.memmap)
+        assert cached.tolist() == [0, 1, 2, 3, 4]
+        with pytest.raises(ValueError):
+            cached[0] = 1.0
+        assert _calls == [5]
+        assert store.path_of(store.fingerprint(_ramp, {"n": 5})).suffix == ".npy"
+
+    def test_other_results_are_pickled(self, tmp_path):
+        store = ArtifactStore(tmp_path)
+        _call(store, _label, n=1)
+        assert _call(store, _label, n=1) == "item-1"
+        assert _calls == [1]
+        assert store.path_of(store.fingerprint(_label, {"n": 1})).suffix == ".pkl"
+
+    def test_a_new_store_on_the_same_directory_skips_completed_work(self, tmp_path):
+        graph = _ramp_net([3, 4], ArtifactStore(tmp_path))
+        asyncio.run(ExecutableGraphOperations.execute_graph(graph, max_transitions=10))
+        store = ArtifactStore(tmp_path)  # As after a restart.
+        graph = _ramp_net([3, 4, 5], store)
+        asyncio.run(ExecutableGraphOperations.execute_graph(graph, max_transitions=10))
+        assert sorted(len(ramp) for ramp in graph.place_named("Ramps").tokens) == [3, 4, 5]
+        assert sorted(_calls) == [3, 4, 5]
+        stats = store.stats()
+        assert (stats.hits, stats.misses, stats.entries) == (2, 1, 3)
+
+    def test_key_follows_the_source_not_the_function_object(self, tmp_path):
+        store = ArtifactStore(tmp_path)
+        namespace_a, namespace_b = {}, {}
+        source = "def double(x: int) -> int:\n    return 2 * x\n"
+        exec(source, namespace_a)
+        exec(source, namespace_b)
+        # exec'd functions have no retrievable source, so their compiled code is used instead.
+        assert store.fingerprint(namespace_a["double"], {"x": 1}) == store.fingerprint(namespace_b["double"], {"x": 1})
+        assert store.fingerprint(_ramp, {"n": 1}) != store.fingerprint(_label, {"n": 1})
+        assert store.fingerprint(_ramp, {"n": 1}) != store.fingerprint(_ramp, {"n": 2})
+
+    def test_partials_do_not_share_artifacts(self, tmp_path):
+        store = ArtifactStore(tmp_path)
+        assert _call(store, functools.partial(_repeat, text="a"), n=2) == "aa"
+        assert _call(ArtifactStore(tmp_path), functools.partial(_repeat, text="b"), n=2) == "bb"
+        assert _call(ArtifactStore(tmp_path), functools.partial(_repeat, text="a"), n=2) == "aa"
+        assert _calls == [2, 2]
+
+    def test_existing_artifacts_are_not_replaced(self, tmp_path):
+        store = ArtifactStore(tmp_path)
+        key = store.fingerprint(_label, {"n": 2})
+        store.put(key, "first")
+        store.put(key, "second")
+        assert store.get(key) == (True, "first")
+        assert not list((tmp_path / "tmp").iterdir())
+
+    def test_a_rerun_with_another_hash_seed_skips_completed_work(self, tmp_path):
+        script = tmp_path / "count_tags.py"
+        script.write_text(_HASH_SEED_SCRIPT)
+        runs = []
+        for seed in (1, 2):
+            env = {**os.environ, "PYTHONHASHSEED": str(seed), "PYTHONPATH": str(Path(__file__).resolve().parents[1])}
+            result = subprocess.run(
+                [sys.executable, str(script), str(tmp_path / "store")], env=env, capture_output=True, text=True,
+                check=True,
+            )
+            runs.append(result.stdout.split())
+        (first_key, first_calls), (second_key, second_calls) = runs
+        assert first_key == second_key
+        assert (first_calls, second_calls) == ("1", "0")
+
+    def test_clear_removes_artifacts(self, tmp_path):
+        store = ArtifactStore(tmp_path)
+        _call(store, _ramp, n=2)
+        _call(store, _label, n=2)
+        assert store.stats().entries == 2 and store.stats().bytes > 0
+        store.clear()
+        assert store.stats().entries == 0
+        _call(store, _ramp, n=2)
+        assert _calls == [2, 2, 2]
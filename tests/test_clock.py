@@ -0,0 +1,137 @@
+"""Tests for graph clocks and the discrete-event waiting of ``execute_graph``.
+
+``VirtualClock`` is covered on its own, then as the clock of a graph whose activation functions register deadlines
+that ``execute_graph`` sleeps until.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from petritype.core.clock import Clock, SystemClock, VirtualClock
+from petritype.core.executable_graph_components import (
+    ArgumentEdgeToTransition,
+    ExecutableGraph,
+    ExecutableGraphOperations,
+    FunctionTransitionNode,
+    ListPlaceNode,
+    ReturnedEdgeFromTransition,
+)
+from petritype.core.guards import PlaceCount, TimeWindow
+from petritype.core.transition_selectors import GuardSelector
+
+
+_arrivals = {"next": 0.0}
+
+
+def _ship(parcel: int) -> str:
+    return f"parcel-{parcel}"
+
+
+def _arrive() -> int:
+    _arrivals["next"] += 1.0
+    return 1
+
+
+def _can_arrive(graph: ExecutableGraph) -> bool:
+    if graph.now() < _arrivals["next"]:
+        graph.clock.wake_at(_arrivals["next"])
+        return False
+    return True
+
+
+def _shipping(guard, clock=None):
+    graph = ExecutableGraphOperations.construct_graph([
+        ListPlaceNode("Parcels", int, [1, 2]),
+        ArgumentEdgeToTransition("Parcels", "Ship", "parcel"),
+        FunctionTransitionNode("Ship", _ship, activation_function=guard),
+        ReturnedEdgeFromTransition("Ship", "Shipped"),
+        ListPlaceNode("Shipped", str),
+    ])
+    graph.clock = clock
+    return graph
+
+
+def _run(graph, **kwargs):
+    kwargs.setdefault("max_transitions", None)
+    execution = ExecutableGraphOperations.execute_graph(graph, transition_selector=GuardSelector(), **kwargs)
+    _, fired = asyncio.run(execution)
+    return fired
+
+
+class TestVirtualClock:
+
+    def test_clocks_must_implement_now_and_sleep_until(self):
+        with pytest.raises(TypeError, match="abstract"):
+            Clock()
+
+    def test_advance(self):
+        clock = VirtualClock(start=10.0)
+        clock.advance(5)
+        assert clock.now() == 15.0
+        clock.advance_to(20)
+        assert clock.now() == 20.0
+        with pytest.raises(ValueError, match="back"):
+            clock.advance_to(19)
+
+    def test_wakeups_are_ordered_and_expire(self):
+        clock = VirtualClock()
+        for deadline in (5.0, 2.0, 5.0, -1.0):
+            clock.wake_at(deadline)
+        assert clock.next_wakeup() == 2.0
+        clock.advance_to(2.0)
+        assert clock.next_wakeup() == 5.0
+        clock.advance_to(6.0)
+        assert clock.next_wakeup() is None
+
+    def test_sleep_jumps_to_the_deadline(self):
+        clock = VirtualClock()
+        started = time.perf_counter()
+        asyncio.run(clock.sleep_until(3600.0))
+        assert clock.now() == 3600.0
+        assert time.perf_counter() - started < 1.0
+
+
+class TestDiscreteEventExecution:
+
+    def test_waits_for_a_time_window_to_open(self):
+        clock = VirtualClock(start=0.0)
+        graph = _shipping(TimeWindow(start=3600.0) & (PlaceCount("Parcels") >= 1), clock)
+        assert graph.now() == 0.0
+        assert _run(graph) == 2
+        assert clock.now() == 3600.0
+        assert sorted(graph.place_named("Shipped").tokens) == ["parcel-1", "parcel-2"]
+
+    def test_until_bounds_the_wait(self):
+        clock = VirtualClock(start=0.0)
+        graph = _shipping(TimeWindow(start=3600.0), clock)
+        assert _run(graph, until=60.0) == 0
+        assert clock.now() == 0.0
+
+    def test_without_a_clock_execution_stops(self):
+        graph = _shipping(TimeWindow(start=time.time() + 3600))
+        assert _run(graph) == 0
+
+    def test_system_clock_sleeps_in_real_time(self):
+        graph = _shipping(TimeWindow(start=time.time() + 0.05), SystemClock())
+        assert _run(graph) == 2
+
+    def test_activation_functions_register_deadlines(self):
+        _arrivals["next"] = 0.0
+        clock = VirtualClock(start=0.0)
+        graph = ExecutableGraphOperations.construct_graph([
+            FunctionTransitionNode("Arrive", _arrive, activation_function=_can_arrive),
+            ReturnedEdgeFromTransition("Arrive", "Parcels"),
+            ListPlaceNode("Parcels", int),
+            ArgumentEdgeToTransition("Parcels", "Ship", "parcel"),
+            FunctionTransitionNode("Ship", _ship),
+            ReturnedEdgeFromTransition("Ship", "Shipped"),
+            ListPlaceNode("Shipped", str),
+        ])
+        graph.clock = clock
+        started = time.perf_counter()
+        _run(graph, until=3600.0)
+        assert time.perf_counter() - started < 10.0
+        assert len(graph.place_named("Shipped").tokens) == 3601  # Arrivals at 0, 1, ..., 3600 seconds.
+        assert clock.now() == 3600.0
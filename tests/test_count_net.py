@@ -0,0 +1,152 @@
+"""Tests for ``CountNet``, the batched count-only form of a net."""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("rustworkx")
+
+from petritype.core.count_net import CountNet  # noqa: E402
+from petritype.core.executable_graph_components import (  # noqa: E402
+    ArgumentEdgeToTransition,
+    ExecutableGraphOperations,
+    FunctionTransitionNode,
+    ListPlaceNode,
+    ReturnedEdgeFromTransition,
+)
+
+
+def _take(token: int) -> int:
+    return token
+
+
+def _produce() -> int:
+    return 0
+
+
+def _drain(tokens: list[int]) -> int:
+    return len(tokens)
+
+
+def _mutex(tokens: int = 2):
+    """Two processes competing for one lock: ``Idle{i} -> Acquire{i} -> Busy{i} -> Release{i} -> Idle{i}``."""
+    nodes = [ListPlaceNode("Lock", int, [0])]
+    for i in (1, 2):
+        nodes += [
+            ListPlaceNode(f"Idle{i}", int, list(range(tokens))),
+            ListPlaceNode(f"Busy{i}", int),
+            ArgumentEdgeToTransition(f"Idle{i}", f"Acquire{i}", "token"),
+            ArgumentEdgeToTransition("Lock", f"Acquire{i}", "lock"),
+            FunctionTransitionNode(f"Acquire{i}", _acquire),
+            ReturnedEdgeFromTransition(f"Acquire{i}", f"Busy{i}"),
+            ArgumentEdgeToTransition(f"Busy{i}", f"Release{i}", "token"),
+            FunctionTransitionNode(f"Release{i}", _release),
+            ReturnedEdgeFromTransition(f"Release{i}", f"Idle{i}"),
+            ReturnedEdgeFromTransition(f"Release{i}", "Lock"),
+        ]
+    return ExecutableGraphOperations.construct_graph(nodes, allow_token_copying=True)
+
+
+def _acquire(token: int, lock: int) -> int:
+    return token
+
+
+def _release(token: int) -> int:
+    return token
+
+
+def _marking(net, **counts):
+    return np.array([counts.get(name, 0) for name in net.place_names])
+
+
+class TestCountNet:
+
+    def test_batched_enabled_and_fire(self):
+        net = CountNet(_mutex())
+        markings = np.stack([net.initial_marking, _marking(net, Idle1=1, Busy1=1, Idle2=2)])
+        enabled = net.enabled(markings)
+        names = np.array(net.transition_names)
+        assert sorted(names[enabled[0]]) == ["Acquire1", "Acquire2"]
+        assert list(names[enabled[1]]) == ["Release1"]
+        assert np.array_equal(net.enabled(markings[1]), enabled[1])
+        acquire = net.transition_names.index("Acquire1")
+        fired = net.fire(markings[:1], np.array([acquire]))
+        assert net.marking_dict(fired[0]) == {"Lock": 0, "Idle1": 1, "Busy1": 1, "Idle2": 2, "Busy2": 0}
+
+    def test_matches_the_single_marking_abstraction(self):
+        net = CountNet(_mutex())
+        origins, transitions, successors = net.successors(net.initial_marking)
+        assert list(origins) == [0, 0]
+        for transition, successor in zip(transitions, successors):
+            assert np.array_equal(successor, super(CountNet, net).fire(net.initial_marking, transition))
+
+    def test_reachable_markings_of_a_mutex(self):
+        net = CountNet(_mutex(tokens=2))
+        reachable = net.reachable_markings()
+        # Free lock with all tokens idle, or one process holding it with one token busy.
+        assert len(reachable) == 3
+        assert len({row.tobytes() for row in reachable}) == 3
+        lock, busy1, busy2 = (net.place_names.index(name) for name in ("Lock", "Busy1", "Busy2"))
+        assert np.all(reachable[:, lock] + reachable[:, busy1] + reachable[:, busy2] == 1)
+
+    def test_reachable_markings_limit(self):
+        graph = ExecutableGraphOperations.construct_graph([
+            FunctionTransitionNode("Produce", _produce),
+            ReturnedEdgeFromTransition("Produce", "Items"),
+            ListPlaceNode("Items", int),
+        ])
+        with pytest.raises(RuntimeError, match="more than 50"):
+            CountNet(graph).reachable_markings(limit=50)
+
+    def test_random_walks_conserve_tokens(self):
+        net = CountNet(_mutex(tokens=3))
+        final, fired, taken = net.random_walks(walks=1_000, steps=40, seed=2)
+        assert final.shape == (1_000, len(net.place_names)) and np.all(taken == 40)
+        assert np.all(fired.sum(axis=1) == taken)
+        assert np.all(final.sum(axis=1) == net.initial_marking.sum())
+        first, _, _ = net.random_walks(walks=10, steps=40, seed=2)
+        again, _, _ = net.random_walks(walks=10, steps=40, seed=2)
+        assert np.array_equal(first, again)
+
+    def test_random_walks_stop_in_dead_markings(self):
+        graph = ExecutableGraphOperations.construct_graph([
+            ListPlaceNode("Input", int, [1, 2, 3]),
+            ArgumentEdgeToTransition("Input", "Take", "token"),
+            FunctionTransitionNode("Take", _take),
+            ReturnedEdgeFromTransition("Take", "Output"),
+            ListPlaceNode("Output", int),
+        ])
+        net = CountNet(graph)
+        final, fired, taken = net.random_walks(walks=5, steps=10, seed=0)
+        assert np.all(taken == 3)
+        assert np.all(final == _marking(net, Output=3))
+
+    def test_weights_bias_the_choice(self):
+        net = CountNet(_mutex())
+        weights = np.array([1.0 if name.endswith("1") else 0.0 for name in net.transition_names])
+        _, fired, _ = net.random_walks(walks=20, steps=10, seed=1, weights=weights)
+        second = [i for i, name in enumerate(net.transition_names) if name.endswith("2")]
+        assert fired[:, second].sum() == 0
+
+    def test_list_mode_arguments_reset_places(self):
+        graph = ExecutableGraphOperations.construct_graph([
+            ListPlaceNode("Batch", int, [1, 2, 3]),
+            ArgumentEdgeToTransition("Batch", "Drain", "tokens"),
+            FunctionTransitionNode("Drain", _drain),
+            ReturnedEdgeFromTransition("Drain", "Sizes"),
+            ListPlaceNode("Sizes", int),
+        ])
+        net = CountNet(graph)
+        markings = np.array([_marking(net, Batch=3), _marking(net, Batch=1, Sizes=4)])
+        assert net.marking_dict(net.fire(markings, np.array([0, 0]))[1]) == {"Batch": 0, "Sizes": 5}
+        assert not net.enabled(_marking(net, Sizes=1)).any()
+
+    def test_capacity_disables_transitions(self):
+        graph = ExecutableGraphOperations.construct_graph([
+            ListPlaceNode("Input", int, [1, 2, 3]),
+            ArgumentEdgeToTransition("Input", "Take", "token"),
+            FunctionTransitionNode("Take", _take),
+            ReturnedEdgeFromTransition("Take", "Output"),
+            ListPlaceNode("Output", int, capacity=2),
+        ])
+        net = CountNet(graph)
+        assert len(net.reachable_markings()) == 3
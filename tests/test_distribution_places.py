@@ -0,0 +1,76 @@
+"""Tests for ``FunctionTransitionNode.distribution_places``, the declared destinations of a distributor.
+
+Covers delivery to the declared places, the construction-time checks on the declaration, and the debug type check
+of delivered tokens.
+"""
+
+import asyncio
+
+import pytest
+from pydantic import ValidationError
+
+from petritype.core.executable_graph_components import (
+    ArgumentEdgeToTransition,
+    ExecutableGraphOperations,
+    FunctionTransitionNode,
+    ListPlaceNode,
+    ReturnedEdgeFromTransition,
+)
+
+
+def _split_by_sign(x: int) -> int:
+    return x
+
+
+def _sign_graph(distributor, distribution_places=("Positive", "Negative"), initial_tokens=(3, -2)):
+    """``Split`` sends each input to ``Positive`` or ``Negative`` via ``distributor``."""
+    return ExecutableGraphOperations.construct_graph([
+        ListPlaceNode("Input", int, list(initial_tokens)),
+        ArgumentEdgeToTransition("Input", "Split", "x"),
+        FunctionTransitionNode(
+            "Split", _split_by_sign,
+            output_distribution_function=distributor,
+            distribution_places=distribution_places,
+        ),
+        ReturnedEdgeFromTransition("Split", "Positive"),
+        ReturnedEdgeFromTransition("Split", "Negative"),
+        ListPlaceNode("Positive", int),
+        ListPlaceNode("Negative", int),
+    ])
+
+
+def _by_sign(result: int) -> dict:
+    return {"Positive" if result >= 0 else "Negative": result}
+
+
+class TestDeclaredDistributionPlaces:
+
+    def test_tokens_are_delivered_to_declared_places(self):
+        graph, fired = asyncio.run(ExecutableGraphOperations.execute_graph(_sign_graph(_by_sign), max_transitions=5))
+        assert fired == 2
+        assert graph.place_named("Positive").tokens == [3]
+        assert graph.place_named("Negative").tokens == [-2]
+
+    def test_declared_place_without_return_edge_is_rejected(self):
+        with pytest.raises(ValidationError, match="without a return edge"):
+            _sign_graph(_by_sign, distribution_places=("Positive", "Zero"))
+
+    def test_declaration_requires_distribution_function(self):
+        with pytest.raises(ValidationError, match="no output distribution function"):
+            FunctionTransitionNode("Split", _split_by_sign, distribution_places={"Positive"})
+
+    def test_delivery_to_undeclared_place_raises(self):
+        graph = _sign_graph(_by_sign, distribution_places=("Positive",))
+        with pytest.raises(ValueError, match="undeclared place \"Negative\""):
+            asyncio.run(ExecutableGraphOperations.execute_graph(graph, max_transitions=5))
+
+    def test_type_checks_are_skipped_unless_requested(self):
+        graph = _sign_graph(lambda result: {"Positive": str(result)}, initial_tokens=(1,))
+        asyncio.run(ExecutableGraphOperations.execute_graph(graph, max_transitions=1))
+        assert graph.place_named("Positive").tokens == ["1"]
+
+        graph = _sign_graph(lambda result: {"Positive": str(result)}, initial_tokens=(1,))
+        with pytest.raises(TypeError, match="Expected token to be of type"):
+            asyncio.run(ExecutableGraphOperations.execute_graph(
+                graph, max_transitions=1, check_declared_distributions=True,
+            ))
@@ -0,0 +1,149 @@
+"""Tests for ``StateSpaceExplorer`` and the replay of its counterexamples.
+
+The nets are dining philosophers, whose deadlock gives a known shortest trace. ``_MarkingSet``, the deduplicating
+store of visited markings, is tested separately.
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+pytest.importorskip("rustworkx")
+
+from petritype.core.exploration import DEADLOCK, StateSpaceExplorer, _MarkingSet  # noqa: E402
+from petritype.core.executable_graph_components import (  # noqa: E402
+    ArgumentEdgeToTransition,
+    ExecutableGraphOperations,
+    FunctionTransitionNode,
+    ListPlaceNode,
+    ReturnedEdgeFromTransition,
+)
+from petritype.core.guards import PlaceCount  # noqa: E402
+from petritype.core.transition_selectors import TraceSelector  # noqa: E402
+
+
+def _take(philosopher: int, fork: int) -> int:
+    return philosopher
+
+
+def _release(philosopher: int) -> int:
+    return philosopher
+
+
+def _philosophers(count: int, guard=None):
+    """Dining philosophers who take their left fork first, which deadlocks once every one of them holds it."""
+    nodes = []
+    for i in range(count):
+        right = (i + 1) % count
+        nodes += [
+            ListPlaceNode(f"Thinking{i}", int, [i]),
+            ListPlaceNode(f"Fork{i}", int, [0]),
+            ListPlaceNode(f"HasLeft{i}", int),
+            ListPlaceNode(f"Eating{i}", int),
+            ArgumentEdgeToTransition(f"Thinking{i}", f"TakeLeft{i}", "philosopher"),
+            ArgumentEdgeToTransition(f"Fork{i}", f"TakeLeft{i}", "fork"),
+            FunctionTransitionNode(f"TakeLeft{i}", _take, activation_function=guard),
+            ReturnedEdgeFromTransition(f"TakeLeft{i}", f"HasLeft{i}"),
+            ArgumentEdgeToTransition(f"HasLeft{i}", f"TakeRight{i}", "philosopher"),
+            ArgumentEdgeToTransition(f"Fork{right}", f"TakeRight{i}", "fork"),
+            FunctionTransitionNode(f"TakeRight{i}", _take),
+            ReturnedEdgeFromTransition(f"TakeRight{i}", f"Eating{i}"),
+            ArgumentEdgeToTransition(f"Eating{i}", f"Release{i}", "philosopher"),
+            FunctionTransitionNode(f"Release{i}", _release),
+            ReturnedEdgeFromTransition(f"Release{i}", f"Thinking{i}"),
+            ReturnedEdgeFromTransition(f"Release{i}", f"Fork{i}"),
+            ReturnedEdgeFromTransition(f"Release{i}", f"Fork{right}"),
+        ]
+    return ExecutableGraphOperations.construct_graph(nodes, allow_token_copying=True)
+
+
+def _counts(graph):
+    return {place.name: len(place.tokens) for place in graph.places}
+
+
+def _forks_are_never_shared(counts):
+    return np.all([counts[f"Eating{i}"] + counts[f"Eating{(i + 1) % 3}"] <= 1 for i in range(3)], axis=0)
+
+
+class TestStateSpaceExplorer:
+
+    def test_finds_the_deadlock_with_the_shortest_trace(self):
+        result = StateSpaceExplorer(_philosophers(3)).explore()
+        assert result.complete
+        assert result.state_count == 14 and result.depth == 3
+        assert result.place_bounds["Fork0"] == 1 and result.place_bounds["Eating0"] == 1
+        [deadlock] = result.counterexamples
+        assert deadlock.property == DEADLOCK
+        assert sorted(deadlock.trace) == ["TakeLeft0", "TakeLeft1", "TakeLeft2"]
+        assert all(deadlock.marking[f"HasLeft{i}"] == 1 for i in range(3))
+
+    def test_counterexamples_replay_through_execute_graph(self):
+        deadlock = StateSpaceExplorer(_philosophers(3)).explore().counterexamples[0]
+        graph = asyncio.run(deadlock.replay(_philosophers(3)))
+        assert _counts(graph) == deadlock.marking
+
+    def test_invariants(self):
+        explorer = StateSpaceExplorer(_philosophers(3), invariants={
+            "forks are never shared": _forks_are_never_shared,
+            "nobody eats": lambda counts: counts["Eating0"] + counts["Eating1"] + counts["Eating2"] == 0,
+        }, check_deadlocks=False)
+        result = explorer.explore()
+        assert {counterexample.property for counterexample in result.counterexamples} == {"nobody eats"}
+        [first] = explorer.explore(max_counterexamples=1).counterexamples
+        assert first == result.counterexamples[0]
+        assert len(first.trace) == 2 and first.trace[-1].startswith("TakeRight")
+
+    def test_terminal_markings_are_not_deadlocks(self):
+        def everyone_holds_a_fork(counts):
+            return counts["HasLeft0"] + counts["HasLeft1"] + counts["HasLeft2"] == 3
+
+        explorer = StateSpaceExplorer(_philosophers(3), terminal=everyone_holds_a_fork)
+        assert explorer.explore().counterexamples == ()
+
+    def test_incomplete_exploration(self):
+        result = StateSpaceExplorer(_philosophers(6)).explore(max_states=20)
+        assert not result.complete
+        assert result.state_count > 20
+
+    def test_workers_explore_the_same_state_space(self):
+        explorer = StateSpaceExplorer(_philosophers(5))
+        serial = explorer.explore()
+        parallel = explorer.explore(workers=2, chunk_size=4)
+        assert parallel == serial
+
+    def test_matches_count_net_reachability(self):
+        explorer = StateSpaceExplorer(_philosophers(5))
+        assert explorer.explore().state_count == len(explorer.net.reachable_markings())
+
+    def test_guards_block_replay(self):
+        deadlock = StateSpaceExplorer(_philosophers(3)).explore().counterexamples[0]
+        with pytest.raises(RuntimeError, match="Step 0 of the trace"):
+            asyncio.run(deadlock.replay(_philosophers(3, guard=PlaceCount("Eating0") >= 1)))
+
+    def test_trace_selector_stops_at_the_end_of_the_trace(self):
+        graph = _philosophers(3)
+        selector = TraceSelector(["TakeLeft0", "TakeRight0"])
+        _, fired = asyncio.run(ExecutableGraphOperations.execute_graph(
+            graph, max_transitions=None, transition_selector=selector,
+        ))
+        assert fired == 2 and _counts(graph)["Eating0"] == 1
+
+
+class TestMarkingSet:
+
+    def test_deduplicates_exactly(self):
+        markings = np.random.default_rng(0).integers(0, 300, size=(20_000, 3))
+        states = _MarkingSet(3)
+        indices, new = states.add(markings)
+        assert len(states) == new.sum() == len(np.unique(markings, axis=0))
+        assert np.array_equal(states.rows(indices), markings)
+        again, new = states.add(markings[::-1])
+        assert not new.any() and np.array_equal(again, indices[::-1])
+
+    def test_widens_storage_for_large_counts(self):
+        states = _MarkingSet(2)
+        states.add(np.array([[1, 2]]))
+        indices, _ = states.add(np.array([[70_000, 1], [1, 2]]))
+        assert list(indices) == [1, 0]
+        assert states.rows(indices[0]).tolist() == [70_000, 1]
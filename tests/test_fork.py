@@ -0,0 +1,131 @@
+"""Tests for ``ExecutableGraphOperations.fork``, the cheap copy of a running graph for what-if branches.
+
+Checks that forks share topology and token objects but not token lists, counters, histories, clocks or streams.
+"""
+
+import asyncio
+from copy import deepcopy
+
+import pytest
+
+from petritype.core.clock import VirtualClock
+from petritype.core.executable_graph_components import (
+    ArgumentEdgeToTransition,
+    ExecutableGraphOperations,
+    FunctionTransitionNode,
+    ListPlaceNode,
+    ReturnedEdgeFromTransition,
+    SourceTransitionNode,
+)
+from petritype.core.transition_selectors import RandomSelector
+
+
+def _accept(order: int) -> int:
+    return order
+
+
+def _reject(order: int) -> str:
+    return f"rejected-{order}"
+
+
+def _orders(tokens=(1, 2, 3, 4)):
+    """``Orders`` go to ``Accepted`` or ``Rejected``, whichever transition the selector picks."""
+    return ExecutableGraphOperations.construct_graph([
+        ListPlaceNode("Orders", int, list(tokens)),
+        ArgumentEdgeToTransition("Orders", "Accept", "order"),
+        FunctionTransitionNode("Accept", _accept),
+        ReturnedEdgeFromTransition("Accept", "Accepted"),
+        ListPlaceNode("Accepted", int),
+        ArgumentEdgeToTransition("Orders", "Reject", "order"),
+        FunctionTransitionNode("Reject", _reject),
+        ReturnedEdgeFromTransition("Reject", "Rejected"),
+        ListPlaceNode("Rejected", str),
+    ])
+
+
+def _run(graph, **kwargs):
+    kwargs.setdefault("max_transitions", None)
+    _, fired = asyncio.run(ExecutableGraphOperations.execute_graph(graph, **kwargs))
+    return fired
+
+
+def _marking(graph):
+    return {place.name: sorted(place.tokens, key=str) for place in graph.places}
+
+
+class TestFork:
+
+    def test_branches_are_independent(self):
+        graph = _orders()
+        _run(graph, max_transitions=1)
+        before = _marking(graph)
+        branch = ExecutableGraphOperations.fork(graph)
+        assert _marking(branch) == before
+        assert _run(branch) == 3
+        assert _marking(graph) == before
+        assert branch.step_count == 4 and graph.step_count == 1
+        assert sum(branch.fired_counts.values()) == 4 and sum(graph.fired_counts.values()) == 1
+
+    def test_topology_and_tokens_are_shared(self):
+        graph = _orders(tokens=[10**30])  # Large ints are not interned, so identity shows sharing.
+        branch = ExecutableGraphOperations.fork(graph)
+        assert branch.transitions is graph.transitions
+        assert branch.argument_edges is graph.argument_edges and branch.return_edges is graph.return_edges
+        assert branch.places[0] is not graph.places[0]
+        assert branch.places[0].tokens is not graph.places[0].tokens
+        assert branch.places[0].tokens[0] is graph.places[0].tokens[0]
+
+    def test_histories_start_empty(self):
+        graph = _orders()
+        _run(graph, max_transitions=2, transition_history_length=10, place_history_length=10)
+        branch = ExecutableGraphOperations.fork(graph)
+        assert len(graph.transition_history) == 2
+        assert branch.transition_history == [] and branch.input_place_history == []
+        _run(branch, max_transitions=1, transition_history_length=10)
+        assert len(graph.transition_history) == 2
+
+    def test_what_if_branches_from_one_state(self):
+        graph = _orders(tokens=range(20))
+        outcomes = set()
+        for seed in range(10):
+            branch = ExecutableGraphOperations.fork(graph)
+            _run(branch, transition_selector=RandomSelector(seed=seed))
+            outcomes.add(len(branch.place_named("Accepted").tokens))
+        assert len(outcomes) > 1
+        assert len(graph.place_named("Orders").tokens) == 20
+
+    def test_clock_is_copied(self):
+        graph = _orders()
+        graph.clock = VirtualClock(start=10.0)
+        branch = ExecutableGraphOperations.fork(graph)
+        branch.clock.advance(5)
+        assert branch.now() == 15.0 and graph.now() == 10.0
+
+    def test_streams_are_not_inherited(self):
+        graph = ExecutableGraphOperations.construct_graph([
+            ListPlaceNode("Orders", int, [1]),
+            ArgumentEdgeToTransition("Orders", "Accept", "order"),
+            FunctionTransitionNode("Accept", _accept),
+            ReturnedEdgeFromTransition("Accept", "Accepted"),
+            ListPlaceNode("Accepted", int, streaming=True),
+        ])
+        graph.stream("Accepted")
+        branch = ExecutableGraphOperations.fork(graph)
+        assert graph.place_named("Accepted").has_open_streams()
+        assert not branch.place_named("Accepted").has_open_streams()
+        _run(branch)
+        assert branch.place_named("Accepted").tokens == [1]
+
+    def test_matches_deepcopy(self):
+        graph = _orders()
+        _run(graph, max_transitions=2)
+        assert _marking(ExecutableGraphOperations.fork(graph)) == _marking(deepcopy(graph))
+
+    def test_source_transitions_cannot_be_forked(self):
+        graph = ExecutableGraphOperations.construct_graph([
+            SourceTransitionNode("Receive", source=iter([1, 2])),
+            ReturnedEdgeFromTransition("Receive", "Orders"),
+            ListPlaceNode("Orders", int),
+        ])
+        with pytest.raises(ValueError, match="cannot be forked"):
+            ExecutableGraphOperations.fork(graph)
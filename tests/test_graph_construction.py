@@ -0,0 +1,109 @@
+"""Tests for the fast paths of ``ExecutableGraphOperations.construct_graph`` on large generated nets.
+
+Covers the per-function type hint cache, the per-type check of initial tokens, and construction with ``trusted=True``.
+"""
+
+import asyncio
+import gc
+import weakref
+
+import pytest
+from pydantic import ValidationError
+
+from petritype.core.executable_graph_components import (
+    ArgumentEdgeToTransition,
+    ExecutableGraphOperations,
+    FunctionTransitionNode,
+    ListPlaceNode,
+    ReturnedEdgeFromTransition,
+)
+from petritype.core import type_comparisons
+from petritype.core.type_comparisons import TypeHints
+
+
+def _increment(x: int) -> int:
+    return x + 1
+
+
+def _chain(length: int) -> list:
+    """``P0 -> T0 -> P1 -> T1 -> ... -> P<length>``, every transition sharing one function."""
+    nodes = [ListPlaceNode("P0", int, [0])]
+    for i in range(length):
+        nodes.extend([
+            ArgumentEdgeToTransition(f"P{i}", f"T{i}", "x"),
+            FunctionTransitionNode(f"T{i}", _increment),
+            ReturnedEdgeFromTransition(f"T{i}", f"P{i + 1}"),
+            ListPlaceNode(f"P{i + 1}", int),
+        ])
+    return nodes
+
+
+class TestTypeHints:
+
+    def test_hints_are_resolved_once_per_function(self, monkeypatch):
+        calls = []
+        original = type_comparisons.get_type_hints
+
+        def counting(obj):
+            calls.append(obj)
+            return original(obj)
+
+        def _decrement(x: int) -> int:
+            return x - 1
+
+        monkeypatch.setattr(type_comparisons, "get_type_hints", counting)
+        for _ in range(3):
+            assert TypeHints.of(_decrement) == {"x": int, "return": int}
+        assert calls == [_decrement]
+
+    def test_cached_hints_do_not_keep_functions_alive(self):
+        def _decrement(x: int) -> int:
+            return x - 1
+
+        assert TypeHints.of(_decrement) == {"x": int, "return": int}
+        reference = weakref.ref(_decrement)
+        del _decrement
+        gc.collect()
+        assert reference() is None
+
+    def test_shared_function_is_validated_for_every_edge(self):
+        graph = ExecutableGraphOperations.construct_graph(_chain(200))
+        assert len(graph.transitions) == 200
+        graph, fired = asyncio.run(ExecutableGraphOperations.execute_graph(graph, max_transitions=500))
+        assert fired == 200
+        assert graph.place_named("P200").tokens == [200]
+
+    def test_mismatch_is_still_reported_after_matching_pairs(self):
+        nodes = _chain(3) + [
+            ListPlaceNode("Text", str, ["a"]),
+            ArgumentEdgeToTransition("Text", "Bad", "x"),
+            FunctionTransitionNode("Bad", _increment),
+            ReturnedEdgeFromTransition("Bad", "P0"),
+        ]
+        with pytest.raises(TypeError, match="Type mismatch for argument edge from place 'Text'"):
+            ExecutableGraphOperations.construct_graph(nodes)
+
+
+class TestInitialTokenValidation:
+
+    def test_every_distinct_token_type_is_checked(self):
+        with pytest.raises(TypeError, match="Expected token to be of type"):
+            ListPlaceNode("Numbers", int, [1] * 1000 + ["one"])
+
+
+class TestTrustedConstruction:
+
+    def test_trusted_graph_matches_validated_graph(self):
+        validated = ExecutableGraphOperations.construct_graph(_chain(5))
+        trusted = ExecutableGraphOperations.construct_graph(_chain(5), trusted=True)
+        assert trusted.model_dump() == validated.model_dump()
+        trusted, fired = asyncio.run(ExecutableGraphOperations.execute_graph(trusted, max_transitions=10))
+        assert fired == 5
+        assert trusted.step_count == 5
+
+    def test_trusted_construction_skips_graph_validation(self):
+        nodes = _chain(1) + [ListPlaceNode("P0", int)]
+        with pytest.raises(ValidationError, match="Place names must be unique"):
+            ExecutableGraphOperations.construct_graph(nodes)
+        graph = ExecutableGraphOperations.construct_graph(nodes, trusted=True)
+        assert len(graph.places) == 3
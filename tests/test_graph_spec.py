@@ -0,0 +1,131 @@
+"""Tests for ``GraphSpec``, the hashable topology used to validate each distinct net once per process.
+
+Covers spec equality, the process-wide cache of validated specs, and ``instantiate_graph``.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from petritype.core.executable_graph_components import (
+    ArgumentEdgeToTransition,
+    ExecutableGraph,
+    ExecutableGraphOperations,
+    FunctionTransitionNode,
+    ListPlaceNode,
+    ReturnedEdgeFromTransition,
+    SourceTransitionNode,
+    GraphSpecCache,
+)
+
+
+def _fail_validation(self, **data):
+    raise AssertionError("The graph was validated again.")
+
+
+def _double(x: int) -> int:
+    return 2 * x
+
+
+def _job_nodes(tokens: list[int], capacity=None) -> list:
+    return [
+        ListPlaceNode("Input", int, list(tokens)),
+        ArgumentEdgeToTransition("Input", "Double", "x"),
+        FunctionTransitionNode("Double", _double),
+        ReturnedEdgeFromTransition("Double", "Output"),
+        ListPlaceNode("Output", int, capacity=capacity),
+    ]
+
+
+class TestGraphSpec:
+
+    def test_equal_topologies_have_equal_specs(self):
+        first = ExecutableGraphOperations.graph_spec(ExecutableGraphOperations.construct_graph(_job_nodes([1])))
+        second = ExecutableGraphOperations.graph_spec(ExecutableGraphOperations.construct_graph(_job_nodes([2, 3])))
+        assert first == second
+        assert hash(first) == hash(second)
+
+    def test_different_topologies_have_different_specs(self):
+        first = ExecutableGraphOperations.graph_spec(ExecutableGraphOperations.construct_graph(_job_nodes([1])))
+        second = ExecutableGraphOperations.graph_spec(
+            ExecutableGraphOperations.construct_graph(_job_nodes([1], capacity=5))
+        )
+        assert first != second
+
+    def test_repeated_construction_validates_once(self, monkeypatch):
+        GraphSpecCache.clear()
+        ExecutableGraphOperations.construct_graph(_job_nodes([1]))
+        monkeypatch.setattr(ExecutableGraph, "__init__", _fail_validation)
+        graph = ExecutableGraphOperations.construct_graph(_job_nodes([2]))
+        assert graph.place_named("Input").tokens == [2]
+        with pytest.raises(AssertionError, match="validated again"):
+            ExecutableGraphOperations.construct_graph(_job_nodes([2], capacity=3))
+
+    def test_invalid_topology_is_not_cached(self):
+        GraphSpecCache.clear()
+        nodes = _job_nodes([]) + [ListPlaceNode("Output", int)]
+        for _ in range(2):
+            with pytest.raises(ValueError, match="Place names must be unique"):
+                ExecutableGraphOperations.construct_graph(nodes)
+        assert len(GraphSpecCache._validated) == 0
+
+    def test_cache_evicts_least_recently_used(self, monkeypatch):
+        GraphSpecCache.clear()
+        monkeypatch.setattr(GraphSpecCache, "max_size", 1)
+        first = ExecutableGraphOperations.graph_spec(ExecutableGraphOperations.construct_graph(_job_nodes([])))
+        second = ExecutableGraphOperations.graph_spec(
+            ExecutableGraphOperations.construct_graph(_job_nodes([], capacity=2))
+        )
+        assert not GraphSpecCache.contains(first)
+        assert GraphSpecCache.contains(second)
+
+    def test_cache_is_shared_by_threads(self, monkeypatch):
+        GraphSpecCache.clear()
+        monkeypatch.setattr(GraphSpecCache, "max_size", 4)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            graphs = list(executor.map(
+                lambda capacity: ExecutableGraphOperations.construct_graph(_job_nodes([1], capacity=capacity)),
+                [1 + i % 16 for i in range(400)],
+            ))
+        assert all(graph.place_named("Input").tokens == [1] for graph in graphs)
+        assert len(GraphSpecCache._validated) == 4
+
+    def test_source_transitions_cannot_be_described(self):
+        graph = ExecutableGraphOperations.construct_graph([
+            SourceTransitionNode("Read", [1, 2]),
+            ReturnedEdgeFromTransition("Read", "Items"),
+            ListPlaceNode("Items", int),
+        ])
+        with pytest.raises(ValueError, match="cannot be described by a GraphSpec"):
+            ExecutableGraphOperations.graph_spec(graph)
+
+
+class TestInstantiateGraph:
+
+    def test_instances_have_independent_tokens(self):
+        spec = ExecutableGraphOperations.graph_spec(ExecutableGraphOperations.construct_graph(_job_nodes([])))
+        first = ExecutableGraphOperations.instantiate_graph(spec, {"Input": [1, 2]})
+        second = ExecutableGraphOperations.instantiate_graph(spec, {"Input": [10]})
+        first, fired = asyncio.run(ExecutableGraphOperations.execute_graph(first, max_transitions=10))
+        assert fired == 2
+        assert sorted(first.place_named("Output").tokens) == [2, 4]
+        assert second.place_named("Input").tokens == [10]
+        assert second.place_named("Output").tokens == []
+        assert second.step_count == 0
+
+    def test_tokens_are_checked(self):
+        spec = ExecutableGraphOperations.graph_spec(ExecutableGraphOperations.construct_graph(_job_nodes([])))
+        with pytest.raises(TypeError, match="Expected token to be of type"):
+            ExecutableGraphOperations.instantiate_graph(spec, {"Input": ["one"]})
+        with pytest.raises(ValueError, match="unknown places"):
+            ExecutableGraphOperations.instantiate_graph(spec, {"Missing": [1]})
+
+    def test_capacity_is_kept(self):
+        spec = ExecutableGraphOperations.graph_spec(
+            ExecutableGraphOperations.construct_graph(_job_nodes([], capacity=1))
+        )
+        graph = ExecutableGraphOperations.instantiate_graph(spec, {"Input": [1, 2, 3]})
+        graph, fired = asyncio.run(ExecutableGraphOperations.execute_graph(graph, max_transitions=10))
+        assert fired == 1
+        assert graph.place_named("Output").has_room_for(1) is False
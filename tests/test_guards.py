@@ -0,0 +1,135 @@
+"""Tests for the declarative guard DSL and its vectorised evaluation by ``GuardSelector``."""
+
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from petritype.core.executable_graph_components import (
+    ArgumentEdgeToTransition,
+    ExecutableGraphOperations,
+    FunctionTransitionNode,
+    ListPlaceNode,
+    MapTransitionNames,
+    ReturnedEdgeFromTransition,
+)
+from petritype.core.guards import CompiledGuards, Guard, PlaceCount, PlaceCountClause, TimeWindow
+from petritype.core.transition_selectors import GuardSelector
+
+
+def _total(items: list[int]) -> int:
+    return sum(items)
+
+
+def _pool_graph(pool_tokens: list[int], guard):
+    """``Pool -> Batch -> Output`` with ``guard`` as Batch's activation function."""
+    return ExecutableGraphOperations.construct_graph([
+        ListPlaceNode("Pool", int, list(pool_tokens)),
+        ArgumentEdgeToTransition("Pool", "Batch", "items"),
+        FunctionTransitionNode("Batch", _total, activation_function=guard),
+        ReturnedEdgeFromTransition("Batch", "Output"),
+        ListPlaceNode("Output", int),
+    ])
+
+
+def _compile(graph):
+    return CompiledGuards(
+        graph.places,
+        graph.transitions,
+        MapTransitionNames.to_incoming_edges(graph),
+        MapTransitionNames.to_outgoing_edges(graph),
+    )
+
+
+def _fire(graph, max_transitions=1):
+    return asyncio.run(ExecutableGraphOperations.execute_graph(
+        graph, max_transitions=max_transitions, transition_selector=GuardSelector(),
+    ))
+
+
+class TestGuardDSL:
+
+    def test_comparison_builds_a_single_clause(self):
+        guard = PlaceCount("Pool") >= 3
+        assert guard.clauses == (PlaceCountClause(place_name="Pool", comparison=">=", threshold=3),)
+
+    def test_and_concatenates_clauses(self):
+        guard = (PlaceCount("Pool") >= 3) & (PlaceCount("Pool") < 10) & TimeWindow(start=0.0)
+        assert len(guard.clauses) == 3
+
+    def test_guard_is_callable_with_graph(self):
+        guard = PlaceCount("Pool") >= 2
+        assert guard(_pool_graph([1, 2], guard)) is True
+        assert guard(_pool_graph([1], guard)) is False
+
+    def test_time_window(self):
+        now = time.time()
+        assert TimeWindow(start=now - 10, end=now + 10)(graph=None) is True
+        assert TimeWindow(start=now + 10)(graph=None) is False
+
+    def test_place_count_clauses_need_a_graph(self):
+        guard = (PlaceCount("Pool") >= 1) & TimeWindow(start=0.0)
+        with pytest.raises(ValueError, match="needs a graph"):
+            guard(graph=None)
+
+    def test_unknown_place_rejected_at_compile_time(self):
+        graph = _pool_graph([1], PlaceCount("Missing") >= 1)
+        with pytest.raises(ValueError, match="unknown place: Missing"):
+            _compile(graph)
+
+
+class TestCompiledGuards:
+
+    def test_evaluates_token_availability_and_guards(self):
+        graph = _pool_graph([], (PlaceCount("Pool") >= 2) & (PlaceCount("Output") == 0))
+        compiled = _compile(graph)
+        assert compiled.evaluate(np.array([0, 0]), now=0.0).tolist() == [False]
+        assert compiled.evaluate(np.array([1, 0]), now=0.0).tolist() == [False]
+        assert compiled.evaluate(np.array([2, 0]), now=0.0).tolist() == [True]
+        assert compiled.evaluate(np.array([2, 1]), now=0.0).tolist() == [False]
+
+    def test_non_dsl_activation_functions_are_flagged_as_fallback(self):
+        graph = _pool_graph([1], lambda: True)
+        compiled = _compile(graph)
+        assert compiled.has_fallback.tolist() == [True]
+
+
+class TestGuardSelector:
+
+    def test_blocks_until_guard_passes(self):
+        graph = _pool_graph([1], PlaceCount("Pool") >= 2)
+        graph, fired = _fire(graph)
+        assert fired == 0
+        graph.place_named("Pool").tokens.append(2)
+        graph, fired = _fire(graph)
+        assert fired == 1
+        assert graph.place_named("Output").tokens == [3]
+
+    def test_falls_back_to_python_guards(self):
+        graph, fired = _fire(_pool_graph([1], lambda graph: False))
+        assert fired == 0
+        graph, fired = _fire(_pool_graph([1], lambda: True))
+        assert fired == 1
+
+    def test_follows_place_counts_across_fires(self):
+        """Each fire of Produce adds a token; Consume only fires once three have accumulated."""
+        graph = ExecutableGraphOperations.construct_graph([
+            ListPlaceNode("Seeds", int, [1, 2, 3]),
+            ArgumentEdgeToTransition("Seeds", "Produce", "x"),
+            FunctionTransitionNode("Produce", lambda x: x),
+            ReturnedEdgeFromTransition("Produce", "Pool"),
+            ListPlaceNode("Pool", int),
+            ArgumentEdgeToTransition("Pool", "Consume", "items"),
+            FunctionTransitionNode("Consume", _total, activation_function=PlaceCount("Pool") >= 3),
+            ReturnedEdgeFromTransition("Consume", "Output"),
+            ListPlaceNode("Output", int),
+        ])
+        graph, fired = _fire(graph, max_transitions=10)
+        assert fired == 4
+        assert graph.place_named("Output").tokens == [6]
+
+    def test_guard_instances_compare_equal_by_clauses(self):
+        assert (PlaceCount("A") >= 1) == Guard(
+            clauses=(PlaceCountClause(place_name="A", comparison=">=", threshold=1),)
+        )
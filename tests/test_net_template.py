@@ -0,0 +1,139 @@
+"""Tests for ``NetTemplate``, many markings executed over one shared topology.
+
+Checks that instances keep separate markings, counters and selectors, and that ``run`` interleaves them within
+their budgets.
+"""
+
+import asyncio
+
+import pytest
+
+from petritype.core.executable_graph_components import (
+    ArgumentEdgeToTransition,
+    ExecutableGraphOperations,
+    FunctionTransitionNode,
+    ListPlaceNode,
+    ReturnedEdgeFromTransition,
+    SourceTransitionNode,
+)
+from petritype.core.net_template import NetTemplate
+from petritype.core.transition_selectors import RandomSelector
+
+
+def _increment(x: int) -> int:
+    return x + 1
+
+
+def _total(items: list[int]) -> int:
+    return sum(items)
+
+
+def _pipeline():
+    """``Inc`` moves tokens from ``Input`` to ``Done``; ``Sum`` drains ``Done`` into ``Total`` as a list."""
+    return ExecutableGraphOperations.construct_graph([
+        ListPlaceNode("Input", int),
+        ArgumentEdgeToTransition("Input", "Inc", "x"),
+        FunctionTransitionNode("Inc", _increment),
+        ReturnedEdgeFromTransition("Inc", "Done"),
+        ListPlaceNode("Done", int),
+        ArgumentEdgeToTransition("Done", "Sum", "items"),
+        FunctionTransitionNode("Sum", _total),
+        ReturnedEdgeFromTransition("Sum", "Total"),
+        ListPlaceNode("Total", int),
+    ])
+
+
+def _triage():
+    """``Accept`` and ``Reject`` compete for the tokens in ``Input``."""
+    return ExecutableGraphOperations.construct_graph([
+        ListPlaceNode("Input", int),
+        ArgumentEdgeToTransition("Input", "Accept", "x"),
+        FunctionTransitionNode("Accept", _increment),
+        ReturnedEdgeFromTransition("Accept", "Accepted"),
+        ListPlaceNode("Accepted", int),
+        ArgumentEdgeToTransition("Input", "Reject", "x"),
+        FunctionTransitionNode("Reject", _increment),
+        ReturnedEdgeFromTransition("Reject", "Rejected"),
+        ListPlaceNode("Rejected", int),
+    ])
+
+
+class TestNetTemplate:
+
+    def test_instances_run_independently(self):
+        template = NetTemplate(_pipeline())
+        first = template.new_instance({"Input": [1, 2]})
+        second = template.new_instance({"Input": [10]})
+        fired = asyncio.run(template.step(first, max_transitions=10))
+        assert fired == 3
+        assert first.tokens("Total") == [5]
+        assert first.tokens("Done") == []
+        assert second.to_dict() == {"Input": [10], "Done": [], "Total": []}
+        assert second.step_count == 0
+
+    def test_run_interleaves_instances(self):
+        template = NetTemplate(_pipeline())
+        instances = [template.new_instance({"Input": [i]}) for i in range(5)]
+        total_fired = asyncio.run(template.run(instances))
+        assert total_fired == 10
+        assert [instance.tokens("Total") for instance in instances] == [[1], [2], [3], [4], [5]]
+        assert all(instance.fired_counts == {"Inc": 1, "Sum": 1} for instance in instances)
+        assert all(instance.last_fired == "Sum" for instance in instances)
+
+    def test_run_respects_per_instance_budget(self):
+        template = NetTemplate(_pipeline())
+        instances = [template.new_instance({"Input": [1, 2, 3]}) for _ in range(3)]
+        total_fired = asyncio.run(template.run(instances, max_transitions=2, quantum=5))
+        assert total_fired == 6
+        assert all(instance.step_count == 2 for instance in instances)
+
+    def test_tokens_added_between_steps_are_seen(self):
+        template = NetTemplate(_pipeline())
+        instance = template.new_instance()
+        assert asyncio.run(template.step(instance, max_transitions=5)) == 0
+        instance.tokens("Input").append(4)
+        assert asyncio.run(template.step(instance, max_transitions=5)) == 2
+        assert instance.tokens("Total") == [5]
+
+    def test_template_ignores_graph_tokens(self):
+        graph = _pipeline()
+        graph.place_named("Input").tokens.append(1)
+        template = NetTemplate(graph)
+        assert template.new_instance().tokens("Input") == []
+
+    def test_rejects_bad_tokens_and_unknown_places(self):
+        template = NetTemplate(_pipeline())
+        with pytest.raises(TypeError, match="Expected token to be of type"):
+            template.new_instance({"Input": ["one"]})
+        with pytest.raises(ValueError, match="unknown places"):
+            template.new_instance({"Missing": [1]})
+
+    def test_rejects_source_transitions(self):
+        graph = ExecutableGraphOperations.construct_graph([
+            SourceTransitionNode("Read", [1]),
+            ReturnedEdgeFromTransition("Read", "Items"),
+            ListPlaceNode("Items", int),
+        ])
+        with pytest.raises(ValueError, match="cannot be shared"):
+            NetTemplate(graph)
+
+    def test_lookups_are_built_once(self):
+        template = NetTemplate(_pipeline())
+        instances = [template.new_instance({"Input": [i]}) for i in range(3)]
+        lookups = template.graph.lookups()
+        asyncio.run(template.run(instances))
+        assert template.graph.lookups() is lookups
+
+    def test_each_instance_has_its_own_selector(self):
+        graph = _triage()
+        graph.transition_selector = RandomSelector(seed=0)
+        template = NetTemplate(graph)
+        first, second = (template.new_instance({"Input": list(range(20))}) for _ in range(2))
+        assert first.transition_selector is not second.transition_selector
+        asyncio.run(template.step(first, max_transitions=None))
+        asyncio.run(template.step(second, max_transitions=None))
+        assert first.tokens("Accepted") == second.tokens("Accepted")
+        assert 0 < len(first.tokens("Accepted")) < 20
+        seeded = template.new_instance({"Input": list(range(20))}, transition_selector=RandomSelector(seed=1))
+        asyncio.run(template.step(seeded, max_transitions=None))
+        assert seeded.tokens("Accepted") != first.tokens("Accepted")
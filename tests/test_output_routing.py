@@ -0,0 +1,142 @@
+"""Tests for ``OutputRouting``, the memoised matching of transition results to output places.
+
+Counts the calls to the type matcher to show which results are memoised, and checks that the routing is kept
+across ``execute_graph`` calls until the topology changes.
+"""
+
+import asyncio
+import pickle
+from typing import Any, Optional, Protocol, Union, runtime_checkable
+
+import pytest
+
+from petritype.core.executable_graph_components import (
+    ArgumentEdgeToTransition,
+    ExecutableGraphCheck,
+    ExecutableGraphOperations,
+    FunctionTransitionNode,
+    ListPlaceNode,
+    MapPlaceNames,
+    MapTransitionNames,
+    OutputRouting,
+    ReturnedEdgeFromTransition,
+)
+from petritype.core.type_comparisons import CompareTypes
+
+
+def _split(x: Union[int, str]) -> Union[int, str]:
+    return x
+
+
+def _split_graph(initial_tokens: list):
+    """``Split`` routes ints to ``Ints`` and strs to ``Strs`` by type."""
+    return ExecutableGraphOperations.construct_graph([
+        ListPlaceNode("Input", Union[int, str], list(initial_tokens)),
+        ArgumentEdgeToTransition("Input", "Split", "x"),
+        FunctionTransitionNode("Split", _split),
+        ReturnedEdgeFromTransition("Split", "Ints"),
+        ReturnedEdgeFromTransition("Split", "Strs"),
+        ListPlaceNode("Ints", int),
+        ListPlaceNode("Strs", str),
+    ])
+
+
+def _routing(graph) -> OutputRouting:
+    return OutputRouting(MapTransitionNames.to_outgoing_edges(graph), MapPlaceNames.to_list_place_nodes(graph))
+
+
+@pytest.fixture
+def match_calls(monkeypatch):
+    calls = []
+    original = ExecutableGraphCheck.value_and_places_types_match
+
+    def counting(value, places):
+        calls.append(value)
+        return original(value, places)
+
+    monkeypatch.setattr(ExecutableGraphCheck, "value_and_places_types_match", counting)
+    return calls
+
+
+class TestOutputRouting:
+
+    def test_routes_results_by_type(self):
+        graph, fired = asyncio.run(ExecutableGraphOperations.execute_graph(
+            _split_graph([1, "a", 2, "b"]), max_transitions=10,
+        ))
+        assert fired == 4
+        assert sorted(graph.place_named("Ints").tokens) == [1, 2]
+        assert sorted(graph.place_named("Strs").tokens) == ["a", "b"]
+
+    def test_repeated_result_types_are_matched_once(self, match_calls):
+        graph = _split_graph([])
+        routing = _routing(graph)
+        split = graph.transitions[0]
+        for value in [1, 2, "a", 3, "b"]:
+            (place,) = routing.matching_places(split, value)
+            assert place.name == ("Ints" if isinstance(value, int) else "Strs")
+        assert match_calls == [1, "a"]
+
+    def test_homogeneous_lists_are_memoised_by_element_type(self, match_calls):
+        graph = _split_graph([])
+        routing = _routing(graph)
+        split = graph.transitions[0]
+        assert [place.name for place in routing.matching_places(split, [1, 2])] == ["Ints"]
+        assert [place.name for place in routing.matching_places(split, [3, 4, 5])] == ["Ints"]
+        assert [place.name for place in routing.matching_places(split, ["a"])] == ["Strs"]
+        assert match_calls == [[1, 2], ["a"]]
+
+    def test_heterogeneous_lists_are_matched_in_full(self, match_calls):
+        graph = _split_graph([])
+        routing = _routing(graph)
+        split = graph.transitions[0]
+        assert routing.matching_places(split, [1, "a"]) == ()
+        assert routing.matching_places(split, [1, "a"]) == ()
+        assert len(match_calls) == 2
+
+    def test_generic_place_types_are_not_memoised(self, match_calls):
+        graph = ExecutableGraphOperations.construct_graph([
+            FunctionTransitionNode("Make", lambda: [1]),
+            ReturnedEdgeFromTransition("Make", "Lists"),
+            ListPlaceNode("Lists", list[int]),
+        ])
+        routing = _routing(graph)
+        make = graph.transitions[0]
+        routing.matching_places(make, [1])
+        routing.matching_places(make, [2])
+        assert len(match_calls) == 2
+
+    def test_routing_is_kept_across_execute_graph_calls(self, match_calls):
+        graph = _split_graph([1, "a", 2, "b"])
+        for _ in range(4):
+            asyncio.run(ExecutableGraphOperations.execute_graph(graph, max_transitions=1))
+        assert match_calls == ["b", 2]
+
+    def test_lookups_follow_the_topology(self):
+        graph = _split_graph([1])
+        lookups = graph.lookups()
+        assert graph.lookups() is lookups
+        graph.places = list(graph.places)
+        assert graph.lookups() is not lookups
+        assert ExecutableGraphOperations.fork(graph).lookups() is not graph.lookups()
+
+    def test_pickled_graphs_drop_the_lookups(self):
+        graph = _split_graph([1])
+        graph.lookups()
+        assert pickle.loads(pickle.dumps(graph))._lookups is None
+
+
+class TestValueTypeDecidesMatch:
+
+    @pytest.mark.parametrize("type_", [int, str, Any, None, int | str, Optional[int]])
+    def test_plain_types(self, type_):
+        assert CompareTypes.value_type_decides_match(type_)
+
+    def test_parameterised_generics_and_protocols(self):
+        @runtime_checkable
+        class HasName(Protocol):
+            name: str
+
+        assert not CompareTypes.value_type_decides_match(list[int])
+        assert not CompareTypes.value_type_decides_match(int | list[int])
+        assert not CompareTypes.value_type_decides_match(HasName)
@@ -0,0 +1,144 @@
+"""Tests for ``NetPartitioner`` and ``PartitionedExecution``, which run one net as subnets in worker processes.
+
+Subnets are pickled to the workers, so everything they use is defined at module level.
+"""
+
+from typing import Union
+
+import pytest
+
+pytest.importorskip("rustworkx")
+
+from petritype.core.executable_graph_components import (  # noqa: E402
+    ArgumentEdgeToTransition,
+    ExecutableGraphOperations,
+    FunctionTransitionNode,
+    ListPlaceNode,
+    ReturnedEdgeFromTransition,
+)
+from petritype.core.guards import PlaceCount  # noqa: E402
+from petritype.core.partitioning import NetPartition, NetPartitioner, PartitionedExecution  # noqa: E402
+
+
+def _increment(x: int) -> int:
+    return x + 1
+
+
+def _decrement(x: int) -> int:
+    return x - 1
+
+
+def _chain_nodes(length: int, tokens: list[int], prefix: str = ""):
+    nodes = [ListPlaceNode(f"{prefix}P0", int, list(tokens))]
+    for index in range(length):
+        nodes += [
+            ArgumentEdgeToTransition(f"{prefix}P{index}", f"{prefix}T{index}", "x"),
+            FunctionTransitionNode(f"{prefix}T{index}", _increment),
+            ReturnedEdgeFromTransition(f"{prefix}T{index}", f"{prefix}P{index + 1}"),
+            ListPlaceNode(f"{prefix}P{index + 1}", int),
+        ]
+    return nodes
+
+
+def _chain(length: int, tokens: list[int]):
+    """``T0 .. T<length-1>`` each add one to the tokens moving from ``P0`` to ``P<length>``."""
+    return ExecutableGraphOperations.construct_graph(_chain_nodes(length, tokens))
+
+
+def _ping_pong(count: int):
+    """``Ping`` and ``Pong`` pass one token back and forth, decrementing it until ``Done`` can take it at zero."""
+    return ExecutableGraphOperations.construct_graph([
+        ListPlaceNode("Left", int, [count]),
+        ArgumentEdgeToTransition("Left", "Ping", "x"),
+        FunctionTransitionNode("Ping", _decrement),
+        ReturnedEdgeFromTransition("Ping", "Right"),
+        ListPlaceNode("Right", int),
+        ArgumentEdgeToTransition("Right", "Pong", "x"),
+        FunctionTransitionNode("Pong", _bounce),
+        ReturnedEdgeFromTransition("Pong", "Left"),
+        ReturnedEdgeFromTransition("Pong", "Finished"),
+        ListPlaceNode("Finished", str),
+    ])
+
+
+def _bounce(x: int) -> Union[int, str]:
+    return x if x > 0 else "done"
+
+
+class TestNetPartitioner:
+
+    def test_chain_is_cut_once(self):
+        partition = NetPartitioner.partition(_chain(8, []), partition_count=2)
+        assert partition.cut_arcs == 1
+        assert [len(names) for names in partition.transitions] == [4, 4]
+        assert partition.transitions[0] == ("T0", "T1", "T2", "T3")
+        assert partition.place_owners["P0"] == 0 and partition.place_owners["P8"] == 1
+
+    def test_competing_consumers_stay_together(self):
+        graph = ExecutableGraphOperations.construct_graph([
+            ListPlaceNode("Shared", int),
+            ArgumentEdgeToTransition("Shared", "A", "x"),
+            FunctionTransitionNode("A", _increment),
+            ReturnedEdgeFromTransition("A", "OutA"),
+            ListPlaceNode("OutA", int),
+            ArgumentEdgeToTransition("Shared", "B", "x"),
+            FunctionTransitionNode("B", _increment),
+            ReturnedEdgeFromTransition("B", "OutB"),
+            ListPlaceNode("OutB", int),
+        ])
+        partition = NetPartitioner.partition(graph, partition_count=2)
+        assert partition.transitions == (("A", "B"),)
+        assert partition.cut_arcs == 0
+
+    def test_independent_components_are_not_cut(self):
+        graph = ExecutableGraphOperations.construct_graph(_chain_nodes(3, [], "a") + _chain_nodes(3, [], "b"))
+        partition = NetPartitioner.partition(graph, partition_count=2)
+        assert partition.cut_arcs == 0
+        assert partition.transitions == (("aT0", "aT1", "aT2"), ("bT0", "bT1", "bT2"))
+
+    def test_subgraphs_get_stand_ins_for_remote_outputs(self):
+        graph = _chain(4, [])
+        subgraphs = NetPartitioner.subgraphs(graph, NetPartitioner.partition(graph, partition_count=2))
+        assert [place.name for place in subgraphs[0].places] == ["P0", "P1", "P2"]
+        assert [place.name for place in subgraphs[1].places] == ["P2", "P3", "P4"]
+        assert subgraphs[0].places[2] is not graph.places[2] and subgraphs[1].places[0] is graph.places[2]
+
+    def test_capacity_at_cut_is_rejected(self):
+        graph = _chain(2, [])
+        graph.places[1].capacity = 1
+        partition = NetPartition(transitions=(("T0",), ("T1",)), place_owners={"P0": 0, "P1": 1, "P2": 1}, cut_arcs=1)
+        with pytest.raises(ValueError, match="has a capacity"):
+            NetPartitioner.subgraphs(graph, partition)
+
+    def test_guard_on_remote_place_is_rejected(self):
+        graph = _chain(2, [])
+        graph.transitions[0].activation_function = PlaceCount("P2") < 5
+        partition = NetPartition(transitions=(("T0",), ("T1",)), place_owners={"P0": 0, "P1": 1, "P2": 1}, cut_arcs=1)
+        with pytest.raises(ValueError, match="owned by another partition"):
+            NetPartitioner.subgraphs(graph, partition)
+
+
+@pytest.mark.parametrize("start_method", ["fork", "spawn"])
+class TestPartitionedExecution:
+
+    def test_chain_runs_across_processes(self, start_method):
+        graph = _chain(6, [0, 10, 20])
+        partition = NetPartitioner.partition(graph, partition_count=3)
+        graph, fired = PartitionedExecution.execute(
+            graph, partition, slice_transitions=2, start_method=start_method, timeout=30
+        )
+        assert fired == 18
+        assert graph.step_count == 18
+        assert sorted(graph.place_named("P6").tokens) == [6, 16, 26]
+        assert all(not graph.place_named(f"P{index}").tokens for index in range(6))
+        assert graph.fired_counts == {f"T{index}": 3 for index in range(6)}
+
+    def test_tokens_cross_the_cut_in_both_directions(self, start_method):
+        graph = _ping_pong(5)
+        partition = NetPartition(
+            transitions=(("Ping",), ("Pong",)), place_owners={"Left": 0, "Right": 1, "Finished": 1}, cut_arcs=2,
+        )
+        graph, fired = PartitionedExecution.execute(graph, partition, start_method=start_method, timeout=30)
+        assert graph.place_named("Finished").tokens == ["done"]
+        assert graph.place_named("Left").tokens == [] and graph.place_named("Right").tokens == []
+        assert fired == 10
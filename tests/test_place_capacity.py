@@ -0,0 +1,139 @@
+"""Tests for ``ListPlaceNode.capacity`` and the backpressure it applies to producers.
+
+Covers validation of ``capacity``, its effect on which transitions are enabled under every built-in selector, and
+``add_token_when_room_available`` for async producers.
+"""
+
+import asyncio
+import itertools
+
+import pytest
+
+from petritype.core.executable_graph_components import (
+    ArgumentEdgeToTransition,
+    ExecutableGraphOperations,
+    FunctionTransitionNode,
+    ListPlaceNode,
+    ReturnedEdgeFromTransition,
+)
+from petritype.core.guards import PlaceCount
+from petritype.core.transition_selectors import GuardSelector, PriorityQueueSelector
+
+
+def _producer_consumer_graph(capacity: int):
+    """``Produce`` (a source) fills ``Buffer``; ``Consume`` drains it into ``Output``."""
+    counter = itertools.count()
+    return ExecutableGraphOperations.construct_graph([
+        FunctionTransitionNode("Produce", lambda: next(counter)),
+        ReturnedEdgeFromTransition("Produce", "Buffer"),
+        ListPlaceNode("Buffer", int, capacity=capacity),
+        ArgumentEdgeToTransition("Buffer", "Consume", "x"),
+        FunctionTransitionNode("Consume", lambda x: x),
+        ReturnedEdgeFromTransition("Consume", "Output"),
+        ListPlaceNode("Output", int),
+    ])
+
+
+def _total(items: list[int]) -> int:
+    return sum(items)
+
+
+class TestCapacityValidation:
+
+    def test_capacity_defaults_to_unbounded(self):
+        assert ListPlaceNode("P", int).capacity is None
+
+    def test_initial_tokens_must_fit(self):
+        with pytest.raises(ValueError, match="exceeds its capacity"):
+            ListPlaceNode("P", int, [1, 2, 3], capacity=2)
+
+    def test_capacity_must_be_positive(self):
+        with pytest.raises(ValueError, match="must be at least 1"):
+            ListPlaceNode("P", int, capacity=0)
+
+    def test_place_history_copies_keep_capacity(self):
+        assert ListPlaceNode("P", int, [1], capacity=3).copy_sans_tokens().capacity == 3
+
+
+class TestCapacityDisablesProducers:
+
+    def test_buffer_never_exceeds_capacity(self):
+        graph = _producer_consumer_graph(capacity=2)
+        for _ in range(10):
+            graph, fired = asyncio.run(ExecutableGraphOperations.execute_graph(graph, max_transitions=1))
+            assert fired == 1
+            assert len(graph.place_named("Buffer").tokens) <= 2
+        # Once the buffer is full the producer waits for the consumer.
+        assert graph.fired_counts["Consume"] > 0
+
+    def test_self_loop_on_full_place_stays_enabled(self):
+        graph = ExecutableGraphOperations.construct_graph([
+            ListPlaceNode("Loop", int, [0], capacity=1),
+            ArgumentEdgeToTransition("Loop", "Step", "x"),
+            FunctionTransitionNode("Step", lambda x: x + 1),
+            ReturnedEdgeFromTransition("Step", "Loop"),
+        ])
+        graph, fired = asyncio.run(ExecutableGraphOperations.execute_graph(graph, max_transitions=3))
+        assert fired == 3
+        assert graph.place_named("Loop").tokens == [3]
+
+    def test_list_argument_frees_the_whole_place(self):
+        graph = ExecutableGraphOperations.construct_graph([
+            ListPlaceNode("Pool", int, [1, 2], capacity=2),
+            ArgumentEdgeToTransition("Pool", "Sum", "items"),
+            FunctionTransitionNode("Sum", _total),
+            ReturnedEdgeFromTransition("Sum", "Pool"),
+        ])
+        graph, fired = asyncio.run(ExecutableGraphOperations.execute_graph(graph, max_transitions=1))
+        assert fired == 1
+        assert graph.place_named("Pool").tokens == [3]
+
+    @pytest.mark.parametrize("selector_class", [PriorityQueueSelector, GuardSelector])
+    def test_built_in_selectors_respect_capacity(self, selector_class):
+        graph = _producer_consumer_graph(capacity=1)
+        graph, fired = asyncio.run(ExecutableGraphOperations.execute_graph(
+            graph, max_transitions=6, transition_selector=selector_class(),
+        ))
+        assert fired == 6
+        assert graph.fired_counts == {"Produce": 3, "Consume": 3}
+
+    def test_guard_selector_combines_capacity_with_guards(self):
+        graph = _producer_consumer_graph(capacity=5)
+        graph.transitions[1].activation_function = PlaceCount("Buffer") >= 5
+        graph, _ = asyncio.run(ExecutableGraphOperations.execute_graph(
+            graph, max_transitions=6, transition_selector=GuardSelector(),
+        ))
+        assert graph.fired_counts == {"Produce": 5, "Consume": 1}
+
+
+class TestAsyncProducers:
+
+    def test_producer_waits_for_room(self):
+        async def scenario():
+            graph = ExecutableGraphOperations.construct_graph([
+                ListPlaceNode("Input", int, [0], capacity=1),
+                ArgumentEdgeToTransition("Input", "Inc", "x"),
+                FunctionTransitionNode("Inc", lambda x: x + 1),
+                ReturnedEdgeFromTransition("Inc", "Output"),
+                ListPlaceNode("Output", int),
+            ])
+
+            async def produce():
+                for token in (10, 20):
+                    await ExecutableGraphOperations.add_token_when_room_available(graph, "Input", token)
+
+            producer = asyncio.create_task(produce())
+            await asyncio.sleep(0)
+            assert graph.place_named("Input").tokens == [0]  # The producer is blocked on the full place.
+            graph, fired = await ExecutableGraphOperations.execute_graph(graph, max_transitions=3)
+            await producer
+            return graph, fired
+
+        graph, fired = asyncio.run(scenario())
+        assert fired == 3
+        assert graph.place_named("Output").tokens == [1, 11, 21]
+
+    def test_rejects_token_of_wrong_type(self):
+        graph = _producer_consumer_graph(capacity=1)
+        with pytest.raises(TypeError):
+            asyncio.run(ExecutableGraphOperations.add_token_when_room_available(graph, "Buffer", "not an int"))
@@ -0,0 +1,132 @@
+"""Tests for ``ShardedNetPool``, which runs independent nets in worker processes.
+
+Nets, factories and tokens are pickled to the workers, so everything they use is defined at module level.
+"""
+
+import pytest
+
+from petritype import petri_net
+from petritype.core.executable_graph_components import (
+    ArgumentEdgeToTransition,
+    ExecutableGraphOperations,
+    FunctionTransitionNode,
+    ListPlaceNode,
+    ReturnedEdgeFromTransition,
+)
+from petritype.core.process_pool import ShardedNetPool
+
+
+def _increment(x: int) -> int:
+    return x + 1
+
+
+def _counter_net(tokens: list[int]):
+    """``Inc`` moves each token from ``Input`` to ``Output``."""
+    return ExecutableGraphOperations.construct_graph([
+        ListPlaceNode("Input", int, list(tokens)),
+        ArgumentEdgeToTransition("Input", "Inc", "x"),
+        FunctionTransitionNode("Inc", _increment),
+        ReturnedEdgeFromTransition("Inc", "Output"),
+        ListPlaceNode("Output", int),
+    ])
+
+
+def _spin_net():
+    """``Spin`` takes its token from ``Loop`` and puts it back, so the net never parks."""
+    return ExecutableGraphOperations.construct_graph([
+        ListPlaceNode("Loop", int, [0]),
+        ArgumentEdgeToTransition("Loop", "Spin", "x"),
+        FunctionTransitionNode("Spin", _increment),
+        ReturnedEdgeFromTransition("Spin", "Loop"),
+    ])
+
+
+@petri_net(name="counter-a")
+def counter_a():
+    return _counter_net([1, 2, 3])
+
+
+@petri_net(name="counter-b")
+def counter_b():
+    return _counter_net([10])
+
+
+@petri_net(name="batch", mode="batch")
+def batch():
+    return _counter_net([1, 2])
+
+
+@pytest.fixture(params=["fork", "spawn"])
+def pool(request):
+    with ShardedNetPool(processes=2, start_method=request.param) as pool:
+        yield pool
+
+
+class TestShardedNetPool:
+
+    def test_factories_run_on_separate_shards(self, pool):
+        assert pool.add_factory(counter_a) == "counter-a"
+        assert pool.add_factory(counter_b) == "counter-b"
+        pool.wait_until_idle()
+        assert sorted(pool.tokens("counter-a", "Output")) == [2, 3, 4]
+        assert pool.tokens("counter-b", "Output") == [11]
+        health = pool.health()
+        assert [shard.alive for shard in health] == [True, True]
+        assert [shard.step_counts for shard in health] == [{"counter-a": 3}, {"counter-b": 1}]
+        assert all(shard.parked_nets for shard in health)
+
+    def test_graph_instances_and_injection(self, pool):
+        pool.add(_counter_net([]), "streaming")
+        pool.inject("streaming", "Input", [5, 6])
+        pool.wait_until_idle()
+        assert sorted(pool.tokens("streaming", "Output", take=True)) == [6, 7]
+        assert pool.tokens("streaming", "Output") == []
+        pool.inject("streaming", "Input", [7])
+        pool.wait_until_idle()
+        assert pool.tokens("streaming", "Output") == [8]
+        assert pool.step_counts() == {"streaming": 3}
+
+    def test_finished_batch_nets_can_be_read_and_added_again(self, pool):
+        pool.add_factory(batch)
+        pool.wait_until_idle()
+        assert sorted(pool.tokens("batch", "Output")) == [2, 3]
+        [shard] = [shard for shard in pool.health() if shard.completed_nets]
+        assert shard.completed_nets == ["batch"] and shard.step_counts == {"batch": 2}
+        assert pool.add_factory(batch) == "batch"
+        pool.wait_until_idle()
+        assert sorted(pool.tokens("batch", "Output", take=True)) == [2, 3]
+        assert pool.step_counts() == {"batch": 2}
+
+    def test_worker_errors_are_raised_in_the_caller(self, pool):
+        pool.add(_counter_net([]), "net")
+        with pytest.raises(TypeError, match="Expected token to be of type"):
+            pool.inject("net", "Input", ["not an int"])
+        with pytest.raises(ValueError, match="no place named"):
+            pool.tokens("net", "Missing")
+        with pytest.raises(ValueError, match="already in the pool"):
+            pool.add(_counter_net([]), "net")
+        with pytest.raises(ValueError, match="No net named"):
+            pool.inject("other", "Input", [1])
+        assert pool.tokens("net", "Output") == []
+
+    def test_wait_until_idle_times_out(self, pool):
+        pool.add(_spin_net(), "spin")
+        pool.add(_counter_net([1]), "counter")
+        with pytest.raises(TimeoutError, match=r"Shards \[0\] were still busy"):
+            pool.wait_until_idle(timeout=0.2)
+        assert pool.tokens("counter", "Output") == [2]
+        assert pool.step_counts()["spin"] > 0
+        with pytest.raises(TimeoutError):
+            pool.wait_until_idle(timeout=0)
+
+    def test_dead_worker_is_reported(self, pool):
+        pool.add_factory(counter_a)
+        pool._processes[1].terminate()
+        pool._processes[1].join()
+        health = pool.health()
+        assert [shard.alive for shard in health] == [True, False]
+        assert health[1].step_counts == {}
+
+    def test_pool_must_be_started(self):
+        with pytest.raises(RuntimeError, match="Start the pool"):
+            ShardedNetPool(processes=1).add_factory(counter_a)
@@ -0,0 +1,195 @@
+"""Tests for ``NetScheduler``, which interleaves many graphs on one event loop.
+
+Covers fair and weighted turns, waking parked nets by injection, and the batch and always-on lifecycles of
+``@petri_net`` factories, including failures.
+"""
+
+import asyncio
+
+import pytest
+
+from petritype import petri_net
+from petritype.core.executable_graph_components import (
+    ArgumentEdgeToTransition,
+    ExecutableGraphOperations,
+    FunctionTransitionNode,
+    ListPlaceNode,
+    ReturnedEdgeFromTransition,
+)
+from petritype.core.scheduler import NetScheduler
+
+
+def _increment(x: int) -> int:
+    return x + 1
+
+
+def _counter_net(tokens: list[int]):
+    """``Inc`` moves each token from ``Input`` to ``Output``."""
+    return ExecutableGraphOperations.construct_graph([
+        ListPlaceNode("Input", int, list(tokens)),
+        ArgumentEdgeToTransition("Input", "Inc", "x"),
+        FunctionTransitionNode("Inc", _increment),
+        ReturnedEdgeFromTransition("Inc", "Output"),
+        ListPlaceNode("Output", int),
+    ])
+
+
+def _fail(x: int) -> int:
+    raise RuntimeError("boom")
+
+
+class TestNetScheduler:
+
+    def test_runs_every_net_to_idle(self):
+        scheduler = NetScheduler(quantum=2)
+        scheduler.add(_counter_net([1, 2, 3]), name="a")
+        scheduler.add(_counter_net([10]), name="b")
+        stats = asyncio.run(scheduler.run())
+        assert stats.transitions_fired == 4
+        assert stats.fired_by_net == {"a": 3, "b": 1}
+        assert sorted(stats.parked_nets) == ["a", "b"]
+        assert sorted(scheduler.nets["a"].graph.place_named("Output").tokens) == [2, 3, 4]
+
+    def test_equal_weights_share_turns_fairly(self):
+        scheduler = NetScheduler()
+        scheduler.add(_counter_net(list(range(100))), name="a")
+        scheduler.add(_counter_net(list(range(100))), name="b")
+        stats = asyncio.run(scheduler.run(max_transitions=20))
+        assert stats.fired_by_net == {"a": 10, "b": 10}
+
+    def test_weights_share_turns_proportionally(self):
+        scheduler = NetScheduler()
+        scheduler.add(_counter_net(list(range(100))), name="heavy", weight=3.0)
+        scheduler.add(_counter_net(list(range(100))), name="light", weight=1.0)
+        stats = asyncio.run(scheduler.run(max_transitions=40))
+        assert stats.fired_by_net == {"heavy": 30, "light": 10}
+
+    def test_inject_wakes_a_parked_net(self):
+        scheduler = NetScheduler()
+        scheduler.add(_counter_net([]), name="a")
+        asyncio.run(scheduler.run())
+        assert scheduler.stats().parked_nets == ["a"]
+        scheduler.inject("a", "Input", [5])
+        assert scheduler.stats().active_nets == ["a"]
+        stats = asyncio.run(scheduler.run())
+        assert stats.fired_by_net == {"a": 1}
+        assert scheduler.nets["a"].graph.place_named("Output").tokens == [6]
+
+    def test_run_until_stopped_waits_for_injections(self):
+        scheduler = NetScheduler()
+        scheduler.add(_counter_net([]), name="a")
+
+        async def scenario():
+            runner = asyncio.create_task(scheduler.run(until_idle=False))
+            await asyncio.sleep(0)
+            scheduler.inject("a", "Input", [1, 2])
+            while scheduler.stats().transitions_fired < 2:
+                await asyncio.sleep(0)
+            scheduler.stop()
+            return await runner
+
+        stats = asyncio.run(scenario())
+        assert stats.fired_by_net == {"a": 2}
+
+    def test_inject_rejects_wrong_token_type(self):
+        scheduler = NetScheduler()
+        scheduler.add(_counter_net([]), name="a")
+        with pytest.raises(TypeError, match="Expected token to be of type"):
+            scheduler.inject("a", "Input", ["x"])
+
+    def test_failing_net_is_removed_without_stopping_others(self):
+        scheduler = NetScheduler()
+        scheduler.add(ExecutableGraphOperations.construct_graph([
+            ListPlaceNode("Input", int, [1]),
+            ArgumentEdgeToTransition("Input", "Fail", "x"),
+            FunctionTransitionNode("Fail", _fail),
+            ReturnedEdgeFromTransition("Fail", "Output"),
+            ListPlaceNode("Output", int),
+        ]), name="bad")
+        scheduler.add(_counter_net([1, 2]), name="good")
+        stats = asyncio.run(scheduler.run())
+        assert stats.failed_nets == {"bad": "RuntimeError: boom"}
+        assert stats.fired_by_net["good"] == 2
+        assert "bad" not in scheduler.nets
+
+
+class TestPetriNetFactories:
+
+    def test_batch_nets_are_removed_when_done(self):
+        @petri_net(name="batch-job", mode="batch")
+        def batch_job():
+            return _counter_net([1, 2])
+
+        scheduler = NetScheduler()
+        assert scheduler.add_factory(batch_job) == "batch-job"
+        stats = asyncio.run(scheduler.run())
+        assert stats.completed_nets == ["batch-job"]
+        assert stats.fired_by_net == {"batch-job": 2}
+        assert scheduler.nets == {}
+        assert scheduler.net("batch-job").graph.place_named("Output").tokens == [3, 2]
+        scheduler.add_factory(batch_job)
+        assert "batch-job" not in scheduler.finished
+
+    def test_always_on_nets_are_restarted_after_failure(self):
+        attempts = []
+
+        @petri_net(name="monitor", mode="24/7")
+        def monitor():
+            attempts.append(1)
+            if len(attempts) == 1:
+                return ExecutableGraphOperations.construct_graph([
+                    ListPlaceNode("Input", int, [1]),
+                    ArgumentEdgeToTransition("Input", "Fail", "x"),
+                    FunctionTransitionNode("Fail", _fail),
+                    ReturnedEdgeFromTransition("Fail", "Output"),
+                    ListPlaceNode("Output", int),
+                ])
+            return _counter_net([1])
+
+        scheduler = NetScheduler()
+        scheduler.add_factory(monitor)
+        stats = asyncio.run(scheduler.run())
+        assert scheduler.nets["monitor"].restarts == 1
+        assert stats.fired_by_net == {"monitor": 1}
+        assert stats.parked_nets == ["monitor"]
+
+    def test_failed_restarts_remove_the_net(self):
+        attempts = []
+
+        @petri_net(name="flaky", mode="24/7")
+        def flaky():
+            attempts.append(1)
+            if len(attempts) > 1:
+                raise ConnectionError("database unavailable")
+            return ExecutableGraphOperations.construct_graph([
+                ListPlaceNode("Input", int, [1]),
+                ArgumentEdgeToTransition("Input", "Fail", "x"),
+                FunctionTransitionNode("Fail", _fail),
+                ReturnedEdgeFromTransition("Fail", "Output"),
+                ListPlaceNode("Output", int),
+            ])
+
+        scheduler = NetScheduler()
+        scheduler.add_factory(flaky)
+        scheduler.add(_counter_net([1, 2]), name="steady")
+        stats = asyncio.run(scheduler.run())
+        assert "flaky" not in scheduler.nets
+        assert "restart failed with ConnectionError: database unavailable" in stats.failed_nets["flaky"]
+        assert stats.fired_by_net["steady"] == 2
+
+    def test_scheduled_nets_run_quietly(self, capsys):
+        scheduler = NetScheduler()
+        scheduler.add(_counter_net([1]), name="quiet")
+        asyncio.run(scheduler.run())
+        assert capsys.readouterr().out == ""
+
+    def test_rejects_undecorated_and_cron_factories(self):
+        @petri_net(name="nightly", mode="cron", schedule="0 0 * * *")
+        def nightly():
+            return _counter_net([])
+
+        scheduler = NetScheduler()
+        with pytest.raises(ValueError, match="not decorated"):
+            scheduler.add_factory(lambda: _counter_net([]))
+        with pytest.raises(ValueError, match="mode 'cron'"):
+            scheduler.add_factory(nightly)
@@ -0,0 +1,145 @@
+"""Tests for ``SharedArray``, numpy tokens whose data lives in shared memory.
+
+Covers reference counting and pickling of the handles, release of transition inputs, and passing arrays to another
+process without copying their data.
+"""
+
+import asyncio
+import pickle
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from petritype.core.executable_graph_components import (
+    ArgumentEdgeToTransition,
+    ExecutableGraphOperations,
+    FunctionTransitionNode,
+    ListPlaceNode,
+    ReturnedEdgeFromTransition,
+)
+from petritype.core import shared_arrays
+from petritype.core.process_pool import ShardedNetPool
+from petritype.core.shared_arrays import SharedArray, SharedArrays
+
+
+def _double(series: np.ndarray) -> np.ndarray:
+    return series * 2
+
+
+async def _negate(series: np.ndarray) -> np.ndarray:
+    return -series
+
+
+def _fail(series: np.ndarray) -> np.ndarray:
+    raise ValueError("bad series")
+
+
+async def _fail_async(series: np.ndarray) -> np.ndarray:
+    raise ValueError("bad series")
+
+
+def _doubling_net(tokens: list[SharedArray]):
+    return ExecutableGraphOperations.construct_graph([
+        ListPlaceNode("Series", SharedArray, list(tokens)),
+        ArgumentEdgeToTransition("Series", "Double", "series"),
+        FunctionTransitionNode("Double", SharedArrays.transition(_double)),
+        ReturnedEdgeFromTransition("Double", "Doubled"),
+        ListPlaceNode("Doubled", SharedArray),
+    ])
+
+
+def _is_unlinked(token: SharedArray) -> bool:
+    try:
+        shared_memory.SharedMemory(token.name, track=False).close()
+    except FileNotFoundError:
+        return True
+    return False
+
+
+class TestSharedArray:
+
+    def test_round_trip_and_reference_counting(self):
+        token = SharedArrays.from_array(np.arange(6, dtype=np.int32).reshape(2, 3))
+        assert token.shape == (2, 3) and token.nbytes == 24
+        assert token.array.tolist() == [[0, 1, 2], [3, 4, 5]]
+        assert token.refcount == 1
+        assert token.acquire() is token and token.refcount == 2
+        token.release()
+        assert not _is_unlinked(token)
+        token.release()
+        assert _is_unlinked(token)
+
+    def test_pickle_sends_only_the_handle(self):
+        token = SharedArrays.from_array(np.zeros(1_000_000))
+        payload = pickle.dumps(token)
+        assert len(payload) < 200
+        received = pickle.loads(payload)
+        received.array[0] = 42.0
+        assert token.array[0] == 42.0
+        assert received.refcount == 1
+        received.release()
+
+    def test_object_arrays_are_rejected(self):
+        with pytest.raises(TypeError, match="cannot be shared"):
+            SharedArrays.from_array(np.array([object()]))
+
+    def test_over_release_raises(self):
+        token = SharedArrays.from_array(np.ones(3))
+        other_handle = pickle.loads(pickle.dumps(token))
+        token.release()
+        with pytest.raises((RuntimeError, FileNotFoundError)):
+            other_handle.release()
+
+    def test_collect_unmaps_arrays_released_elsewhere(self):
+        token = SharedArrays.from_array(np.ones(3))
+        # Simulate another process dropping the last reference without this process knowing.
+        shared_arrays._counter(shared_arrays._attached[token.name])[0] = 0
+        assert SharedArrays.collect() == 1
+        assert token.name not in shared_arrays._attached
+        shared_memory.SharedMemory(token.name, track=False).unlink()
+
+
+class TestSharedArrayTransitions:
+
+    def test_transition_takes_and_returns_shared_arrays(self):
+        token = SharedArrays.from_array(np.arange(4.0))
+        graph = _doubling_net([token])
+        assert graph.transitions[0].function.__annotations__ == {"series": SharedArray, "return": SharedArray}
+        asyncio.run(ExecutableGraphOperations.execute_graph(graph, max_transitions=1))
+        (doubled,) = graph.place_named("Doubled").tokens
+        assert isinstance(doubled, SharedArray)
+        assert doubled.array.tolist() == [0.0, 2.0, 4.0, 6.0]
+        assert _is_unlinked(token)
+        doubled.release()
+
+    def test_async_transition(self):
+        token = SharedArrays.from_array(np.ones(2))
+        adapter = SharedArrays.transition(_negate)
+        negated = asyncio.run(adapter(series=token))
+        assert negated.array.tolist() == [-1.0, -1.0]
+        assert _is_unlinked(token)
+        assert pickle.loads(pickle.dumps(adapter)).function is _negate
+        negated.release()
+
+    @pytest.mark.parametrize("function", [_fail, _fail_async])
+    def test_inputs_are_released_when_the_function_raises(self, function):
+        token = SharedArrays.from_array(np.ones(2))
+        adapter = SharedArrays.transition(function)
+        with pytest.raises(ValueError, match="bad series"):
+            result = adapter(series=token)
+            if adapter.is_async:
+                asyncio.run(result)
+        assert _is_unlinked(token)
+
+    def test_tokens_cross_processes_without_copying_the_data(self):
+        token = SharedArrays.from_array(np.arange(100_000, dtype=np.float64))
+        with ShardedNetPool(processes=1) as pool:
+            pool.add(_doubling_net([]), "double")
+            pool.inject("double", "Series", [token])
+            pool.wait_until_idle()
+            (doubled,) = pool.tokens("double", "Doubled", take=True)
+        assert doubled.array[-1] == 2 * 99_999
+        assert _is_unlinked(token)
+        doubled.release()
+        assert _is_unlinked(doubled)
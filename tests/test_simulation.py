@@ -0,0 +1,158 @@
+"""Tests for ``StochasticSimulation``, the timed stochastic simulation of the count abstraction of a net."""
+
+import math
+
+import pytest
+
+pytest.importorskip("rustworkx")
+
+from petritype.core.executable_graph_components import (  # noqa: E402
+    ArgumentEdgeToTransition,
+    ExecutableGraphOperations,
+    FunctionTransitionNode,
+    ListPlaceNode,
+    ReturnedEdgeFromTransition,
+)
+from petritype.core.simulation import Distributions, StochasticSimulation  # noqa: E402
+
+
+def _receive() -> int:
+    return 0
+
+
+def _serve(job: int) -> int:
+    return job
+
+
+def _station(capacity=None, route=False):
+    """``Receive -> Queue -> Serve -> Done``, with ``Serve`` also delivering to ``Rework`` if ``route``."""
+    nodes = [
+        FunctionTransitionNode("Receive", _receive),
+        ReturnedEdgeFromTransition("Receive", "Queue"),
+        ListPlaceNode("Queue", int, capacity=capacity),
+        ArgumentEdgeToTransition("Queue", "Serve", "job"),
+        FunctionTransitionNode("Serve", _serve),
+        ReturnedEdgeFromTransition("Serve", "Done"),
+        ListPlaceNode("Done", int),
+    ]
+    if route:
+        nodes += [ReturnedEdgeFromTransition("Serve", "Rework"), ListPlaceNode("Rework", int)]
+    return ExecutableGraphOperations.construct_graph(nodes)
+
+
+def _mm1(service_mean: float, servers: int = 1, **kwargs):
+    return StochasticSimulation(
+        _station(**kwargs),
+        service_times={"Serve": Distributions.exponential(service_mean)},
+        arrivals={"Receive": Distributions.exponential(1.0)},
+        servers={"Serve": servers},
+    )
+
+
+class TestStochasticSimulation:
+
+    def test_single_server_queue_matches_theory(self):
+        # M/M/1 with arrival rate 1 and service rate 2: utilisation 0.5, 0.5 jobs waiting, time in system 1.
+        report = _mm1(0.5).run(horizon=2_000, replications=40, seed=7, warm_up=100)
+        assert report.replications == 40 and report.duration == 1_900
+        assert report.transitions["Serve"].utilisation.mean == pytest.approx(0.5, abs=0.03)
+        assert report.transitions["Receive"].throughput.mean == pytest.approx(1.0, abs=0.03)
+        assert report.places["Queue"].mean_tokens.mean == pytest.approx(0.5, abs=0.08)
+        assert report.places["Queue"].mean_sojourn.mean == pytest.approx(0.5, abs=0.08)
+        assert report.cycle_time.mean == pytest.approx(1.0, abs=0.1)
+        assert report.cycle_time.std_error < 0.05
+
+    def test_servers_share_the_load(self):
+        report = _mm1(1.5, servers=2).run(horizon=1_000, replications=20, seed=1)
+        assert report.transitions["Serve"].utilisation.mean == pytest.approx(0.75, abs=0.05)
+
+    def test_same_seed_same_report(self):
+        first = _mm1(0.5).run(horizon=100, replications=5, seed=3)
+        second = _mm1(0.5).run(horizon=100, replications=5, seed=3)
+        assert first == second
+
+    def test_arrivals_into_a_full_place_are_lost(self):
+        simulation = StochasticSimulation(
+            _station(capacity=1),
+            service_times={"Serve": Distributions.deterministic(2.0)},
+            arrivals={"Receive": Distributions.deterministic(1.0)},
+        )
+        report = simulation.run(horizon=1_000, replications=2, seed=0, warm_up=10)
+        assert report.places["Queue"].max_tokens.mean == 1
+        assert report.transitions["Serve"].throughput.mean == pytest.approx(0.5, abs=0.01)
+        assert report.transitions["Receive"].lost.mean == pytest.approx(0.5, abs=0.01)
+
+    def test_services_in_progress_hold_room_in_their_output_place(self):
+        simulation = StochasticSimulation(
+            ExecutableGraphOperations.construct_graph([
+                FunctionTransitionNode("Receive", _receive),
+                ReturnedEdgeFromTransition("Receive", "Queue"),
+                ListPlaceNode("Queue", int),
+                ArgumentEdgeToTransition("Queue", "Serve", "job"),
+                FunctionTransitionNode("Serve", _serve),
+                ReturnedEdgeFromTransition("Serve", "Done"),
+                ListPlaceNode("Done", int, capacity=2),
+                ArgumentEdgeToTransition("Done", "Ship", "job"),
+                FunctionTransitionNode("Ship", _serve),
+                ReturnedEdgeFromTransition("Ship", "Shipped"),
+                ListPlaceNode("Shipped", int),
+            ]),
+            service_times={"Serve": Distributions.exponential(1.0), "Ship": Distributions.exponential(5.0)},
+            arrivals={"Receive": Distributions.exponential(0.2)},
+            servers={"Serve": 5},
+        )
+        report = simulation.run(horizon=500, replications=10, seed=2)
+        assert report.places["Done"].max_tokens.mean <= 2
+        assert report.transitions["Serve"].utilisation.mean <= 0.4  # At most two of the five servers can be busy.
+
+    def test_max_tokens_are_measured_after_the_warm_up(self):
+        simulation = StochasticSimulation(
+            ExecutableGraphOperations.construct_graph([
+                FunctionTransitionNode("Receive", _receive),
+                ReturnedEdgeFromTransition("Receive", "Queue"),
+                ListPlaceNode("Queue", int, [0] * 10),
+                ArgumentEdgeToTransition("Queue", "Serve", "job"),
+                FunctionTransitionNode("Serve", _serve),
+                ReturnedEdgeFromTransition("Serve", "Done"),
+                ListPlaceNode("Done", int),
+            ]),
+            service_times={"Serve": Distributions.deterministic(1.0)},
+            arrivals={"Receive": Distributions.deterministic(100.0)},
+        )
+        assert simulation.run(horizon=50, replications=2, seed=0).places["Queue"].max_tokens.mean == 10
+        report = simulation.run(horizon=50, replications=2, seed=0, warm_up=20)
+        assert report.places["Queue"].max_tokens.mean == 0
+        assert report.places["Done"].max_tokens.mean == 10
+
+    def test_routing_probabilities(self):
+        simulation = StochasticSimulation(
+            _station(route=True),
+            arrivals={"Receive": Distributions.exponential(1.0)},
+            routing={"Serve": {"Done": 3, "Rework": 1}},
+        )
+        report = simulation.run(horizon=2_000, replications=10, seed=5)
+        done = report.places["Done"].mean_tokens.mean
+        rework = report.places["Rework"].mean_tokens.mean
+        assert done / rework == pytest.approx(3.0, rel=0.1)
+        assert report.transitions["Serve"].utilisation.mean == 0  # Immediate.
+        assert report.places["Queue"].mean_tokens.mean == 0
+
+    def test_no_completed_tokens_gives_nan_cycle_time(self):
+        simulation = StochasticSimulation(
+            _station(),
+            service_times={"Serve": Distributions.deterministic(100.0)},
+            arrivals={"Receive": Distributions.deterministic(1.0)},
+        )
+        assert math.isnan(simulation.run(horizon=10, replications=3, seed=0).cycle_time.mean)
+
+    def test_validation(self):
+        with pytest.raises(ValueError, match="needs an arrival process"):
+            StochasticSimulation(_station())
+        with pytest.raises(ValueError, match="Unknown transitions"):
+            StochasticSimulation(_station(), arrivals={"Receive": Distributions.exponential(1.0), "Missing": None})
+        with pytest.raises(ValueError, match="cannot have an arrival process"):
+            StochasticSimulation(_station(), arrivals={
+                "Receive": Distributions.exponential(1.0), "Serve": Distributions.exponential(1.0),
+            })
+        with pytest.raises(ValueError, match="warm_up"):
+            _mm1(0.5).run(horizon=10, warm_up=10)
@@ -0,0 +1,114 @@
+"""Tests for ``SourceTransitionNode``, a transition that emits the items of a sync or async iterator.
+
+Covers lazy pulling from sync iterators, waiting for async items, and the incremental selectors seeing items that
+arrive while the net runs.
+"""
+
+import asyncio
+
+import pytest
+
+from petritype.core.executable_graph_components import (
+    ArgumentEdgeToTransition,
+    ExecutableGraphOperations,
+    FunctionTransitionNode,
+    ListPlaceNode,
+    ReturnedEdgeFromTransition,
+    SourceTransitionNode,
+)
+from petritype.core.transition_selectors import GuardSelector, PriorityQueueSelector
+
+
+def _source_graph(source, prefetch: int = 1):
+    """``Read`` emits the source items into ``Raw``; ``Double`` writes twice each item to ``Doubled``."""
+    return ExecutableGraphOperations.construct_graph([
+        SourceTransitionNode("Read", source, prefetch),
+        ReturnedEdgeFromTransition("Read", "Raw"),
+        ListPlaceNode("Raw", int),
+        ArgumentEdgeToTransition("Raw", "Double", "x"),
+        FunctionTransitionNode("Double", lambda x: 2 * x),
+        ReturnedEdgeFromTransition("Double", "Doubled"),
+        ListPlaceNode("Doubled", int),
+    ])
+
+
+def _run(graph, max_transitions=100, selector=None):
+    return asyncio.run(ExecutableGraphOperations.execute_graph(
+        graph, max_transitions=max_transitions, transition_selector=selector,
+    ))
+
+
+async def _numbers(count: int, delay: float = 0.0):
+    for i in range(count):
+        await asyncio.sleep(delay)
+        yield i
+
+
+class TestSyncSource:
+
+    def test_emits_every_item_then_is_disabled(self):
+        graph, fired = _run(_source_graph(iter([1, 2, 3])))
+        assert fired == 6
+        assert graph.fired_counts == {"Read": 3, "Double": 3}
+        assert sorted(graph.place_named("Doubled").tokens) == [2, 4, 6]
+
+    def test_items_are_pulled_lazily(self):
+        pulled = []
+
+        def numbers():
+            for i in range(100):
+                pulled.append(i)
+                yield i
+
+        graph, fired = _run(_source_graph(numbers(), prefetch=2), max_transitions=3)
+        assert fired == 3
+        assert len(pulled) <= 4
+
+    def test_empty_source_is_never_enabled(self):
+        graph, fired = _run(_source_graph([]))
+        assert fired == 0
+
+    def test_rejects_invalid_prefetch(self):
+        with pytest.raises(ValueError, match="at least 1"):
+            SourceTransitionNode("Read", [1], 0)
+
+
+class TestAsyncSource:
+
+    def test_waits_for_slow_items(self):
+        graph, fired = _run(_source_graph(_numbers(4, delay=0.001)))
+        assert fired == 8
+        assert sorted(graph.place_named("Doubled").tokens) == [0, 2, 4, 6]
+
+    def test_error_in_source_is_raised(self):
+        async def failing():
+            yield 1
+            raise RuntimeError("source failed")
+
+        with pytest.raises(RuntimeError, match="source failed"):
+            _run(_source_graph(failing()))
+
+    @pytest.mark.parametrize("selector_type", [PriorityQueueSelector, GuardSelector])
+    def test_works_with_incremental_selectors(self, selector_type):
+        graph, fired = _run(_source_graph(_numbers(5, delay=0.001), prefetch=2), selector=selector_type())
+        assert fired == 10
+        assert sorted(graph.place_named("Doubled").tokens) == [0, 2, 4, 6, 8]
+
+    def test_incremental_selectors_see_items_that_arrive_while_the_net_is_busy(self):
+        """``Spin`` is always enabled, so the selector never rebuilds; ``Read`` must be re-checked when items arrive."""
+        async def spin(x: int) -> int:
+            await asyncio.sleep(0)
+            return x
+
+        graph = ExecutableGraphOperations.construct_graph([
+            SourceTransitionNode("Read", _numbers(3)),
+            ReturnedEdgeFromTransition("Read", "Raw"),
+            ListPlaceNode("Raw", int),
+            ListPlaceNode("Loop", int, [0]),
+            ArgumentEdgeToTransition("Loop", "Spin", "x"),
+            FunctionTransitionNode("Spin", spin),
+            ReturnedEdgeFromTransition("Spin", "Loop"),
+        ])
+        _run(graph, max_transitions=50, selector=PriorityQueueSelector(priorities={"Read": 10.0}))
+        assert graph.fired_counts["Read"] == 3
+        assert graph.place_named("Raw").tokens == [0, 1, 2]
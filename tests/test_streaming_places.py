@@ -0,0 +1,173 @@
+"""Tests for streaming sink places consumed with ``async for token in graph.stream(...)``."""
+
+import asyncio
+
+import pytest
+
+from petritype.core.executable_graph_components import (
+    ArgumentEdgeToTransition,
+    ExecutableGraphOperations,
+    FunctionTransitionNode,
+    ListPlaceNode,
+    ReturnedEdgeFromTransition,
+)
+from petritype.core.transition_selectors import PriorityQueueSelector
+
+
+def _streaming_graph(initial_tokens: list[int], capacity=None):
+    """``Input -> Inc -> Output`` where ``Output`` is a streaming sink."""
+    return ExecutableGraphOperations.construct_graph([
+        ListPlaceNode("Input", int, list(initial_tokens)),
+        ArgumentEdgeToTransition("Input", "Inc", "x"),
+        FunctionTransitionNode("Inc", lambda x: x + 1),
+        ReturnedEdgeFromTransition("Inc", "Output"),
+        ListPlaceNode("Output", int, capacity=capacity, streaming=True),
+    ])
+
+
+async def _consume(stream, received: list, graph=None, steps: list = None):
+    async for token in stream:
+        received.append(token)
+        if steps is not None:
+            steps.append(graph.step_count)
+
+
+class TestStreaming:
+
+    def test_tokens_are_handed_off_instead_of_accumulating(self):
+        async def scenario():
+            graph = _streaming_graph([1, 2, 3])
+            received = []
+            consumer = asyncio.create_task(_consume(graph.stream("Output"), received))
+            await ExecutableGraphOperations.execute_graph(graph, max_transitions=3)
+            graph.close_streams()
+            await consumer
+            return graph, received
+
+        graph, received = asyncio.run(scenario())
+        assert received == [4, 3, 2]
+        assert graph.place_named("Output").tokens == []
+
+    def test_consumer_receives_each_token_before_the_next_fire(self):
+        """Delivery does not wait for ``execute_graph`` to return."""
+        async def scenario():
+            graph = _streaming_graph([1, 2, 3])
+            received, steps = [], []
+            consumer = asyncio.create_task(_consume(graph.stream("Output"), received, graph, steps))
+            await ExecutableGraphOperations.execute_graph(graph, max_transitions=3)
+            graph.close_streams()
+            await consumer
+            return steps
+
+        assert asyncio.run(scenario()) == [1, 2, 3]
+
+    def test_tokens_produced_before_subscribing_are_delivered(self):
+        async def scenario():
+            graph = _streaming_graph([1])
+            await ExecutableGraphOperations.execute_graph(graph, max_transitions=1)
+            assert graph.place_named("Output").tokens == [2]
+            stream = graph.stream("Output")
+            stream.close()
+            return [token async for token in stream]
+
+        assert asyncio.run(scenario()) == [2]
+
+    def test_every_subscriber_receives_every_token(self):
+        async def scenario():
+            graph = _streaming_graph([1, 2])
+            first, second = [], []
+            consumers = [
+                asyncio.create_task(_consume(graph.stream("Output"), first)),
+                asyncio.create_task(_consume(graph.stream("Output"), second)),
+            ]
+            await ExecutableGraphOperations.execute_graph(graph, max_transitions=2)
+            graph.close_streams()
+            await asyncio.gather(*consumers)
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        assert first == second == [3, 2]
+
+    def test_streaming_requires_streaming_place(self):
+        graph = _streaming_graph([])
+        with pytest.raises(ValueError, match="not a streaming place"):
+            graph.stream("Input")
+
+    def test_rejects_invalid_maxsize(self):
+        graph = _streaming_graph([])
+        with pytest.raises(ValueError, match="at least 1"):
+            graph.stream("Output", maxsize=0)
+
+
+class TestStreamBackpressure:
+
+    @staticmethod
+    def _run_with_slow_consumer(selector=None):
+        """20 tokens through a streaming place of capacity 2, read by a consumer that buffers at most 3."""
+        async def scenario():
+            graph = _streaming_graph(range(20), capacity=2)
+            output = graph.place_named("Output")
+            stream = graph.stream("Output", maxsize=3)
+            received, buffered, held_back = [], [], []
+
+            async def consume():
+                async for token in stream:
+                    received.append(token)
+                    buffered.append(stream.maxsize - stream.room())
+                    held_back.append(len(output.tokens))
+                    for _ in range(5):
+                        await asyncio.sleep(0)
+
+            consumer = asyncio.create_task(consume())
+            _, fired = await ExecutableGraphOperations.execute_graph(
+                graph, max_transitions=None, transition_selector=selector,
+            )
+            graph.close_streams()
+            await consumer
+            return fired, received, buffered, held_back
+
+        return asyncio.run(scenario())
+
+    def test_the_net_waits_for_a_slow_consumer(self):
+        fired, received, buffered, held_back = self._run_with_slow_consumer()
+        assert fired == 20
+        assert sorted(received) == list(range(1, 21))
+        assert max(buffered) == 3 and 1 <= max(held_back) <= 2
+
+    def test_incremental_selectors_see_the_room_made_by_the_consumer(self):
+        """``Spin`` keeps the net busy, so the selector must learn from the stream that ``Inc`` can fire again."""
+        async def spin(x: int) -> int:
+            await asyncio.sleep(0)
+            return x
+
+        async def scenario():
+            graph = ExecutableGraphOperations.construct_graph([
+                ListPlaceNode("Input", int, list(range(20))),
+                ArgumentEdgeToTransition("Input", "Inc", "x"),
+                FunctionTransitionNode("Inc", lambda x: x + 1),
+                ReturnedEdgeFromTransition("Inc", "Output"),
+                ListPlaceNode("Output", int, capacity=2, streaming=True),
+                ListPlaceNode("Loop", int, [0]),
+                ArgumentEdgeToTransition("Loop", "Spin", "x"),
+                FunctionTransitionNode("Spin", spin),
+                ReturnedEdgeFromTransition("Spin", "Loop"),
+            ])
+            stream, received = graph.stream("Output", maxsize=1), []
+
+            async def consume_slowly():
+                async for token in stream:
+                    received.append(token)
+                    for _ in range(5):
+                        await asyncio.sleep(0)
+
+            consumer = asyncio.create_task(consume_slowly())
+            await ExecutableGraphOperations.execute_graph(
+                graph, max_transitions=200, transition_selector=PriorityQueueSelector(priorities={"Inc": 10.0}),
+            )
+            graph.close_streams()
+            await consumer
+            return graph, received
+
+        graph, received = asyncio.run(scenario())
+        assert graph.fired_counts["Inc"] == 20
+        assert sorted(received) == list(range(1, 21))
@@ -0,0 +1,115 @@
+"""Tests for the ``structural_check`` of ``construct_graph``, which finds transitions that can never fire.
+
+``_nodes`` builds a net with a branch that can never fire, which is then found, warned about or pruned.
+"""
+
+import asyncio
+
+import pytest
+
+from petritype.core.executable_graph_components import (
+    ArgumentEdgeToTransition,
+    ExecutableGraphCheck,
+    ExecutableGraphOperations,
+    FunctionTransitionNode,
+    ListPlaceNode,
+    ReturnedEdgeFromTransition,
+)
+from petritype.core.clock import VirtualClock
+from petritype.core.guards import PlaceCount
+from petritype.core.transition_selectors import RoundRobinSelector
+
+
+def _increment(x: int) -> int:
+    return x + 1
+
+
+def _combine(x: int, y: int) -> int:
+    return x + y
+
+
+def _seed() -> int:
+    return 0
+
+
+def _nodes(guard=None):
+    """``Live`` feeds ``Step``; ``Orphan`` has no tokens and no producer, so ``Join`` and ``After`` never fire."""
+    return [
+        ListPlaceNode("Live", int, [1, 2]),
+        ArgumentEdgeToTransition("Live", "Step", "x"),
+        FunctionTransitionNode("Step", _increment, activation_function=guard),
+        ReturnedEdgeFromTransition("Step", "Done"),
+        ListPlaceNode("Done", int),
+        ListPlaceNode("Orphan", int),
+        ArgumentEdgeToTransition("Orphan", "Join", "x"),
+        ArgumentEdgeToTransition("Done", "Join", "y"),
+        FunctionTransitionNode("Join", _combine),
+        ReturnedEdgeFromTransition("Join", "Joined"),
+        ListPlaceNode("Joined", int),
+        ArgumentEdgeToTransition("Joined", "After", "x"),
+        FunctionTransitionNode("After", _increment),
+        ReturnedEdgeFromTransition("After", "Final"),
+        ListPlaceNode("Final", int),
+    ]
+
+
+class TestStructuralCheck:
+
+    def test_unreachable_nodes(self):
+        graph = ExecutableGraphOperations.construct_graph(_nodes())
+        dead_transitions, unreachable_places = ExecutableGraphCheck.unreachable_nodes(graph)
+        assert dead_transitions == {"Join", "After"}
+        assert unreachable_places == {"Orphan", "Joined", "Final"}
+
+    def test_transitions_without_inputs_are_live(self):
+        graph = ExecutableGraphOperations.construct_graph([
+            FunctionTransitionNode("Seed", _seed),
+            ReturnedEdgeFromTransition("Seed", "Numbers"),
+            ListPlaceNode("Numbers", int),
+            ArgumentEdgeToTransition("Numbers", "Step", "x"),
+            FunctionTransitionNode("Step", _increment),
+            ReturnedEdgeFromTransition("Step", "Numbers"),
+        ])
+        assert ExecutableGraphCheck.unreachable_nodes(graph) == (frozenset(), frozenset())
+
+    def test_no_check_by_default(self):
+        graph = ExecutableGraphOperations.construct_graph(_nodes())
+        assert len(graph.transitions) == 3
+
+    def test_warn(self):
+        with pytest.warns(UserWarning, match=r"never fire: \['After', 'Join'\]"):
+            graph = ExecutableGraphOperations.construct_graph(_nodes(), structural_check="warn")
+        assert len(graph.transitions) == 3
+
+    def test_prune(self):
+        graph = ExecutableGraphOperations.construct_graph(_nodes(), structural_check="prune")
+        assert [transition.name for transition in graph.transitions] == ["Step"]
+        assert [place.name for place in graph.places] == ["Live", "Done"]
+        assert [edge.transition_node_name for edge in graph.argument_edges] == ["Step"]
+        asyncio.run(ExecutableGraphOperations.execute_graph(graph, max_transitions=10))
+        assert sorted(graph.place_named("Done").tokens) == [2, 3]
+
+    def test_prune_keeps_the_state_of_a_running_graph(self):
+        graph = ExecutableGraphOperations.construct_graph(_nodes())
+        graph.transition_selector = RoundRobinSelector()
+        graph.clock = VirtualClock(start=5.0)
+        asyncio.run(ExecutableGraphOperations.execute_graph(graph, max_transitions=1, transition_history_length=10))
+        pruned = ExecutableGraphOperations.apply_structural_check(graph, "prune")
+        assert [transition.name for transition in pruned.transitions] == ["Step"]
+        assert pruned.transition_selector is graph.transition_selector and pruned.clock is graph.clock
+        assert pruned.step_count == 1 and pruned.fired_counts == {"Step": 1}
+        assert [transition.name for transition in pruned.transition_history] == ["Step"]
+        asyncio.run(ExecutableGraphOperations.execute_graph(pruned, max_transitions=10))
+        assert pruned.step_count == 2 and graph.fired_counts == {"Step": 1}
+
+    def test_prune_keeps_places_counted_by_live_guards(self):
+        graph = ExecutableGraphOperations.construct_graph(
+            _nodes(guard=PlaceCount("Final") == 0), structural_check="prune",
+        )
+        assert [place.name for place in graph.places] == ["Live", "Done", "Final"]
+        asyncio.run(ExecutableGraphOperations.execute_graph(graph, max_transitions=10))
+        assert sorted(graph.place_named("Done").tokens) == [2, 3]
+
+    def test_unknown_mode(self):
+        with pytest.raises(ValueError, match="Unexpected structural check"):
+            ExecutableGraphOperations.construct_graph(_nodes(), structural_check="drop")
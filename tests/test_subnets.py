@@ -0,0 +1,212 @@
+"""Tests for ``SubnetTransitionNode``, which embeds a net in another and is flattened by ``construct_graph``.
+
+Covers name prefixing and boundary checks when flattening, and execution of nested and repeatedly embedded subnets.
+"""
+
+import asyncio
+
+import pytest
+
+from petritype.core.executable_graph_components import (
+    ArgumentEdgeToTransition,
+    ExecutableGraphOperations,
+    FunctionTransitionNode,
+    ListPlaceNode,
+    RenamedDistribution,
+    ReturnedEdgeFromTransition,
+    SourceTransitionNode,
+    SubnetTransitionNode,
+)
+from petritype.core.guards import PlaceCount
+
+
+def _double(x: int) -> int:
+    return 2 * x
+
+
+def _increment(x: int) -> int:
+    return x + 1
+
+
+def _to_text(x: int) -> str:
+    return str(x)
+
+
+def _parity(x: int) -> int:
+    return x
+
+
+def _route_parity(x: int) -> dict[str, int]:
+    return {"Even": x} if x % 2 == 0 else {"Odd": x}
+
+
+def _double_then_increment():
+    """``In -> Double -> Middle -> Increment -> Out``."""
+    return ExecutableGraphOperations.construct_graph([
+        ListPlaceNode("In", int),
+        ArgumentEdgeToTransition("In", "Double", "x"),
+        FunctionTransitionNode("Double", _double),
+        ReturnedEdgeFromTransition("Double", "Middle"),
+        ListPlaceNode("Middle", int),
+        ArgumentEdgeToTransition("Middle", "Increment", "x"),
+        FunctionTransitionNode("Increment", _increment),
+        ReturnedEdgeFromTransition("Increment", "Out"),
+        ListPlaceNode("Out", int),
+    ])
+
+
+def _parent(subnet: SubnetTransitionNode, tokens: list[int]):
+    return ExecutableGraphOperations.construct_graph([
+        ListPlaceNode("Numbers", int, list(tokens)),
+        subnet,
+        ListPlaceNode("Results", int),
+    ])
+
+
+def _transition_named(graph, name: str) -> FunctionTransitionNode:
+    return next(transition for transition in graph.transitions if transition.name == name)
+
+
+def _run(graph, max_transitions: int = 100):
+    asyncio.run(ExecutableGraphOperations.execute_graph(graph, max_transitions=max_transitions))
+    return graph
+
+
+class TestFlattening:
+
+    def test_inner_nodes_are_prefixed_and_boundary_places_replaced(self):
+        subnet = SubnetTransitionNode("Step", _double_then_increment(), {"In": "Numbers", "Out": "Results"})
+        graph = _parent(subnet, [])
+        assert sorted(place.name for place in graph.places) == ["Numbers", "Results", "Step.Middle"]
+        assert sorted(transition.name for transition in graph.transitions) == ["Step.Double", "Step.Increment"]
+        assert sorted((edge.place_node_name, edge.transition_node_name) for edge in graph.argument_edges) == [
+            ("Numbers", "Step.Double"), ("Step.Middle", "Step.Increment"),
+        ]
+        assert sorted((edge.transition_node_name, edge.place_node_name) for edge in graph.return_edges) == [
+            ("Step.Double", "Step.Middle"), ("Step.Increment", "Results"),
+        ]
+
+    def test_the_embedded_graph_is_not_modified(self):
+        inner = _double_then_increment()
+        inner.place_named("Middle").tokens.append(5)
+        graph = _parent(SubnetTransitionNode("Step", inner, {"In": "Numbers", "Out": "Results"}), [])
+        graph.place_named("Step.Middle").tokens.clear()
+        assert inner.place_named("Middle").tokens == [5]
+        assert [place.name for place in inner.places] == ["In", "Middle", "Out"]
+
+    def test_unknown_boundary_place(self):
+        with pytest.raises(ValueError, match="maps places it does not have"):
+            SubnetTransitionNode("Step", _double_then_increment(), {"Input": "Numbers"})
+
+    def test_boundary_places_must_be_empty(self):
+        inner = _double_then_increment()
+        inner.place_named("In").tokens.append(1)
+        with pytest.raises(ValueError, match="must be empty"):
+            SubnetTransitionNode("Step", inner, {"In": "Numbers"})
+
+    def test_boundary_types_are_checked_against_the_parent(self):
+        subnet = SubnetTransitionNode("Step", _double_then_increment(), {"In": "Numbers", "Out": "Results"})
+        with pytest.raises(TypeError, match="Step.Double"):
+            ExecutableGraphOperations.construct_graph([
+                ListPlaceNode("Numbers", str),
+                subnet,
+                ListPlaceNode("Results", int),
+            ])
+
+
+class TestExecution:
+
+    def test_tokens_flow_through_the_subnet(self):
+        subnet = SubnetTransitionNode("Step", _double_then_increment(), {"In": "Numbers", "Out": "Results"})
+        graph = _run(_parent(subnet, [1, 2, 3]))
+        assert sorted(graph.place_named("Results").tokens) == [3, 5, 7]
+        assert graph.step_count == 6
+
+    def test_same_subnet_embedded_twice(self):
+        inner = _double_then_increment()
+        graph = ExecutableGraphOperations.construct_graph([
+            ListPlaceNode("Numbers", int, [1]),
+            SubnetTransitionNode("First", inner, {"In": "Numbers", "Out": "Between"}),
+            ListPlaceNode("Between", int),
+            SubnetTransitionNode("Second", inner, {"In": "Between", "Out": "Results"}),
+            ListPlaceNode("Results", int),
+        ])
+        assert graph.place_named("Results").tokens == []
+        assert _run(graph).place_named("Results").tokens == [7]
+
+    def test_source_subnet_embedded_twice(self):
+        reader = ExecutableGraphOperations.construct_graph([
+            SourceTransitionNode("Read", [1, 2, 3]),
+            ReturnedEdgeFromTransition("Read", "Out"),
+            ListPlaceNode("Out", int),
+        ])
+        graph = _run(ExecutableGraphOperations.construct_graph([
+            SubnetTransitionNode("A", reader, {"Out": "A"}),
+            ListPlaceNode("A", int),
+            SubnetTransitionNode("B", reader, {"Out": "B"}),
+            ListPlaceNode("B", int),
+        ]))
+        assert sorted(graph.place_named("A").tokens) == [1, 2, 3]
+        assert sorted(graph.place_named("B").tokens) == [1, 2, 3]
+        assert _transition_named(graph, "A.Read") is not _transition_named(graph, "B.Read")
+
+    def test_nested_subnets(self):
+        middle = ExecutableGraphOperations.construct_graph([
+            ListPlaceNode("Start", int),
+            SubnetTransitionNode("Inner", _double_then_increment(), {"In": "Start", "Out": "Doubled"}),
+            ListPlaceNode("Doubled", int),
+            ArgumentEdgeToTransition("Doubled", "Text", "x"),
+            FunctionTransitionNode("Text", _to_text),
+            ReturnedEdgeFromTransition("Text", "End"),
+            ListPlaceNode("End", str),
+        ])
+        graph = ExecutableGraphOperations.construct_graph([
+            ListPlaceNode("Numbers", int, [4]),
+            SubnetTransitionNode("Outer", middle, {"Start": "Numbers", "End": "Texts"}),
+            ListPlaceNode("Texts", str),
+        ])
+        assert "Outer.Inner.Double" in {transition.name for transition in graph.transitions}
+        assert _run(graph).place_named("Texts").tokens == ["9"]
+
+    def test_output_distribution_uses_the_flattened_names(self):
+        inner = ExecutableGraphOperations.construct_graph([
+            ListPlaceNode("In", int),
+            ArgumentEdgeToTransition("In", "Split", "x"),
+            FunctionTransitionNode(
+                "Split", _parity, output_distribution_function=_route_parity, distribution_places={"Even", "Odd"},
+            ),
+            ReturnedEdgeFromTransition("Split", "Even"),
+            ReturnedEdgeFromTransition("Split", "Odd"),
+            ListPlaceNode("Even", int),
+            ListPlaceNode("Odd", int),
+        ])
+        graph = ExecutableGraphOperations.construct_graph([
+            ListPlaceNode("Numbers", int, [1, 2, 3]),
+            SubnetTransitionNode("Parity", inner, {"In": "Numbers", "Even": "Evens"}),
+            ListPlaceNode("Evens", int),
+        ])
+        split = _transition_named(graph, "Parity.Split")
+        assert isinstance(split.output_distribution_function, RenamedDistribution)
+        assert split.distribution_places == frozenset({"Evens", "Parity.Odd"})
+        _run(graph)
+        assert graph.place_named("Evens").tokens == [2]
+        assert sorted(graph.place_named("Parity.Odd").tokens) == [1, 3]
+
+    def test_guards_use_the_flattened_names(self):
+        inner = ExecutableGraphOperations.construct_graph([
+            ListPlaceNode("In", int),
+            ArgumentEdgeToTransition("In", "Double", "x"),
+            FunctionTransitionNode("Double", _double),
+            ReturnedEdgeFromTransition("Double", "Waiting"),
+            ListPlaceNode("Waiting", int),
+            ArgumentEdgeToTransition("Waiting", "Release", "x"),
+            FunctionTransitionNode("Release", _increment, activation_function=PlaceCount("Waiting") >= 2),
+            ReturnedEdgeFromTransition("Release", "Out"),
+            ListPlaceNode("Out", int),
+        ])
+        graph = _parent(SubnetTransitionNode("Step", inner, {"In": "Numbers", "Out": "Results"}), [1])
+        guard = _transition_named(graph, "Step.Release").activation_function
+        assert guard.clauses[0].place_name == "Step.Waiting"
+        assert guard(graph) is False
+        graph.place_named("Step.Waiting").tokens.extend([10, 20])
+        assert guard(graph) is True
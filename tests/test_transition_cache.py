@@ -0,0 +1,253 @@
+"""Tests for ``TransitionCache``, which memoises transitions on a fingerprint of their inputs.
+
+Covers hits, eviction, expiry and disk persistence of the cache, which arguments and bound state make a key, and
+the cache's use by the engine.
+"""
+
+import asyncio
+import functools
+import gc
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+import types
+from pathlib import Path
+
+from petritype.core import transition_cache
+from petritype.core.executable_graph_components import (
+    ArgumentEdgeToTransition,
+    ExecutableGraphOperations,
+    FunctionTransitionNode,
+    ListPlaceNode,
+    ReturnedEdgeFromTransition,
+)
+from petritype.core.transition_cache import TransitionCache
+
+
+_calls: list[int] = []
+
+
+def _square(x: int) -> int:
+    _calls.append(x)
+    return x * x
+
+
+def _range(n: int) -> list[int]:
+    _calls.append(n)
+    return list(range(n))
+
+
+def _identity(x: object) -> object:
+    _calls.append(x)
+    return x
+
+
+def _scale(x: int, factor: int) -> int:
+    _calls.append(x)
+    return x * factor
+
+
+class _Multiplier:
+
+    def __init__(self, factor: int):
+        self.factor = factor
+
+    def __call__(self, x: int) -> int:
+        _calls.append(x)
+        return x * self.factor
+
+    def apply(self, x: int) -> int:
+        return self(x)
+
+
+async def _async_square(x: int) -> int:
+    _calls.append(x)
+    return x * x
+
+
+def _squaring_net(tokens: list[int], cache: TransitionCache):
+    return ExecutableGraphOperations.construct_graph([
+        ListPlaceNode("Input", int, list(tokens)),
+        ArgumentEdgeToTransition("Input", "Square", "x"),
+        FunctionTransitionNode("Square", _square, cache=cache),
+        ReturnedEdgeFromTransition("Square", "Output"),
+        ListPlaceNode("Output", int),
+    ])
+
+
+def _call(cache: TransitionCache, function, **kwargs):
+    return asyncio.run(cache.call(function, kwargs))
+
+
+_HASH_SEED_SCRIPT = textwrap.dedent("""
+    import asyncio, sys
+    from petritype.core.transition_cache import TransitionCache
+
+    def count_tags(tags, groups):
+        return len(tags) + len(groups)
+
+    cache = TransitionCache(directory=sys.argv[1])
+    kwargs = {"tags": frozenset(f"tag-{i}" for i in range(20)), "groups": [{"a", "b", "c"}, ("x", {"y", "z"})]}
+    asyncio.run(cache.call(count_tags, kwargs))
+    print(cache.fingerprint(count_tags, kwargs), cache.stats().disk_hits)
+""")
+
+
+def _run_with_hash_seed(script: Path, seed: int, *args) -> list[str]:
+    """Run ``script`` in a new interpreter with the given ``PYTHONHASHSEED`` and return the words it prints."""
+    env = {**os.environ, "PYTHONHASHSEED": str(seed), "PYTHONPATH": str(Path(__file__).resolve().parents[1])}
+    result = subprocess.run(
+        [sys.executable, str(script), *map(str, args)], env=env, capture_output=True, text=True, check=True,
+    )
+    return result.stdout.split()
+
+
+class TestTransitionCache:
+
+    def setup_method(self):
+        _calls.clear()
+
+    def test_hit_skips_the_function(self):
+        cache = TransitionCache()
+        assert [_call(cache, _square, x=x) for x in (2, 3, 2, 2)] == [4, 9, 4, 4]
+        assert _calls == [2, 3]
+        stats = cache.stats()
+        assert (stats.hits, stats.misses, stats.entries) == (2, 2, 2)
+
+    def test_async_functions_are_cached(self):
+        cache = TransitionCache()
+        assert _call(cache, _async_square, x=4) == 16
+        assert _call(cache, _async_square, x=4) == 16
+        assert _calls == [4]
+
+    def test_functions_do_not_share_entries(self):
+        cache = TransitionCache()
+        _call(cache, _square, x=3)
+        _call(cache, _async_square, x=3)
+        assert _calls == [3, 3]
+
+    def test_hits_return_fresh_copies(self):
+        cache = TransitionCache()
+        first = _call(cache, _range, n=3)
+        first.append(99)
+        assert _call(cache, _range, n=3) == [0, 1, 2]
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = TransitionCache(max_entries=2)
+        _call(cache, _square, x=1)
+        _call(cache, _square, x=2)
+        _call(cache, _square, x=1)
+        _call(cache, _square, x=3)  # Evicts 2, the least recently used.
+        _call(cache, _square, x=1)
+        _call(cache, _square, x=2)
+        assert _calls == [1, 2, 3, 2]
+        assert cache.stats().evictions == 2
+
+    def test_size_accounting(self):
+        cache = TransitionCache(max_entries=None, max_bytes=200)
+        _call(cache, _range, n=10)
+        one_entry = cache.stats().bytes
+        assert 0 < one_entry <= 200
+        for n in range(11, 20):
+            _call(cache, _range, n=n)
+        stats = cache.stats()
+        assert stats.bytes <= 200 and stats.evictions > 0
+        _call(cache, _range, n=1000)  # Larger than max_bytes on its own: not kept.
+        assert cache.stats().bytes <= 200
+
+    def test_entries_expire(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(transition_cache, "time", types.SimpleNamespace(time=lambda: now[0]))
+        cache = TransitionCache(ttl=10)
+        _call(cache, _square, x=5)
+        now[0] += 5
+        _call(cache, _square, x=5)
+        now[0] += 10
+        _call(cache, _square, x=5)
+        assert _calls == [5, 5]
+        assert cache.stats().expirations == 1
+
+    def test_entries_persist_on_disk(self, tmp_path):
+        _call(TransitionCache(directory=tmp_path), _square, x=7)
+        cache = TransitionCache(directory=tmp_path)
+        assert _call(cache, _square, x=7) == 49
+        assert _calls == [7]
+        assert cache.stats().disk_hits == 1
+        cache.clear(disk=True)
+        _call(cache, _square, x=7)
+        assert _calls == [7, 7]
+        assert not list(tmp_path.glob("*/*.tmp"))
+
+    def test_keys_of_sets_do_not_depend_on_the_hash_seed(self, tmp_path):
+        script = tmp_path / "count_tags.py"
+        script.write_text(_HASH_SEED_SCRIPT)
+        first_key, first_disk_hits = _run_with_hash_seed(script, 1, tmp_path / "cache")
+        second_key, second_disk_hits = _run_with_hash_seed(script, 2, tmp_path / "cache")
+        assert first_key == second_key
+        assert (first_disk_hits, second_disk_hits) == ("0", "1")
+
+    def test_unpicklable_arguments_are_not_cached(self):
+        cache = TransitionCache()
+        assert cache.fingerprint(_identity, {"x": threading.Lock()}) is None
+        _call(cache, _identity, x=threading.Lock())
+        _call(cache, _identity, x=threading.Lock())
+        assert len(_calls) == 2
+        assert cache.stats().uncacheable == 2 and cache.stats().entries == 0
+
+    def test_bound_state_is_part_of_the_key(self):
+        cache = TransitionCache()
+        assert _call(cache, functools.partial(_scale, factor=2), x=3) == 6
+        assert _call(cache, functools.partial(_scale, factor=10), x=3) == 30
+        assert _call(cache, _Multiplier(2), x=3) == 6
+        assert _call(cache, _Multiplier(7), x=3) == 21
+        assert _call(cache, _Multiplier(7).apply, x=3) == 21
+        assert _call(cache, _Multiplier(5).apply, x=3) == 15
+        assert _call(cache, functools.partial(_scale, factor=10), x=3) == 30
+        assert cache.stats().hits == 1 and cache.stats().misses == 6
+
+    def test_unpicklable_bound_state_is_not_cached(self):
+        cache = TransitionCache()
+        multiplier = _Multiplier(2)
+        multiplier.lock = threading.Lock()
+        assert cache.fingerprint(multiplier, {"x": 1}) is None
+        assert cache.fingerprint(functools.partial(_scale, factor=threading.Lock()), {"x": 1}) is None
+
+    def test_functions_are_not_kept_alive(self):
+        def make_closure():
+            def closure(x: int) -> int:
+                return x
+            return closure
+
+        closure = make_closure()
+        TransitionCache().fingerprint(closure, {"x": 1})
+        table = transition_cache._descriptions[transition_cache.code_description]
+        assert closure in table
+        count = len(table)
+        del closure
+        gc.collect()
+        assert len(table) == count - 1
+
+
+class TestCachedTransitions:
+
+    def setup_method(self):
+        _calls.clear()
+
+    def test_engine_uses_the_cache(self):
+        cache = TransitionCache()
+        graph = _squaring_net([3, 3, 4], cache)
+        asyncio.run(ExecutableGraphOperations.execute_graph(graph, max_transitions=3))
+        assert sorted(graph.place_named("Output").tokens) == [9, 9, 16]
+        assert sorted(_calls) == [3, 4]
+        assert cache.stats().hits == 1
+
+    def test_instantiated_graphs_share_the_cache(self):
+        cache = TransitionCache()
+        spec = ExecutableGraphOperations.graph_spec(_squaring_net([], cache))
+        for _ in range(3):
+            graph = ExecutableGraphOperations.instantiate_graph(spec, {"Input": [6]})
+            asyncio.run(ExecutableGraphOperations.execute_graph(graph, max_transitions=1))
+            assert graph.place_named("Output").tokens == [36]
+        assert _calls == [6]
@@ -0,0 +1,352 @@
+"""Tests for the built-in stateful selectors in ``petritype.core.transition_selectors``.
+
+Each selector has its own test class. The priority queue tests also check that only the transitions affected by a
+fire are re-evaluated, and that tokens added between or during calls are seen.
+"""
+
+import asyncio
+import gc
+import weakref
+
+import pytest
+from pydantic import BaseModel
+
+from petritype.core.executable_graph_components import (
+    ArgumentEdgeToTransition,
+    ExecutableGraphOperations,
+    FunctionTransitionNode,
+    ListPlaceNode,
+    ReturnedEdgeFromTransition,
+)
+from petritype.core import transition_selectors
+from petritype.core.transition_selectors import (
+    ActivationFunctionCall,
+    BottleneckAwareSelector,
+    EarliestDeadlineSelector,
+    PriorityQueueSelector,
+    RandomSelector,
+    RoundRobinSelector,
+    WeightedFairSelector,
+)
+
+
+def _two_consumer_graph(initial_tokens: list[int], low_priority=None, high_priority=None):
+    """``Input`` feeds both ``Low`` and ``High``, which write to ``Output``."""
+    return ExecutableGraphOperations.construct_graph([
+        ListPlaceNode("Input", int, list(initial_tokens)),
+        ArgumentEdgeToTransition("Input", "Low", "x"),
+        FunctionTransitionNode("Low", lambda x: x + 1, activation_function=low_priority),
+        ReturnedEdgeFromTransition("Low", "Output"),
+        ArgumentEdgeToTransition("Input", "High", "x"),
+        FunctionTransitionNode("High", lambda x: x - 1, activation_function=high_priority),
+        ReturnedEdgeFromTransition("High", "Output"),
+        ListPlaceNode("Output", int),
+    ])
+
+
+def _sources_graph(names: list[str]):
+    """Independent source transitions (no inputs), each writing its own name to ``Log``."""
+    nodes = [ListPlaceNode("Log", str)]
+    for name in names:
+        nodes.append(FunctionTransitionNode(name, lambda name=name: name))
+        nodes.append(ReturnedEdgeFromTransition(name, "Log"))
+    return ExecutableGraphOperations.construct_graph(nodes)
+
+
+def _spin_and_wait_graph(waiting: int):
+    """``Spin`` keeps cycling its token through ``Loop`` while ``waiting`` other transitions hold one token each."""
+    nodes = [
+        ListPlaceNode("Loop", int, [0]),
+        ArgumentEdgeToTransition("Loop", "Spin", "x"),
+        FunctionTransitionNode("Spin", lambda x: x + 1),
+        ReturnedEdgeFromTransition("Spin", "Loop"),
+    ]
+    for i in range(waiting):
+        nodes += [
+            ListPlaceNode(f"Parked{i}", int, [i]),
+            ArgumentEdgeToTransition(f"Parked{i}", f"Wait{i}", "x"),
+            FunctionTransitionNode(f"Wait{i}", lambda x: x),
+            ReturnedEdgeFromTransition(f"Wait{i}", f"Parked{i}"),
+        ]
+    return ExecutableGraphOperations.construct_graph(nodes)
+
+
+def _fire(graph, selector, max_transitions):
+    return asyncio.run(ExecutableGraphOperations.execute_graph(
+        graph, max_transitions=max_transitions, transition_selector=selector,
+    ))
+
+
+class TestActivationFunctionCall:
+
+    def test_zero_argument_function_is_called_without_graph(self):
+        transition = FunctionTransitionNode("T", lambda x: x, activation_function=lambda: 3.0)
+        assert ActivationFunctionCall.result(transition, graph=None) == 3.0
+
+    def test_graph_argument_is_passed_when_accepted(self):
+        transition = FunctionTransitionNode("T", lambda x: x, activation_function=lambda graph: graph)
+        assert ActivationFunctionCall.result(transition, graph="the graph") == "the graph"
+
+    def test_unhashable_callables_are_inspected_every_time(self):
+        class Threshold(BaseModel):
+            minimum: int
+
+            def __call__(self, graph) -> bool:
+                return graph >= self.minimum
+
+        assert ActivationFunctionCall.takes_graph(Threshold(minimum=2))
+        transition = FunctionTransitionNode("T", lambda x: x, activation_function=Threshold(minimum=2))
+        assert ActivationFunctionCall.result(transition, graph=3)
+
+    def test_bound_methods_are_remembered_by_their_function(self):
+        class Limits:
+            def ready(self):
+                return True
+
+        limits = Limits()
+        assert not ActivationFunctionCall.takes_graph(limits.ready)
+        assert transition_selectors._method_takes_graph_cache[Limits.ready] is False
+
+    def test_functions_are_not_kept_alive(self):
+        def priority(graph):
+            return 1.0
+
+        assert ActivationFunctionCall.takes_graph(priority)
+        reference = weakref.ref(priority)
+        del priority
+        gc.collect()
+        assert reference() is None
+
+
+class TestPriorityQueueSelector:
+
+    def test_dynamic_priority_from_activation_function(self):
+        graph = _two_consumer_graph([5], low_priority=lambda: 1.0, high_priority=lambda: 10.0)
+        graph, fired = asyncio.run(ExecutableGraphOperations.execute_graph(
+            graph, max_transitions=1, transition_selector=PriorityQueueSelector(),
+        ))
+        assert fired == 1
+        assert graph.last_fired == "High"
+
+    def test_static_priorities_override_activation_function(self):
+        graph = _two_consumer_graph([5], low_priority=lambda: 1.0, high_priority=lambda: 10.0)
+        selector = PriorityQueueSelector(priorities={"Low": 100.0})
+        graph, _ = asyncio.run(ExecutableGraphOperations.execute_graph(
+            graph, max_transitions=1, transition_selector=selector,
+        ))
+        assert graph.last_fired == "Low"
+
+    def test_ties_follow_declaration_order(self):
+        """Without priorities the selector fires the same transition as the default selector."""
+        graph = _two_consumer_graph([5])
+        graph, _ = asyncio.run(ExecutableGraphOperations.execute_graph(
+            graph, max_transitions=1, transition_selector=PriorityQueueSelector(),
+        ))
+        assert graph.last_fired == "Low"
+
+    def test_runs_until_no_transition_is_enabled(self):
+        graph = _two_consumer_graph([1, 2, 3], high_priority=lambda: 1.0)
+        graph, fired = asyncio.run(ExecutableGraphOperations.execute_graph(
+            graph, max_transitions=10, transition_selector=PriorityQueueSelector(),
+        ))
+        assert fired == 3
+        assert graph.fired_counts == {"High": 3}
+        assert graph.place_named("Output").tokens == [2, 1, 0]
+
+    def test_priorities_are_recomputed_only_for_affected_transitions(self):
+        """``Unrelated`` consumes from a place that never changes, so its priority is evaluated once."""
+        calls = {"Unrelated": 0}
+
+        def unrelated_priority():
+            calls["Unrelated"] += 1
+            return -1.0
+
+        graph = ExecutableGraphOperations.construct_graph([
+            ListPlaceNode("Input", int, [1, 2, 3, 4]),
+            ArgumentEdgeToTransition("Input", "Inc", "x"),
+            FunctionTransitionNode("Inc", lambda x: x + 1),
+            ReturnedEdgeFromTransition("Inc", "Output"),
+            ListPlaceNode("Output", int),
+            ListPlaceNode("Other", str, ["a"]),
+            ArgumentEdgeToTransition("Other", "Unrelated", "s"),
+            FunctionTransitionNode("Unrelated", lambda s: s, activation_function=unrelated_priority),
+            ReturnedEdgeFromTransition("Unrelated", "Other"),
+        ])
+        graph, fired = asyncio.run(ExecutableGraphOperations.execute_graph(
+            graph, max_transitions=4, transition_selector=PriorityQueueSelector(),
+        ))
+        assert fired == 4
+        assert graph.fired_counts == {"Inc": 4}
+        assert calls["Unrelated"] == 1
+
+    def test_tokens_injected_between_calls_are_seen(self):
+        graph = _two_consumer_graph([1])
+        selector = PriorityQueueSelector()
+        graph, fired = asyncio.run(ExecutableGraphOperations.execute_graph(
+            graph, max_transitions=5, transition_selector=selector,
+        ))
+        assert fired == 1
+        graph.place_named("Input").tokens.append(7)
+        graph, fired = asyncio.run(ExecutableGraphOperations.execute_graph(
+            graph, max_transitions=5, transition_selector=selector,
+        ))
+        assert fired == 1
+        assert graph.step_count == 2
+
+    def test_heap_does_not_grow_with_the_number_of_steps(self):
+        """``Idle`` is re-pushed on every fire of ``Spin`` but never reaches the top of the heap."""
+        graph = ExecutableGraphOperations.construct_graph([
+            ListPlaceNode("Loop", int, [0]),
+            ArgumentEdgeToTransition("Loop", "Spin", "x"),
+            FunctionTransitionNode("Spin", lambda x: x + 1),
+            ReturnedEdgeFromTransition("Spin", "Loop"),
+            ArgumentEdgeToTransition("Loop", "Idle", "x"),
+            FunctionTransitionNode("Idle", lambda x: x),
+            ReturnedEdgeFromTransition("Idle", "Loop"),
+        ])
+        selector = PriorityQueueSelector(priorities={"Spin": 10.0})
+        _, fired = asyncio.run(ExecutableGraphOperations.execute_graph(
+            graph, max_transitions=1000, transition_selector=selector,
+        ))
+        assert graph.fired_counts == {"Spin": 1000}
+        assert len(selector._heap) <= 4
+
+    def test_sees_tokens_added_while_the_net_runs(self):
+        """Tokens added by a concurrent producer are picked up without waiting for the next ``execute_graph`` call."""
+        async def spin(x: int) -> int:
+            await asyncio.sleep(0)
+            return x
+
+        graph = ExecutableGraphOperations.construct_graph([
+            ListPlaceNode("Loop", int, [0]),
+            ArgumentEdgeToTransition("Loop", "Spin", "x"),
+            FunctionTransitionNode("Spin", spin),
+            ReturnedEdgeFromTransition("Spin", "Loop"),
+            ListPlaceNode("Inbox", int),
+            ArgumentEdgeToTransition("Inbox", "Handle", "x"),
+            FunctionTransitionNode("Handle", lambda x: x),
+            ReturnedEdgeFromTransition("Handle", "Handled"),
+            ListPlaceNode("Handled", int),
+        ])
+
+        async def main():
+            run = asyncio.create_task(ExecutableGraphOperations.execute_graph(
+                graph, max_transitions=500, transition_selector=PriorityQueueSelector(priorities={"Handle": 10.0}),
+            ))
+            await asyncio.sleep(0)
+            await ExecutableGraphOperations.add_token_when_room_available(graph, "Inbox", 1)
+            await run
+
+        asyncio.run(main())
+        assert graph.fired_counts["Handle"] == 1
+        assert graph.place_named("Handled").tokens == [1]
+
+    def test_single_step_calls_do_not_rebuild(self):
+        """With one fire per ``execute_graph`` call, each step updates only ``Spin``, however many transitions wait."""
+        updates_per_size = []
+        for waiting in (10, 300):
+            graph = _spin_and_wait_graph(waiting)
+            selector = PriorityQueueSelector(priorities={"Spin": 10.0})
+            _fire(graph, selector, 1)
+            updates = []
+            update = selector._update
+            selector._update = lambda graph, transition: (updates.append(transition.name), update(graph, transition))
+            for _ in range(20):
+                _fire(graph, selector, 1)
+            assert graph.fired_counts == {"Spin": 21}
+            updates_per_size.append(len(updates))
+        assert updates_per_size == [20, 20]
+
+    def test_rebuilds_for_a_different_graph(self):
+        selector = PriorityQueueSelector(priorities={"Spin": 10.0})
+        graph = _spin_and_wait_graph(2)
+        _fire(graph, selector, 1)
+        branch = ExecutableGraphOperations.fork(graph)
+        branch.place_named("Loop").tokens.clear()
+        _fire(branch, selector, 1)
+        assert branch.fired_counts == {"Spin": 1, "Wait0": 1}
+        _fire(graph, selector, 1)
+        assert graph.fired_counts == {"Spin": 2}
+
+    def test_last_changed_places_recorded_by_engine(self):
+        graph = _two_consumer_graph([1])
+        graph, _ = asyncio.run(ExecutableGraphOperations.execute_graph(graph, max_transitions=1))
+        assert graph.last_changed_places == ("Input", "Output")
+
+
+class TestRoundRobinSelector:
+
+    def test_cycles_through_enabled_transitions(self):
+        graph, _ = _fire(_sources_graph(["A", "B", "C"]), RoundRobinSelector(), 7)
+        assert graph.place_named("Log").tokens == ["A", "B", "C", "A", "B", "C", "A"]
+
+    def test_cursor_persists_across_calls(self):
+        graph = _sources_graph(["A", "B", "C"])
+        selector = RoundRobinSelector()
+        for _ in range(4):
+            graph, _ = _fire(graph, selector, 1)
+        assert graph.place_named("Log").tokens == ["A", "B", "C", "A"]
+
+    def test_skips_disabled_transitions(self):
+        graph = _two_consumer_graph([1, 2, 3, 4])
+        graph, fired = _fire(graph, RoundRobinSelector(), 10)
+        assert fired == 4
+        assert graph.fired_counts == {"Low": 2, "High": 2}
+
+
+class TestWeightedFairSelector:
+
+    def test_fires_in_proportion_to_weights(self):
+        selector = WeightedFairSelector(weights={"A": 3.0, "B": 1.0})
+        graph, _ = _fire(_sources_graph(["A", "B"]), selector, 40)
+        assert graph.fired_counts == {"A": 30, "B": 10}
+
+    def test_rejects_non_positive_weights(self):
+        with pytest.raises(ValueError, match="must be positive"):
+            WeightedFairSelector(weights={"A": 0.0})
+
+
+class TestEarliestDeadlineSelector:
+
+    def test_fires_earliest_deadline_first(self):
+        selector = EarliestDeadlineSelector(deadlines={"A": 30.0, "B": 10.0, "C": 20.0})
+        graph, _ = _fire(_sources_graph(["A", "B", "C"]), selector, 1)
+        assert graph.last_fired == "B"
+
+    def test_transitions_without_deadline_fire_last(self):
+        graph = _two_consumer_graph([1], high_priority=lambda: 5.0)
+        graph, _ = _fire(graph, EarliestDeadlineSelector(), 1)
+        assert graph.last_fired == "High"
+
+
+class TestBottleneckAwareSelector:
+
+    def test_drains_the_fullest_place(self):
+        graph = ExecutableGraphOperations.construct_graph([
+            ListPlaceNode("Small", int, [1]),
+            ListPlaceNode("Large", int, [1, 2, 3]),
+            ArgumentEdgeToTransition("Small", "DrainSmall", "x"),
+            FunctionTransitionNode("DrainSmall", lambda x: x),
+            ReturnedEdgeFromTransition("DrainSmall", "Out"),
+            ArgumentEdgeToTransition("Large", "DrainLarge", "x"),
+            FunctionTransitionNode("DrainLarge", lambda x: x),
+            ReturnedEdgeFromTransition("DrainLarge", "Out"),
+            ListPlaceNode("Out", int),
+        ])
+        graph, fired = _fire(graph, BottleneckAwareSelector(), 3)
+        assert fired == 3
+        # Large drains to the size of Small, then the tie goes to the first declared transition.
+        assert graph.fired_counts == {"DrainLarge": 2, "DrainSmall": 1}
+
+
+class TestRandomSelector:
+
+    def test_same_seed_gives_same_sequence(self):
+        first, _ = _fire(_sources_graph(["A", "B", "C"]), RandomSelector(seed=7), 20)
+        second, _ = _fire(_sources_graph(["A", "B", "C"]), RandomSelector(seed=7), 20)
+        assert first.place_named("Log").tokens == second.place_named("Log").tokens
+        assert set(first.place_named("Log").tokens) == {"A", "B", "C"}
+
+    def test_returns_none_when_nothing_is_enabled(self):
+        graph, fired = _fire(_two_consumer_graph([]), RandomSelector(seed=0), 5)
+        assert fired == 0